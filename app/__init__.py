@@ -43,6 +43,7 @@ from app.bootstrap.security_headers import install_security_headers
 from app.bootstrap.session_guard import install_session_guard
 from app.bootstrap.socketio_factory import create_socketio
 from app.extensions import compress, csrf, limiter
+from app.upload_ingest import StreamingUploadRequest
 
 try:
     from cachelib.file import FileSystemCache
@@ -124,6 +125,7 @@ def create_app():
         static_url_path="/static",
         template_folder=template_folder,
     )
+    app.request_class = StreamingUploadRequest
 
     app.config["SECRET_KEY"] = _load_or_create_secret(os.path.join(BASE_DIR, ".secret_key"), 32)
     app.config["PASSWORD_SALT"] = _load_or_create_secret(os.path.join(BASE_DIR, ".security_salt"), 16)
@@ -158,6 +160,8 @@ def create_app():
         pass
     limiter.init_app(app)
     csrf.init_app(app)
+    # 첨부 다운로드는 Range/ETag가 저장된 바이트 기준이어야 하므로 압축하지 않는다.
+    app.config.setdefault("COMPRESS_EXCLUDED_ENDPOINTS", ("uploaded_file",))
     compress.init_app(app)
     register_socket_events(socketio)
     init_db()
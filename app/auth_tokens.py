@@ -12,6 +12,7 @@ from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from app.models.base import get_db
+from app.models.retention import delete_in_batches
 
 
 def _now_utc() -> datetime:
@@ -236,14 +237,14 @@ def cleanup_stale_device_sessions(
     - very old inactive sessions (last_used_at older than max_inactive_days)
     """
     conn = get_db()
-    cursor = conn.cursor()
     now = _now_utc()
     revoked_cutoff = now - timedelta(days=max(1, int(revoked_grace_days)))
     inactive_cutoff = now - timedelta(days=max(1, int(max_inactive_days)))
-    cursor.execute(
+    return delete_in_batches(
+        conn,
+        'device_sessions',
         '''
-        DELETE FROM device_sessions
-        WHERE (revoked_at IS NOT NULL AND revoked_at < ?)
+        (revoked_at IS NOT NULL AND revoked_at < ?)
            OR (expires_at <= ?)
            OR (last_used_at < ?)
         ''',
@@ -253,6 +254,3 @@ def cleanup_stale_device_sessions(
             _fmt_ts(inactive_cutoff),
         ),
     )
-    removed = int(cursor.rowcount or 0)
-    conn.commit()
-    return removed
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+프로필 이미지 정규화 / 크기별 아바타
+
+- 업로드 요청 안에서 바로 처리한다 (작은 이미지 1장, 사용자 응답에 새 경로가 필요).
+- EXIF 방향을 반영한 뒤 가운데를 정사각형으로 잘라 PROFILE_IMAGE_SIZES 크기로 재인코딩한다.
+  저장 시 EXIF/메타데이터는 쓰지 않는다. 애니메이션 GIF는 첫 프레임만 사용한다.
+- 가장 큰 크기가 대표 이미지(``profiles/<이름>.<webp|jpg>``, users.profile_image)이고,
+  나머지 크기는 첨부 축소본과 같은 파생 경로 ``.thumbs/profiles/<대표 이름>.<크기>.<ext>``에 둔다.
+  대표 이미지가 safe_file_delete로 지워지면 파생 파일도 함께 지워진다.
+- PROFILE_IMAGE_KEEP_ORIGINAL이면 업로드 원본을 ``.thumbs/profiles/<대표 이름>.original.<ext>``에
+  보관한다 (/uploads로는 제공하지 않음).
+- Pillow가 없거나 PROFILE_IMAGE_NORMALIZE가 꺼져 있으면 업로드 원본을 그대로 대표 이미지로 쓴다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+
+from app.thumbnails import THUMBNAIL_DIR, Image, ImageOps, _FORMAT_EXTS, _save_image, output_format, thumbnail_relpath
+
+try:
+    from config import PROFILE_IMAGE_KEEP_ORIGINAL, PROFILE_IMAGE_NORMALIZE, PROFILE_IMAGE_SIZES
+except ImportError:
+    PROFILE_IMAGE_NORMALIZE = True
+    PROFILE_IMAGE_SIZES = (48, 96, 256)
+    PROFILE_IMAGE_KEEP_ORIGINAL = False
+
+logger = logging.getLogger(__name__)
+
+ORIGINAL_VARIANT = 'original'
+
+
+def avatar_sizes() -> tuple[int, ...]:
+    """설정된 아바타 크기 (오름차순, 중복 제거)"""
+    return tuple(sorted({int(size) for size in PROFILE_IMAGE_SIZES if int(size) > 0})) or (256,)
+
+
+def is_available() -> bool:
+    return bool(PROFILE_IMAGE_NORMALIZE) and Image is not None
+
+
+def normalize_profile_image(upload_root: str, rel_path: str) -> str:
+    """
+    업로드된 프로필 이미지(rel_path)를 정규화하고 대표 이미지 상대 경로 반환.
+
+    정규화를 하지 않으면 rel_path 그대로 반환. 디코딩할 수 없는 이미지는 ValueError.
+    업로드 원본은 보관 설정이 아니면 삭제한다.
+    """
+    if not is_available():
+        return rel_path
+    sizes = avatar_sizes()
+    fmt = output_format()
+    source_path = os.path.join(upload_root, rel_path)
+    canonical_rel = f'{os.path.splitext(rel_path)[0]}.{_FORMAT_EXTS[fmt]}'
+    try:
+        with Image.open(source_path) as opened:
+            opened.draft('RGB', (sizes[-1], sizes[-1]))
+            if getattr(opened, 'is_animated', False):
+                opened.seek(0)
+            image = ImageOps.exif_transpose(opened)
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            # 팔레트 이미지는 최근접 보간만 되므로 먼저 풀컬러로 바꾼다.
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+    except Exception as e:
+        raise ValueError(f'invalid profile image: {e}') from e
+
+    created: list[str] = []
+    try:
+        if PROFILE_IMAGE_KEEP_ORIGINAL:
+            original_ext = os.path.splitext(rel_path)[1].lstrip('.').lower() or 'bin'
+            original_rel = f'{THUMBNAIL_DIR}/{canonical_rel}.{ORIGINAL_VARIANT}.{original_ext}'
+            original_path = os.path.join(upload_root, original_rel)
+            os.makedirs(os.path.dirname(original_path), exist_ok=True)
+            os.replace(source_path, original_path)
+            created.append(original_path)
+
+        # 큰 크기부터 만들어 작은 크기는 이전 결과에서 축소한다.
+        current = image
+        for size in reversed(sizes):
+            current = ImageOps.fit(current, (size, size), Image.Resampling.LANCZOS)
+            if size == sizes[-1]:
+                target_path = os.path.join(upload_root, canonical_rel)
+            else:
+                target_path = os.path.join(upload_root, thumbnail_relpath(canonical_rel, str(size), fmt))
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            _save_image(current, target_path, fmt)
+            created.append(target_path)
+    except Exception:
+        for path in created:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+
+    if not PROFILE_IMAGE_KEEP_ORIGINAL and os.path.normpath(canonical_rel) != os.path.normpath(rel_path):
+        try:
+            os.remove(source_path)
+        except OSError as e:
+            logger.warning(f"Profile upload cleanup failed: {rel_path}: {e}")
+    return canonical_rel
+
+
+def pick_avatar_size(requested: int) -> int:
+    """요청 크기 이상인 가장 작은 아바타 크기 (없으면 가장 큰 크기)"""
+    sizes = avatar_sizes()
+    return next((size for size in sizes if size >= int(requested)), sizes[-1])
+
+
+def find_avatar(upload_root: str, rel_path: str, requested: int) -> str | None:
+    """
+    ?size= 요청에 맞는 크기별 이미지의 절대 경로. 대표 이미지를 줘야 하면 None.
+    """
+    size = pick_avatar_size(requested)
+    if size >= avatar_sizes()[-1]:
+        return None
+    ext = os.path.splitext(rel_path)[1].lstrip('.').lower()
+    fmt = next((name for name, value in _FORMAT_EXTS.items() if value == ext), None)
+    if fmt is None:
+        return None  # 정규화되지 않은 (이전/Pillow 미설치) 프로필
+    avatar_path = os.path.join(upload_root, thumbnail_relpath(rel_path, str(size), fmt))
+    return avatar_path if os.path.isfile(avatar_path) else None
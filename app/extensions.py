@@ -29,7 +29,22 @@ try:
 except Exception:
     compress: _CompressExtension = _FallbackCompress()
 else:
-    compress = _RuntimeCompress()
+    class _SelectiveCompress(_RuntimeCompress):
+        """
+        Skips endpoints listed in COMPRESS_EXCLUDED_ENDPOINTS.
+        File downloads rely on byte ranges and strong ETags, which must describe
+        the stored bytes rather than a compressed re-encoding.
+        """
+
+        def after_request(self, response):
+            from flask import current_app, request
+
+            excluded = current_app.config.get("COMPRESS_EXCLUDED_ENDPOINTS") or ()
+            if response is not None and request.endpoint in excluded:
+                return response
+            return super().after_request(response)
+
+    compress = _SelectiveCompress()
 
 
 def _rate_limit_key():
@@ -11,7 +11,9 @@ from flask import jsonify, request, session
 from app.extensions import limiter
 from app.http.common import emit_socket_event, json_dict, normalize_date_bounds, parse_optional_positive_int
 from app.models import (
+    InvalidCursorError,
     advanced_search as model_advanced_search,
+    decode_cursor,
     delete_message,
     edit_message,
     get_message_reactions,
@@ -40,6 +42,18 @@ def _advanced_search_impl():
         return model_advanced_search
 
 
+def _json_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in ("1", "true", "yes", "on"):
+            return True
+        if normalized in ("0", "false", "no", "off", ""):
+            return False
+    raise ValueError("not a boolean")
+
+
 def register_message_routes(app) -> None:
     @app.route("/api/rooms/<int:room_id>/messages")
     def get_messages(room_id):
@@ -135,6 +149,10 @@ def register_message_routes(app) -> None:
         room_id = request.args.get("room_id", type=int)
         offset = max(request.args.get("offset", type=int) or 0, 0)
         limit = min(max(request.args.get("limit", type=int) or 50, 1), 200)
+        try:
+            page_cursor = decode_cursor(request.args.get("cursor"))
+        except InvalidCursorError:
+            return jsonify({"error": "잘못된 cursor입니다."}), 400
 
         if (not query or not query.strip()) and not raw_date_from and not raw_date_to and not file_only:
             return jsonify([])
@@ -147,17 +165,27 @@ def register_message_routes(app) -> None:
         except ValueError as exc:
             return jsonify({"error": str(exc)}), 400
 
-        results = _advanced_search_impl()(
-            user_id=session["user_id"],
-            query=(normalized_query or None),
-            room_id=room_id,
-            date_from=(date_from or None),
-            date_to=(date_to or None),
-            file_only=file_only,
-            limit=limit,
-            offset=offset,
-        )
-        return jsonify(results.get("messages", []))
+        try:
+            results = _advanced_search_impl()(
+                user_id=session["user_id"],
+                query=(normalized_query or None),
+                room_id=room_id,
+                date_from=(date_from or None),
+                date_to=(date_to or None),
+                file_only=file_only,
+                limit=limit,
+                offset=offset,
+                page_cursor=page_cursor,
+                # 목록만 응답하므로 건수는 세지 않는다.
+                include_total=False,
+            )
+        except InvalidCursorError:
+            return jsonify({"error": "잘못된 cursor입니다."}), 400
+        response = jsonify(results.get("messages", []))
+        next_cursor = results.get("next_cursor")
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
 
     @app.route("/api/rooms/<int:room_id>/pins")
     def get_room_pins(room_id):
@@ -278,20 +306,24 @@ def register_message_routes(app) -> None:
         except ValueError as exc:
             return jsonify({"error": str(exc)}), 400
 
-        raw_file_only = data.get("file_only", False)
-        if isinstance(raw_file_only, bool):
-            file_only = raw_file_only
-        elif isinstance(raw_file_only, str):
-            normalized_bool = raw_file_only.strip().lower()
-            if normalized_bool in ("1", "true", "yes", "on"):
-                file_only = True
-            elif normalized_bool in ("0", "false", "no", "off", ""):
-                file_only = False
-            else:
-                return jsonify({"error": "file_only는 boolean 값이어야 합니다."}), 400
-        else:
+        try:
+            file_only = _json_bool(data.get("file_only", False))
+        except ValueError:
             return jsonify({"error": "file_only는 boolean 값이어야 합니다."}), 400
 
+        raw_cursor = data.get("cursor")
+        if raw_cursor is not None and not isinstance(raw_cursor, str):
+            return jsonify({"error": "잘못된 cursor입니다."}), 400
+        try:
+            page_cursor = decode_cursor(raw_cursor)
+        except InvalidCursorError:
+            return jsonify({"error": "잘못된 cursor입니다."}), 400
+        try:
+            # 다음 페이지(cursor)는 기본으로 건수를 다시 세지 않는다.
+            include_total = _json_bool(data.get("include_total", page_cursor is None))
+        except ValueError:
+            return jsonify({"error": "include_total은 boolean 값이어야 합니다."}), 400
+
         raw_limit = data.get("limit", 50)
         raw_offset = data.get("offset", 0)
         try:
@@ -302,15 +334,22 @@ def register_message_routes(app) -> None:
         limit = min(max(limit, 1), 200)
         offset = max(offset, 0)
 
-        results = _advanced_search_impl()(
-            user_id=session["user_id"],
-            query=normalized_query,
-            room_id=room_id,
-            sender_id=sender_id,
-            date_from=date_from,
-            date_to=date_to,
-            file_only=file_only,
-            limit=limit,
-            offset=offset,
-        )
+        try:
+            results = _advanced_search_impl()(
+                user_id=session["user_id"],
+                query=normalized_query,
+                room_id=room_id,
+                sender_id=sender_id,
+                date_from=date_from,
+                date_to=date_to,
+                file_only=file_only,
+                limit=limit,
+                offset=offset,
+                page_cursor=page_cursor,
+                include_total=include_total,
+                # 검색 계획(색인 통계)은 디버그 모드에서만 조회/노출한다.
+                explain=app.debug,
+            )
+        except InvalidCursorError:
+            return jsonify({"error": "잘못된 cursor입니다."}), 400
         return jsonify(results)
@@ -9,8 +9,23 @@ from flask import jsonify, request, session
 
 from app.extensions import limiter
 from app.http.common import is_platform_admin, json_dict, parse_version
-from app.models import get_db, get_maintenance_status, get_user_by_id, log_access
+from app.models import (
+    get_db,
+    get_db_pool_stats,
+    get_maintenance_status,
+    get_membership_cache_stats,
+    get_message_write_queue_stats,
+    get_readiness,
+    get_stored_file_stats,
+    get_dedup_stats,
+    get_upload_acl_cache_stats,
+    get_search_cache_stats,
+    get_user_by_id,
+    log_access,
+)
 from app.models import review_user_approval
+from app.realtime.metrics import get_send_path_stats
+from app.thumbnails import get_thumbnail_stats
 
 from config import (
     DESKTOP_CLIENT_ARTIFACT_SHA256,
@@ -183,12 +198,13 @@ def register_system_routes(app) -> None:
         payload = {
             "status": "ok" if db_ok else "degraded",
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "readiness": get_readiness(),
             "tls": {
                 "configured": bool(app.config.get("SESSION_COOKIE_SECURE", False)),
                 "effective": bool(tls_effective),
                 "enforce_https": bool(app.config.get("ENFORCE_HTTPS", False)),
             },
-            "db": {"ok": bool(db_ok)},
+            "db": {"ok": bool(db_ok), "pool": get_db_pool_stats()},
             "session_guard": {
                 "fail_open_enabled": bool(app.config.get("SESSION_TOKEN_FAIL_OPEN", True)),
                 "fail_open_count": int(guard_stats.get("fail_open_count") or 0),
@@ -197,6 +213,14 @@ def register_system_routes(app) -> None:
                 "last_fail_closed_at": guard_stats.get("last_fail_closed_at"),
             },
             "maintenance": get_maintenance_status(),
+            "message_write_queue": get_message_write_queue_stats(),
+            "membership_cache": get_membership_cache_stats(),
+            "stored_files": get_stored_file_stats(),
+            "upload_dedup": get_dedup_stats(),
+            "upload_acl_cache": get_upload_acl_cache_stats(),
+            "search_cache": get_search_cache_stats(),
+            "thumbnails": get_thumbnail_stats(),
+            "send_message_latency": get_send_path_stats(),
             "rate_limit": {
                 "storage_uri": str(app.config.get("RATE_LIMIT_STORAGE_URI", "memory://")),
                 "key_mode": str(app.config.get("RATE_LIMIT_KEY_MODE", "ip")),
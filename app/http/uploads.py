@@ -3,20 +3,125 @@
 from __future__ import annotations
 
 import os
+import re
 import uuid
 from datetime import datetime
+from urllib.parse import quote
 
 from flask import jsonify, request, send_from_directory, session
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import FileWrapper
 
+from app.avatars import find_avatar
 from app.http.common import json_dict
-from app.models import delete_room_file, get_db, get_room_files, is_room_admin, is_room_member, safe_file_delete
-from app.security.upload_scanner import scan_saved_file, scan_upload_stream
+from app.models import (
+    InvalidCursorError,
+    adopt_upload_blob,
+    decode_cursor,
+    delete_room_file,
+    find_upload_reference,
+    get_room_files,
+    get_room_files_page,
+    is_room_admin,
+    is_room_member,
+    register_stored_file,
+    release_upload_file,
+    safe_file_delete,
+)
+from app.security.upload_scanner import scan_saved_file
+from app.thumbnails import THUMBNAIL_SIZES, find_thumbnail, schedule_thumbnails
+from app.upload_ingest import MAX_UPLOAD_BYTES, TOO_LARGE_ERROR, inspect_file, open_upload
+from app.upload_sessions import (
+    UploadSessionError,
+    create_upload_session,
+    delete_upload_session,
+    get_upload_session,
+    missing_chunks,
+    public_session_view,
+    session_temp_path,
+    write_upload_chunk,
+)
+from app.upload_storage import PROFILE_DIR, candidate_relpaths, ensure_parent_dir, is_shard_dir, new_upload_relpath
 from app.upload_tokens import issue_upload_token
-from app.utils import allowed_file, validate_file_header
+from app.utils import allowed_file
 
 from config import UPLOAD_FOLDER
 
+try:
+    from config import UPLOAD_DEDUP_ENABLED
+except ImportError:
+    UPLOAD_DEDUP_ENABLED = False
+
+try:
+    from config import UPLOAD_ACCEL_REDIRECT_PREFIX, UPLOAD_CACHE_MAX_AGE_SECONDS, UPLOAD_SEND_BUFFER_BYTES
+except ImportError:
+    UPLOAD_CACHE_MAX_AGE_SECONDS = 3600
+    UPLOAD_SEND_BUFFER_BYTES = 256 * 1024
+    UPLOAD_ACCEL_REDIRECT_PREFIX = ""
+
+try:
+    from config import THUMBNAIL_CACHE_MAX_AGE_SECONDS
+except ImportError:
+    THUMBNAIL_CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+try:
+    from config import PROFILE_IMAGE_CACHE_MAX_AGE_SECONDS
+except ImportError:
+    PROFILE_IMAGE_CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600
+
+INLINE_IMAGE_EXTS = frozenset({"png", "jpg", "jpeg", "gif", "webp", "bmp", "ico"})
+_CONTENT_HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def upload_etag(full_path: str, stat_result=None) -> str:
+    """강한 ETag: 내용 주소 저장 파일은 SHA-256, 그 외는 크기 + 수정 시각(ns)"""
+    stem = os.path.splitext(os.path.basename(full_path))[0]
+    if _CONTENT_HASH_RE.match(stem):
+        return f"sha256-{stem}"
+    stat_result = stat_result or os.stat(full_path)
+    return f"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"
+
+
+def _sized_file_wrapper(file, buffer_size: int = 8192):
+    """서버가 wsgi.file_wrapper(sendfile)를 제공하지 않을 때 쓰는 큰 블록 파일 래퍼"""
+    return FileWrapper(file, max(int(buffer_size), int(UPLOAD_SEND_BUFFER_BYTES or 0)))
+
+
+def _offload_to_proxy(response, upload_root: str, full_path: str):
+    """
+    본문 전송을 리버스 프록시(X-Accel-Redirect)에 넘긴다.
+    304/412 판정은 여기서 하고, Range와 sendfile은 프록시가 처리한다.
+    """
+    response = response.make_conditional(request)
+    response.close()
+    response.response = []
+    response.headers.pop("Content-Length", None)
+    if response.status_code == 200:
+        rel_path = os.path.relpath(full_path, upload_root).replace(os.sep, "/")
+        prefix = str(UPLOAD_ACCEL_REDIRECT_PREFIX).rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{quote(rel_path)}"
+    return response
+
+
+def _send_stored_file(upload_root: str, full_path: str, *, as_attachment: bool = False, download_name=None):
+    """업로드 폴더의 파일 전송 (강한 ETag + Range, 설정 시 프록시 오프로드)"""
+    offload = bool(UPLOAD_ACCEL_REDIRECT_PREFIX)
+    if not offload:
+        # 서버가 sendfile 기반 wsgi.file_wrapper를 주면 그대로 쓰고, 없으면 큰 블록으로 읽는다.
+        request.environ.setdefault("wsgi.file_wrapper", _sized_file_wrapper)
+    response = send_from_directory(
+        os.path.dirname(full_path),
+        os.path.basename(full_path),
+        as_attachment=as_attachment,
+        download_name=download_name if as_attachment else None,
+        etag=upload_etag(full_path),
+        conditional=not offload,
+    )
+    if offload:
+        response = _offload_to_proxy(response, upload_root, full_path)
+    response.headers.pop("Expires", None)
+    return response
+
 
 def register_upload_routes(app) -> None:
     @app.route("/api/upload", methods=["POST"])
@@ -31,9 +136,8 @@ def register_upload_routes(app) -> None:
         if not is_room_member(room_id, session["user_id"]):
             return jsonify({"error": "대화방 접근 권한이 없습니다."}), 403
 
-        max_size = 16 * 1024 * 1024
-        if request.content_length and request.content_length > max_size:
-            return jsonify({"error": "파일 크기는 16MB 이하여야 합니다."}), 413
+        if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+            return jsonify({"error": TOO_LARGE_ERROR}), 413
         if "file" not in request.files:
             return jsonify({"error": "파일이 없습니다."}), 400
 
@@ -43,55 +147,209 @@ def register_upload_routes(app) -> None:
             return jsonify({"error": "파일이 선택되지 않았습니다."}), 400
 
         if file and allowed_file(raw_filename):
-            if not validate_file_header(file):
-                return jsonify({"error": "파일 내용이 확장자와 일치하지 않습니다."}), 400
+            # 본문은 수신 시점에 .incoming 임시 파일로 한 번만 기록되며,
+            # 크기 / SHA-256 / 헤더 검증 / 스캐너 훅이 같은 패스에서 처리된다.
+            with open_upload(file, upload_folder) as upload:
+                error = upload.finish()
+                if error is not None:
+                    return jsonify({"error": error[0]}), error[1]
 
-            ok, reason = scan_upload_stream(
-                file,
-                filename=str(file.filename or ""),
-                content_type=str(getattr(file, "content_type", "") or ""),
-            )
-            if not ok:
-                return jsonify({"error": reason or "업로드 스캔 정책에 의해 차단되었습니다."}), 400
-
-            filename = secure_filename(raw_filename)
-            unique_filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}_{filename}"
-            file_path = os.path.join(upload_folder, unique_filename)
-            file.save(file_path)
-            ok, reason = scan_saved_file(
-                file_path,
+                filename, stored_path = _new_stored_path(raw_filename)
+                upload.commit(ensure_parent_dir(upload_folder, stored_path))
+                file_size = upload.size
+                content_sha256 = upload.sha256
+
+            return _publish_upload(
+                upload_folder,
+                room_id=room_id,
                 filename=filename,
+                stored_path=stored_path,
+                file_size=file_size,
+                content_sha256=content_sha256,
                 content_type=str(getattr(file, "content_type", "") or ""),
             )
-            if not ok:
-                safe_file_delete(file_path)
-                return jsonify({"error": reason or "업로드 파일 보안 검증에 실패했습니다."}), 400
-
-            file_size = os.path.getsize(file_path)
-            ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
-            file_type = "image" if ext in {"png", "jpg", "jpeg", "gif", "webp", "bmp", "ico"} else "file"
-            upload_token = issue_upload_token(
+
+        return jsonify({"error": "허용되지 않는 파일 형식입니다."}), 400
+
+    def _publish_upload(
+        upload_folder: str,
+        *,
+        room_id: int,
+        filename: str,
+        stored_path: str,
+        file_size: int,
+        content_sha256: str,
+        content_type: str,
+    ):
+        """최종 경로에 배치된 업로드를 검사/등록하고 업로드 토큰 응답 생성 (단일/분할 업로드 공통)"""
+        file_path = os.path.join(upload_folder, stored_path)
+        ok, reason = scan_saved_file(file_path, filename=filename, content_type=content_type)
+        if not ok:
+            safe_file_delete(file_path)
+            return jsonify({"error": reason or "업로드 파일 보안 검증에 실패했습니다."}), 400
+
+        if UPLOAD_DEDUP_ENABLED:
+            # 같은 내용이 이미 저장돼 있으면 기존 blob을 공유한다.
+            stored_path = adopt_upload_blob(upload_folder, stored_path, content_sha256, file_size, filename)
+        register_stored_file(stored_path, file_size=file_size)
+        # 축소본은 백그라운드에서 만든다 (업로드 응답은 기다리지 않음).
+        schedule_thumbnails(upload_folder, stored_path)
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        file_type = "image" if ext in {"png", "jpg", "jpeg", "gif", "webp", "bmp", "ico"} else "file"
+        upload_token = issue_upload_token(
+            user_id=session["user_id"],
+            room_id=room_id,
+            file_path=stored_path,
+            file_name=filename,
+            file_type=file_type,
+            file_size=file_size,
+        )
+        if not upload_token:
+            release_upload_file(stored_path)
+            return jsonify({"error": "업로드 토큰 발급에 실패했습니다."}), 500
+        return jsonify(
+            {
+                "success": True,
+                "file_path": stored_path,
+                "file_name": filename,
+                "file_type": file_type,
+                "upload_token": upload_token,
+            }
+        )
+
+    def _new_stored_path(raw_filename: str) -> tuple[str, str]:
+        filename = secure_filename(raw_filename)
+        unique_filename = f"{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}_{filename}"
+        return filename, new_upload_relpath(unique_filename)
+
+    # ------------------------------------------------------------------
+    # 분할(재개 가능) 업로드: init → PUT chunks(offset) → finalize
+    # ------------------------------------------------------------------
+
+    def _owned_upload_session(session_id: str):
+        upload_session = get_upload_session(session_id, session["user_id"])
+        if upload_session is None:
+            return None, (jsonify({"error": "업로드 세션을 찾을 수 없습니다."}), 404)
+        return upload_session, None
+
+    @app.route("/api/uploads/sessions", methods=["POST"])
+    def create_upload_session_route():
+        if "user_id" not in session:
+            return jsonify({"error": "로그인이 필요합니다."}), 401
+        upload_folder = str(app.config.get("UPLOAD_FOLDER", UPLOAD_FOLDER) or UPLOAD_FOLDER)
+        data = json_dict()
+        try:
+            room_id = int(data.get("room_id") or 0)
+            file_size = int(data.get("file_size") or 0)
+        except (TypeError, ValueError):
+            return jsonify({"error": "잘못된 요청입니다."}), 400
+        raw_filename = str(data.get("file_name") or "")
+        if not room_id:
+            return jsonify({"error": "room_id가 필요합니다."}), 400
+        if not is_room_member(room_id, session["user_id"]):
+            return jsonify({"error": "대화방 접근 권한이 없습니다."}), 403
+        if not raw_filename or not allowed_file(raw_filename):
+            return jsonify({"error": "허용되지 않는 파일 형식입니다."}), 400
+        try:
+            upload_session = create_upload_session(
+                upload_folder,
                 user_id=session["user_id"],
                 room_id=room_id,
-                file_path=unique_filename,
-                file_name=filename,
-                file_type=file_type,
+                file_name=raw_filename,
                 file_size=file_size,
+                content_type=str(data.get("content_type") or ""),
             )
-            if not upload_token:
-                safe_file_delete(file_path)
-                return jsonify({"error": "업로드 토큰 발급에 실패했습니다."}), 500
-            return jsonify(
-                {
-                    "success": True,
-                    "file_path": unique_filename,
-                    "file_name": filename,
-                    "file_type": file_type,
-                    "upload_token": upload_token,
-                }
+        except UploadSessionError as e:
+            return jsonify({"error": str(e)}), e.status
+        return jsonify(public_session_view(upload_session)), 201
+
+    @app.route("/api/uploads/sessions/<session_id>", methods=["GET"])
+    def get_upload_session_route(session_id):
+        if "user_id" not in session:
+            return jsonify({"error": "로그인이 필요합니다."}), 401
+        upload_session, error = _owned_upload_session(session_id)
+        if error:
+            return error
+        return jsonify(public_session_view(upload_session))
+
+    @app.route("/api/uploads/sessions/<session_id>", methods=["DELETE"])
+    def abort_upload_session_route(session_id):
+        if "user_id" not in session:
+            return jsonify({"error": "로그인이 필요합니다."}), 401
+        upload_session, error = _owned_upload_session(session_id)
+        if error:
+            return error
+        upload_folder = str(app.config.get("UPLOAD_FOLDER", UPLOAD_FOLDER) or UPLOAD_FOLDER)
+        delete_upload_session(upload_folder, upload_session["id"])
+        return jsonify({"success": True})
+
+    @app.route("/api/uploads/sessions/<session_id>/chunks", methods=["PUT"])
+    def put_upload_chunk_route(session_id):
+        if "user_id" not in session:
+            return jsonify({"error": "로그인이 필요합니다."}), 401
+        upload_session, error = _owned_upload_session(session_id)
+        if error:
+            return error
+        offset = request.args.get("offset", type=int)
+        if offset is None:
+            return jsonify({"error": "offset이 필요합니다."}), 400
+        upload_folder = str(app.config.get("UPLOAD_FOLDER", UPLOAD_FOLDER) or UPLOAD_FOLDER)
+        try:
+            chunk = write_upload_chunk(
+                upload_folder, upload_session, offset, request.stream, request.content_length
             )
+        except UploadSessionError as e:
+            return jsonify({"error": str(e)}), e.status
+        return jsonify({"success": True, **chunk})
 
-        return jsonify({"error": "허용되지 않는 파일 형식입니다."}), 400
+    @app.route("/api/uploads/sessions/<session_id>/finalize", methods=["POST"])
+    def finalize_upload_session_route(session_id):
+        if "user_id" not in session:
+            return jsonify({"error": "로그인이 필요합니다."}), 401
+        upload_session, error = _owned_upload_session(session_id)
+        if error:
+            return error
+        upload_folder = str(app.config.get("UPLOAD_FOLDER", UPLOAD_FOLDER) or UPLOAD_FOLDER)
+        room_id = int(upload_session["room_id"])
+        if not is_room_member(room_id, session["user_id"]):
+            delete_upload_session(upload_folder, upload_session["id"])
+            return jsonify({"error": "대화방 접근 권한이 없습니다."}), 403
+        missing = missing_chunks(upload_session)
+        if missing:
+            return jsonify({"error": "아직 받지 못한 청크가 있습니다.", "missing_chunks": missing}), 409
+
+        temp_path = session_temp_path(upload_folder, upload_session["id"])
+        try:
+            result = inspect_file(
+                temp_path,
+                filename=upload_session["file_name"],
+                content_type=upload_session.get("content_type") or "",
+                max_size=None,
+            )
+        except OSError:
+            delete_upload_session(upload_folder, upload_session["id"])
+            return jsonify({"error": "업로드 세션 파일이 없습니다."}), 410
+        if result.error is not None or result.size != int(upload_session["file_size"]):
+            delete_upload_session(upload_folder, upload_session["id"])
+            message, status = result.error or ("파일 크기가 일치하지 않습니다.", 400)
+            return jsonify({"error": message}), status
+
+        filename, stored_path = _new_stored_path(upload_session["file_name"])
+        try:
+            os.replace(temp_path, ensure_parent_dir(upload_folder, stored_path))
+        except OSError:
+            # 같은 세션의 finalize가 동시에 처리된 경우
+            return jsonify({"error": "업로드 세션 파일이 없습니다."}), 410
+        delete_upload_session(upload_folder, upload_session["id"])
+        return _publish_upload(
+            upload_folder,
+            room_id=room_id,
+            filename=filename,
+            stored_path=stored_path,
+            file_size=result.size,
+            content_sha256=result.sha256,
+            content_type=upload_session.get("content_type") or "",
+        )
 
     @app.route("/uploads/<path:filename>")
     def uploaded_file(filename):
@@ -103,52 +361,82 @@ def register_upload_routes(app) -> None:
         is_profile = False
         if "/" in filename:
             subdir = os.path.dirname(filename)
-            if subdir not in ["profiles"]:
+            if subdir != PROFILE_DIR and not is_shard_dir(subdir):
                 return jsonify({"error": "접근 권한이 없습니다."}), 403
-            safe_path = os.path.join(subdir, safe_filename)
-            is_profile = subdir == "profiles"
+            safe_path = f"{subdir}/{safe_filename}"
+            is_profile = subdir == PROFILE_DIR
         else:
             safe_path = safe_filename
 
-        full_path = os.path.realpath(os.path.join(upload_folder, safe_path))
-        if not full_path.startswith(os.path.realpath(upload_folder)):
-            return jsonify({"error": "잘못된 요청입니다."}), 400
-        if not os.path.isfile(full_path):
+        # 평면(이전) 경로와 해시 분산 경로를 모두 확인한다.
+        upload_root = os.path.realpath(upload_folder)
+        full_path = None
+        for candidate in candidate_relpaths(safe_path):
+            resolved = os.path.realpath(os.path.join(upload_folder, candidate))
+            if not resolved.startswith(upload_root):
+                return jsonify({"error": "잘못된 요청입니다."}), 400
+            if os.path.isfile(resolved):
+                full_path = resolved
+                break
+        if full_path is None:
             return jsonify({"error": "파일을 찾을 수 없습니다."}), 404
 
+        variant = str(request.args.get("variant") or "").strip().lower()
+        if variant and variant not in THUMBNAIL_SIZES:
+            return jsonify({"error": "지원하지 않는 variant입니다."}), 400
+
+        size_arg = str(request.args.get("size") or "").strip()
+        if size_arg and (not size_arg.isdigit() or int(size_arg) <= 0):
+            return jsonify({"error": "잘못된 size입니다."}), 400
+
         download_name = safe_filename
-        if not is_profile:
-            try:
-                conn = get_db()
-                cursor = conn.cursor()
-                lookup_path = safe_path.replace("\\", "/")
-                cursor.execute(
-                    "SELECT room_id, file_name FROM room_files WHERE file_path = ? ORDER BY id DESC LIMIT 1",
-                    (lookup_path,),
-                )
-                row = cursor.fetchone()
-            except Exception:
-                row = None
-
-            if not row:
+        stored_path = os.path.relpath(full_path, upload_root).replace(os.sep, "/")
+        if is_profile:
+            # 프로필 경로는 업로드마다 새로 만들어지므로 (변경 시 경로가 바뀜) 오래 캐시한다.
+            profile_cache_control = (
+                f"private, max-age={max(0, int(PROFILE_IMAGE_CACHE_MAX_AGE_SECONDS or 0))}, immutable"
+            )
+            avatar_path = find_avatar(upload_root, stored_path, int(size_arg)) if size_arg else None
+            if avatar_path:
+                response = _send_stored_file(upload_root, avatar_path)
+                response.headers["Cache-Control"] = profile_cache_control
+                response.headers["Content-Disposition"] = "inline"
+                return response
+        else:
+            # 중복 제거된 파일은 여러 방에서 참조하므로 요청자가 속한 방의 기록을 찾는다.
+            reference, referenced = find_upload_reference(stored_path, session["user_id"])
+            if not referenced:
                 return jsonify({"error": "파일을 찾을 수 없습니다."}), 404
-            room_id = row["room_id"]
-            download_name = row["file_name"] or download_name
-            if not is_room_member(room_id, session["user_id"]):
+            if reference is None:
                 return jsonify({"error": "접근 권한이 없습니다."}), 403
+            download_name = reference[1] or download_name
+
+            if variant:
+                # 축소본은 원본 경로별로 불변이므로 오래 캐시한다. 아직 없으면 원본으로 대체.
+                thumb_path = find_thumbnail(upload_root, stored_path, variant)
+                if thumb_path:
+                    response = _send_stored_file(upload_root, thumb_path)
+                    response.headers["Cache-Control"] = (
+                        f"private, max-age={max(0, int(THUMBNAIL_CACHE_MAX_AGE_SECONDS or 0))}, immutable"
+                    )
+                    response.headers["Content-Disposition"] = "inline"
+                    return response
 
         ext = os.path.splitext(safe_filename)[1].lower().lstrip(".")
-        inline_exts = {"png", "jpg", "jpeg", "gif", "webp", "bmp", "ico"}
-        as_attachment = (not is_profile) and (ext not in inline_exts)
-        response = send_from_directory(
-            os.path.dirname(full_path),
-            os.path.basename(full_path),
-            as_attachment=as_attachment,
-            download_name=download_name if as_attachment else None,
+        as_attachment = (not is_profile) and (ext not in INLINE_IMAGE_EXTS)
+        # 강한 ETag + Range: 재요청은 304, 미리보기/이어받기는 필요한 구간만 보낸다.
+        response = _send_stored_file(
+            upload_root, full_path, as_attachment=as_attachment, download_name=download_name
         )
-        response.headers["Cache-Control"] = "private, max-age=3600" if is_profile else "private, no-store"
-        response.headers["Vary"] = "Accept-Encoding"
-        if not as_attachment and ext in inline_exts:
+        if is_profile:
+            response.headers["Cache-Control"] = profile_cache_control
+        elif variant:
+            # 축소본 생성 후 바로 바뀌도록 대체 응답은 매번 재검증한다.
+            response.headers["Cache-Control"] = "private, no-cache"
+        else:
+            # 본인만 볼 수 있는 첨부이므로 공유 캐시에는 남기지 않는다.
+            response.headers["Cache-Control"] = f"private, max-age={max(0, int(UPLOAD_CACHE_MAX_AGE_SECONDS or 0))}"
+        if not as_attachment and ext in INLINE_IMAGE_EXTS:
             response.headers["Content-Disposition"] = "inline"
         return response
 
@@ -159,7 +447,18 @@ def register_upload_routes(app) -> None:
         if not is_room_member(room_id, session["user_id"]):
             return jsonify({"error": "접근 권한이 없습니다."}), 403
         file_type = request.args.get("type")
-        return jsonify(get_room_files(room_id, file_type))
+        if "limit" not in request.args and "cursor" not in request.args:
+            return jsonify(get_room_files(room_id, file_type))
+        # limit/cursor를 주면 (uploaded_at, id) 키셋 페이지. 다음 커서는 X-Next-Cursor 헤더.
+        limit = min(max(request.args.get("limit", type=int) or 50, 1), 200)
+        try:
+            page = get_room_files_page(room_id, file_type, limit, decode_cursor(request.args.get("cursor")))
+        except InvalidCursorError:
+            return jsonify({"error": "잘못된 cursor입니다."}), 400
+        response = jsonify(page["files"])
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        return response
 
     @app.route("/api/rooms/<int:room_id>/files/<int:file_id>", methods=["DELETE"])
     def delete_file_route(room_id, file_id):
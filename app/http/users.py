@@ -8,8 +8,9 @@ from datetime import datetime
 
 from flask import jsonify, request, session
 
+from app.avatars import normalize_profile_image
 from app.http.common import emit_profile_updated_event, json_dict
-from app.models import change_password, delete_user, get_user_by_id, safe_file_delete, update_user_profile as model_update_user_profile
+from app.models import change_password, delete_user, get_user_by_id, register_stored_file, safe_file_delete, update_user_profile as model_update_user_profile
 from app.security.upload_scanner import scan_saved_file, scan_upload_stream
 from app.utils import sanitize_input, validate_file_header, validate_password
 
@@ -110,7 +111,17 @@ def register_user_routes(app) -> None:
             safe_file_delete(file_path)
             return jsonify({"error": reason or "업로드 파일 보안 검증에 실패했습니다."}), 400
 
-        profile_image = f"profiles/{filename}"
+        # EXIF 제거 + 크기별 재인코딩 (Pillow 미설치 시 업로드 원본 그대로)
+        try:
+            profile_image = normalize_profile_image(upload_folder, f"profiles/{filename}")
+        except ValueError:
+            safe_file_delete(file_path)
+            return jsonify({"error": "유효하지 않은 이미지 파일입니다."}), 400
+        except Exception:
+            safe_file_delete(file_path)
+            return jsonify({"error": "프로필 처리 중 오류가 발생했습니다."}), 500
+        file_path = os.path.join(upload_folder, profile_image)
+        register_stored_file(profile_image, file_size=os.path.getsize(file_path))
         try:
             success = _update_user_profile_impl()(session["user_id"], profile_image=profile_image)
             if success:
@@ -16,13 +16,51 @@ from app.models.base import (
     get_db,
     close_thread_db,
     get_db_context,
+    get_db_pool_stats,
     init_db,
     get_maintenance_status,
+    get_readiness,
     run_maintenance_once,
+    schedule_startup_maintenance,
     safe_file_delete,
     close_expired_polls,
     cleanup_old_access_logs,
     cleanup_empty_rooms,
+    rebuild_unread_counts,
+    rebuild_search_index,
+)
+
+# Write queue - 메시지 INSERT 그룹 커밋
+from app.models.write_queue import (
+    configure_message_write_queue,
+    get_message_write_queue_stats,
+)
+
+# Membership cache - 대화방 멤버십 캐시
+from app.models.membership_cache import (
+    get_cached_user_room_ids,
+    get_cached_room_member_ids,
+    get_membership_cache_stats,
+)
+
+# Stored files - 업로드 파일 매니페스트
+from app.models.stored_files import (
+    register_stored_file,
+    get_stored_file_stats,
+)
+
+# File blobs - 내용 주소 기반 첨부 중복 제거
+from app.models.file_blobs import (
+    adopt_upload_blob,
+    release_upload_file,
+    get_dedup_stats,
+)
+
+# Upload ACL cache - 첨부 다운로드 권한 조회 캐시
+from app.models.upload_acl_cache import (
+    find_upload_reference,
+    invalidate_upload_acl,
+    get_upload_acl_cache_stats,
 )
 
 # Users - 사용자 관리
@@ -52,6 +90,8 @@ from app.models.rooms import (
     create_room,
     get_room_key,
     get_user_rooms,
+    get_member_room_ids,
+    get_room_member_ids,
     get_room_members,
     is_room_member,
     add_room_member,
@@ -68,6 +108,7 @@ from app.models.rooms import (
 
 # Messages - 메시지 관리
 from app.models.messages import (
+    ReplyTargetError,
     create_message,
     create_file_message_with_record,
     get_room_messages,
@@ -102,9 +143,20 @@ from app.models.polls import (
 from app.models.files import (
     add_room_file,
     get_room_files,
+    get_room_files_page,
     delete_room_file,
 )
 
+# Search cache - 검색 결과 캐시
+from app.models.search_cache import get_search_cache_stats
+
+# Pagination - 키셋(커서) 페이지네이션
+from app.models.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+)
+
 # Reactions - 리액션 관리
 from app.models.reactions import (
     add_reaction,
@@ -116,30 +168,44 @@ from app.models.reactions import (
 
 __all__ = [
     # Base
-    'get_db', 'close_thread_db', 'get_db_context', 'init_db',
-    'get_maintenance_status', 'run_maintenance_once',
+    'get_db', 'close_thread_db', 'get_db_context', 'get_db_pool_stats', 'init_db',
+    'get_maintenance_status', 'get_readiness', 'run_maintenance_once', 'schedule_startup_maintenance',
     'safe_file_delete',
-    'close_expired_polls', 'cleanup_old_access_logs', 'cleanup_empty_rooms',
+    'close_expired_polls', 'cleanup_old_access_logs', 'cleanup_empty_rooms', 'rebuild_unread_counts', 'rebuild_search_index',
+    # Write queue
+    'configure_message_write_queue', 'get_message_write_queue_stats',
+    # Membership cache
+    'get_cached_user_room_ids', 'get_cached_room_member_ids', 'get_membership_cache_stats',
+    # Stored files
+    'register_stored_file', 'get_stored_file_stats',
+    # File blobs
+    'adopt_upload_blob', 'release_upload_file', 'get_dedup_stats',
+    # Upload ACL cache
+    'find_upload_reference', 'invalidate_upload_acl', 'get_upload_acl_cache_stats',
     # Users
     'create_user', 'authenticate_user', 'get_user_by_id', 'get_user_by_username', 'get_user_by_id_cached',
     'request_user_approval', 'get_user_approval_status', 'review_user_approval',
     'is_platform_admin_user', 'invalidate_user_cache', 'get_all_users', 'update_user_status', 'update_user_profile',
     'get_online_users', 'log_access', 'change_password', 'get_user_session_token', 'delete_user',
     # Rooms
-    'create_room', 'get_room_key', 'get_user_rooms', 'get_room_members',
+    'create_room', 'get_room_key', 'get_user_rooms', 'get_member_room_ids', 'get_room_member_ids', 'get_room_members',
     'is_room_member', 'add_room_member', 'leave_room_db', 'update_room_name',
     'get_room_by_id', 'pin_room', 'mute_room', 'kick_member',
     'set_room_admin', 'is_room_admin', 'get_room_admins',
     # Messages
     'create_message', 'get_room_messages', 'update_last_read', 'get_unread_count',
-    'create_file_message_with_record', 'get_room_last_reads', 'get_message_room_id',
+    'ReplyTargetError', 'create_file_message_with_record', 'get_room_last_reads', 'get_message_room_id',
     'get_message_by_client_msg_id', 'delete_message', 'edit_message',
     'search_messages', 'advanced_search', 'pin_message', 'unpin_message', 'get_pinned_messages',
     'server_stats', 'update_server_stats', 'get_server_stats',
     # Polls
     'create_poll', 'get_poll', 'get_room_polls', 'vote_poll', 'get_user_votes', 'close_poll',
     # Files
-    'add_room_file', 'get_room_files', 'delete_room_file',
+    'add_room_file', 'get_room_files', 'get_room_files_page', 'delete_room_file',
+    # Search cache
+    'get_search_cache_stats',
+    # Pagination
+    'InvalidCursorError', 'decode_cursor', 'encode_cursor',
     # Reactions
     'add_reaction', 'remove_reaction', 'toggle_reaction', 
     'get_message_reactions', 'get_messages_reactions',
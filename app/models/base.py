@@ -8,6 +8,7 @@ import logging
 import threading
 import time
 import os
+import weakref
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import Iterator, cast
@@ -20,10 +21,39 @@ except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     from config import DATABASE_PATH, UPLOAD_FOLDER, MAINTENANCE_INTERVAL_MINUTES
 
+try:
+    from config import DB_POOL_SIZE, DB_POOL_TIMEOUT_SECONDS, DB_POOL_MAX_AGE_SECONDS
+except ImportError:
+    DB_POOL_SIZE = 16
+    DB_POOL_TIMEOUT_SECONDS = 10
+    DB_POOL_MAX_AGE_SECONDS = 1800
+
+try:
+    from config import MAINTENANCE_STARTUP_MODE, MAINTENANCE_STARTUP_DELAY_SECONDS
+except ImportError:
+    MAINTENANCE_STARTUP_MODE = 'background'
+    MAINTENANCE_STARTUP_DELAY_SECONDS = 10
+
+from app.models.migrations import (
+    FTS_INDEXES,
+    LATEST_SCHEMA_VERSION,
+    _REBUILD_UNREAD_SQL,
+    get_schema_version,
+    rebuild_fts_index,
+    run_migrations,
+)
+from app.models.retention import (
+    delete_in_batches,
+    enqueue_file_delete,
+    get_file_delete_stats,
+    timed_write,
+    track_task,
+)
+
 logger = logging.getLogger(__name__)
 
 # ============================================================================
-# 데이터베이스 연결 관리 (스레드 로컬 풀링 버전)
+# 데이터베이스 연결 관리 (크기 제한 연결 풀 + 스레드 바인딩)
 # ============================================================================
 _db_lock = threading.Lock()
 _db_initialized = False
@@ -35,7 +65,191 @@ _maintenance_status = {
     'last_results': {},
     'scheduler_started': False,
     'interval_minutes': int(MAINTENANCE_INTERVAL_MINUTES or 0),
+    'running': False,
+    'current_task': None,
+    'completed_tasks': 0,
+    'total_tasks': 0,
+    'task_stats': {},
+}
+# 시작 시 유지보수 (pending → scheduled → running → completed/failed, 또는 disabled)
+_startup_maintenance = {
+    'mode': None,
+    'state': 'pending',
+    'scheduled_at': None,
+    'started_at': None,
+    'finished_at': None,
+    'duration_ms': None,
+    'error': None,
 }
+_maintenance_run_lock = threading.Lock()
+_startup_maintenance_thread = None
+
+
+class _PooledConnection(sqlite3.Connection):
+    """풀에서 관리되는 연결 (생성 시각 추적 + weakref 지원)"""
+
+    created_at: float = 0.0
+
+
+class _ConnectionPool:
+    """
+    크기 제한이 있는 SQLite 연결 풀.
+
+    - 체크아웃된 연결은 현재 스레드(gevent 환경에서는 greenlet)에 바인딩되며,
+      close_thread_db() 호출 시 풀로 반납된다.
+    - 연결 검증은 지연 방식: 닫힌 연결/오류가 난 연결/max_age 초과 연결만 교체한다.
+    - 반납되지 않은 채 스레드가 종료된 연결은 weakref로 추적되어 자동으로 슬롯이 회수된다.
+    """
+
+    def __init__(self, max_size: int, timeout: float, max_age: float):
+        self.max_size = max(1, int(max_size or 1))
+        self.timeout = max(0.0, float(timeout or 0))
+        self.max_age = max(0.0, float(max_age or 0))
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: list[_PooledConnection] = []
+        self._in_use: weakref.WeakSet[_PooledConnection] = weakref.WeakSet()
+        self._pending = 0
+        self._stats = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'created': 0,
+            'replaced': 0,
+            'wait_total_ms': 0.0,
+            'wait_max_ms': 0.0,
+            'last_wait_ms': 0.0,
+        }
+
+    def _is_expired(self, conn: _PooledConnection) -> bool:
+        return self.max_age > 0 and (time.monotonic() - conn.created_at) > self.max_age
+
+    @staticmethod
+    def _is_usable(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.in_transaction
+            return True
+        except (sqlite3.ProgrammingError, sqlite3.OperationalError):
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _total(self) -> int:
+        return len(self._idle) + len(self._in_use) + self._pending
+
+    def _record_checkout(self, started: float) -> None:
+        waited_ms = (time.monotonic() - started) * 1000.0
+        self._stats['checkouts'] += 1
+        self._stats['wait_total_ms'] += waited_ms
+        self._stats['last_wait_ms'] = waited_ms
+        if waited_ms > self._stats['wait_max_ms']:
+            self._stats['wait_max_ms'] = waited_ms
+
+    def checkout(self) -> _PooledConnection:
+        started = time.monotonic()
+        deadline = started + self.timeout
+        with self._cond:
+            while True:
+                while self._idle:
+                    candidate = self._idle.pop()
+                    if self._is_usable(candidate) and not self._is_expired(candidate):
+                        self._in_use.add(candidate)
+                        self._record_checkout(started)
+                        return candidate
+                    self._close_quietly(candidate)
+                    self._stats['replaced'] += 1
+                if self._total() < self.max_size:
+                    # 슬롯만 예약하고 실제 연결 생성은 락 밖에서 수행
+                    self._pending += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise sqlite3.OperationalError(
+                        f"database connection pool exhausted (size={self.max_size}, timeout={self.timeout}s)"
+                    )
+                self._cond.wait(remaining)
+
+        try:
+            conn = _create_connection()
+        except Exception:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify()
+            raise
+
+        with self._cond:
+            self._pending -= 1
+            self._in_use.add(conn)
+            self._stats['created'] += 1
+            self._record_checkout(started)
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        reusable = self._is_usable(conn)
+        if reusable:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                reusable = False
+        pooled = cast(_PooledConnection, conn)
+        if reusable and self._is_expired(pooled):
+            reusable = False
+        if not reusable:
+            self._close_quietly(conn)
+        with self._cond:
+            self._in_use.discard(pooled)
+            if reusable and self._total() < self.max_size:
+                self._idle.append(pooled)
+            elif reusable:
+                self._close_quietly(conn)
+            else:
+                self._stats['replaced'] += 1
+            self._cond.notify()
+
+    def discard(self, conn: sqlite3.Connection) -> None:
+        """오류가 난 연결을 풀에서 제거 (슬롯 반환)"""
+        self._close_quietly(conn)
+        with self._cond:
+            self._in_use.discard(cast(_PooledConnection, conn))
+            self._stats['replaced'] += 1
+            self._cond.notify()
+
+    def close_idle(self) -> int:
+        with self._cond:
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for conn in idle:
+            self._close_quietly(conn)
+        return len(idle)
+
+    def stats(self) -> dict:
+        with self._cond:
+            in_use = len(self._in_use) + self._pending
+            idle = len(self._idle)
+            stats = dict(self._stats)
+        checkouts = int(stats['checkouts'])
+        return {
+            'max_size': self.max_size,
+            'size': in_use + idle,
+            'in_use': in_use,
+            'idle': idle,
+            'checkouts': checkouts,
+            'timeouts': int(stats['timeouts']),
+            'created': int(stats['created']),
+            'replaced': int(stats['replaced']),
+            'wait_avg_ms': round(stats['wait_total_ms'] / checkouts, 3) if checkouts else 0.0,
+            'wait_max_ms': round(stats['wait_max_ms'], 3),
+            'last_wait_ms': round(stats['last_wait_ms'], 3),
+        }
+
+
+_pool = _ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT_SECONDS, DB_POOL_MAX_AGE_SECONDS)
 
 
 def _get_thread_connection() -> sqlite3.Connection | None:
@@ -46,15 +260,19 @@ def _set_thread_connection(conn: sqlite3.Connection | None) -> None:
     _db_local.connection = conn
 
 
-def _create_connection() -> sqlite3.Connection:
+def _create_connection() -> _PooledConnection:
     """새 데이터베이스 연결 생성 (재시도 로직 포함)"""
     max_retries = 3
     retry_delay = 0.1
     
     for attempt in range(max_retries):
         try:
-            conn = sqlite3.connect(DATABASE_PATH, timeout=30, check_same_thread=False)
+            conn = cast(
+                _PooledConnection,
+                sqlite3.connect(DATABASE_PATH, timeout=30, check_same_thread=False, factory=_PooledConnection),
+            )
             conn.row_factory = sqlite3.Row
+            conn.created_at = time.monotonic()
             
             # 성능 최적화 설정
             conn.execute('PRAGMA journal_mode=WAL')
@@ -77,35 +295,31 @@ def _create_connection() -> sqlite3.Connection:
 
 
 def get_db() -> sqlite3.Connection:
-    """데이터베이스 연결 - 스레드별 연결 재사용 (성능 최적화)"""
+    """데이터베이스 연결 - 풀에서 체크아웃하여 현재 스레드에 바인딩 (반납: close_thread_db)"""
     conn = _get_thread_connection()
-    if conn is None:
-        conn = _create_connection()
-        _set_thread_connection(conn)
-        return conn
-
-    try:
-        conn.execute('SELECT 1')
-    except (sqlite3.ProgrammingError, sqlite3.OperationalError):
-        try:
-            conn.close()
-        except Exception:
-            pass
-        conn = _create_connection()
-        _set_thread_connection(conn)
+    if conn is not None:
+        # 외부에서 close()된 연결만 교체한다. (매 호출 SELECT 1 프로브 없음)
+        if _ConnectionPool._is_usable(conn):
+            return conn
+        _pool.discard(conn)
+        _set_thread_connection(None)
 
+    conn = _pool.checkout()
+    _set_thread_connection(conn)
     return conn
 
 
 def close_thread_db() -> None:
-    """현재 스레드의 데이터베이스 연결 종료"""
+    """현재 스레드의 데이터베이스 연결을 풀에 반납"""
     conn = _get_thread_connection()
     if conn is not None:
-        try:
-            conn.close()
-        except Exception:
-            pass
         _set_thread_connection(None)
+        _pool.release(conn)
+
+
+def get_db_pool_stats() -> dict:
+    """연결 풀 게이지/카운터 조회 (size, in_use, checkout 대기 시간 등)"""
+    return _pool.stats()
 
 
 @contextmanager
@@ -131,6 +345,7 @@ def safe_file_delete(file_path: str, max_retries: int = 3) -> bool:
         try:
             if os.path.exists(file_path):
                 os.remove(file_path)
+                _remove_derived_files(file_path)
                 return True
             return True
         except PermissionError:
@@ -145,6 +360,16 @@ def safe_file_delete(file_path: str, max_retries: int = 3) -> bool:
     return False
 
 
+def _remove_derived_files(file_path: str) -> None:
+    """원본에서 만든 축소본 등 파생 파일 정리"""
+    try:
+        from app.thumbnails import remove_thumbnails
+
+        remove_thumbnails(file_path)
+    except Exception as e:
+        logger.warning(f"Derived file cleanup failed: {file_path}: {e}")
+
+
 def get_maintenance_status() -> dict:
     """유지보수 스케줄러 상태 조회"""
     return {
@@ -152,54 +377,148 @@ def get_maintenance_status() -> dict:
         'last_results': dict(_maintenance_status.get('last_results') or {}),
         'scheduler_started': bool(_maintenance_status.get('scheduler_started')),
         'interval_minutes': int(_maintenance_status.get('interval_minutes') or 0),
+        'running': bool(_maintenance_status.get('running')),
+        'progress': {
+            'current_task': _maintenance_status.get('current_task'),
+            'completed_tasks': int(_maintenance_status.get('completed_tasks') or 0),
+            'total_tasks': int(_maintenance_status.get('total_tasks') or 0),
+        },
+        'startup': dict(_startup_maintenance),
+        'tasks': dict(_maintenance_status.get('task_stats') or {}),
+        'file_deleter': get_file_delete_stats(),
     }
 
 
-def run_maintenance_once() -> dict:
-    """유지보수 작업 1회 실행"""
-    results = {
-        'closed_polls': 0,
-        'cleaned_access_logs': 0,
-        'cleaned_empty_rooms': 0,
-        'cleaned_device_sessions': 0,
-        'cleaned_upload_tokens': 0,
-        'cleaned_orphan_uploads': 0,
-        'cleaned_orphan_profiles': 0,
+def get_readiness() -> dict:
+    """
+    서버 준비 상태.
+
+    ready: 스키마 초기화가 끝나 요청을 처리할 수 있음.
+    maintenance_pending: 시작 시 유지보수가 아직 끝나지 않음 (요청 처리에는 영향 없음).
+    """
+    startup_state = _startup_maintenance.get('state')
+    return {
+        'ready': bool(_db_initialized),
+        'startup_maintenance': startup_state,
+        'maintenance_pending': startup_state in ('pending', 'scheduled', 'running'),
     }
+
+
+# (결과 키, 모듈, 함수명). 순서대로 실행하며 모듈은 실행 시점에 가져온다.
+_MAINTENANCE_TASKS = (
+    ('closed_polls', 'app.models.base', 'close_expired_polls'),
+    ('cleaned_access_logs', 'app.models.base', 'cleanup_old_access_logs'),
+    ('cleaned_empty_rooms', 'app.models.base', 'cleanup_empty_rooms'),
+    ('cleaned_device_sessions', 'app.auth_tokens', 'cleanup_stale_device_sessions'),
+    ('cleaned_upload_tokens', 'app.upload_tokens', 'purge_expired_upload_tokens'),
+    ('cleaned_upload_sessions', 'app.upload_sessions', 'purge_expired_upload_sessions'),
+    ('cleaned_orphan_uploads', 'app.upload_tokens', 'cleanup_orphan_upload_files'),
+    ('cleaned_orphan_profiles', 'app.upload_tokens', 'cleanup_orphan_profile_files'),
+)
+
+
+def run_maintenance_once() -> dict:
+    """유지보수 작업 1회 실행 (동시 실행은 직렬화, 작업 단위 진행 상황 기록)"""
+    import importlib
+
+    results = {key: 0 for key, _, _ in _MAINTENANCE_TASKS}
+    task_stats = {}
+    with _maintenance_run_lock:
+        _maintenance_status.update({
+            'running': True,
+            'current_task': None,
+            'completed_tasks': 0,
+            'total_tasks': len(_MAINTENANCE_TASKS),
+        })
+        try:
+            for key, module_name, func_name in _MAINTENANCE_TASKS:
+                _maintenance_status['current_task'] = func_name
+                with track_task() as stats:
+                    try:
+                        task = getattr(importlib.import_module(module_name), func_name)
+                        results[key] = int(task() or 0)
+                    except Exception as e:
+                        logger.warning(f"Maintenance {func_name} error: {e}")
+                task_stats[func_name] = stats.as_dict()
+                _maintenance_status['completed_tasks'] += 1
+                # 작업 사이에 다른 요청(그린렛)이 실행될 기회를 준다.
+                time.sleep(0)
+        finally:
+            _maintenance_status['running'] = False
+            _maintenance_status['current_task'] = None
+            _maintenance_status['last_run_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            _maintenance_status['last_results'] = dict(results)
+            _maintenance_status['task_stats'] = task_stats
+            close_thread_db()
+    return results
+
+
+def _run_startup_maintenance() -> None:
+    _startup_maintenance['state'] = 'running'
+    _startup_maintenance['started_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    started = time.perf_counter()
     try:
-        results['closed_polls'] = int(close_expired_polls() or 0)
-    except Exception as e:
-        logger.warning(f"Maintenance close_expired_polls error: {e}")
-    try:
-        results['cleaned_access_logs'] = int(cleanup_old_access_logs() or 0)
-    except Exception as e:
-        logger.warning(f"Maintenance cleanup_old_access_logs error: {e}")
-    try:
-        results['cleaned_empty_rooms'] = int(cleanup_empty_rooms() or 0)
+        results = run_maintenance_once()
+        _startup_maintenance['state'] = 'completed'
+        logger.info(f"Startup maintenance completed: {results}")
     except Exception as e:
-        logger.warning(f"Maintenance cleanup_empty_rooms error: {e}")
-    try:
-        from app.auth_tokens import cleanup_stale_device_sessions
+        _startup_maintenance['state'] = 'failed'
+        _startup_maintenance['error'] = str(e)
+        logger.warning(f"Maintenance tasks error: {e}")
+    finally:
+        _startup_maintenance['finished_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        _startup_maintenance['duration_ms'] = round((time.perf_counter() - started) * 1000.0, 3)
+
+
+def schedule_startup_maintenance(mode: str | None = None, delay_seconds: float | None = None):
+    """
+    시작 시 유지보수 예약.
+
+    - background (기본): delay_seconds 후 백그라운드 스레드에서 실행하고 주기 스케줄러를 시작한다.
+    - sync: 호출 스레드에서 즉시 실행 (이전 동작).
+    - off: 시작 시 실행하지 않고 주기 스케줄러만 시작한다.
+
+    백그라운드 모드에서는 생성된 스레드를 반환한다.
+    """
+    global _startup_maintenance_thread
+
+    mode = str(mode or MAINTENANCE_STARTUP_MODE or 'background').strip().lower()
+    delay = float(MAINTENANCE_STARTUP_DELAY_SECONDS if delay_seconds is None else delay_seconds)
+    _startup_maintenance.update({
+        'mode': mode,
+        'scheduled_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'started_at': None,
+        'finished_at': None,
+        'duration_ms': None,
+        'error': None,
+    })
+
+    if mode == 'off':
+        _startup_maintenance['state'] = 'disabled'
+        _start_maintenance_scheduler_if_needed()
+        return None
+    if mode == 'sync':
+        _run_startup_maintenance()
+        _start_maintenance_scheduler_if_needed()
+        return None
 
-        results['cleaned_device_sessions'] = int(cleanup_stale_device_sessions() or 0)
-    except Exception as e:
-        logger.warning(f"Maintenance cleanup_stale_device_sessions error: {e}")
-    try:
-        from app.upload_tokens import (
-            purge_expired_upload_tokens,
-            cleanup_orphan_upload_files,
-            cleanup_orphan_profile_files,
-        )
+    if _startup_maintenance_thread is not None and _startup_maintenance_thread.is_alive():
+        return _startup_maintenance_thread
+    _startup_maintenance['state'] = 'scheduled'
 
-        results['cleaned_upload_tokens'] = int(purge_expired_upload_tokens() or 0)
-        results['cleaned_orphan_uploads'] = int(cleanup_orphan_upload_files() or 0)
-        results['cleaned_orphan_profiles'] = int(cleanup_orphan_profile_files() or 0)
-    except Exception as e:
-        logger.warning(f"Maintenance upload cleanup error: {e}")
+    def _worker():
+        if delay > 0 and _maintenance_stop.wait(delay):
+            return
+        _run_startup_maintenance()
+        _start_maintenance_scheduler_if_needed()
 
-    _maintenance_status['last_run_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    _maintenance_status['last_results'] = dict(results)
-    return results
+    _startup_maintenance_thread = threading.Thread(
+        target=_worker,
+        name='maintenance-startup',
+        daemon=True,
+    )
+    _startup_maintenance_thread.start()
+    return _startup_maintenance_thread
 
 
 def _start_maintenance_scheduler_if_needed() -> None:
@@ -235,6 +554,52 @@ def _start_maintenance_scheduler_if_needed() -> None:
     _maintenance_status['scheduler_started'] = True
 
 
+def rebuild_unread_counts(room_id: int | None = None) -> int:
+    """unread_count 전체(또는 특정 방) 재계산. 갱신된 멤버 행 수 반환."""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        if room_id is None:
+            cursor.execute(_REBUILD_UNREAD_SQL)
+        else:
+            cursor.execute(_REBUILD_UNREAD_SQL + " WHERE room_id = ?", (int(room_id),))
+        updated = int(cursor.rowcount or 0)
+        conn.commit()
+        logger.info(f"Rebuilt unread counts: {updated} member rows")
+        return updated
+    except Exception as e:
+        logger.error(f"Rebuild unread counts error: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return 0
+
+
+def rebuild_search_index() -> dict[str, int]:
+    """메시지 검색 FTS 색인 전체 재구축. 색인별 색인한 행 수 반환 (없는 색인은 제외)."""
+    conn = get_db()
+    cursor = conn.cursor()
+    rebuilt: dict[str, int] = {}
+    try:
+        for table, _tokenize in FTS_INDEXES:
+            exists = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()
+            if exists:
+                rebuilt[table] = rebuild_fts_index(cursor, table)
+        conn.commit()
+        logger.info(f"Rebuilt search index: {rebuilt}")
+        return rebuilt
+    except Exception as e:
+        logger.error(f"Rebuild search index error: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return {}
+
+
 def init_db():
     """데이터베이스 초기화"""
     global _db_initialized
@@ -253,279 +618,19 @@ def init_db():
         conn.execute('PRAGMA foreign_keys=ON')
         cursor = conn.cursor()
         
-        logger.info(f"Initializing database at: {DATABASE_PATH}")
-    
-        # 사용자 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                username TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                nickname TEXT,
-                profile_image TEXT,
-                status TEXT DEFAULT 'offline',
-                is_platform_admin INTEGER DEFAULT 0,
-                public_key TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # 대화방 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS rooms (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                type TEXT CHECK(type IN ('direct', 'group')),
-                created_by INTEGER,
-                encryption_key TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (created_by) REFERENCES users(id)
-            )
-        ''')
-        
-        # 대화방 참여자 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS room_members (
-                room_id INTEGER,
-                user_id INTEGER,
-                joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_read_message_id INTEGER DEFAULT 0,
-                pinned INTEGER DEFAULT 0,
-                muted INTEGER DEFAULT 0,
-                PRIMARY KEY (room_id, user_id),
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # 메시지 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                sender_id INTEGER NOT NULL,
-                content TEXT,
-                encrypted INTEGER DEFAULT 1,
-                message_type TEXT DEFAULT 'text',
-                file_path TEXT,
-                file_name TEXT,
-                client_msg_id TEXT,
-                reply_to INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (sender_id) REFERENCES users(id),
-                FOREIGN KEY (reply_to) REFERENCES messages(id)
-            )
-        ''')
-        
-        # 접속 로그 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS access_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                action TEXT,
-                ip_address TEXT,
-                user_agent TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # 공지사항 고정 메시지 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS pinned_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                message_id INTEGER,
-                content TEXT,
-                pinned_by INTEGER NOT NULL,
-                pinned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (message_id) REFERENCES messages(id),
-                FOREIGN KEY (pinned_by) REFERENCES users(id)
-            )
-        ''')
-        
-        # 투표 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS polls (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                created_by INTEGER NOT NULL,
-                question TEXT NOT NULL,
-                multiple_choice INTEGER DEFAULT 0,
-                anonymous INTEGER DEFAULT 0,
-                closed INTEGER DEFAULT 0,
-                ends_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (created_by) REFERENCES users(id)
-            )
-        ''')
-        
-        # 투표 옵션 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS poll_options (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                poll_id INTEGER NOT NULL,
-                option_text TEXT NOT NULL,
-                FOREIGN KEY (poll_id) REFERENCES polls(id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # 투표 참여 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS poll_votes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                poll_id INTEGER NOT NULL,
-                option_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(poll_id, option_id, user_id),
-                FOREIGN KEY (poll_id) REFERENCES polls(id) ON DELETE CASCADE,
-                FOREIGN KEY (option_id) REFERENCES poll_options(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-        
-        # 파일 저장소 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS room_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                message_id INTEGER,
-                file_path TEXT NOT NULL,
-                file_name TEXT NOT NULL,
-                file_size INTEGER,
-                file_type TEXT,
-                uploaded_by INTEGER NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (message_id) REFERENCES messages(id),
-                FOREIGN KEY (uploaded_by) REFERENCES users(id)
+        # 스키마가 최신이면 버전 번호 하나만 확인한다.
+        current_version = get_schema_version(conn)
+        if current_version < LATEST_SCHEMA_VERSION:
+            logger.info(
+                f"Migrating database at {DATABASE_PATH}: "
+                f"schema v{current_version} -> v{LATEST_SCHEMA_VERSION}"
             )
-        ''')
-        
-        # 메시지 리액션 테이블
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS message_reactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                message_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                emoji TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(message_id, user_id, emoji),
-                FOREIGN KEY (message_id) REFERENCES messages(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''')
-
-        # Desktop client device session tokens
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS device_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                device_id TEXT NOT NULL,
-                token_hash TEXT NOT NULL UNIQUE,
-                device_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP NOT NULL,
-                revoked_at TIMESTAMP,
-                ip TEXT,
-                user_agent TEXT,
-                remember INTEGER DEFAULT 1,
-                ttl_days INTEGER DEFAULT 30,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
-            )
-        ''')
-
-        # Upload message token registry (durable, multi-worker safe)
-        cursor.execute(
-            '''
-            CREATE TABLE IF NOT EXISTS upload_tokens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                token_hash TEXT NOT NULL UNIQUE,
-                user_id INTEGER NOT NULL,
-                room_id INTEGER NOT NULL,
-                file_path TEXT NOT NULL,
-                file_name TEXT NOT NULL,
-                file_type TEXT,
-                file_size INTEGER,
-                issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP NOT NULL,
-                consumed_at TIMESTAMP
-            )
-            '''
-        )
-
-        # Approval workflow scaffold (A2)
-        cursor.execute(
-            '''
-            CREATE TABLE IF NOT EXISTS pending_user_approvals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                status TEXT NOT NULL DEFAULT 'pending',
-                requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                reviewed_at TIMESTAMP,
-                reviewed_by INTEGER,
-                reason TEXT,
-                FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY (reviewed_by) REFERENCES users(id)
-            )
-            '''
-        )
-
-        # Legal hold scaffold (A5)
-        cursor.execute(
-            '''
-            CREATE TABLE IF NOT EXISTS legal_holds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                hold_type TEXT NOT NULL,
-                target_id TEXT NOT NULL,
-                active INTEGER NOT NULL DEFAULT 1,
-                reason TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                released_at TIMESTAMP
+            run_migrations(conn)
+        elif current_version > LATEST_SCHEMA_VERSION:
+            logger.warning(
+                f"Database schema v{current_version} is newer than this server "
+                f"(v{LATEST_SCHEMA_VERSION})"
             )
-            '''
-        )
-        
-        # Auto-migration
-        required_columns = {
-            'users': {
-                'is_platform_admin': 'INTEGER DEFAULT 0',
-            },
-            'room_members': {
-                'role': 'TEXT DEFAULT "member"',
-                'pinned': 'INTEGER DEFAULT 0',
-                'muted': 'INTEGER DEFAULT 0',
-                'last_read_message_id': 'INTEGER DEFAULT 0'
-            },
-            'messages': {
-                'reply_to': 'INTEGER',
-                'client_msg_id': 'TEXT',
-            },
-            'device_sessions': {
-                'remember': 'INTEGER DEFAULT 1',
-                'ttl_days': 'INTEGER DEFAULT 30',
-            },
-            'pending_user_approvals': {
-                'reason': 'TEXT',
-            }
-        }
-
-        try:
-            for table, cols in required_columns.items():
-                cursor.execute(f"PRAGMA table_info({table})")
-                existing_cols = [row[1] for row in cursor.fetchall()]
-                
-                for col_name, col_def in cols.items():
-                    if col_name not in existing_cols:
-                        logger.info(f"Migrating: Adding column '{col_name}' to table '{table}'")
-                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
-        except Exception as e:
-            logger.error(f"Migration failed: {e}")
 
         # Bootstrap: ensure there is at least one platform admin.
         try:
@@ -544,128 +649,7 @@ def init_db():
                     logger.info(f"Platform admin bootstrapped: user_id={int(first_user['id'])}")
         except Exception as e:
             logger.warning(f"Platform admin bootstrap check failed: {e}")
-        
-        # 인덱스 생성
-        try:
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_room_id ON messages(room_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_file_name ON messages(file_name)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_client_msg_id ON messages(client_msg_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_members_user_id ON room_members(user_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_members_room_id ON room_members(room_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_reactions_message_id ON message_reactions(message_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_room_id_desc ON messages(room_id, id DESC)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_members_room_user ON room_members(room_id, user_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_poll_votes_poll_user ON poll_votes(poll_id, user_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_files_file_path ON room_files(file_path)')
-            cursor.execute(
-                '''
-                CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_room_sender_client_msg_unique
-                ON messages(room_id, sender_id, client_msg_id)
-                WHERE client_msg_id IS NOT NULL AND client_msg_id <> ''
-                '''
-            )
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)")
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_users_platform_admin ON users(is_platform_admin)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_device_sessions_user_revoked '
-                'ON device_sessions(user_id, revoked_at)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_device_sessions_device_revoked '
-                'ON device_sessions(device_id, revoked_at)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_device_sessions_expires_at '
-                'ON device_sessions(expires_at)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_upload_tokens_expires_at '
-                'ON upload_tokens(expires_at)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_upload_tokens_consumed_at '
-                'ON upload_tokens(consumed_at)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_upload_tokens_room_user '
-                'ON upload_tokens(room_id, user_id)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_pending_user_approvals_user_status '
-                'ON pending_user_approvals(user_id, status)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_pending_user_approvals_status_requested '
-                'ON pending_user_approvals(status, requested_at)'
-            )
-            cursor.execute(
-                'CREATE INDEX IF NOT EXISTS idx_legal_holds_type_target_active '
-                'ON legal_holds(hold_type, target_id, active)'
-            )
 
-            # Full-text search (FTS5) for plaintext (encrypted=0) text/system messages.
-            # If this SQLite build doesn't support FTS5, skip silently.
-            try:
-                cursor.execute("""
-                    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
-                    USING fts5(
-                        content,
-                        room_id UNINDEXED,
-                        sender_id UNINDEXED,
-                        created_at UNINDEXED,
-                        tokenize='unicode61'
-                    )
-                """)
-
-                cursor.execute("""
-                    CREATE TRIGGER IF NOT EXISTS messages_fts_ai
-                    AFTER INSERT ON messages BEGIN
-                        INSERT INTO messages_fts(rowid, content, room_id, sender_id, created_at)
-                        SELECT new.id, new.content, new.room_id, new.sender_id, new.created_at
-                        WHERE new.encrypted = 0
-                          AND new.message_type IN ('text', 'system')
-                          AND new.content IS NOT NULL;
-                    END;
-                """)
-                cursor.execute("""
-                    CREATE TRIGGER IF NOT EXISTS messages_fts_ad
-                    AFTER DELETE ON messages BEGIN
-                        DELETE FROM messages_fts WHERE rowid = old.id;
-                    END;
-                """)
-                cursor.execute("""
-                    CREATE TRIGGER IF NOT EXISTS messages_fts_au
-                    AFTER UPDATE ON messages BEGIN
-                        DELETE FROM messages_fts WHERE rowid = old.id;
-                        INSERT INTO messages_fts(rowid, content, room_id, sender_id, created_at)
-                        SELECT new.id, new.content, new.room_id, new.sender_id, new.created_at
-                        WHERE new.encrypted = 0
-                          AND new.message_type IN ('text', 'system')
-                          AND new.content IS NOT NULL;
-                    END;
-                """)
-
-                # Backfill once for existing DBs where the FTS table is newly created.
-                cursor.execute("SELECT COUNT(*) FROM messages_fts")
-                fts_count = cursor.fetchone()[0]
-                if not fts_count:
-                    cursor.execute("""
-                        INSERT INTO messages_fts(rowid, content, room_id, sender_id, created_at)
-                        SELECT id, content, room_id, sender_id, created_at
-                        FROM messages
-                        WHERE encrypted = 0
-                          AND message_type IN ('text', 'system')
-                          AND content IS NOT NULL
-                    """)
-            except Exception as e:
-                logger.debug(f"FTS5 init skipped: {e}")
-            logger.debug("Database indexes created/verified")
-        except Exception as e:
-            logger.debug(f"Index creation: {e}")
-        
         conn.commit()
         _db_initialized = True
         logger.info("데이터베이스 초기화 완료")
@@ -680,11 +664,12 @@ def init_db():
             except Exception:
                 pass
     
-    # 서버 시작 시 유지보수 작업 + 주기 스케줄러
+    # 서버 시작 시 유지보수 작업 + 주기 스케줄러 (기본: 백그라운드, 요청 처리를 막지 않음)
+    # 테스트에서는 임시 DB 수명과 겹치지 않도록 예약하지 않는다.
+    if os.environ.get('PYTEST_CURRENT_TEST'):
+        return
     try:
-        results = run_maintenance_once()
-        logger.info(f"Startup maintenance completed: {results}")
-        _start_maintenance_scheduler_if_needed()
+        schedule_startup_maintenance()
     except Exception as e:
         logger.warning(f"Maintenance tasks error: {e}")
 
@@ -695,12 +680,13 @@ def close_expired_polls():
     cursor = conn.cursor()
     try:
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        cursor.execute('''
-            UPDATE polls SET closed = 1 
-            WHERE ends_at IS NOT NULL AND ends_at < ? AND closed = 0
-        ''', (now,))
-        count = cursor.rowcount
-        conn.commit()
+        with timed_write(conn) as affected:
+            cursor.execute('''
+                UPDATE polls SET closed = 1 
+                WHERE ends_at IS NOT NULL AND ends_at < ? AND closed = 0
+            ''', (now,))
+            count = cursor.rowcount
+            affected.append(count)
         if count > 0:
             logger.info(f"Closed {count} expired polls")
         return count
@@ -714,24 +700,22 @@ def close_expired_polls():
 def cleanup_old_access_logs(days_to_keep=90):
     """오래된 접속 로그 정리"""
     conn = get_db()
-    cursor = conn.cursor()
     try:
         cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).strftime('%Y-%m-%d %H:%M:%S')
-        cursor.execute(
+        count = delete_in_batches(
+            conn,
+            'access_logs',
             '''
-            DELETE FROM access_logs
-            WHERE created_at < ?
-              AND id NOT IN (
-                  SELECT CAST(target_id AS INTEGER)
-                  FROM legal_holds
-                  WHERE hold_type = 'access_log'
-                    AND active = 1
-              )
+            created_at < ?
+            AND id NOT IN (
+                SELECT CAST(target_id AS INTEGER)
+                FROM legal_holds
+                WHERE hold_type = 'access_log'
+                  AND active = 1
+            )
             ''',
             (cutoff_date,),
         )
-        count = cursor.rowcount
-        conn.commit()
         if count > 0:
             logger.info(f"Cleaned up {count} old access logs")
         return count
@@ -743,7 +727,13 @@ def cleanup_old_access_logs(days_to_keep=90):
 
 
 def cleanup_empty_rooms():
-    """멤버가 없는 빈 대화방 정리"""
+    """
+    멤버가 없는 빈 대화방 정리
+
+    대화방마다 짧은 쓰기 트랜잭션(BEGIN IMMEDIATE) 하나에서 멤버가 없는지 확인하고 하위 기록
+    (고정/투표/파일 기록 → 메시지 → 대화방)을 함께 삭제한다. 그 사이 멤버 추가는 쓰기 락에
+    막히므로 대화방은 통째로 지워지거나 그대로 남는다. 첨부 파일은 커밋 후 백그라운드 삭제 큐로 넘긴다.
+    """
     conn = get_db()
     cursor = conn.cursor()
     try:
@@ -758,22 +748,35 @@ def cleanup_empty_rooms():
         if not empty_rooms:
             return 0
         
+        from app.models.file_blobs import release_upload_file
+        from app.models.membership_cache import membership_cache
+        from app.models.upload_acl_cache import invalidate_upload_acl
+
+        removed_rooms = []
         for room_id in empty_rooms:
-            cursor.execute('SELECT file_path FROM room_files WHERE room_id = ?', (room_id,))
-            files = cursor.fetchall()
-            for f in files:
-                full_path = os.path.join(UPLOAD_FOLDER, f['file_path'])
-                safe_file_delete(full_path)
-            
-            cursor.execute('DELETE FROM messages WHERE room_id = ?', (room_id,))
-            cursor.execute('DELETE FROM pinned_messages WHERE room_id = ?', (room_id,))
-            cursor.execute('DELETE FROM polls WHERE room_id = ?', (room_id,))
-            cursor.execute('DELETE FROM room_files WHERE room_id = ?', (room_id,))
-            cursor.execute('DELETE FROM rooms WHERE id = ?', (room_id,))
-        
-        conn.commit()
-        logger.info(f"Cleaned up {len(empty_rooms)} empty rooms: {empty_rooms}")
-        return len(empty_rooms)
+            with timed_write(conn) as affected:
+                conn.execute('BEGIN IMMEDIATE')
+                cursor.execute('SELECT 1 FROM room_members WHERE room_id = ? LIMIT 1', (room_id,))
+                if cursor.fetchone():
+                    # 목록 조회 후 멤버가 추가된 대화방은 남겨 둔다.
+                    continue
+                cursor.execute('SELECT file_path FROM room_files WHERE room_id = ?', (room_id,))
+                file_paths = {row['file_path'] for row in cursor.fetchall() if row['file_path']}
+                for table in ('pinned_messages', 'polls', 'room_files', 'messages'):
+                    cursor.execute(f'DELETE FROM {table} WHERE room_id = ?', (room_id,))
+                    affected.append(int(cursor.rowcount or 0))
+                cursor.execute('DELETE FROM rooms WHERE id = ?', (room_id,))
+                affected.append(int(cursor.rowcount or 0))
+
+            removed_rooms.append(room_id)
+            membership_cache.forget_room(room_id)
+            for file_path in file_paths:
+                invalidate_upload_acl(file_path)
+                release_upload_file(file_path, delete_func=enqueue_file_delete)
+
+        if removed_rooms:
+            logger.info(f"Cleaned up {len(removed_rooms)} empty rooms: {removed_rooms}")
+        return len(removed_rooms)
     except Exception as e:
         logger.error(f"Cleanup empty rooms error: {e}")
         return 0
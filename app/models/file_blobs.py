@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+내용 주소(SHA-256) 기반 첨부 중복 제거 (UPLOAD_DEDUP_ENABLED)
+
+- 같은 내용의 업로드는 ``ab/cd/<sha256>.<ext>`` 파일 하나로 저장하고, 여러 room_files
+  행이 같은 file_path를 가리킨다.
+- file_blobs.refcount는 room_files INSERT/DELETE/UPDATE 트리거로 유지된다.
+- 첨부를 지우는 경로(delete_room_file / delete_message / cleanup_empty_rooms / 회원 탈퇴)는
+  파일을 바로 지우지 않고 release_upload_file()을 호출한다. 참조가 남아 있으면 파일을 유지한다.
+- adopt와 release는 같은 쓰기 락(BEGIN IMMEDIATE) 안에서 blob을 확인한다. adopt는 돌려줄
+  blob에 held_until(_ADOPT_HOLD_SECONDS 뒤)을 기록해 업로드 토큰이 발급되기 전에 지워지지 않게 하고,
+  release는 락을 쥔 채 refcount/보류/대기 토큰을 다시 확인한 뒤 blob 파일을 지운다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+try:
+    from config import UPLOAD_DEDUP_ENABLED
+except ImportError:
+    UPLOAD_DEDUP_ENABLED = False
+
+logger = logging.getLogger(__name__)
+
+# adopt가 돌려준 blob을 업로드 토큰 발급 전까지 보호하는 시간
+_ADOPT_HOLD_SECONDS = 60
+
+_stats_lock = threading.Lock()
+_dedup_stats = {'uploads': 0, 'dedup_hits': 0}
+
+
+def _get_db():
+    import app.models.base as base_module
+    return base_module.get_db()
+
+
+def _upload_folder() -> str:
+    import app.models.base as base_module
+    return base_module.UPLOAD_FOLDER
+
+
+def blob_relpath(sha256: str, original_name: str) -> str:
+    from app.upload_storage import sharded_relpath
+
+    ext = os.path.splitext(str(original_name or ''))[1].lower()
+    return sharded_relpath(f'{sha256}{ext}')
+
+
+def adopt_upload_blob(upload_folder: str, saved_rel_path: str, sha256: str, file_size: int, original_name: str) -> str:
+    """
+    저장된 업로드를 내용 주소 저장소로 편입하고 사용할 상대 경로를 반환.
+
+    같은 내용이 이미 있으면 방금 저장한 파일을 지우고 기존 경로를 돌려준다.
+    실패하면 원래 경로를 그대로 사용한다 (중복 제거만 건너뜀).
+    """
+    from app.models.base import safe_file_delete
+    from app.upload_storage import ensure_parent_dir
+
+    saved_full = os.path.join(upload_folder, saved_rel_path)
+    held_until = (datetime.now() + timedelta(seconds=_ADOPT_HOLD_SECONDS)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = _get_db()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute('SELECT file_path FROM file_blobs WHERE sha256 = ?', (sha256,)).fetchone()
+        if row and os.path.isfile(os.path.join(upload_folder, row[0])):
+            conn.execute('UPDATE file_blobs SET held_until = ? WHERE sha256 = ?', (held_until, sha256))
+            conn.commit()
+            safe_file_delete(saved_full)
+            with _stats_lock:
+                _dedup_stats['uploads'] += 1
+                _dedup_stats['dedup_hits'] += 1
+            return str(row[0])
+
+        blob_path = blob_relpath(sha256, original_name)
+        os.replace(saved_full, ensure_parent_dir(upload_folder, blob_path))
+        conn.execute(
+            '''
+            INSERT INTO file_blobs (sha256, file_path, file_size, refcount, created_at, held_until)
+            VALUES (?, ?, ?, (SELECT COUNT(*) FROM room_files WHERE file_path = ?), ?, ?)
+            ON CONFLICT(sha256) DO UPDATE SET
+                file_path = excluded.file_path,
+                file_size = excluded.file_size,
+                held_until = excluded.held_until
+            ''',
+            (
+                sha256, blob_path, int(file_size or 0), blob_path,
+                datetime.now().strftime('%Y-%m-%d %H:%M:%S'), held_until,
+            ),
+        )
+        conn.commit()
+        with _stats_lock:
+            _dedup_stats['uploads'] += 1
+        return blob_path
+    except Exception as e:
+        logger.warning(f"Upload dedup skipped: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        if os.path.isfile(saved_full):
+            return saved_rel_path
+        # 이미 blob 경로로 이동된 뒤 DB 기록만 실패한 경우
+        blob_path = blob_relpath(sha256, original_name)
+        return blob_path if os.path.isfile(os.path.join(upload_folder, blob_path)) else saved_rel_path
+
+
+def release_upload_file(file_path: str, *, delete_func: Callable[[str], object] | None = None) -> bool:
+    """
+    room_files 참조를 지운 뒤(커밋 후) 호출. 더 이상 참조되지 않으면 파일을 삭제한다.
+
+    - 중복 제거 대상이 아닌 파일: 기존처럼 바로 삭제
+    - 중복 제거 blob: 쓰기 락 안에서 refcount가 0이고 보류(held_until)와 대기 중인 업로드 토큰이
+      없음을 확인한 뒤, 락을 쥔 채로 삭제 (같은 내용의 adopt가 지워질 파일을 돌려주지 않도록)
+    delete_func: 중복 제거 대상이 아닌 파일의 삭제 함수 (기본 safe_file_delete, 백그라운드 큐 지정 가능)
+    반환: 삭제(또는 삭제 예약)했으면 True
+    """
+    from app.models.base import safe_file_delete
+
+    rel_path = str(file_path or '').replace('\\', '/').strip('/')
+    if not rel_path:
+        return False
+    full_path = os.path.join(_upload_folder(), rel_path)
+    conn = _get_db()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+    except Exception as e:
+        # 확인 없이 지우지 않는다. 남은 파일은 고아 파일 정리에서 회수된다.
+        logger.warning(f"Release upload file skipped: {rel_path}: {e}")
+        return False
+    try:
+        row = conn.execute('SELECT refcount, held_until FROM file_blobs WHERE file_path = ?', (rel_path,)).fetchone()
+        if row is None:
+            conn.rollback()
+            (delete_func or safe_file_delete)(full_path)
+            return True
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if int(row[0] or 0) > 0 or (row[1] and str(row[1]) > now):
+            conn.rollback()
+            return False
+        pending = conn.execute(
+            '''
+            SELECT 1 FROM upload_tokens
+            WHERE file_path = ? AND consumed_at IS NULL AND expires_at > ?
+            LIMIT 1
+            ''',
+            (rel_path, now),
+        ).fetchone()
+        if pending:
+            conn.rollback()
+            return False
+        cursor = conn.execute('DELETE FROM file_blobs WHERE file_path = ? AND refcount <= 0', (rel_path,))
+        if not cursor.rowcount:
+            conn.rollback()
+            return False
+        safe_file_delete(full_path)
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.warning(f"Release upload file check failed: {rel_path}: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return False
+
+
+def get_dedup_stats() -> dict:
+    """중복 제거 현황 (논리 바이트 = blob 크기 × 참조 수)"""
+    with _stats_lock:
+        counters = dict(_dedup_stats)
+    stats = {
+        'enabled': bool(UPLOAD_DEDUP_ENABLED),
+        'blobs': 0,
+        'references': 0,
+        'stored_bytes': 0,
+        'logical_bytes': 0,
+        'bytes_saved': 0,
+        'dedup_ratio': 1.0,
+        **counters,
+    }
+    try:
+        row = _get_db().execute(
+            '''
+            SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(file_size), 0),
+                   COALESCE(SUM(file_size * MAX(refcount, 1)), 0)
+            FROM file_blobs
+            '''
+        ).fetchone()
+        stats['blobs'] = int(row[0] or 0)
+        stats['references'] = int(row[1] or 0)
+        stats['stored_bytes'] = int(row[2] or 0)
+        stats['logical_bytes'] = int(row[3] or 0)
+        stats['bytes_saved'] = stats['logical_bytes'] - stats['stored_bytes']
+        if stats['stored_bytes'] > 0:
+            stats['dedup_ratio'] = round(stats['logical_bytes'] / stats['stored_bytes'], 3)
+    except Exception as e:
+        logger.debug(f"Dedup stats error: {e}")
+    return stats
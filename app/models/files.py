@@ -6,7 +6,10 @@
 import logging
 import os
 
-from app.models.base import get_db, safe_file_delete
+from app.models.base import get_db
+from app.models.file_blobs import release_upload_file
+from app.models.pagination import KIND_TIME, build_page, cursor_values
+from app.models.upload_acl_cache import invalidate_upload_acl
 
 try:
     from config import UPLOAD_FOLDER
@@ -36,6 +39,7 @@ def add_room_file(
             VALUES (?, ?, ?, ?, ?, ?, ?)
         ''', (room_id, uploaded_by, file_path, file_name, file_size, file_type, message_id))
         conn.commit()
+        invalidate_upload_acl(file_path)
         return cursor.lastrowid
     except Exception as e:
         logger.error(f"Add room file error: {e}")
@@ -53,7 +57,7 @@ def get_room_files(room_id: int, file_type: str | None = None):
                 FROM room_files rf
                 JOIN users u ON rf.uploaded_by = u.id
                 WHERE rf.room_id = ? AND rf.file_type = ?
-                ORDER BY rf.uploaded_at DESC
+                ORDER BY rf.uploaded_at DESC, rf.id DESC
             ''', (room_id, file_type))
         else:
             cursor.execute('''
@@ -61,7 +65,7 @@ def get_room_files(room_id: int, file_type: str | None = None):
                 FROM room_files rf
                 JOIN users u ON rf.uploaded_by = u.id
                 WHERE rf.room_id = ?
-                ORDER BY rf.uploaded_at DESC
+                ORDER BY rf.uploaded_at DESC, rf.id DESC
             ''', (room_id,))
         return [dict(f) for f in cursor.fetchall()]
     except Exception as e:
@@ -69,6 +73,46 @@ def get_room_files(room_id: int, file_type: str | None = None):
         return []
 
 
+def get_room_files_page(
+    room_id: int,
+    file_type: str | None = None,
+    limit: int = 50,
+    page_cursor: dict | None = None,
+):
+    """
+    대화방의 파일 목록 한 페이지 - (uploaded_at, id) 키셋
+
+    반환: {'files', 'has_more', 'next_cursor'}. page_cursor는 decode_cursor 결과.
+    """
+    conn = get_db()
+    cursor = conn.cursor()
+    after = cursor_values(page_cursor, KIND_TIME, 2)
+    try:
+        conditions = ['rf.room_id = ?']
+        params: list = [room_id]
+        if file_type:
+            conditions.append('rf.file_type = ?')
+            params.append(file_type)
+        if after:
+            conditions.append('(rf.uploaded_at, rf.id) < (?, ?)')
+            params.extend(after)
+        cursor.execute(f'''
+            SELECT rf.*, u.nickname as uploader_name
+            FROM room_files rf
+            JOIN users u ON rf.uploaded_by = u.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY rf.uploaded_at DESC, rf.id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
+        files, next_cursor = build_page(
+            [dict(f) for f in cursor.fetchall()], limit, KIND_TIME, lambda f: [f['uploaded_at'], f['id']]
+        )
+        return {'files': files, 'has_more': next_cursor is not None, 'next_cursor': next_cursor}
+    except Exception as e:
+        logger.error(f"Get room files page error: {e}")
+        return {'files': [], 'has_more': False, 'next_cursor': None}
+
+
 def delete_room_file(
     file_id: int,
     user_id: int,
@@ -96,10 +140,10 @@ def delete_room_file(
         file_path = str(file['file_path'] or '')
         cursor.execute('DELETE FROM room_files WHERE id = ?', (file_id,))
         conn.commit()
+        invalidate_upload_acl(file_path)
         
-        # 실제 파일 삭제
-        full_path = os.path.join(UPLOAD_FOLDER, file_path)
-        if safe_file_delete(full_path):
+        # 실제 파일 삭제 (중복 제거된 파일은 마지막 참조가 지워질 때만)
+        if release_upload_file(file_path):
             logger.debug(f"File deleted from disk: {file_path}")
         
         return True, file_path
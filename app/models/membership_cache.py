@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+대화방 멤버십 캐시 (user→rooms, room→users)
+
+- 두 인덱스 모두 크기 제한 LRU이며 멤버십 변경 이벤트
+  (create_room / add_room_member / kick_member / leave_room_db / delete_user)로
+  직접 갱신된다.
+- 다른 워커 프로세스나 직접 SQL/관리 도구로 바뀐 멤버십은 이벤트가 오지 않으므로
+  항목은 적재 후 MEMBERSHIP_CACHE_TTL_SECONDS가 지나면 버리고 다시 적재한다.
+- 미스 시에만 room_members 경량 조회로 적재한다.
+- 적재 도중 멤버십 변경이 일어나면 (세대 번호 불일치) 결과를 캐시에 저장하지 않는다.
+- 접근이 거부된 (user_id, room_id)는 짧은 TTL의 음성 캐시에 기록해, 나간 방에
+  이벤트를 반복 전송하는 클라이언트가 매번 DB 조회를 일으키지 않게 한다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    from config import MEMBERSHIP_CACHE_MAX_USERS, MEMBERSHIP_CACHE_MAX_ROOMS
+except ImportError:
+    MEMBERSHIP_CACHE_MAX_USERS = 5000
+    MEMBERSHIP_CACHE_MAX_ROOMS = 5000
+
+try:
+    from config import MEMBERSHIP_CACHE_TTL_SECONDS
+except ImportError:
+    MEMBERSHIP_CACHE_TTL_SECONDS = 300
+
+try:
+    from config import MEMBERSHIP_DENY_CACHE_TTL_SECONDS, MEMBERSHIP_DENY_CACHE_MAX_SIZE
+except ImportError:
+    MEMBERSHIP_DENY_CACHE_TTL_SECONDS = 30
+    MEMBERSHIP_DENY_CACHE_MAX_SIZE = 10000
+
+
+class _LRUIndex:
+    """key → set[int] LRU 인덱스 (락은 MembershipCache가 관리). ttl > 0이면 put 후 ttl초가 지난 항목은 없는 것으로 본다."""
+
+    def __init__(self, max_size: int, ttl: float = 0.0):
+        self.max_size = max(1, int(max_size or 1))
+        self.ttl = max(0.0, float(ttl or 0))
+        self.entries: OrderedDict[int, set[int]] = OrderedDict()
+        # key → 만료 시각 (monotonic). entries를 직접 pop/clear 해도 put/만료 확인 시 정리된다.
+        self.expires_at: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def _expire(self, key) -> bool:
+        """만료된 항목이면 제거하고 True"""
+        if self.ttl <= 0:
+            return False
+        expires_at = self.expires_at.get(key)
+        if expires_at is None or expires_at > time.monotonic():
+            return False
+        self.entries.pop(key, None)
+        del self.expires_at[key]
+        self.expired += 1
+        return True
+
+    def peek(self, key: int) -> set[int] | None:
+        """카운터/LRU 순서에 영향 없이 조회 (만료 항목은 None)"""
+        if key not in self.entries or self._expire(key):
+            return None
+        return self.entries[key]
+
+    def get(self, key: int) -> set[int] | None:
+        value = self.entries.get(key)
+        if value is None or self._expire(key):
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: int, value: set[int]) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if self.ttl > 0:
+            self.expires_at[key] = time.monotonic() + self.ttl
+            if len(self.expires_at) > 2 * self.max_size:
+                self.expires_at = {k: v for k, v in self.expires_at.items() if k in self.entries}
+        while len(self.entries) > self.max_size:
+            evicted, _value = self.entries.popitem(last=False)
+            self.expires_at.pop(evicted, None)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MembershipCache:
+    def __init__(
+        self,
+        max_users: int,
+        max_rooms: int,
+        ttl: float = MEMBERSHIP_CACHE_TTL_SECONDS,
+        deny_ttl: float = MEMBERSHIP_DENY_CACHE_TTL_SECONDS,
+        deny_max_size: int = MEMBERSHIP_DENY_CACHE_MAX_SIZE,
+    ):
+        self._lock = threading.Lock()
+        self._users = _LRUIndex(max_users, ttl)
+        self._rooms = _LRUIndex(max_rooms, ttl)
+        self._generation = 0
+        self._db_path: str | None = None
+        # (user_id, room_id) → 만료 시각 (monotonic)
+        self._denied: OrderedDict[tuple[int, int], float] = OrderedDict()
+        self._deny_ttl = max(0.0, float(deny_ttl or 0))
+        self._deny_max_size = max(1, int(deny_max_size or 1))
+        self._deny_stats = {'stored': 0, 'avoided_db_lookups': 0, 'expired': 0}
+
+    def _check_database(self) -> None:
+        # 테스트/도구에서 DB 경로가 바뀌면 이전 DB의 멤버십은 무효
+        import app.models.base as base_module
+
+        if self._db_path != base_module.DATABASE_PATH:
+            self._users.entries.clear()
+            self._rooms.entries.clear()
+            self._denied.clear()
+            self._generation += 1
+            self._db_path = base_module.DATABASE_PATH
+
+    def generation(self) -> int:
+        with self._lock:
+            self._check_database()
+            return self._generation
+
+    def get_user_rooms(self, user_id: int) -> set[int] | None:
+        with self._lock:
+            self._check_database()
+            rooms = self._users.get(user_id)
+            return set(rooms) if rooms is not None else None
+
+    def get_room_users(self, room_id: int) -> set[int] | None:
+        with self._lock:
+            self._check_database()
+            users = self._rooms.get(room_id)
+            return set(users) if users is not None else None
+
+    def peek_user_rooms(self, user_id: int) -> set[int] | None:
+        """카운터/LRU 순서에 영향 없이 조회"""
+        with self._lock:
+            rooms = self._users.peek(user_id)
+            return set(rooms) if rooms is not None else None
+
+    def peek_room_users(self, room_id: int) -> set[int] | None:
+        with self._lock:
+            users = self._rooms.peek(room_id)
+            return set(users) if users is not None else None
+
+    def store_user_rooms(self, user_id: int, room_ids, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._users.put(user_id, set(room_ids))
+
+    def store_room_users(self, room_id: int, user_ids, generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._rooms.put(room_id, set(user_ids))
+
+    def add_members(self, room_id: int, user_ids) -> None:
+        with self._lock:
+            self._generation += 1
+            room_users = self._rooms.entries.get(room_id)
+            for user_id in user_ids:
+                self._denied.pop((user_id, room_id), None)
+                user_rooms = self._users.entries.get(user_id)
+                if user_rooms is not None:
+                    user_rooms.add(room_id)
+                if room_users is not None:
+                    room_users.add(user_id)
+
+    def remove_member(self, room_id: int, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            user_rooms = self._users.entries.get(user_id)
+            if user_rooms is not None:
+                user_rooms.discard(room_id)
+            room_users = self._rooms.entries.get(room_id)
+            if room_users is not None:
+                room_users.discard(user_id)
+
+    def forget_user(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            user_rooms = self._users.entries.pop(user_id, None) or set()
+            for room_id in user_rooms:
+                room_users = self._rooms.entries.get(room_id)
+                if room_users is not None:
+                    room_users.discard(user_id)
+            # user 항목이 없던 경우 room 인덱스에 남은 흔적도 제거
+            for room_users in self._rooms.entries.values():
+                room_users.discard(user_id)
+            for key in [key for key in self._denied if key[0] == user_id]:
+                del self._denied[key]
+
+    def forget_room(self, room_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._rooms.entries.pop(room_id, None)
+            for user_rooms in self._users.entries.values():
+                user_rooms.discard(room_id)
+            for key in [key for key in self._denied if key[1] == room_id]:
+                del self._denied[key]
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            self._generation += 1
+            self._users.entries.pop(user_id, None)
+            for key in [key for key in self._denied if key[0] == user_id]:
+                del self._denied[key]
+
+    def is_denied(self, user_id: int, room_id: int) -> bool:
+        """최근 거부된 접근이면 True (DB 조회 1회를 절약한 것으로 집계)"""
+        key = (user_id, room_id)
+        with self._lock:
+            self._check_database()
+            expires_at = self._denied.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.monotonic():
+                del self._denied[key]
+                self._deny_stats['expired'] += 1
+                return False
+            self._deny_stats['avoided_db_lookups'] += 1
+            return True
+
+    def mark_denied(self, user_id: int, room_id: int) -> None:
+        if self._deny_ttl <= 0:
+            return
+        key = (user_id, room_id)
+        with self._lock:
+            self._check_database()
+            self._denied[key] = time.monotonic() + self._deny_ttl
+            self._denied.move_to_end(key)
+            self._deny_stats['stored'] += 1
+            while len(self._denied) > self._deny_max_size:
+                self._denied.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._users.entries.clear()
+            self._rooms.entries.clear()
+            self._denied.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'users': {**self._users.stats(), 'expired': self._users.expired, 'ttl_seconds': self._users.ttl},
+                'rooms': {**self._rooms.stats(), 'expired': self._rooms.expired, 'ttl_seconds': self._rooms.ttl},
+                'denied': {
+                    'size': len(self._denied),
+                    'ttl_seconds': self._deny_ttl,
+                    **self._deny_stats,
+                },
+            }
+
+
+membership_cache = MembershipCache(MEMBERSHIP_CACHE_MAX_USERS, MEMBERSHIP_CACHE_MAX_ROOMS)
+
+
+def get_cached_user_room_ids(user_id: int) -> set[int]:
+    """사용자가 속한 대화방 ID 집합 (미스 시 DB 적재, 조회 실패는 캐시하지 않고 빈 집합)"""
+    cached = membership_cache.get_user_rooms(user_id)
+    if cached is not None:
+        return cached
+    from app.models.rooms import get_member_room_ids
+
+    generation = membership_cache.generation()
+    loaded = get_member_room_ids(user_id)
+    if loaded is None:
+        return set()
+    room_ids = set(loaded)
+    membership_cache.store_user_rooms(user_id, room_ids, generation)
+    return room_ids
+
+
+def get_cached_room_member_ids(room_id: int) -> set[int]:
+    """대화방 멤버 ID 집합 (미스 시 DB 적재, 조회 실패는 캐시하지 않고 빈 집합)"""
+    cached = membership_cache.get_room_users(room_id)
+    if cached is not None:
+        return cached
+    from app.models.rooms import get_room_member_ids
+
+    generation = membership_cache.generation()
+    loaded = get_room_member_ids(room_id)
+    if loaded is None:
+        return set()
+    user_ids = set(loaded)
+    membership_cache.store_room_users(room_id, user_ids, generation)
+    return user_ids
+
+
+def get_membership_cache_stats() -> dict:
+    return membership_cache.stats()
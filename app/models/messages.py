@@ -11,7 +11,19 @@ import sqlite3
 import time
 from datetime import datetime, timezone, timedelta
 
-from app.models.base import get_db, safe_file_delete
+from app.models.base import get_db
+from app.models.file_blobs import release_upload_file
+from app.models.pagination import KIND_TIME, InvalidCursorError, build_page, count_capped, cursor_values
+from app.models.search_cache import (
+    bump_room_search_version,
+    get_cached_search,
+    normalize_search_query,
+    store_cached_search,
+)
+from app.models.search_planner import describe_plan, plan_fts_search
+from app.models.upload_acl_cache import invalidate_upload_acl
+from app.models.users import get_user_by_id_cached
+from app.models.write_queue import get_message_write_queue
 
 try:
     from config import UPLOAD_FOLDER
@@ -20,6 +32,11 @@ except ImportError:
     sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
     from config import UPLOAD_FOLDER
 
+try:
+    from config import SEARCH_FTS_TRIGRAM
+except ImportError:
+    SEARCH_FTS_TRIGRAM = True
+
 logger = logging.getLogger(__name__)
 
 # 서버 통계
@@ -32,41 +49,112 @@ server_stats = {
 _stats_lock = threading.Lock()
 _fts5_probe_lock = threading.Lock()
 _fts5_probe_state = {'available': None, 'checked_at': 0.0}
+_fts5_trigram_probe_state = {'available': None, 'checked_at': 0.0}
 _FTS5_PROBE_TTL_SECONDS = 60.0
 _ws_split_re = re.compile(r'\s+')
+# trigram 토크나이저는 3글자 단위로 색인하므로 더 짧은 검색어는 unicode61 접두어 일치로 찾는다.
+_FTS_TRIGRAM_MIN_CHARS = 3
 
 
-def _fts5_available(cursor) -> bool:
+class ReplyTargetError(ValueError):
+    """답장 대상 메시지가 없거나 다른 대화방의 메시지인 경우"""
+
+
+def _fts5_available(cursor, table: str = 'messages_fts') -> bool:
+    state = _fts5_trigram_probe_state if table == 'messages_fts_trigram' else _fts5_probe_state
     now = time.monotonic()
     with _fts5_probe_lock:
-        cached = _fts5_probe_state.get('available')
-        checked_at = float(_fts5_probe_state.get('checked_at') or 0.0)
+        cached = state.get('available')
+        checked_at = float(state.get('checked_at') or 0.0)
         if cached is not None and (now - checked_at) < _FTS5_PROBE_TTL_SECONDS:
             return bool(cached)
 
     available = False
     try:
-        cursor.execute("SELECT 1 FROM messages_fts LIMIT 1")
+        cursor.execute(f"SELECT 1 FROM {table} LIMIT 1")
         cursor.fetchone()
         available = True
     except Exception:
         available = False
 
     with _fts5_probe_lock:
-        _fts5_probe_state['available'] = bool(available)
-        _fts5_probe_state['checked_at'] = now
+        state['available'] = bool(available)
+        state['checked_at'] = now
     return available
 
 
-def _fts5_build_query(text: str | None) -> str | None:
+def _fts5_split_terms(text: str | None) -> list[str]:
     raw = (text or '').strip()
     if not raw:
-        return None
-    parts = [p for p in _ws_split_re.split(raw) if p]
+        return []
+    return [p for p in _ws_split_re.split(raw) if p]
+
+
+def _fts5_build_query(text: str | None, *, prefix: bool = False) -> str | None:
+    """
+    공백으로 나눈 검색어를 AND로 묶은 FTS5 MATCH 식.
+
+    prefix=True면 각 구문을 접두어로 찾는다 (unicode61: "회의"* → "회의실에서" 일치).
+    trigram 색인에서는 구문 자체가 부분 문자열 일치다.
+    """
+    parts = _fts5_split_terms(text)
     if not parts:
         return None
+    suffix = '*' if prefix else ''
     escaped = [p.replace('"', '""') for p in parts]
-    return ' AND '.join([f'"{token}"' for token in escaped])
+    return ' AND '.join([f'"{token}"{suffix}' for token in escaped])
+
+
+def _like_escape(text: str) -> str:
+    # Escape for SQLite LIKE with ESCAPE '\'
+    return (text or '').replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _fts5_match(cursor, text: str | None) -> dict | None:
+    """
+    검색어 → 사용할 FTS 색인과 조건. FTS를 쓸 수 없으면 None (LIKE로 대체).
+
+    - 3글자 이상 검색어: trigram 색인에서 부분 문자열 일치 (한국어 조사/복합어 안쪽도 찾음)
+    - 2글자 이하 검색어만 있으면: unicode61 색인에서 어절 접두어 일치 (trigram으로는 찾을 수 없음)
+    - 둘이 섞이면 trigram 결과를 짧은 검색어의 LIKE로 거른다.
+
+    반환: table, where / params (FTS 테이블 기준 조건), terms (색인 조회에 쓴 검색어)
+    """
+    terms = _fts5_split_terms(text)
+    if not terms:
+        return None
+    long_terms = [t for t in terms if len(t) >= _FTS_TRIGRAM_MIN_CHARS]
+    short_terms = [t for t in terms if len(t) < _FTS_TRIGRAM_MIN_CHARS]
+    if long_terms and SEARCH_FTS_TRIGRAM and _fts5_available(cursor, 'messages_fts_trigram'):
+        where = 'messages_fts_trigram MATCH ?'
+        params = [_fts5_build_query(' '.join(long_terms))]
+        for term in short_terms:
+            # 긴 검색어로 이미 좁혀진 행만 확인하므로 LIKE로 부분 문자열까지 찾는다.
+            where += " AND content LIKE ? ESCAPE '\\'"
+            params.append(f'%{_like_escape(term)}%')
+        return {
+            'table': 'messages_fts_trigram',
+            'where': where,
+            'params': params,
+            'terms': long_terms,
+        }
+    if not _fts5_available(cursor):
+        return None
+    return {
+        'table': 'messages_fts',
+        'where': 'messages_fts MATCH ?',
+        'params': [_fts5_build_query(' '.join(terms), prefix=True)],
+        'terms': terms,
+    }
+
+
+def _fts5_hits_sql(cursor, text: str | None) -> tuple[str, list[str]] | None:
+    """전체 FTS 적중 (id, rank) 조회 SQL과 파라미터 (대화방 조건 없음)"""
+    match = _fts5_match(cursor, text)
+    if match is None:
+        return None
+    table = match['table']
+    return f"SELECT rowid AS id, bm25({table}) AS rank FROM {table} WHERE {match['where']}", match['params']
 
 
 def update_server_stats(key, value=1, increment=True):
@@ -134,6 +222,66 @@ def _insert_message_row(
     return int(cursor.lastrowid or 0)
 
 
+def _fetch_reply_preview(cursor, room_id: int, reply_to: int | None, *, required: bool) -> dict:
+    """INSERT와 같은 트랜잭션에서 답장 대상 검증 + 미리보기 조회"""
+    if reply_to is None:
+        return {'reply_content': None, 'reply_sender': None}
+    cursor.execute(
+        '''
+        SELECT m.content, u.nickname
+        FROM messages m
+        LEFT JOIN users u ON m.sender_id = u.id
+        WHERE m.id = ? AND m.room_id = ?
+        ''',
+        (reply_to, room_id),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        if required:
+            raise ReplyTargetError(f'invalid reply target: {reply_to}')
+        return {'reply_content': None, 'reply_sender': None}
+    return {'reply_content': row[0], 'reply_sender': row[1]}
+
+
+def _build_message_payload(
+    cursor,
+    message_id: int,
+    *,
+    room_id: int,
+    sender_id: int,
+    content: str,
+    encrypted: bool,
+    message_type: str,
+    file_path: str | None,
+    file_name: str | None,
+    reply_to: int | None,
+    client_msg_id: str | None,
+    created_at: str,
+    reply_preview: dict,
+) -> dict | None:
+    """INSERT한 값 + 캐시된 발신자 프로필로 응답 생성 (재조회 JOIN 생략)"""
+    sender = get_user_by_id_cached(sender_id)
+    if not sender:
+        return _get_message_with_sender(cursor, message_id)
+    return {
+        'id': message_id,
+        'room_id': room_id,
+        'sender_id': sender_id,
+        'content': content,
+        'encrypted': 1 if encrypted else 0,
+        'message_type': message_type,
+        'file_path': file_path,
+        'file_name': file_name,
+        'client_msg_id': client_msg_id,
+        'reply_to': reply_to,
+        'created_at': created_at,
+        'sender_name': sender.get('nickname'),
+        'sender_image': sender.get('profile_image'),
+        'reply_content': reply_preview.get('reply_content'),
+        'reply_sender': reply_preview.get('reply_sender'),
+    }
+
+
 def _get_message_with_sender(cursor, message_id: int) -> dict | None:
     cursor.execute(
         '''
@@ -191,35 +339,61 @@ def create_message(
     reply_to=None,
     encrypted=True,
     client_msg_id: str | None = None,
+    *,
+    require_reply_target: bool = False,
 ):
-    """메시지 생성"""
+    """
+    메시지 생성
+
+    답장 대상 조회와 INSERT를 한 트랜잭션에서 처리하고, 응답은 INSERT한 값으로
+    구성한다. require_reply_target=True이면 같은 방에 없는 답장 대상에 대해
+    ReplyTargetError를 발생시킨다. client_msg_id 중복은 UNIQUE 인덱스로 판별한다.
+    """
     now_kst = _now_kst()
     normalized_client_msg_id = _normalize_client_msg_id(client_msg_id)
+    row_values = {
+        'room_id': int(room_id),
+        'sender_id': int(sender_id),
+        'content': content,
+        'encrypted': bool(encrypted),
+        'message_type': message_type,
+        'file_path': file_path,
+        'file_name': file_name,
+        'reply_to': reply_to,
+        'client_msg_id': normalized_client_msg_id,
+        'created_at': now_kst,
+    }
 
     conn = get_db()
     cursor = conn.cursor()
-    try:
-        message_id = _insert_message_row(
-            cursor,
-            room_id=int(room_id),
-            sender_id=int(sender_id),
-            content=content,
-            encrypted=bool(encrypted),
-            message_type=message_type,
-            file_path=file_path,
-            file_name=file_name,
-            reply_to=reply_to,
-            client_msg_id=normalized_client_msg_id,
-            created_at=now_kst,
+
+    def _insert(write_cursor) -> tuple[int, dict]:
+        reply_preview = _fetch_reply_preview(
+            write_cursor, row_values['room_id'], reply_to, required=require_reply_target
         )
-        conn.commit()
-        message = _get_message_with_sender(cursor, message_id)
+        return _insert_message_row(write_cursor, **row_values), reply_preview
+
+    try:
+        write_queue = get_message_write_queue()
+        if write_queue is not None:
+            message_id, reply_preview = write_queue.submit(_insert)
+        else:
+            message_id, reply_preview = _insert(cursor)
+            conn.commit()
+        bump_room_search_version(row_values['room_id'])
+        message = _build_message_payload(cursor, int(message_id), reply_preview=reply_preview, **row_values)
 
         update_server_stats('total_messages')
 
         if message:
             message['__created'] = True
         return message
+    except ReplyTargetError:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
     except sqlite3.IntegrityError as e:
         # Duplicate (room_id, sender_id, client_msg_id) replay -> return existing row.
         if normalized_client_msg_id:
@@ -244,43 +418,66 @@ def create_file_message_with_record(
     file_size: int | None = None,
     reply_to: int | None = None,
     client_msg_id: str | None = None,
+    require_reply_target: bool = False,
 ) -> dict | None:
     """
     Atomically create a file/image message and its room_files row.
     Rolls back DB state and deletes uploaded file on failure.
+    Raises ReplyTargetError (after cleanup) when require_reply_target is set
+    and the reply target is not in the same room.
     """
     now_kst = _now_kst()
     normalized_client_msg_id = _normalize_client_msg_id(client_msg_id)
+    row_values = {
+        'room_id': int(room_id),
+        'sender_id': int(sender_id),
+        'content': content,
+        'encrypted': False,
+        'message_type': message_type,
+        'file_path': file_path,
+        'file_name': file_name,
+        'reply_to': reply_to,
+        'client_msg_id': normalized_client_msg_id,
+        'created_at': now_kst,
+    }
     conn = get_db()
     cursor = conn.cursor()
-    full_path = os.path.join(UPLOAD_FOLDER, file_path)
-    try:
-        message_id = _insert_message_row(
-            cursor,
-            room_id=int(room_id),
-            sender_id=int(sender_id),
-            content=content,
-            encrypted=False,
-            message_type=message_type,
-            file_path=file_path,
-            file_name=file_name,
-            reply_to=reply_to,
-            client_msg_id=normalized_client_msg_id,
-            created_at=now_kst,
+
+    def _insert(write_cursor) -> tuple[int, dict]:
+        reply_preview = _fetch_reply_preview(
+            write_cursor, row_values['room_id'], reply_to, required=require_reply_target
         )
-        cursor.execute(
+        new_message_id = _insert_message_row(write_cursor, **row_values)
+        write_cursor.execute(
             '''
             INSERT INTO room_files (room_id, uploaded_by, file_path, file_name, file_size, file_type, message_id)
             VALUES (?, ?, ?, ?, ?, ?, ?)
             ''',
-            (room_id, sender_id, file_path, file_name or '', file_size, message_type, message_id),
+            (room_id, sender_id, file_path, file_name or '', file_size, message_type, new_message_id),
         )
-        conn.commit()
-        message = _get_message_with_sender(cursor, message_id)
+        return new_message_id, reply_preview
+
+    try:
+        write_queue = get_message_write_queue()
+        if write_queue is not None:
+            message_id, reply_preview = write_queue.submit(_insert)
+        else:
+            message_id, reply_preview = _insert(cursor)
+            conn.commit()
+        invalidate_upload_acl(file_path)
+        bump_room_search_version(row_values['room_id'])
+        message = _build_message_payload(cursor, int(message_id), reply_preview=reply_preview, **row_values)
         update_server_stats('total_messages')
         if message:
             message['__created'] = True
         return message
+    except ReplyTargetError:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        release_upload_file(file_path)
+        raise
     except sqlite3.IntegrityError as e:
         try:
             conn.rollback()
@@ -290,9 +487,9 @@ def create_file_message_with_record(
             existing = get_message_by_client_msg_id(room_id, sender_id, normalized_client_msg_id)
             if existing:
                 # Duplicate replay with a freshly uploaded file should not leak orphan files.
-                safe_file_delete(full_path)
+                release_upload_file(file_path)
                 return existing
-        safe_file_delete(full_path)
+        release_upload_file(file_path)
         logger.error(f"Create file message integrity error: {e}")
         return None
     except Exception as e:
@@ -300,7 +497,7 @@ def create_file_message_with_record(
             conn.rollback()
         except Exception:
             pass
-        safe_file_delete(full_path)
+        release_upload_file(file_path)
         logger.error(f"Create file message error: {e}")
         return None
 
@@ -353,7 +550,12 @@ def get_room_messages(room_id, limit=50, before_id=None, include_reactions=True)
 
 
 def update_last_read(room_id, user_id, message_id):
-    """마지막 읽은 메시지 업데이트"""
+    """
+    마지막 읽은 메시지 업데이트
+
+    last_read 이후 남은 메시지로 unread_count를 다시 계산하고 그 값을 반환한다
+    (실패 시 None). 보통 최신 메시지까지 읽으므로 (room_id, id) 인덱스 범위가 작다.
+    """
     conn = get_db()
     cursor = conn.cursor()
     try:
@@ -366,9 +568,27 @@ def update_last_read(room_id, user_id, message_id):
                   WHERE m.id = ? AND m.room_id = ?
               )
         ''', (message_id, room_id, user_id, message_id, message_id, room_id))
+        cursor.execute('''
+            UPDATE room_members
+            SET unread_count = (
+                SELECT COUNT(*)
+                FROM messages m
+                WHERE m.room_id = room_members.room_id
+                  AND m.id > COALESCE(room_members.last_read_message_id, 0)
+                  AND m.sender_id != room_members.user_id
+            )
+            WHERE room_id = ? AND user_id = ?
+        ''', (room_id, user_id))
+        cursor.execute(
+            'SELECT unread_count FROM room_members WHERE room_id = ? AND user_id = ?',
+            (room_id, user_id),
+        )
+        row = cursor.fetchone()
         conn.commit()
+        return int(row[0] or 0) if row else None
     except Exception as e:
         logger.error(f"Update last read error: {e}")
+        return None
 
 
 def get_unread_count(room_id, message_id, sender_id=None):
@@ -432,13 +652,20 @@ def delete_message(message_id, user_id):
         cursor.execute("UPDATE messages SET content = '[삭제된 메시지]', encrypted = 0, file_path = NULL, file_name = NULL WHERE id = ?", (message_id,))
         
         if msg['file_path']:
-            cursor.execute('DELETE FROM room_files WHERE file_path = ?', (msg['file_path'],))
+            # 중복 제거된 파일은 다른 메시지도 같은 경로를 쓰므로 이 메시지의 기록만 지운다.
+            cursor.execute('DELETE FROM room_files WHERE message_id = ?', (message_id,))
+            if cursor.rowcount == 0:
+                cursor.execute(
+                    'DELETE FROM room_files WHERE room_id = ? AND file_path = ? AND message_id IS NULL',
+                    (msg['room_id'], msg['file_path']),
+                )
              
         conn.commit()
+        bump_room_search_version(msg['room_id'])
         
         if msg['file_path']:
-            full_path = os.path.join(UPLOAD_FOLDER, msg['file_path'])
-            safe_file_delete(full_path)
+            invalidate_upload_acl(msg['file_path'])
+            release_upload_file(msg['file_path'])
         
         return True, msg['room_id']
     except Exception as e:
@@ -458,6 +685,7 @@ def edit_message(message_id, user_id, new_content):
         
         cursor.execute("UPDATE messages SET content = ? WHERE id = ?", (new_content, message_id))
         conn.commit()
+        bump_room_search_version(msg['room_id'])
         return True, "", msg['room_id']
     except Exception as e:
         logger.error(f"Edit message error: {e}")
@@ -472,23 +700,23 @@ def search_messages(user_id, query, offset=0, limit=50):
         q = (query or '').strip()
         if not q:
             return {'messages': [], 'total': 0, 'offset': offset, 'limit': limit, 'has_more': False}
-        fts_query = _fts5_build_query(q)
+        fts_match = _fts5_match(cursor, q)
 
-        if fts_query and _fts5_available(cursor):
-            cursor.execute('''
+        if fts_match:
+            plan = plan_fts_search(cursor, fts_match, user_id)
+            hits_sql, hits_params = plan['hits_sql'], plan['hits_params']
+            cursor.execute(f'''
+                WITH hits AS ({hits_sql})
                 SELECT COUNT(*)
-                FROM messages_fts f
-                JOIN room_members rm ON rm.room_id = f.room_id
-                WHERE rm.user_id = ? AND f.content MATCH ?
-            ''', (user_id, fts_query))
+                FROM hits h
+                JOIN messages m ON m.id = h.id
+                JOIN room_members rm ON rm.room_id = m.room_id
+                WHERE rm.user_id = ?
+            ''', (*hits_params, user_id))
             total_count = cursor.fetchone()[0]
 
-            cursor.execute('''
-                WITH hits AS (
-                    SELECT rowid AS id, bm25(messages_fts) AS rank
-                    FROM messages_fts
-                    WHERE content MATCH ?
-                )
+            cursor.execute(f'''
+                WITH hits AS ({hits_sql})
                 SELECT m.*, r.name as room_name, u.nickname as sender_name
                 FROM hits h
                 JOIN messages m ON m.id = h.id
@@ -498,7 +726,7 @@ def search_messages(user_id, query, offset=0, limit=50):
                 WHERE m.encrypted = 0
                 ORDER BY h.rank ASC, m.created_at DESC
                 LIMIT ? OFFSET ?
-            ''', (fts_query, user_id, limit, offset))
+            ''', (*hits_params, user_id, limit, offset))
             messages = [dict(m) for m in cursor.fetchall()]
 
             return {
@@ -544,203 +772,272 @@ def search_messages(user_id, query, offset=0, limit=50):
         return {'messages': [], 'total': 0, 'offset': 0, 'limit': limit, 'has_more': False}
 
 
-def advanced_search(
-    user_id: int,
-    query: str | None = None,
-    room_id: int | None = None,
-    sender_id: int | None = None,
-    date_from: str | None = None,
-    date_to: str | None = None,
-    file_only: bool = False,
-    limit: int = 50,
-    offset: int = 0,
-):
-    """고급 메시지 검색 - FTS 또는 LIKE 기반"""
-    conn = get_db()
-    cursor = conn.cursor()
-    try:
-        def _like_escape(text: str) -> str:
-            # Escape for SQLite LIKE with ESCAPE '\'
-            return (text or '').replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+_SEARCH_NOTE = '암호화된 메시지는 서버 검색에서 제외됩니다.'
+# 키셋 조건: 시간순은 (created_at, id) 내림차순, FTS는 (rank 오름차순, id 내림차순)
+_TIME_AFTER_SQL = '({prefix}created_at, {prefix}id) < (?, ?)'
+_RANK_AFTER_SQL = '(h.rank > ? OR (h.rank = ? AND m.id < ?))'
 
-        conditions = ['rm.user_id = ?']
-        params: list[int | str] = [user_id]
 
-        if room_id:
-            conditions.append('m.room_id = ?')
-            params.append(room_id)
-        if sender_id:
-            conditions.append('m.sender_id = ?')
-            params.append(sender_id)
-        if date_from:
-            conditions.append('m.created_at >= ?')
-            params.append(date_from)
-        if date_to:
-            conditions.append('m.created_at <= ?')
-            params.append(date_to)
-
-        if file_only:
-            conditions.append("m.message_type IN ('file', 'image')")
-            if query:
-                # Optimize file name search:
-                # 1) Prefer prefix match (uses idx_messages_file_name)
-                # 2) Fallback to contains match (still supported)
-                q = _like_escape(query.strip())
-                if q:
-                    where_base = ' AND '.join(conditions)
-
-                    prefix = f'{q}%'
-                    contains = f'%{q}%'
-
-                    # Count
-                    count_params = params.copy() + [prefix] + params.copy() + [contains, prefix]
-                    cursor.execute(f'''
-                        SELECT COUNT(DISTINCT id) FROM (
-                            SELECT m.id AS id
-                            FROM messages m
-                            JOIN rooms r ON m.room_id = r.id
-                            JOIN room_members rm ON r.id = rm.room_id
-                            WHERE {where_base}
-                              AND m.file_name LIKE ? ESCAPE '\\'
-                            UNION ALL
-                            SELECT m.id AS id
-                            FROM messages m
-                            JOIN rooms r ON m.room_id = r.id
-                            JOIN room_members rm ON r.id = rm.room_id
-                            WHERE {where_base}
-                              AND m.file_name LIKE ? ESCAPE '\\'
-                              AND m.file_name NOT LIKE ? ESCAPE '\\'
-                        ) t
-                    ''', count_params)
-                    total_count = cursor.fetchone()[0]
-
-                    list_params = params.copy() + [prefix] + params.copy() + [contains, prefix, limit, offset]
-                    cursor.execute(f'''
-                        SELECT * FROM (
-                            SELECT m.*, r.name as room_name, u.nickname as sender_name
-                            FROM messages m
-                            JOIN rooms r ON m.room_id = r.id
-                            JOIN room_members rm ON r.id = rm.room_id
-                            JOIN users u ON m.sender_id = u.id
-                            WHERE {where_base}
-                              AND m.file_name LIKE ? ESCAPE '\\'
-                            UNION ALL
-                            SELECT m.*, r.name as room_name, u.nickname as sender_name
-                            FROM messages m
-                            JOIN rooms r ON m.room_id = r.id
-                            JOIN room_members rm ON r.id = rm.room_id
-                            JOIN users u ON m.sender_id = u.id
-                            WHERE {where_base}
-                              AND m.file_name LIKE ? ESCAPE '\\'
-                              AND m.file_name NOT LIKE ? ESCAPE '\\'
-                        )
-                        ORDER BY created_at DESC
-                        LIMIT ? OFFSET ?
-                    ''', list_params)
-
-                    messages = [dict(r) for r in cursor.fetchall()]
-                    return {
-                        'messages': messages,
-                        'total': total_count,
-                        'offset': offset,
-                        'limit': limit,
-                        'has_more': offset + len(messages) < total_count,
-                    }
-        else:
-            if query:
-                conditions.append('m.encrypted = 0')
-
-                fts_query = _fts5_build_query(query)
-                if fts_query and _fts5_available(cursor):
-                    where_clause = ' AND '.join(conditions)
-
-                    count_params = [fts_query] + params.copy()
-                    cursor.execute(f'''
-                        WITH hits AS (
-                            SELECT rowid AS id, bm25(messages_fts) AS rank
-                            FROM messages_fts
-                            WHERE content MATCH ?
-                        )
-                        SELECT COUNT(DISTINCT m.id)
-                        FROM hits h
-                        JOIN messages m ON m.id = h.id
+def _time_after(page_cursor: dict | None, prefix: str = 'm.') -> tuple[str, list]:
+    values = cursor_values(page_cursor, KIND_TIME, 2)
+    if values is None:
+        return '', []
+    return ' AND ' + _TIME_AFTER_SQL.format(prefix=prefix), values
+
+
+def _time_key(message: dict) -> list:
+    return [message['created_at'], message['id']]
+
+
+def _search_page(rows: list[dict], limit: int, offset: int, kind: str, key, total) -> dict:
+    messages, next_cursor = build_page(rows, limit, kind, key)
+    count, capped = total if total is not None else (None, False)
+    return {
+        'messages': messages,
+        'total': count,
+        'total_capped': capped,
+        'offset': offset,
+        'limit': limit,
+        'has_more': next_cursor is not None,
+        'next_cursor': next_cursor,
+    }
+
+
+def _run_advanced_search(
+    cursor,
+    user_id: int,
+    query: str | None,
+    room_id: int | None,
+    sender_id: int | None,
+    date_from: str | None,
+    date_to: str | None,
+    file_only: bool,
+    limit: int,
+    offset: int,
+    page_cursor: dict | None,
+    include_total: bool,
+    explain: bool,
+) -> dict:
+    conditions = ['rm.user_id = ?']
+    params: list[int | str] = [user_id]
+
+    if room_id:
+        conditions.append('m.room_id = ?')
+        params.append(room_id)
+    if sender_id:
+        conditions.append('m.sender_id = ?')
+        params.append(sender_id)
+    if date_from:
+        conditions.append('m.created_at >= ?')
+        params.append(date_from)
+    if date_to:
+        conditions.append('m.created_at <= ?')
+        params.append(date_to)
+
+    if file_only:
+        conditions.append("m.message_type IN ('file', 'image')")
+        if query:
+            # Optimize file name search:
+            # 1) Prefer prefix match (uses idx_messages_file_name)
+            # 2) Fallback to contains match (still supported)
+            q = _like_escape(query.strip())
+            if q:
+                where_base = ' AND '.join(conditions)
+
+                prefix = f'{q}%'
+                contains = f'%{q}%'
+                union_params = params.copy() + [prefix] + params.copy() + [contains, prefix]
+
+                total = None
+                if include_total:
+                    total = count_capped(cursor, f'''
+                        SELECT m.id AS id
+                        FROM messages m
                         JOIN rooms r ON m.room_id = r.id
                         JOIN room_members rm ON r.id = rm.room_id
-                        WHERE {where_clause}
-                    ''', count_params)
-                    total_count = cursor.fetchone()[0]
-
-                    list_params = [fts_query] + params + [limit, offset]
-                    cursor.execute(f'''
-                        WITH hits AS (
-                            SELECT rowid AS id, bm25(messages_fts) AS rank
-                            FROM messages_fts
-                            WHERE content MATCH ?
-                        )
+                        WHERE {where_base}
+                          AND m.file_name LIKE ? ESCAPE '\\'
+                        UNION ALL
+                        SELECT m.id AS id
+                        FROM messages m
+                        JOIN rooms r ON m.room_id = r.id
+                        JOIN room_members rm ON r.id = rm.room_id
+                        WHERE {where_base}
+                          AND m.file_name LIKE ? ESCAPE '\\'
+                          AND m.file_name NOT LIKE ? ESCAPE '\\'
+                    ''', union_params)
+
+                after_sql, after_params = _time_after(page_cursor, prefix='')
+                list_params = union_params + after_params + [limit + 1, 0 if after_params else offset]
+                cursor.execute(f'''
+                    SELECT * FROM (
                         SELECT m.*, r.name as room_name, u.nickname as sender_name
+                        FROM messages m
+                        JOIN rooms r ON m.room_id = r.id
+                        JOIN room_members rm ON r.id = rm.room_id
+                        JOIN users u ON m.sender_id = u.id
+                        WHERE {where_base}
+                          AND m.file_name LIKE ? ESCAPE '\\'
+                        UNION ALL
+                        SELECT m.*, r.name as room_name, u.nickname as sender_name
+                        FROM messages m
+                        JOIN rooms r ON m.room_id = r.id
+                        JOIN room_members rm ON r.id = rm.room_id
+                        JOIN users u ON m.sender_id = u.id
+                        WHERE {where_base}
+                          AND m.file_name LIKE ? ESCAPE '\\'
+                          AND m.file_name NOT LIKE ? ESCAPE '\\'
+                    )
+                    WHERE 1 = 1{after_sql}
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT ? OFFSET ?
+                ''', list_params)
+
+                rows = [dict(r) for r in cursor.fetchall()]
+                return _search_page(rows, limit, offset, KIND_TIME, _time_key, total)
+    else:
+        if query:
+            conditions.append('m.encrypted = 0')
+
+            fts_match = _fts5_match(cursor, query)
+            if fts_match:
+                plan = plan_fts_search(cursor, fts_match, user_id, room_id, explain=explain)
+                hits_sql, hits_params = plan['hits_sql'], plan['hits_params']
+                kind = f"fts:{plan['strategy']}"
+                where_clause = ' AND '.join(conditions)
+
+                total = None
+                if include_total:
+                    total = count_capped(cursor, f'''
+                        WITH hits AS ({hits_sql})
+                        SELECT m.id
                         FROM hits h
                         JOIN messages m ON m.id = h.id
                         JOIN rooms r ON m.room_id = r.id
                         JOIN room_members rm ON r.id = rm.room_id
-                        JOIN users u ON m.sender_id = u.id
                         WHERE {where_clause}
-                        ORDER BY h.rank ASC, m.created_at DESC
-                        LIMIT ? OFFSET ?
-                    ''', list_params)
-
-                    messages = [dict(r) for r in cursor.fetchall()]
-                    out = {
-                        'messages': messages,
-                        'total': total_count,
-                        'offset': offset,
-                        'limit': limit,
-                        'has_more': offset + len(messages) < total_count,
-                        'note': '\uc554\ud638\ud654\ub41c \uba54\uc2dc\uc9c0\ub294 \uc11c\ubc84 \uac80\uc0c9\uc5d0\uc11c \uc81c\uc678\ub429\ub2c8\ub2e4.',
-                    }
-                    return out
-
-                # FTS5 unavailable -> fallback to LIKE
-                conditions.append('m.content LIKE ?')
-                params.append(f'%{query}%')
-
-        where_clause = ' AND '.join(conditions)
-
-        count_params = params.copy()
-        cursor.execute(f'''
-            SELECT COUNT(DISTINCT m.id)
-            FROM messages m
-            JOIN rooms r ON m.room_id = r.id
-            JOIN room_members rm ON r.id = rm.room_id
-            WHERE {where_clause}
-        ''', count_params)
-        total_count = cursor.fetchone()[0]
-
-        params.extend([limit, offset])
-        cursor.execute(f'''
-            SELECT m.*, r.name as room_name, u.nickname as sender_name
+                    ''', hits_params + params)
+
+                after = cursor_values(page_cursor, kind, 2)
+                after_sql = f' AND {_RANK_AFTER_SQL}' if after else ''
+                after_params = [after[0], after[0], after[1]] if after else []
+                list_params = hits_params + params + after_params + [limit + 1, 0 if after else offset]
+                cursor.execute(f'''
+                    WITH hits AS ({hits_sql})
+                    SELECT m.*, r.name as room_name, u.nickname as sender_name, h.rank AS _rank
+                    FROM hits h
+                    JOIN messages m ON m.id = h.id
+                    JOIN rooms r ON m.room_id = r.id
+                    JOIN room_members rm ON r.id = rm.room_id
+                    JOIN users u ON m.sender_id = u.id
+                    WHERE {where_clause}{after_sql}
+                    ORDER BY h.rank ASC, m.id DESC
+                    LIMIT ? OFFSET ?
+                ''', list_params)
+
+                rows = [dict(r) for r in cursor.fetchall()]
+                out = _search_page(rows, limit, offset, kind, lambda m: [m['_rank'], m['id']], total)
+                for message in out['messages']:
+                    message.pop('_rank', None)
+                out['note'] = _SEARCH_NOTE
+                if explain:
+                    out['plan'] = describe_plan(plan)
+                return out
+
+            # FTS5 unavailable -> fallback to LIKE
+            conditions.append('m.content LIKE ?')
+            params.append(f'%{query}%')
+
+    where_clause = ' AND '.join(conditions)
+
+    total = None
+    if include_total:
+        total = count_capped(cursor, f'''
+            SELECT m.id
             FROM messages m
             JOIN rooms r ON m.room_id = r.id
             JOIN room_members rm ON r.id = rm.room_id
-            JOIN users u ON m.sender_id = u.id
             WHERE {where_clause}
-            ORDER BY m.created_at DESC
-            LIMIT ? OFFSET ?
         ''', params)
 
-        messages = [dict(r) for r in cursor.fetchall()]
-        out = {
-            'messages': messages,
-            'total': total_count,
-            'offset': offset,
-            'limit': limit,
-            'has_more': offset + len(messages) < total_count
-        }
-        if query and not file_only:
-            out['note'] = '\uc554\ud638\ud654\ub41c \uba54\uc2dc\uc9c0\ub294 \uc11c\ubc84 \uac80\uc0c9\uc5d0\uc11c \uc81c\uc678\ub429\ub2c8\ub2e4.'
-        return out
+    after_sql, after_params = _time_after(page_cursor)
+    list_params = params + after_params + [limit + 1, 0 if after_params else offset]
+    cursor.execute(f'''
+        SELECT m.*, r.name as room_name, u.nickname as sender_name
+        FROM messages m
+        JOIN rooms r ON m.room_id = r.id
+        JOIN room_members rm ON r.id = rm.room_id
+        JOIN users u ON m.sender_id = u.id
+        WHERE {where_clause}{after_sql}
+        ORDER BY m.created_at DESC, m.id DESC
+        LIMIT ? OFFSET ?
+    ''', list_params)
+
+    rows = [dict(r) for r in cursor.fetchall()]
+    out = _search_page(rows, limit, offset, KIND_TIME, _time_key, total)
+    if query and not file_only:
+        out['note'] = _SEARCH_NOTE
+    return out
+
+
+def advanced_search(
+    user_id: int,
+    query: str | None = None,
+    room_id: int | None = None,
+    sender_id: int | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    file_only: bool = False,
+    limit: int = 50,
+    offset: int = 0,
+    page_cursor: dict | None = None,
+    include_total: bool = True,
+    explain: bool = False,
+):
+    """
+    고급 메시지 검색 - FTS 또는 LIKE 기반
+
+    page_cursor(decode_cursor 결과)가 있으면 offset 대신 이전 페이지의 마지막 정렬 키 뒤부터 읽는다.
+    정렬은 FTS면 (rank, id), 그 외는 (created_at, id). total은 SEARCH_TOTAL_CAP까지만 세고
+    넘으면 total_capped=True, include_total=False면 세지 않는다(None).
+    결과는 검색 캐시(search_cache)에 두며, 요청자 대화방의 메시지가 바뀌면 다시 검색한다.
+    explain=True(디버그 모드)면 FTS 검색 결과에 색인 통계를 담은 plan을 붙인다.
+    """
+    query = normalize_search_query(query)
+    cache_key = (
+        int(user_id),
+        query,
+        (room_id, sender_id, date_from, date_to, bool(file_only)),
+        (
+            limit,
+            offset,
+            (page_cursor['kind'], tuple(page_cursor['values'])) if page_cursor else None,
+            bool(include_total),
+            bool(explain),
+        ),
+    )
+    cached, room_stamp = get_cached_search(cache_key, user_id)
+    if cached is not None:
+        return cached
+
+    conn = get_db()
+    try:
+        out = _run_advanced_search(
+            conn.cursor(), user_id, query, room_id, sender_id, date_from, date_to,
+            file_only, limit, offset, page_cursor, include_total, explain,
+        )
+    except InvalidCursorError:
+        raise
     except Exception as e:
         logger.error(f"Advanced search error: {e}")
-        return {'messages': [], 'total': 0, 'offset': 0, 'limit': limit, 'has_more': False}
+        return {
+            'messages': [], 'total': 0, 'total_capped': False, 'offset': 0, 'limit': limit,
+            'has_more': False, 'next_cursor': None,
+        }
+    store_cached_search(cache_key, room_stamp, out)
+    return out
+
+
 def pin_message(
     room_id: int,
     pinned_by: int,
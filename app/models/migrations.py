@@ -0,0 +1,929 @@
+# -*- coding: utf-8 -*-
+"""
+번호가 붙은 스키마 마이그레이션
+
+schema_version 테이블에 적용된 번호를 기록한다. 스키마가 최신이면 시작 시
+버전 번호 하나만 조회한다. 마이그레이션은 각각 하나의 트랜잭션(BEGIN IMMEDIATE)
+에서 실행되고 소요 시간이 로그와 schema_version에 남는다.
+
+새 마이그레이션은 MIGRATIONS 끝에 다음 번호로 추가한다. 이미 배포된 마이그레이션은
+수정하지 않는다.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def _add_missing_columns(cursor, required_columns: dict[str, dict[str, str]]) -> set[tuple[str, str]]:
+    added = set()
+    for table, cols in required_columns.items():
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing_cols = [row[1] for row in cursor.fetchall()]
+        for col_name, col_def in cols.items():
+            if col_name not in existing_cols:
+                logger.info(f"Migrating: Adding column '{col_name}' to table '{table}'")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
+                added.add((table, col_name))
+    return added
+
+
+def _m001_baseline(cursor) -> None:
+    """기본 스키마 (이전 init_db / migrate_db.py 내용 통합, 기존 DB에도 안전)"""
+    # 사용자 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            nickname TEXT,
+            profile_image TEXT,
+            status TEXT DEFAULT 'offline',
+            is_platform_admin INTEGER DEFAULT 0,
+            public_key TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 대화방 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rooms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            type TEXT CHECK(type IN ('direct', 'group')),
+            created_by INTEGER,
+            encryption_key TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (created_by) REFERENCES users(id)
+        )
+    ''')
+
+    # 대화방 참여자 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS room_members (
+            room_id INTEGER,
+            user_id INTEGER,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_read_message_id INTEGER DEFAULT 0,
+            pinned INTEGER DEFAULT 0,
+            muted INTEGER DEFAULT 0,
+            PRIMARY KEY (room_id, user_id),
+            FOREIGN KEY (room_id) REFERENCES rooms(id),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # 메시지 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER NOT NULL,
+            sender_id INTEGER NOT NULL,
+            content TEXT,
+            encrypted INTEGER DEFAULT 1,
+            message_type TEXT DEFAULT 'text',
+            file_path TEXT,
+            file_name TEXT,
+            client_msg_id TEXT,
+            reply_to INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (room_id) REFERENCES rooms(id),
+            FOREIGN KEY (sender_id) REFERENCES users(id),
+            FOREIGN KEY (reply_to) REFERENCES messages(id)
+        )
+    ''')
+
+    # 접속 로그 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS access_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            action TEXT,
+            ip_address TEXT,
+            user_agent TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # 공지사항 고정 메시지 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS pinned_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER NOT NULL,
+            message_id INTEGER,
+            content TEXT,
+            pinned_by INTEGER NOT NULL,
+            pinned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (room_id) REFERENCES rooms(id),
+            FOREIGN KEY (message_id) REFERENCES messages(id),
+            FOREIGN KEY (pinned_by) REFERENCES users(id)
+        )
+    ''')
+
+    # 투표 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS polls (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER NOT NULL,
+            created_by INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            multiple_choice INTEGER DEFAULT 0,
+            anonymous INTEGER DEFAULT 0,
+            closed INTEGER DEFAULT 0,
+            ends_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (room_id) REFERENCES rooms(id),
+            FOREIGN KEY (created_by) REFERENCES users(id)
+        )
+    ''')
+
+    # 투표 옵션 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS poll_options (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            poll_id INTEGER NOT NULL,
+            option_text TEXT NOT NULL,
+            FOREIGN KEY (poll_id) REFERENCES polls(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # 투표 참여 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS poll_votes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            poll_id INTEGER NOT NULL,
+            option_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(poll_id, option_id, user_id),
+            FOREIGN KEY (poll_id) REFERENCES polls(id) ON DELETE CASCADE,
+            FOREIGN KEY (option_id) REFERENCES poll_options(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # 파일 저장소 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS room_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER NOT NULL,
+            message_id INTEGER,
+            file_path TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            file_size INTEGER,
+            file_type TEXT,
+            uploaded_by INTEGER NOT NULL,
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (room_id) REFERENCES rooms(id),
+            FOREIGN KEY (message_id) REFERENCES messages(id),
+            FOREIGN KEY (uploaded_by) REFERENCES users(id)
+        )
+    ''')
+
+    # 메시지 리액션 테이블
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS message_reactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            emoji TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(message_id, user_id, emoji),
+            FOREIGN KEY (message_id) REFERENCES messages(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+    ''')
+
+    # Desktop client device session tokens
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS device_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            device_id TEXT NOT NULL,
+            token_hash TEXT NOT NULL UNIQUE,
+            device_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            revoked_at TIMESTAMP,
+            ip TEXT,
+            user_agent TEXT,
+            remember INTEGER DEFAULT 1,
+            ttl_days INTEGER DEFAULT 30,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        )
+    ''')
+
+    # Upload message token registry (durable, multi-worker safe)
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS upload_tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token_hash TEXT NOT NULL UNIQUE,
+            user_id INTEGER NOT NULL,
+            room_id INTEGER NOT NULL,
+            file_path TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            file_type TEXT,
+            file_size INTEGER,
+            issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            consumed_at TIMESTAMP
+        )
+        '''
+    )
+
+    # Approval workflow scaffold (A2)
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS pending_user_approvals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            requested_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            reviewed_at TIMESTAMP,
+            reviewed_by INTEGER,
+            reason TEXT,
+            FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+            FOREIGN KEY (reviewed_by) REFERENCES users(id)
+        )
+        '''
+    )
+
+    # Legal hold scaffold (A5)
+    cursor.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS legal_holds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hold_type TEXT NOT NULL,
+            target_id TEXT NOT NULL,
+            active INTEGER NOT NULL DEFAULT 1,
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            released_at TIMESTAMP
+        )
+        '''
+    )
+
+    # 이전 버전 DB에 없던 컬럼 (요청 처리 중 ALTER 하던 users 컬럼 포함)
+    _add_missing_columns(cursor, {
+        'users': {
+            'is_platform_admin': 'INTEGER DEFAULT 0',
+            'status_message': 'TEXT',
+            'session_token': 'TEXT',
+        },
+        'room_members': {
+            'role': 'TEXT DEFAULT "member"',
+            'pinned': 'INTEGER DEFAULT 0',
+            'muted': 'INTEGER DEFAULT 0',
+            'last_read_message_id': 'INTEGER DEFAULT 0',
+        },
+        'messages': {
+            'reply_to': 'INTEGER',
+            'client_msg_id': 'TEXT',
+        },
+        'device_sessions': {
+            'remember': 'INTEGER DEFAULT 1',
+            'ttl_days': 'INTEGER DEFAULT 30',
+        },
+        'pending_user_approvals': {
+            'reason': 'TEXT',
+        },
+    })
+
+    # 인덱스
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_room_id ON messages(room_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_file_name ON messages(file_name)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_client_msg_id ON messages(client_msg_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_members_user_id ON room_members(user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_members_room_id ON room_members(room_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_message_reactions_message_id ON message_reactions(message_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_messages_room_id_desc ON messages(room_id, id DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_members_room_user ON room_members(room_id, user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_poll_votes_poll_user ON poll_votes(poll_id, user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_files_file_path ON room_files(file_path)')
+    try:
+        cursor.execute(
+            '''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_messages_room_sender_client_msg_unique
+            ON messages(room_id, sender_id, client_msg_id)
+            WHERE client_msg_id IS NOT NULL AND client_msg_id <> ''
+            '''
+        )
+    except sqlite3.IntegrityError as e:
+        # 과거 데이터에 client_msg_id 중복이 남아 있는 DB는 인덱스 없이 계속 동작한다.
+        logger.warning(f"Unique client_msg_id index skipped: {e}")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)")
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_users_platform_admin ON users(is_platform_admin)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_device_sessions_user_revoked '
+        'ON device_sessions(user_id, revoked_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_device_sessions_device_revoked '
+        'ON device_sessions(device_id, revoked_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_device_sessions_expires_at '
+        'ON device_sessions(expires_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_upload_tokens_expires_at '
+        'ON upload_tokens(expires_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_upload_tokens_consumed_at '
+        'ON upload_tokens(consumed_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_upload_tokens_room_user '
+        'ON upload_tokens(room_id, user_id)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_pending_user_approvals_user_status '
+        'ON pending_user_approvals(user_id, status)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_pending_user_approvals_status_requested '
+        'ON pending_user_approvals(status, requested_at)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_legal_holds_type_target_active '
+        'ON legal_holds(hold_type, target_id, active)'
+    )
+
+    # Full-text search (FTS5) for plaintext (encrypted=0) text/system messages.
+    # If this SQLite build doesn't support FTS5, skip silently.
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts
+            USING fts5(
+                content,
+                room_id UNINDEXED,
+                sender_id UNINDEXED,
+                created_at UNINDEXED,
+                tokenize='unicode61'
+            )
+        """)
+
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ai
+            AFTER INSERT ON messages BEGIN
+                INSERT INTO messages_fts(rowid, content, room_id, sender_id, created_at)
+                SELECT new.id, new.content, new.room_id, new.sender_id, new.created_at
+                WHERE new.encrypted = 0
+                  AND new.message_type IN ('text', 'system')
+                  AND new.content IS NOT NULL;
+            END;
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_ad
+            AFTER DELETE ON messages BEGIN
+                DELETE FROM messages_fts WHERE rowid = old.id;
+            END;
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_fts_au
+            AFTER UPDATE ON messages BEGIN
+                DELETE FROM messages_fts WHERE rowid = old.id;
+                INSERT INTO messages_fts(rowid, content, room_id, sender_id, created_at)
+                SELECT new.id, new.content, new.room_id, new.sender_id, new.created_at
+                WHERE new.encrypted = 0
+                  AND new.message_type IN ('text', 'system')
+                  AND new.content IS NOT NULL;
+            END;
+        """)
+
+        # Backfill once for existing DBs where the FTS table is newly created.
+        cursor.execute("SELECT COUNT(*) FROM messages_fts")
+        fts_count = cursor.fetchone()[0]
+        if not fts_count:
+            cursor.execute("""
+                INSERT INTO messages_fts(rowid, content, room_id, sender_id, created_at)
+                SELECT id, content, room_id, sender_id, created_at
+                FROM messages
+                WHERE encrypted = 0
+                  AND message_type IN ('text', 'system')
+                  AND content IS NOT NULL
+            """)
+    except Exception as e:
+        logger.debug(f"FTS5 init skipped: {e}")
+
+
+# 요약에 저장할 미리보기 본문: 암호화된 텍스트 본문은 목록에 노출하지 않으므로 저장하지 않는다.
+_ROOM_SUMMARY_CONTENT_SQL = (
+    "CASE WHEN COALESCE({m}.encrypted, 0) = 1 AND COALESCE({m}.message_type, 'text') "
+    "NOT IN ('system', 'file', 'image') THEN NULL ELSE {m}.content END"
+)
+
+
+def _ensure_room_summary_triggers(cursor) -> None:
+    """room_summaries 유지 트리거 생성 + 비어 있으면 1회 백필"""
+    new_content = _ROOM_SUMMARY_CONTENT_SQL.format(m='new')
+    latest_content = _ROOM_SUMMARY_CONTENT_SQL.format(m='m')
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS room_summaries_ai
+        AFTER INSERT ON messages BEGIN
+            INSERT OR IGNORE INTO room_summaries (room_id, message_count) VALUES (new.room_id, 0);
+            UPDATE room_summaries SET message_count = message_count + 1 WHERE room_id = new.room_id;
+            UPDATE room_summaries
+            SET last_message_id = new.id,
+                last_message = {new_content},
+                last_message_type = new.message_type,
+                last_message_time = new.created_at,
+                last_message_encrypted = COALESCE(new.encrypted, 0),
+                last_message_file_name = new.file_name
+            WHERE room_id = new.room_id AND COALESCE(last_message_id, 0) <= new.id;
+        END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS room_summaries_au
+        AFTER UPDATE OF content, encrypted, message_type, file_name ON messages BEGIN
+            UPDATE room_summaries
+            SET last_message = {new_content},
+                last_message_type = new.message_type,
+                last_message_encrypted = COALESCE(new.encrypted, 0),
+                last_message_file_name = new.file_name
+            WHERE room_id = new.room_id AND last_message_id = new.id;
+        END;
+    """)
+    # 마지막 메시지가 삭제된 경우에만 (room_id, id DESC) 인덱스로 직전 메시지를 다시 찾는다.
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS room_summaries_ad
+        AFTER DELETE ON messages BEGIN
+            UPDATE room_summaries SET message_count = MAX(message_count - 1, 0) WHERE room_id = old.room_id;
+            UPDATE room_summaries
+            SET (last_message_id, last_message, last_message_type, last_message_time,
+                 last_message_encrypted, last_message_file_name) = (
+                SELECT m.id, {latest_content}, m.message_type, m.created_at,
+                       COALESCE(m.encrypted, 0), m.file_name
+                FROM messages m
+                WHERE m.room_id = old.room_id
+                ORDER BY m.id DESC
+                LIMIT 1
+            )
+            WHERE room_id = old.room_id AND last_message_id = old.id;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS room_summaries_room_ad
+        AFTER DELETE ON rooms BEGIN
+            DELETE FROM room_summaries WHERE room_id = old.id;
+        END;
+    """)
+
+    # Backfill once for existing DBs where the summary table is newly created.
+    cursor.execute("SELECT 1 FROM room_summaries LIMIT 1")
+    if cursor.fetchone() is None:
+        cursor.execute(f"""
+            INSERT INTO room_summaries (
+                room_id, last_message_id, last_message, last_message_type, last_message_time,
+                last_message_encrypted, last_message_file_name, message_count
+            )
+            SELECT m.room_id, m.id, {latest_content}, m.message_type, m.created_at,
+                   COALESCE(m.encrypted, 0), m.file_name, agg.message_count
+            FROM (
+                SELECT room_id, MAX(id) AS last_message_id, COUNT(*) AS message_count
+                FROM messages
+                GROUP BY room_id
+            ) agg
+            JOIN messages m ON m.id = agg.last_message_id
+        """)
+
+
+# room_members.unread_count = last_read 이후 다른 사람이 보낸 메시지 수
+_REBUILD_UNREAD_SQL = """
+    UPDATE room_members
+    SET unread_count = (
+        SELECT COUNT(*)
+        FROM messages m
+        WHERE m.room_id = room_members.room_id
+          AND m.id > COALESCE(room_members.last_read_message_id, 0)
+          AND m.sender_id != room_members.user_id
+    )
+"""
+
+
+def _ensure_unread_count_triggers(cursor) -> None:
+    """room_members.unread_count 증분 유지 트리거 생성"""
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS room_members_unread_ai
+        AFTER INSERT ON messages BEGIN
+            UPDATE room_members
+            SET unread_count = COALESCE(unread_count, 0) + 1
+            WHERE room_id = new.room_id
+              AND user_id != new.sender_id
+              AND COALESCE(last_read_message_id, 0) < new.id;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS room_members_unread_ad
+        AFTER DELETE ON messages BEGIN
+            UPDATE room_members
+            SET unread_count = MAX(COALESCE(unread_count, 0) - 1, 0)
+            WHERE room_id = old.room_id
+              AND user_id != old.sender_id
+              AND COALESCE(last_read_message_id, 0) < old.id;
+        END;
+    """)
+    # 새 멤버는 가입 시점의 기존 메시지 수로 시작한다 (기존 CTE 계산과 동일한 의미).
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS room_members_unread_init
+        AFTER INSERT ON room_members BEGIN
+            UPDATE room_members
+            SET unread_count = (
+                SELECT COUNT(*)
+                FROM messages m
+                WHERE m.room_id = new.room_id
+                  AND m.id > COALESCE(new.last_read_message_id, 0)
+                  AND m.sender_id != new.user_id
+            )
+            WHERE room_id = new.room_id AND user_id = new.user_id;
+        END;
+    """)
+
+
+def _m002_room_summaries(cursor) -> None:
+    """대화방 목록용 마지막 메시지/메시지 수 요약 테이블"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS room_summaries (
+            room_id INTEGER PRIMARY KEY,
+            last_message_id INTEGER,
+            last_message TEXT,
+            last_message_type TEXT,
+            last_message_time TIMESTAMP,
+            last_message_encrypted INTEGER DEFAULT 0,
+            last_message_file_name TEXT,
+            message_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    _ensure_room_summary_triggers(cursor)
+
+
+def _m003_room_member_unread_counts(cursor) -> None:
+    """room_members.unread_count 컬럼 + 유지 트리거 + 초기 재계산"""
+    _add_missing_columns(cursor, {'room_members': {'unread_count': 'INTEGER DEFAULT 0'}})
+    _ensure_unread_count_triggers(cursor)
+    cursor.execute(_REBUILD_UNREAD_SQL)
+
+
+def _m004_stored_files(cursor) -> None:
+    """업로드/프로필 파일 매니페스트 (고아 파일 탐지를 DB anti-join으로 처리)"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stored_files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            file_path TEXT NOT NULL UNIQUE,
+            kind TEXT NOT NULL DEFAULT 'upload',
+            file_size INTEGER,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            settled_at TIMESTAMP
+        )
+    ''')
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_stored_files_pending '
+        'ON stored_files(kind, settled_at, created_at)'
+    )
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_tokens_file_path ON upload_tokens(file_path)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_profile_image ON users(profile_image)')
+
+
+def _m005_file_blobs(cursor) -> None:
+    """내용 주소(SHA-256) 기반 중복 제거 첨부 저장소 + room_files 참조 수 트리거"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS file_blobs (
+            sha256 TEXT PRIMARY KEY,
+            file_path TEXT NOT NULL UNIQUE,
+            file_size INTEGER NOT NULL DEFAULT 0,
+            refcount INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # 중복 제거되지 않은 파일은 file_blobs 행이 없으므로 갱신 대상이 없다.
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS file_blobs_ref_ai
+        AFTER INSERT ON room_files BEGIN
+            UPDATE file_blobs SET refcount = refcount + 1 WHERE file_path = new.file_path;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS file_blobs_ref_ad
+        AFTER DELETE ON room_files BEGIN
+            UPDATE file_blobs SET refcount = MAX(refcount - 1, 0) WHERE file_path = old.file_path;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS file_blobs_ref_au
+        AFTER UPDATE OF file_path ON room_files
+        WHEN old.file_path IS NOT new.file_path BEGIN
+            UPDATE file_blobs SET refcount = MAX(refcount - 1, 0) WHERE file_path = old.file_path;
+            UPDATE file_blobs SET refcount = refcount + 1 WHERE file_path = new.file_path;
+        END;
+    """)
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_room_files_message_id ON room_files(message_id)')
+
+
+def _m006_upload_sessions(cursor) -> None:
+    """분할(재개 가능) 업로드 세션 + 수신 완료 청크 기록"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_sessions (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            room_id INTEGER NOT NULL,
+            file_name TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            chunk_size INTEGER NOT NULL,
+            content_type TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS upload_session_chunks (
+            session_id TEXT NOT NULL,
+            chunk_index INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (session_id, chunk_index)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_expires_at ON upload_sessions(expires_at)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_user ON upload_sessions(user_id)')
+
+
+def _m007_messages_fts_trigram(cursor) -> None:
+    """
+    한국어 부분 문자열 검색용 trigram FTS5 색인 (messages_fts와 함께 유지).
+
+    unicode61은 공백 단위로 토큰을 나누므로 "회의실에서" 안의 "회의실"을 찾지 못한다.
+    trigram 토크나이저(SQLite 3.34+)가 없으면 건너뛴다.
+    """
+    try:
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts_trigram
+            USING fts5(
+                content,
+                room_id UNINDEXED,
+                sender_id UNINDEXED,
+                created_at UNINDEXED,
+                tokenize='trigram'
+            )
+        """)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Trigram FTS5 index skipped: {e}")
+        return
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_trigram_ai
+        AFTER INSERT ON messages BEGIN
+            INSERT INTO messages_fts_trigram(rowid, content, room_id, sender_id, created_at)
+            SELECT new.id, new.content, new.room_id, new.sender_id, new.created_at
+            WHERE new.encrypted = 0
+              AND new.message_type IN ('text', 'system')
+              AND new.content IS NOT NULL;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_trigram_ad
+        AFTER DELETE ON messages BEGIN
+            DELETE FROM messages_fts_trigram WHERE rowid = old.id;
+        END;
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_fts_trigram_au
+        AFTER UPDATE ON messages BEGIN
+            DELETE FROM messages_fts_trigram WHERE rowid = old.id;
+            INSERT INTO messages_fts_trigram(rowid, content, room_id, sender_id, created_at)
+            SELECT new.id, new.content, new.room_id, new.sender_id, new.created_at
+            WHERE new.encrypted = 0
+              AND new.message_type IN ('text', 'system')
+              AND new.content IS NOT NULL;
+        END;
+    """)
+    cursor.execute("""
+        INSERT INTO messages_fts_trigram(rowid, content, room_id, sender_id, created_at)
+        SELECT id, content, room_id, sender_id, created_at
+        FROM messages
+        WHERE encrypted = 0
+          AND message_type IN ('text', 'system')
+          AND content IS NOT NULL
+    """)
+
+
+# FTS 색인 대상: 평문 텍스트/시스템 메시지 ({m} = new | old | 테이블 별칭)
+_FTS_INDEXED_SQL = (
+    "{m}.encrypted = 0 AND {m}.message_type IN ('text', 'system') AND {m}.content IS NOT NULL"
+)
+# (FTS 테이블, 토크나이저)
+FTS_INDEXES = (('messages_fts', 'unicode61'), ('messages_fts_trigram', 'trigram'))
+
+
+def _create_external_content_fts(cursor, table: str, tokenize: str) -> None:
+    """
+    본문을 messages에서 읽는 external-content FTS5 테이블 + 유지 트리거.
+
+    색인에는 평문 텍스트/시스템 메시지만 넣는다. external-content 삭제는 색인에 넣었던
+    값 그대로 'delete' 명령을 보내야 하므로 같은 조건을 old 행에 적용한다.
+    수정 트리거는 본문/암호화 여부/메시지 유형이 실제로 바뀐 경우에만 동작한다.
+    """
+    indexed_new = _FTS_INDEXED_SQL.format(m='new')
+    indexed_old = _FTS_INDEXED_SQL.format(m='old')
+    cursor.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table}
+        USING fts5(content, content='messages', content_rowid='id', tokenize='{tokenize}')
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai
+        AFTER INSERT ON messages BEGIN
+            INSERT INTO {table}(rowid, content)
+            SELECT new.id, new.content WHERE {indexed_new};
+        END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad
+        AFTER DELETE ON messages BEGIN
+            INSERT INTO {table}({table}, rowid, content)
+            SELECT 'delete', old.id, old.content WHERE {indexed_old};
+        END;
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au
+        AFTER UPDATE OF content, encrypted, message_type ON messages
+        WHEN old.content IS NOT new.content
+          OR old.encrypted IS NOT new.encrypted
+          OR old.message_type IS NOT new.message_type
+        BEGIN
+            INSERT INTO {table}({table}, rowid, content)
+            SELECT 'delete', old.id, old.content WHERE {indexed_old};
+            INSERT INTO {table}(rowid, content)
+            SELECT new.id, new.content WHERE {indexed_new};
+        END;
+    """)
+
+
+def rebuild_fts_index(cursor, table: str) -> int:
+    """external-content FTS 색인을 messages에서 다시 채운다. 색인한 행 수 반환"""
+    # 'rebuild' 명령은 messages 전체(암호화/파일 메시지 포함)를 색인하므로 직접 채운다.
+    cursor.execute(f"INSERT INTO {table}({table}) VALUES('delete-all')")
+    cursor.execute(f"""
+        INSERT INTO {table}(rowid, content)
+        SELECT id, content FROM messages m WHERE {_FTS_INDEXED_SQL.format(m='m')}
+    """)
+    indexed = int(cursor.rowcount or 0)
+    cursor.execute(f"INSERT INTO {table}({table}) VALUES('optimize')")
+    return indexed
+
+
+def _m008_external_content_fts(cursor) -> None:
+    """
+    messages_fts / messages_fts_trigram을 external-content(content='messages')로 전환.
+
+    본문/room_id/sender_id/created_at 사본을 없애 색인 저장 공간을 줄이고,
+    관련 없는 컬럼 UPDATE에는 색인을 다시 쓰지 않는다.
+    """
+    for table, tokenize in FTS_INDEXES:
+        for suffix in ('ai', 'ad', 'au'):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_{suffix}")
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        try:
+            _create_external_content_fts(cursor, table, tokenize)
+        except sqlite3.OperationalError as e:
+            # FTS5 또는 trigram 토크나이저가 없는 SQLite 빌드
+            logger.warning(f"FTS5 index {table} skipped: {e}")
+            continue
+        rebuild_fts_index(cursor, table)
+
+
+def _m009_fts_vocab(cursor) -> None:
+    """검색 계획용 FTS 어휘 통계 테이블 (fts5vocab: 토큰별 문서 수, 저장 공간 없음)"""
+    for table, _tokenize in FTS_INDEXES:
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone()
+        if not exists:
+            continue
+        try:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_vocab USING fts5vocab('{table}', 'row')")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 vocab table for {table} skipped: {e}")
+
+
+def _m010_keyset_indexes(cursor) -> None:
+    """검색/파일 목록 키셋 페이지네이션용 (room_id, 시각, id) 인덱스"""
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_messages_room_created ON messages(room_id, created_at DESC, id DESC)'
+    )
+    cursor.execute(
+        'CREATE INDEX IF NOT EXISTS idx_room_files_room_uploaded ON room_files(room_id, uploaded_at DESC, id DESC)'
+    )
+
+
+def _m011_file_blob_holds(cursor) -> None:
+    """중복 제거 blob 재사용 직후 토큰 발급 전까지 삭제를 막는 보류 시각"""
+    columns = {row[1] for row in cursor.execute('PRAGMA table_info(file_blobs)').fetchall()}
+    if 'held_until' not in columns:
+        cursor.execute('ALTER TABLE file_blobs ADD COLUMN held_until TIMESTAMP')
+
+
+# (버전, 이름, 함수). 번호는 1부터 빠짐없이 증가해야 한다.
+MIGRATIONS: list[tuple[int, str, Callable]] = [
+    (1, 'baseline', _m001_baseline),
+    (2, 'room_summaries', _m002_room_summaries),
+    (3, 'room_member_unread_counts', _m003_room_member_unread_counts),
+    (4, 'stored_files', _m004_stored_files),
+    (5, 'file_blobs', _m005_file_blobs),
+    (6, 'upload_sessions', _m006_upload_sessions),
+    (7, 'messages_fts_trigram', _m007_messages_fts_trigram),
+    (8, 'external_content_fts', _m008_external_content_fts),
+    (9, 'fts_vocab', _m009_fts_vocab),
+    (10, 'keyset_indexes', _m010_keyset_indexes),
+    (11, 'file_blob_holds', _m011_file_blob_holds),
+]
+
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def _ensure_version_table(conn) -> None:
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms REAL
+        )
+    ''')
+
+
+def get_schema_version(conn) -> int:
+    """적용된 최신 마이그레이션 번호 (schema_version 테이블이 없으면 0)"""
+    try:
+        row = conn.execute('SELECT MAX(version) FROM schema_version').fetchone()
+    except sqlite3.OperationalError:
+        return 0
+    return int(row[0] or 0) if row else 0
+
+
+def get_applied_migrations(conn) -> list[dict]:
+    try:
+        rows = conn.execute(
+            'SELECT version, name, applied_at, duration_ms FROM schema_version ORDER BY version'
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [
+        {'version': row[0], 'name': row[1], 'applied_at': row[2], 'duration_ms': row[3]}
+        for row in rows
+    ]
+
+
+def run_migrations(conn, target_version: int | None = None) -> list[dict]:
+    """
+    현재 버전 이후의 마이그레이션을 순서대로 적용한다.
+
+    마이그레이션마다 BEGIN IMMEDIATE 트랜잭션을 사용하므로 여러 프로세스가 동시에
+    시작해도 같은 번호가 두 번 적용되지 않는다. 실패하면 해당 마이그레이션만
+    롤백하고 예외를 전파한다. 적용된 항목 목록을 반환한다.
+    """
+    target = LATEST_SCHEMA_VERSION if target_version is None else int(target_version)
+    applied = []
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # 트랜잭션을 직접 관리
+    try:
+        _ensure_version_table(conn)
+        for version, name, migrate in MIGRATIONS:
+            if version > target:
+                break
+            if version <= get_schema_version(conn):
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # 락을 얻는 사이 다른 프로세스가 적용했을 수 있다.
+                if version <= get_schema_version(conn):
+                    conn.execute('COMMIT')
+                    continue
+                started = time.perf_counter()
+                migrate(conn.cursor())
+                duration_ms = round((time.perf_counter() - started) * 1000.0, 3)
+                conn.execute(
+                    'INSERT INTO schema_version (version, name, duration_ms) VALUES (?, ?, ?)',
+                    (version, name, duration_ms),
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                logger.error(f"Schema migration {version:03d}_{name} failed")
+                raise
+            logger.info(f"Schema migration {version:03d}_{name} applied in {duration_ms}ms")
+            applied.append({'version': version, 'name': name, 'duration_ms': duration_ms})
+    finally:
+        conn.isolation_level = previous_isolation
+    return applied
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+키셋(커서) 페이지네이션
+
+커서는 마지막으로 내려준 행의 정렬 키를 담은 불투명 문자열(base64url JSON)이다.
+다음 페이지는 OFFSET 대신 "정렬 키가 커서 뒤인 행" 조건으로 읽으므로 깊은 페이지도
+앞 페이지를 다시 훑지 않는다. kind는 정렬 방식이며 다른 정렬의 커서는 거부한다.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Callable
+
+try:
+    from config import SEARCH_TOTAL_CAP
+except ImportError:
+    SEARCH_TOTAL_CAP = 1000
+
+KIND_TIME = 'time'
+_MAX_CURSOR_LENGTH = 512
+
+
+class InvalidCursorError(ValueError):
+    """형식이 잘못되었거나 다른 정렬 방식으로 만든 커서"""
+
+
+def encode_cursor(kind: str, values: list[Any]) -> str:
+    raw = json.dumps({'k': kind, 'v': list(values)}, separators=(',', ':'), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str | None) -> dict | None:
+    """커서 문자열 → {'kind', 'values'}. 빈 값이면 None"""
+    if token is None or token == '':
+        return None
+    if not isinstance(token, str) or len(token) > _MAX_CURSOR_LENGTH:
+        raise InvalidCursorError('invalid cursor')
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        data = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursorError('invalid cursor') from exc
+    if not isinstance(data, dict) or not isinstance(data.get('k'), str) or not isinstance(data.get('v'), list):
+        raise InvalidCursorError('invalid cursor')
+    values = data['v']
+    if not values or any(not isinstance(value, (int, float, str)) or isinstance(value, bool) for value in values):
+        raise InvalidCursorError('invalid cursor')
+    return {'kind': data['k'], 'values': values}
+
+
+def cursor_values(cursor: dict | None, kind: str, size: int) -> list[Any] | None:
+    """현재 정렬(kind)에 맞는 커서 키 값. 커서가 없으면 None"""
+    if cursor is None:
+        return None
+    values = cursor.get('values') or []
+    if cursor.get('kind') != kind or len(values) != size:
+        raise InvalidCursorError('cursor does not match this query')
+    return list(values)
+
+
+def count_capped(cursor, select_sql: str, params, cap: int | None = None) -> tuple[int, bool]:
+    """
+    (건수, 상한 초과 여부). 상한 + 1건까지만 센다.
+
+    select_sql은 세려는 행을 내는 SELECT(WITH 포함 가능)이다.
+    """
+    cap = max(1, int(SEARCH_TOTAL_CAP if cap is None else cap))
+    cursor.execute(f'SELECT COUNT(*) FROM ({select_sql} LIMIT ?)', (*params, cap + 1))
+    count = int(cursor.fetchone()[0] or 0)
+    return min(count, cap), count > cap
+
+
+def build_page(rows: list[dict], limit: int, kind: str, key: Callable[[dict], list[Any]]) -> tuple[list[dict], str | None]:
+    """limit + 1건 읽은 결과 → (이번 페이지, 다음 커서 또는 None)"""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(kind, key(page[-1]))
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+유지보수용 분할 삭제 엔진 + 백그라운드 파일 삭제 큐
+
+- delete_in_batches()는 조건에 맞는 행을 batch_size개씩 별도 트랜잭션으로 삭제하고
+  배치 사이에 잠시 양보해, 정리 작업이 writer 락을 오래 잡아 메시지 전송을
+  지연시키지 않게 한다.
+- 각 쓰기 트랜잭션의 시작~COMMIT 시간을 락 점유 시간으로 기록한다.
+  track_task() 구간 안에서 기록된 값은 작업별 통계(행 수, rows/sec, 최장 락 점유)로 집계된다.
+- 파일 삭제는 DB 트랜잭션과 분리해 전용 스레드가 처리한다.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    from config import MAINTENANCE_DELETE_BATCH_SIZE, MAINTENANCE_BATCH_PAUSE_MS
+except ImportError:
+    MAINTENANCE_DELETE_BATCH_SIZE = 500
+    MAINTENANCE_BATCH_PAUSE_MS = 5
+
+logger = logging.getLogger(__name__)
+
+_task_local = threading.local()
+
+
+class TaskStats:
+    """작업 하나의 삭제 행 수/배치 수/락 점유 시간"""
+
+    __slots__ = ('rows', 'batches', 'lock_hold_ms', 'max_lock_hold_ms', 'started', 'duration_ms')
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.lock_hold_ms = 0.0
+        self.max_lock_hold_ms = 0.0
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+
+    def record(self, elapsed_ms: float, rows: int) -> None:
+        self.rows += int(rows or 0)
+        self.batches += 1
+        self.lock_hold_ms += elapsed_ms
+        self.max_lock_hold_ms = max(self.max_lock_hold_ms, elapsed_ms)
+
+    def as_dict(self) -> dict:
+        seconds = self.duration_ms / 1000.0
+        return {
+            'rows': self.rows,
+            'batches': self.batches,
+            'duration_ms': round(self.duration_ms, 3),
+            'rows_per_sec': round(self.rows / seconds, 1) if seconds > 0 else 0.0,
+            'lock_hold_ms_total': round(self.lock_hold_ms, 3),
+            'max_lock_hold_ms': round(self.max_lock_hold_ms, 3),
+        }
+
+
+@contextmanager
+def track_task() -> Iterator[TaskStats]:
+    """구간 안에서 실행된 쓰기 트랜잭션을 하나의 TaskStats로 집계"""
+    stats = TaskStats()
+    previous = getattr(_task_local, 'stats', None)
+    _task_local.stats = stats
+    try:
+        yield stats
+    finally:
+        stats.duration_ms = (time.perf_counter() - stats.started) * 1000.0
+        _task_local.stats = previous
+
+
+def record_write(elapsed_ms: float, rows: int) -> None:
+    """쓰기 트랜잭션 1건 기록 (track_task 구간 밖이면 무시)"""
+    stats = getattr(_task_local, 'stats', None)
+    if stats is not None:
+        stats.record(elapsed_ms, rows)
+
+
+@contextmanager
+def timed_write(conn) -> Iterator[list]:
+    """
+    쓰기 트랜잭션 실행 + COMMIT까지의 시간을 기록.
+
+    with timed_write(conn) as affected:
+        affected.append(cursor.execute(...).rowcount)
+    """
+    affected: list[int] = []
+    started = time.perf_counter()
+    try:
+        yield affected
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        record_write((time.perf_counter() - started) * 1000.0, sum(affected))
+
+
+def delete_in_batches(
+    conn,
+    table: str,
+    where: str,
+    params: tuple = (),
+    *,
+    order_by: str | None = None,
+    batch_size: int | None = None,
+    pause_ms: float | None = None,
+) -> int:
+    """
+    WHERE 조건에 맞는 행을 batch_size개씩 나눠 삭제. 삭제된 총 행 수 반환.
+
+    order_by: 배치 선택 순서 (예: 자기 참조 FK가 있는 messages는 'id DESC'로
+    답장이 원본보다 먼저 지워지게 한다).
+    """
+    limit = max(1, int(batch_size or MAINTENANCE_DELETE_BATCH_SIZE))
+    pause = max(0.0, float(MAINTENANCE_BATCH_PAUSE_MS if pause_ms is None else pause_ms)) / 1000.0
+    order_sql = f' ORDER BY {order_by}' if order_by else ''
+    sql = (
+        f'DELETE FROM {table} WHERE rowid IN ('
+        f'SELECT rowid FROM {table} WHERE {where}{order_sql} LIMIT ?)'
+    )
+    total = 0
+    while True:
+        with timed_write(conn) as affected:
+            deleted = int(conn.execute(sql, (*params, limit)).rowcount or 0)
+            affected.append(deleted)
+        total += deleted
+        if deleted < limit:
+            return total
+        # 대기 중인 writer(메시지 전송 등)가 락을 얻을 수 있도록 양보
+        time.sleep(pause)
+
+
+# ============================================================================
+# 백그라운드 파일 삭제
+# ============================================================================
+
+class _FileDeleteQueue:
+    def __init__(self):
+        self._queue: queue.Queue[str] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stats = {'queued': 0, 'deleted': 0, 'failed': 0}
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='file-deleter', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        from app.models.base import safe_file_delete
+
+        while True:
+            path = self._queue.get()
+            try:
+                ok = safe_file_delete(path)
+                with self._lock:
+                    self._stats['deleted' if ok else 'failed'] += 1
+            except Exception as e:
+                logger.warning(f"Background file delete error: {path}: {e}")
+                with self._lock:
+                    self._stats['failed'] += 1
+            finally:
+                self._queue.task_done()
+
+    def enqueue(self, path: str) -> None:
+        if not path:
+            return
+        with self._lock:
+            self._stats['queued'] += 1
+        self._queue.put(path)
+        self._ensure_worker()
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """대기 중인 삭제가 모두 끝날 때까지 대기 (timeout 초과 시 False)"""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'pending': int(self._queue.unfinished_tasks)}
+
+
+_file_delete_queue = _FileDeleteQueue()
+
+
+def enqueue_file_delete(path: str) -> None:
+    """파일 삭제를 백그라운드 삭제 스레드에 위임"""
+    _file_delete_queue.enqueue(path)
+
+
+def flush_file_deletes(timeout: float = 10.0) -> bool:
+    return _file_delete_queue.flush(timeout)
+
+
+def get_file_delete_stats() -> dict:
+    return _file_delete_queue.stats()
@@ -7,6 +7,7 @@ import sqlite3
 import logging
 
 from app.models.base import get_db
+from app.models.membership_cache import membership_cache
 from app.utils import E2ECrypto
 
 logger = logging.getLogger(__name__)
@@ -53,6 +54,7 @@ def create_room(name, room_type, created_by, member_ids):
             )
         
         conn.commit()
+        membership_cache.add_members(room_id, member_ids)
         return room_id
     except Exception as e:
         conn.rollback()
@@ -89,7 +91,8 @@ def get_user_rooms(user_id, include_members=False):
     try:
         cursor.execute('''
             WITH my_rooms AS (
-                SELECT r.*, rm.last_read_message_id, rm.pinned, rm.muted
+                SELECT r.*, rm.last_read_message_id, rm.pinned, rm.muted,
+                       COALESCE(rm.unread_count, 0) AS unread_count
                 FROM rooms r
                 JOIN room_members rm ON r.id = rm.room_id
                 WHERE rm.user_id = ?
@@ -99,47 +102,22 @@ def get_user_rooms(user_id, include_members=False):
                 FROM room_members rm
                 JOIN my_rooms mr ON mr.id = rm.room_id
                 GROUP BY rm.room_id
-            ),
-            last_msg AS (
-                SELECT m.room_id, MAX(m.id) AS last_message_id
-                FROM messages m
-                JOIN my_rooms mr ON mr.id = m.room_id
-                GROUP BY m.room_id
-            ),
-            last_msg_data AS (
-                SELECT m.room_id,
-                       m.content AS last_message,
-                       m.message_type AS last_message_type,
-                       m.created_at AS last_message_time,
-                       COALESCE(m.encrypted, 0) AS last_message_encrypted,
-                       m.file_name AS last_message_file_name
-                FROM messages m
-                JOIN last_msg lm ON lm.room_id = m.room_id AND lm.last_message_id = m.id
-            ),
-            unread_counts AS (
-                SELECT m.room_id, COUNT(*) AS unread_count
-                FROM messages m
-                JOIN my_rooms mr ON mr.id = m.room_id
-                JOIN room_members rm ON rm.room_id = m.room_id AND rm.user_id = ?
-                WHERE m.id > COALESCE(rm.last_read_message_id, 0) AND m.sender_id != ?
-                GROUP BY m.room_id
             )
             SELECT mr.*,
                    COALESCE(mc.member_count, 0) AS member_count,
-                   lmd.last_message,
-                   lmd.last_message_type,
-                   lmd.last_message_time,
-                   lmd.last_message_encrypted,
-                   lmd.last_message_file_name,
-                   COALESCE(uc.unread_count, 0) AS unread_count
+                   rs.last_message,
+                   rs.last_message_type,
+                   rs.last_message_time,
+                   rs.last_message_encrypted,
+                   rs.last_message_file_name,
+                   COALESCE(rs.message_count, 0) AS message_count
             FROM my_rooms mr
             LEFT JOIN member_counts mc ON mc.room_id = mr.id
-            LEFT JOIN last_msg_data lmd ON lmd.room_id = mr.id
-            LEFT JOIN unread_counts uc ON uc.room_id = mr.id
+            LEFT JOIN room_summaries rs ON rs.room_id = mr.id
             ORDER BY mr.pinned DESC,
-                     (lmd.last_message_time IS NULL) ASC,
-                     lmd.last_message_time DESC
-        ''' , (user_id, user_id, user_id))
+                     (rs.last_message_time IS NULL) ASC,
+                     rs.last_message_time DESC
+        ''' , (user_id,))
         rooms = [dict(r) for r in cursor.fetchall()]
 
         if not rooms:
@@ -160,13 +138,12 @@ def get_user_rooms(user_id, include_members=False):
             elif last_type == 'system':
                 if last_message:
                     preview = last_message[:25] + ('...' if len(last_message) > 25 else '')
-            else:
-                if last_message:
-                    if last_encrypted:
-                        preview = '[\uc554\ud638\ud654\ub41c \uba54\uc2dc\uc9c0]'
-                        room['last_message'] = None
-                    else:
-                        preview = last_message[:25] + ('...' if len(last_message) > 25 else '')
+            elif last_encrypted and room.get('last_message_type'):
+                # 암호화 본문은 room_summaries에 저장되지 않는다.
+                preview = '[\uc554\ud638\ud654\ub41c \uba54\uc2dc\uc9c0]'
+                room['last_message'] = None
+            elif last_message:
+                preview = last_message[:25] + ('...' if len(last_message) > 25 else '')
 
             room['last_message_preview'] = preview
 
@@ -211,6 +188,38 @@ def get_user_rooms(user_id, include_members=False):
     except Exception as e:
         logger.error(f"Get user rooms error: {e}")
         return []
+
+
+def get_member_room_ids(user_id):
+    """사용자가 속한 대화방 ID 목록 (소켓 구독/접근 검사용 경량 조회). 조회 실패 시 None"""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            'SELECT room_id FROM room_members WHERE user_id = ? ORDER BY room_id',
+            (user_id,),
+        )
+        return [int(row[0]) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Get member room ids error: {e}")
+        return None
+
+
+def get_room_member_ids(room_id):
+    """대화방 멤버 ID 목록 (팬아웃/접근 검사용 경량 조회). 조회 실패 시 None"""
+    conn = get_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            'SELECT user_id FROM room_members WHERE room_id = ? ORDER BY user_id',
+            (room_id,),
+        )
+        return [int(row[0]) for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Get room member ids error: {e}")
+        return None
+
+
 def get_room_members(room_id):
     """대화방 멤버 조회"""
     conn = get_db()
@@ -230,7 +239,7 @@ def get_room_members(room_id):
 
 
 def is_room_member(room_id, user_id):
-    """대화방 멤버 확인"""
+    """대화방 멤버 확인. 조회 실패 시 None (거짓으로 취급되어 접근은 거부되지만 "멤버 아님"과 구분)"""
     conn = get_db()
     cursor = conn.cursor()
     try:
@@ -241,7 +250,7 @@ def is_room_member(room_id, user_id):
         return cursor.fetchone() is not None
     except Exception as e:
         logger.error(f"Check room membership error: {e}")
-        return False
+        return None
 
 
 def add_room_member(room_id, user_id):
@@ -251,6 +260,7 @@ def add_room_member(room_id, user_id):
     try:
         cursor.execute('INSERT INTO room_members (room_id, user_id) VALUES (?, ?)', (room_id, user_id))
         conn.commit()
+        membership_cache.add_members(room_id, [user_id])
         return True
     except sqlite3.IntegrityError:
         return False
@@ -300,6 +310,7 @@ def leave_room_db(room_id, user_id):
         if not remaining_members:
             cursor.execute('UPDATE rooms SET created_by = NULL WHERE id = ?', (room_id,))
             conn.commit()
+            membership_cache.remove_member(room_id, user_id)
             return True
 
         remaining_ids = {int(row['user_id']) for row in remaining_members}
@@ -321,6 +332,7 @@ def leave_room_db(room_id, user_id):
             logger.info(f"Admin auto-delegated: room {room_id}")
 
         conn.commit()
+        membership_cache.remove_member(room_id, user_id)
         return True
     except Exception as e:
         logger.error(f"Leave room error: {e}")
@@ -393,7 +405,10 @@ def kick_member(room_id, target_user_id):
         cursor.execute('DELETE FROM room_members WHERE room_id = ? AND user_id = ?', 
                       (room_id, target_user_id))
         conn.commit()
-        return cursor.rowcount > 0
+        removed = cursor.rowcount > 0
+        if removed:
+            membership_cache.remove_member(room_id, target_user_id)
+        return removed
     except Exception as e:
         logger.error(f"Kick member error: {e}")
         return False
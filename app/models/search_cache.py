@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+메시지 검색 결과 캐시
+
+- (user_id, 정규화한 검색어, 필터, 페이지) → 검색 결과를 크기 제한 LRU에 보관한다.
+- 대화방마다 버전 번호를 두고 메시지 저장/수정/삭제 시 올린다. 항목에는 저장 당시
+  요청자 대화방들의 버전을 함께 기록하고, 조회 시 하나라도 다르면 (멤버십이 바뀐 경우 포함)
+  버리고 다시 검색한다.
+- 검색 직전의 버전으로 저장하므로 검색 도중 들어온 메시지는 다음 조회에서 무효 처리된다.
+- 대화방 이름/닉네임 변경 등 버전을 올리지 않는 변경은 TTL(SEARCH_CACHE_TTL_SECONDS)로 반영된다.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from app.models.membership_cache import _LRUIndex
+
+try:
+    from config import SEARCH_CACHE_MAX_SIZE, SEARCH_CACHE_TTL_SECONDS
+except ImportError:
+    SEARCH_CACHE_MAX_SIZE = 1000
+    SEARCH_CACHE_TTL_SECONDS = 60
+
+RoomStamp = tuple[tuple[int, int], ...]
+
+
+def normalize_search_query(query: str | None) -> str | None:
+    """앞뒤/연속 공백 정리. 빈 검색어는 None"""
+    normalized = ' '.join(str(query or '').split())
+    return normalized or None
+
+
+class SearchCache:
+    def __init__(self, max_size: int, ttl: float):
+        self._lock = threading.Lock()
+        self._entries = _LRUIndex(max_size)
+        self._ttl = max(0.0, float(ttl or 0))
+        self._room_versions: dict[int, int] = {}
+        self._stale = 0
+        self._bumps = 0
+        self._db_path: str | None = None
+
+    def _check_database(self) -> None:
+        import app.models.base as base_module
+
+        if self._db_path != base_module.DATABASE_PATH:
+            self._entries.entries.clear()
+            self._room_versions.clear()
+            self._db_path = base_module.DATABASE_PATH
+
+    def _stamp(self, room_ids) -> RoomStamp:
+        return tuple((room_id, self._room_versions.get(room_id, 0)) for room_id in sorted(room_ids))
+
+    def lookup(self, key: tuple, room_ids) -> tuple[dict | None, RoomStamp]:
+        """(캐시된 결과 또는 None, 현재 대화방 버전). 미스면 그 버전으로 store 한다."""
+        with self._lock:
+            self._check_database()
+            stamp = self._stamp(room_ids)
+            if self._ttl <= 0:
+                return None, stamp
+            entry = self._entries.entries.get(key)
+            if entry is not None and (entry[0] != stamp or entry[1] <= time.monotonic()):
+                self._stale += 1
+                del self._entries.entries[key]
+                entry = None
+            if entry is None:
+                self._entries.misses += 1
+                return None, stamp
+            return self._entries.get(key)[2], stamp
+
+    def store(self, key: tuple, stamp: RoomStamp, result: dict) -> None:
+        if self._ttl <= 0:
+            return
+        with self._lock:
+            self._entries.put(key, (stamp, time.monotonic() + self._ttl, result))
+
+    def bump_room(self, room_id: int) -> None:
+        with self._lock:
+            self._check_database()
+            room_id = int(room_id)
+            self._room_versions[room_id] = self._room_versions.get(room_id, 0) + 1
+            self._bumps += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._entries.stats(),
+                'stale': self._stale,
+                'room_version_bumps': self._bumps,
+                'ttl_seconds': self._ttl,
+            }
+
+
+search_cache = SearchCache(SEARCH_CACHE_MAX_SIZE, SEARCH_CACHE_TTL_SECONDS)
+
+
+def _copy_result(result: dict) -> dict:
+    # 호출자가 응답 dict를 고쳐도 (예: plan 제거) 캐시 항목은 그대로 남도록 얕은 복사
+    copied = dict(result)
+    if isinstance(copied.get('messages'), list):
+        copied['messages'] = list(copied['messages'])
+    return copied
+
+
+def get_cached_search(key: tuple, user_id: int) -> tuple[dict | None, RoomStamp]:
+    from app.models.membership_cache import get_cached_user_room_ids
+
+    result, stamp = search_cache.lookup(key, get_cached_user_room_ids(int(user_id)))
+    return (_copy_result(result) if result is not None else None), stamp
+
+
+def store_cached_search(key: tuple, stamp: RoomStamp, result: dict) -> None:
+    search_cache.store(key, stamp, _copy_result(result))
+
+
+def bump_room_search_version(room_id: int | None) -> None:
+    """대화방 메시지가 바뀌었음을 알림 (그 방이 포함된 캐시 항목 무효)"""
+    if room_id:
+        search_cache.bump_room(room_id)
+
+
+def get_search_cache_stats() -> dict:
+    return search_cache.stats()
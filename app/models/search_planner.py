@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+메시지 검색 실행 계획
+
+FTS 검색은 fts_filter(FTS 적중을 전체 대화방에서 모은 뒤 멤버십으로 거름) 한 가지로 실행한다.
+색인 통계로 더 싼 계획을 고르는 부분은 보류했다. 요청자의 대화방 메시지를 먼저 훑는 방식
+(room_scan)은 두 가지 모두 쓸 수 없었다.
+- LIKE로 흉내내면 색인과 일치 규칙이 달라(구두점/줄바꿈 경계, 비ASCII 대소문자) 결과가 바뀐다.
+- 같은 FTS 조건(MATCH + rowid 또는 rowid IN 적중 집합)을 쓰면 fts_filter보다 느리다
+  (scripts/bench_korean_search.py, 10만 건 기준).
+
+explain=True(디버그 모드 요청)일 때만 fts5vocab 통계(토큰별 문서 수)로 추정한 적중 수 상한과
+요청자가 볼 수 있는 메시지 수(room_summaries.message_count 합)를 조회해 계획에 담고
+DEBUG 로그로 남긴다. 일반 검색은 통계 조회를 하지 않는다.
+"""
+
+from __future__ import annotations
+
+import logging
+
+try:
+    from config import SEARCH_PLANNER_ENABLED
+except ImportError:
+    SEARCH_PLANNER_ENABLED = True
+
+logger = logging.getLogger(__name__)
+
+STRATEGY_FTS_FILTER = 'fts_filter'
+# fts5vocab 범위 조회 상한 (접두어 검색어가 매우 짧을 때)
+_PREFIX_UPPER = '\U0010ffff'
+
+
+def _vocab_doc_count(cursor, table: str, term: str, *, prefix: bool) -> int | None:
+    vocab = f'{table}_vocab'
+    try:
+        if prefix:
+            row = cursor.execute(
+                f'SELECT COALESCE(SUM(doc), 0) FROM {vocab} WHERE term >= ? AND term < ?',
+                (term, term + _PREFIX_UPPER),
+            ).fetchone()
+        else:
+            row = cursor.execute(f'SELECT doc FROM {vocab} WHERE term = ?', (term,)).fetchone()
+    except Exception:
+        return None
+    return int(row[0] or 0) if row else 0
+
+
+def estimate_fts_hits(cursor, match: dict) -> int | None:
+    """
+    FTS 적중 수 상한 추정. 통계를 쓸 수 없으면 None.
+
+    trigram 색인은 검색어를 이루는 3글자 조각 중 가장 드문 조각의 문서 수,
+    unicode61 색인은 검색어마다 접두어가 같은 토큰들의 문서 수 합 중 가장 작은 값.
+    """
+    table = match['table']
+    estimate: int | None = None
+    for term in match['terms']:
+        term = term.lower()
+        if table == 'messages_fts_trigram':
+            grams = {term[i:i + 3] for i in range(len(term) - 2)}
+            counts = [_vocab_doc_count(cursor, table, gram, prefix=False) for gram in grams]
+        else:
+            counts = [_vocab_doc_count(cursor, table, term, prefix=True)]
+        if not counts or any(count is None for count in counts):
+            return None
+        term_estimate = min(counts)
+        estimate = term_estimate if estimate is None else min(estimate, term_estimate)
+    return estimate
+
+
+def _visible_messages(cursor, user_id: int, room_id: int | None) -> tuple[int, int]:
+    """(요청자가 속한 대화방 수, 그 대화방들의 메시지 수 합)"""
+    sql = '''
+        SELECT COUNT(*), COALESCE(SUM(rs.message_count), 0)
+        FROM room_members rm
+        LEFT JOIN room_summaries rs ON rs.room_id = rm.room_id
+        WHERE rm.user_id = ?
+    '''
+    params: list[int] = [int(user_id)]
+    if room_id:
+        sql += ' AND rm.room_id = ?'
+        params.append(int(room_id))
+    row = cursor.execute(sql, params).fetchone()
+    return int(row[0] or 0), int(row[1] or 0)
+
+
+def plan_fts_search(cursor, match: dict, user_id: int, room_id: int | None = None, *, explain: bool = False) -> dict:
+    """
+    FTS 검색 계획. hits_sql은 (id, rank)를 내는 CTE 본문이고 hits_params가 그 파라미터다.
+
+    explain=True면 디버그용 estimated_hits / rooms / visible_messages를 함께 조회한다.
+    """
+    table = match['table']
+    plan = {
+        'strategy': STRATEGY_FTS_FILTER,
+        'index': table,
+        'hits_sql': f"SELECT rowid AS id, bm25({table}) AS rank FROM {table} WHERE {match['where']}",
+        'hits_params': list(match['params']),
+    }
+    if not explain:
+        return plan
+
+    rooms, visible = _visible_messages(cursor, user_id, room_id)
+    estimated = estimate_fts_hits(cursor, match) if SEARCH_PLANNER_ENABLED else None
+    plan.update({'estimated_hits': estimated, 'rooms': rooms, 'visible_messages': visible})
+    logger.debug(
+        f"Search plan: {plan['strategy']} index={table} estimated_hits={estimated} "
+        f"rooms={rooms} visible_messages={visible}"
+    )
+    return plan
+
+
+def describe_plan(plan: dict) -> dict:
+    """응답/로그용 계획 요약 (SQL 제외)"""
+    return {key: plan[key] for key in ('strategy', 'index', 'estimated_hits', 'rooms', 'visible_messages')}
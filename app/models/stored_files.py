@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+업로드 파일 매니페스트 (stored_files)
+
+- /api/upload, 프로필 이미지 업로드가 저장한 파일을 기록한다.
+- 고아 파일 탐지는 아직 참조 확인이 끝나지 않은(settled_at IS NULL) 최근 항목에 대한
+  DB anti-join으로 처리한다. 참조가 확인된 항목은 settled_at을 기록해 다시 보지 않는다.
+- 전체 디렉터리 순회(reconcile)는 ORPHAN_RECONCILE_INTERVAL_HOURS마다 한 번만 수행하며,
+  매니페스트에 없는 파일을 등록하고 디스크에서 사라진 항목을 지운 뒤
+  모든 항목을 재확인 대상으로 되돌린다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Iterable
+
+try:
+    from config import ORPHAN_RECONCILE_INTERVAL_HOURS
+except ImportError:
+    ORPHAN_RECONCILE_INTERVAL_HOURS = 24
+
+logger = logging.getLogger(__name__)
+
+PROFILE_PREFIX = 'profiles/'
+_SCAN_BATCH_SIZE = 500
+
+# kind별 "참조 중" 조건 (sf = stored_files)
+_REFERENCED_SQL = {
+    'upload': 'EXISTS (SELECT 1 FROM room_files rf WHERE rf.file_path = sf.file_path)',
+    'profile': 'EXISTS (SELECT 1 FROM users u WHERE u.profile_image = sf.file_path)',
+}
+# 아직 메시지에 연결되지 않은 업로드 (유효한 업로드 토큰이 있음)
+_PENDING_TOKEN_SQL = (
+    'EXISTS (SELECT 1 FROM upload_tokens ut WHERE ut.file_path = sf.file_path '
+    'AND ut.consumed_at IS NULL AND ut.expires_at > ?)'
+)
+_HELD_SQL = (
+    "EXISTS (SELECT 1 FROM legal_holds lh WHERE lh.hold_type = 'file_path' "
+    'AND lh.target_id = sf.file_path AND lh.active = 1)'
+)
+
+_reconcile_lock = threading.Lock()
+_reconcile_state = {
+    'db_path': None,
+    'last_run_monotonic': None,
+    'last_run_at': None,
+    'last_result': {},
+}
+
+
+def _get_db():
+    import app.models.base as base_module
+    return base_module.get_db()
+
+
+def _now_ts() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def normalize_stored_path(path: str) -> str:
+    return str(path or '').replace('\\', '/').strip('/')
+
+
+def stored_file_kind(path: str) -> str:
+    return 'profile' if normalize_stored_path(path).startswith(PROFILE_PREFIX) else 'upload'
+
+
+def register_stored_file(file_path: str, *, file_size: int | None = None, created_at: str | None = None) -> bool:
+    """저장한 파일을 매니페스트에 기록 (이미 있으면 무시)"""
+    rel_path = normalize_stored_path(file_path)
+    if not rel_path:
+        return False
+    conn = _get_db()
+    try:
+        conn.execute(
+            '''
+            INSERT OR IGNORE INTO stored_files (file_path, kind, file_size, created_at)
+            VALUES (?, ?, ?, ?)
+            ''',
+            (rel_path, stored_file_kind(rel_path), file_size, created_at or _now_ts()),
+        )
+        conn.commit()
+        return True
+    except Exception as e:
+        logger.warning(f"Register stored file error: {rel_path}: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return False
+
+
+def forget_stored_files(file_paths: Iterable[str]) -> int:
+    paths = [normalize_stored_path(path) for path in file_paths if path]
+    if not paths:
+        return 0
+    conn = _get_db()
+    removed = 0
+    for start in range(0, len(paths), _SCAN_BATCH_SIZE):
+        chunk = paths[start:start + _SCAN_BATCH_SIZE]
+        placeholders = ','.join('?' for _ in chunk)
+        cursor = conn.execute(f'DELETE FROM stored_files WHERE file_path IN ({placeholders})', chunk)
+        removed += int(cursor.rowcount or 0)
+        conn.commit()
+    return removed
+
+
+def settle_referenced_files(kind: str, cutoff: str) -> int:
+    """grace 기간이 지난 미확인 항목 중 참조가 확인된 것을 settled로 표시"""
+    conn = _get_db()
+    cursor = conn.execute(
+        f'''
+        UPDATE stored_files AS sf
+        SET settled_at = ?
+        WHERE sf.kind = ?
+          AND sf.settled_at IS NULL
+          AND sf.created_at <= ?
+          AND {_REFERENCED_SQL[kind]}
+        ''',
+        (_now_ts(), kind, cutoff),
+    )
+    settled = int(cursor.rowcount or 0)
+    conn.commit()
+    return settled
+
+
+def find_orphan_files(kind: str, cutoff: str, *, limit: int = _SCAN_BATCH_SIZE, after_id: int = 0) -> list[tuple[int, str]]:
+    """
+    grace 기간이 지났고 어디에서도 참조되지 않는 미확인 항목 (id, file_path).
+
+    upload는 room_files / 유효한 업로드 토큰, profile은 users.profile_image를 참조로 본다.
+    법적 보존(legal_holds) 대상은 제외한다.
+    """
+    conn = _get_db()
+    params: list = [kind, cutoff, int(after_id)]
+    pending_clause = ''
+    if kind == 'upload':
+        pending_clause = f'AND NOT {_PENDING_TOKEN_SQL}'
+        params.append(_now_ts())
+    params.append(int(limit))
+    rows = conn.execute(
+        f'''
+        SELECT sf.id, sf.file_path
+        FROM stored_files sf
+        WHERE sf.kind = ?
+          AND sf.settled_at IS NULL
+          AND sf.created_at <= ?
+          AND sf.id > ?
+          AND NOT {_REFERENCED_SQL[kind]}
+          {pending_clause}
+          AND NOT {_HELD_SQL}
+        ORDER BY sf.id
+        LIMIT ?
+        ''',
+        params,
+    ).fetchall()
+    return [(int(row[0]), str(row[1])) for row in rows]
+
+
+def _reconcile_due() -> bool:
+    import app.models.base as base_module
+
+    if _reconcile_state['db_path'] != base_module.DATABASE_PATH:
+        return True
+    last_run = _reconcile_state['last_run_monotonic']
+    if last_run is None:
+        return True
+    interval = float(ORPHAN_RECONCILE_INTERVAL_HOURS or 0) * 3600.0
+    return time.monotonic() - last_run >= interval
+
+
+def reconcile_stored_files(upload_root: str) -> dict:
+    """
+    업로드 폴더 전체 순회로 매니페스트 보정.
+
+    - 매니페스트에 없는 파일 등록 (created_at = 파일 수정 시각)
+    - 디스크에 없는 항목 삭제
+    - 남은 항목은 settled_at을 비워 다음 고아 탐지에서 다시 확인
+    """
+    import app.models.base as base_module
+
+    started = time.perf_counter()
+    result = {'registered': 0, 'missing_removed': 0, 'scanned_files': 0}
+    conn = _get_db()
+    upload_root = os.path.realpath(upload_root)
+
+    if os.path.isdir(upload_root):
+        from app.thumbnails import THUMBNAIL_DIR, purge_orphan_thumbnails
+        from app.upload_ingest import INCOMING_DIR, purge_stale_incoming
+
+        # 수신 중인 업로드 임시 파일과 축소본은 매니페스트 대상이 아니다.
+        result['stale_incoming_removed'] = purge_stale_incoming(upload_root, 24 * 3600)
+        result['orphan_thumbnails_removed'] = purge_orphan_thumbnails(upload_root)
+        pending: list[tuple[str, str, int, str]] = []
+
+        def _flush_pending() -> None:
+            if not pending:
+                return
+            cursor = conn.executemany(
+                '''
+                INSERT OR IGNORE INTO stored_files (file_path, kind, file_size, created_at)
+                VALUES (?, ?, ?, ?)
+                ''',
+                pending,
+            )
+            result['registered'] += max(0, int(cursor.rowcount or 0))
+            conn.commit()
+            pending.clear()
+
+        for root, dirs, files in os.walk(upload_root):
+            rel_dir = os.path.relpath(root, upload_root).replace('\\', '/')
+            if rel_dir == '.':
+                rel_dir = ''
+                dirs[:] = [name for name in dirs if name not in (INCOMING_DIR, THUMBNAIL_DIR)]
+            for name in files:
+                if name == '.gitkeep':
+                    continue
+                full_path = os.path.join(root, name)
+                rel_path = normalize_stored_path(os.path.join(rel_dir, name))
+                try:
+                    stat = os.stat(full_path)
+                except OSError:
+                    continue
+                result['scanned_files'] += 1
+                mtime = datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S')
+                pending.append((rel_path, stored_file_kind(rel_path), int(stat.st_size), mtime))
+                if len(pending) >= _SCAN_BATCH_SIZE:
+                    _flush_pending()
+        _flush_pending()
+
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            'SELECT id, file_path FROM stored_files WHERE id > ? ORDER BY id LIMIT ?',
+            (last_id, _SCAN_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = int(rows[-1][0])
+        missing = [
+            int(row[0]) for row in rows
+            if not os.path.exists(os.path.join(upload_root, str(row[1])))
+        ]
+        if missing:
+            placeholders = ','.join('?' for _ in missing)
+            conn.execute(f'DELETE FROM stored_files WHERE id IN ({placeholders})', missing)
+            conn.commit()
+            result['missing_removed'] += len(missing)
+
+    conn.execute('UPDATE stored_files SET settled_at = NULL WHERE settled_at IS NOT NULL')
+    conn.commit()
+
+    result['duration_ms'] = round((time.perf_counter() - started) * 1000.0, 3)
+    _reconcile_state.update({
+        'db_path': base_module.DATABASE_PATH,
+        'last_run_monotonic': time.monotonic(),
+        'last_run_at': _now_ts(),
+        'last_result': dict(result),
+    })
+    logger.info(f"Stored file manifest reconciled: {result}")
+    return result
+
+
+def reconcile_stored_files_if_due(upload_root: str) -> dict | None:
+    """마지막 보정 이후 ORPHAN_RECONCILE_INTERVAL_HOURS가 지났으면 보정 실행"""
+    with _reconcile_lock:
+        if not _reconcile_due():
+            return None
+        return reconcile_stored_files(upload_root)
+
+
+def get_stored_file_stats() -> dict:
+    stats = {
+        'tracked': 0,
+        'unsettled': 0,
+        'reconcile_interval_hours': ORPHAN_RECONCILE_INTERVAL_HOURS,
+        'last_reconcile_at': _reconcile_state.get('last_run_at'),
+        'last_reconcile': dict(_reconcile_state.get('last_result') or {}),
+    }
+    try:
+        row = _get_db().execute(
+            'SELECT COUNT(*), SUM(CASE WHEN settled_at IS NULL THEN 1 ELSE 0 END) FROM stored_files'
+        ).fetchone()
+        stats['tracked'] = int(row[0] or 0)
+        stats['unsettled'] = int(row[1] or 0)
+    except Exception as e:
+        logger.debug(f"Stored file stats error: {e}")
+    return stats
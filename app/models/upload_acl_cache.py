@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+첨부 다운로드 ACL 캐시 (저장 경로 → 참조하는 (room_id, file_name) 목록)
+
+- /uploads 요청마다 room_files를 조회하지 않도록 크기 제한 LRU에 보관한다.
+- 멤버 확인은 멤버십 캐시(get_cached_user_room_ids)를 그대로 사용한다.
+- room_files 추가/삭제 시 해당 경로를 무효화하고, 대화방/사용자 단위 일괄 삭제는 전체를 비운다.
+- 적재 도중 무효화가 일어나면 (세대 번호 불일치) 결과를 캐시에 저장하지 않는다.
+- 참조가 없는 경로(업로드 직후 메시지 저장 전 등)는 캐시하지 않는다.
+- 캐시에는 최신 참조 _MAX_REFERENCES건까지만 담는다. 상한까지 찼는데 요청자의 방이 없으면
+  요청자 멤버십으로 거른 조회로 한 번 더 확인한다 (오래된 방의 멤버도 내려받을 수 있도록).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+
+from app.models.membership_cache import _LRUIndex
+
+try:
+    from config import UPLOAD_ACL_CACHE_MAX_SIZE
+except ImportError:
+    UPLOAD_ACL_CACHE_MAX_SIZE = 10000
+
+logger = logging.getLogger(__name__)
+
+# 캐시 항목 하나에 담는 참조 수 상한 (넘으면 멤버십으로 거른 조회로 확인)
+_MAX_REFERENCES = 256
+
+Reference = tuple[int, str]
+
+
+class UploadAclCache:
+    def __init__(self, max_size: int):
+        self._lock = threading.Lock()
+        self._entries = _LRUIndex(max_size)
+        self._generation = 0
+        self._invalidations = 0
+        self._db_path: str | None = None
+
+    def _check_database(self) -> None:
+        import app.models.base as base_module
+
+        if self._db_path != base_module.DATABASE_PATH:
+            self._entries.entries.clear()
+            self._generation += 1
+            self._db_path = base_module.DATABASE_PATH
+
+    def generation(self) -> int:
+        with self._lock:
+            self._check_database()
+            return self._generation
+
+    def get(self, file_path: str) -> tuple[Reference, ...] | None:
+        with self._lock:
+            self._check_database()
+            return self._entries.get(file_path)
+
+    def store(self, file_path: str, references: tuple[Reference, ...], generation: int) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._entries.put(file_path, references)
+
+    def invalidate(self, file_path: str) -> None:
+        """경로(평면/분산 표기 모두)의 항목 제거"""
+        from app.upload_storage import candidate_relpaths
+
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            for candidate in candidate_relpaths(file_path):
+                self._entries.entries.pop(candidate, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            self._entries.entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._entries.stats(), 'invalidations': self._invalidations}
+
+
+upload_acl_cache = UploadAclCache(UPLOAD_ACL_CACHE_MAX_SIZE)
+
+
+def _load_references(lookup_paths: list[str]) -> tuple[Reference, ...] | None:
+    from app.models.base import get_db
+
+    placeholders = ','.join('?' for _ in lookup_paths)
+    try:
+        rows = get_db().execute(
+            f'''
+            SELECT room_id, file_name FROM room_files
+            WHERE file_path IN ({placeholders})
+            ORDER BY id DESC
+            LIMIT {_MAX_REFERENCES}
+            ''',
+            lookup_paths,
+        ).fetchall()
+    except Exception as e:
+        logger.error(f"Load upload references error: {e}")
+        return None
+    return tuple((int(row[0]), str(row[1] or '')) for row in rows)
+
+
+def _load_member_reference(lookup_paths: list[str], user_id: int) -> Reference | None:
+    from app.models.base import get_db
+
+    placeholders = ','.join('?' for _ in lookup_paths)
+    try:
+        row = get_db().execute(
+            f'''
+            SELECT room_id, file_name FROM room_files
+            WHERE file_path IN ({placeholders})
+              AND room_id IN (SELECT room_id FROM room_members WHERE user_id = ?)
+            ORDER BY id DESC
+            LIMIT 1
+            ''',
+            (*lookup_paths, int(user_id)),
+        ).fetchone()
+    except Exception as e:
+        logger.error(f"Load member upload reference error: {e}")
+        return None
+    return (int(row[0]), str(row[1] or '')) if row else None
+
+
+def get_upload_references(file_path: str) -> tuple[Reference, ...]:
+    """저장 경로를 참조하는 (room_id, file_name) 목록, 최신 기록 우선 최대 _MAX_REFERENCES건 (미스 시 DB 적재)"""
+    from app.upload_storage import candidate_relpaths
+
+    cached = upload_acl_cache.get(file_path)
+    if cached is not None:
+        return cached
+    generation = upload_acl_cache.generation()
+    references = _load_references(candidate_relpaths(file_path))
+    if not references:
+        return ()
+    upload_acl_cache.store(file_path, references, generation)
+    return references
+
+
+def find_upload_reference(file_path: str, user_id: int) -> tuple[Reference | None, bool]:
+    """
+    요청자가 속한 방의 참조 기록 찾기.
+
+    (기록, 참조 존재 여부) 반환. 참조는 있으나 요청자가 어느 방에도 속하지 않으면 (None, True).
+    """
+    from app.models.membership_cache import get_cached_user_room_ids
+
+    references = get_upload_references(file_path)
+    if not references:
+        return None, False
+    room_ids = get_cached_user_room_ids(int(user_id))
+    for reference in references:
+        if reference[0] in room_ids:
+            return reference, True
+    if len(references) >= _MAX_REFERENCES and room_ids:
+        from app.upload_storage import candidate_relpaths
+
+        return _load_member_reference(candidate_relpaths(file_path), int(user_id)), True
+    return None, True
+
+
+def invalidate_upload_acl(file_path: str) -> None:
+    upload_acl_cache.invalidate(file_path)
+
+
+def get_upload_acl_cache_stats() -> dict:
+    return upload_acl_cache.stats()
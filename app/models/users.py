@@ -9,6 +9,9 @@ import threading
 import time
 
 from app.models.base import get_db, close_thread_db
+from app.models.membership_cache import membership_cache
+from app.models.search_cache import bump_room_search_version
+from app.models.upload_acl_cache import invalidate_upload_acl
 from app.utils import hash_password, verify_password
 
 logger = logging.getLogger(__name__)
@@ -18,6 +21,7 @@ _user_cache = {}
 _user_cache_lock = threading.Lock()
 USER_CACHE_TTL = 60
 USER_CACHE_MAX_SIZE = 500
+_user_cache_db_path = None
 
 
 def create_user(username: str, password: str, nickname: str | None = None) -> int | None:
@@ -238,9 +242,20 @@ def is_platform_admin_user(user_id: int) -> bool:
         return False
 
 
+def _check_user_cache_database() -> None:
+    """DB 경로가 바뀌면(테스트/도구) 이전 DB의 사용자 캐시를 버린다. _user_cache_lock 보유 상태에서 호출."""
+    global _user_cache_db_path
+    import app.models.base as base_module
+
+    if _user_cache_db_path != base_module.DATABASE_PATH:
+        _user_cache.clear()
+        _user_cache_db_path = base_module.DATABASE_PATH
+
+
 def get_user_by_id_cached(user_id: int) -> dict | None:
     """캐시된 사용자 조회"""
     with _user_cache_lock:
+        _check_user_cache_database()
         cached = _user_cache.get(user_id)
         if cached and (time.time() - cached['_cached_at']) < USER_CACHE_TTL:
             return cached['data']
@@ -305,14 +320,6 @@ def update_user_profile(user_id, nickname=None, profile_image=None, status_messa
             updates.append('profile_image = ?')
             values.append(profile_image)
         if status_message is not None:
-            try:
-                cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='users'")
-                schema = cursor.fetchone()[0]
-                if 'status_message' not in schema:
-                    cursor.execute('ALTER TABLE users ADD COLUMN status_message TEXT')
-                    conn.commit()
-            except Exception as schema_err:
-                logger.debug(f"Schema check/update for status_message: {schema_err}")
             updates.append('status_message = ?')
             values.append(status_message)
         
@@ -374,16 +381,6 @@ def change_password(user_id, current_password, new_password):
         # [v4.21] 새 세션 토큰 생성 (다른 세션 무효화용)
         new_session_token = secrets.token_hex(32)
         
-        # session_token 컬럼 확인 및 추가
-        try:
-            cursor.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name='users'")
-            schema = cursor.fetchone()[0]
-            if 'session_token' not in schema:
-                cursor.execute('ALTER TABLE users ADD COLUMN session_token TEXT')
-                conn.commit()
-        except Exception as schema_err:
-            logger.debug(f"Schema check for session_token: {schema_err}")
-        
         cursor.execute(
             "UPDATE users SET password_hash = ?, session_token = ? WHERE id = ?", 
             (new_hash, new_session_token, user_id)
@@ -420,6 +417,7 @@ def delete_user(user_id, password):
         from config import UPLOAD_FOLDER
     
     from app.models.base import safe_file_delete
+    from app.models.file_blobs import release_upload_file
     
     conn = get_db()
     cursor = conn.cursor()
@@ -460,18 +458,14 @@ def delete_user(user_id, password):
             else:
                 cursor.execute("DELETE FROM polls WHERE id = ?", (poll['id'],))
         
-        # 업로드 파일 삭제
-        cursor.execute("SELECT file_path FROM room_files WHERE uploaded_by = ?", (user_id,))
-        files_to_delete = cursor.fetchall()
-        for f in files_to_delete:
-            try:
-                full_path = os.path.join(UPLOAD_FOLDER, f['file_path'])
-                safe_file_delete(full_path)
-            except Exception as e:
-                logger.warning(f"File deletion failed during user delete: {e}")
+        # 업로드 기록 삭제 (파일은 커밋 후 참조가 남지 않은 것만 삭제)
+        cursor.execute("SELECT DISTINCT file_path FROM room_files WHERE uploaded_by = ?", (user_id,))
+        files_to_delete = [f['file_path'] for f in cursor.fetchall() if f['file_path']]
         cursor.execute("DELETE FROM room_files WHERE uploaded_by = ?", (user_id,))
         
         # 메시지 익명화
+        cursor.execute("SELECT DISTINCT room_id FROM messages WHERE sender_id = ?", (user_id,))
+        anonymized_rooms = [row['room_id'] for row in cursor.fetchall()]
         cursor.execute("""
             UPDATE messages SET content = '[탈퇴한 사용자의 메시지]', encrypted = 0 
             WHERE sender_id = ?
@@ -485,7 +479,16 @@ def delete_user(user_id, password):
         cursor.execute("DELETE FROM users WHERE id = ?", (user_id,))
         
         conn.commit()
+        for file_path in files_to_delete:
+            invalidate_upload_acl(file_path)
+            try:
+                release_upload_file(file_path)
+            except Exception as e:
+                logger.warning(f"File deletion failed during user delete: {e}")
         invalidate_user_cache(user_id)
+        membership_cache.forget_user(user_id)
+        for room_id in anonymized_rooms:
+            bump_room_search_version(room_id)
         logger.info(f"User {user_id} deleted with all related data cleaned up")
         return True, None
     except Exception as e:
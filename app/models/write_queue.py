@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+메시지 INSERT 그룹 커밋 큐
+
+짧은 시간(수 ms) 안에 도착한 INSERT 작업들을 단일 writer 연결에서 하나의
+트랜잭션으로 묶어 커밋한다. 작업마다 SAVEPOINT를 사용하므로 한 작업의
+IntegrityError(client_msg_id 중복 등)는 해당 작업만 롤백되고 호출자에게 그대로
+전달된다. WAL 모드에서 메시지마다 발생하던 fsync/writer lock 경합을 줄이는 용도.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+try:
+    from config import MESSAGE_WRITE_BATCHING, MESSAGE_WRITE_BATCH_WINDOW_MS, MESSAGE_WRITE_BATCH_MAX
+except ImportError:
+    MESSAGE_WRITE_BATCHING = False
+    MESSAGE_WRITE_BATCH_WINDOW_MS = 0
+    MESSAGE_WRITE_BATCH_MAX = 64
+
+logger = logging.getLogger(__name__)
+
+_SUBMIT_TIMEOUT_SECONDS = 30.0
+
+
+class _WriteJob:
+    __slots__ = ('fn', 'done', 'result', 'error')
+
+    def __init__(self, fn: Callable[[sqlite3.Cursor], Any]):
+        self.fn = fn
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class MessageWriteQueue:
+    """단일 writer 스레드 + 그룹 커밋"""
+
+    def __init__(self, window_ms: float, max_batch: int):
+        self.window = max(0.0, float(window_ms or 0)) / 1000.0
+        self.max_batch = max(1, int(max_batch or 1))
+        self.db_path: str | None = None
+        self._queue: queue.Queue[_WriteJob | None] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._conn: sqlite3.Connection | None = None
+        self._last_batch_size = 0
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'batches': 0,
+            'jobs': 0,
+            'failed_jobs': 0,
+            'max_batch_size': 0,
+            'commit_ms_total': 0.0,
+            'commit_ms_max': 0.0,
+        }
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        import app.models.base as base_module
+
+        conn = base_module._create_connection()
+        # BEGIN/COMMIT/SAVEPOINT를 직접 제어한다.
+        conn.isolation_level = None
+        self._conn = conn
+        self.db_path = base_module.DATABASE_PATH
+        self._thread = threading.Thread(target=self._run, name='message-write-queue', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(None)
+        thread.join(timeout)
+        self._thread = None
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def submit(self, fn: Callable[[sqlite3.Cursor], Any]) -> Any:
+        """작업을 큐에 넣고 커밋될 때까지 대기. 작업 내 예외는 그대로 다시 발생한다."""
+        job = _WriteJob(fn)
+        self._queue.put(job)
+        if not job.done.wait(_SUBMIT_TIMEOUT_SECONDS):
+            raise sqlite3.OperationalError('message write queue timed out')
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _collect_batch(self, first: _WriteJob) -> tuple[list[_WriteJob], bool]:
+        batch = [first]
+        # 경합이 없을 때(직전 배치가 1건)는 대기 없이 즉시 커밋해 지연을 늘리지 않는다.
+        wait_for_more = self.window > 0 and self._last_batch_size > 1
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if wait_for_more and remaining > 0:
+                    job = self._queue.get(timeout=remaining)
+                else:
+                    job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                return batch, True
+            batch.append(job)
+        self._last_batch_size = len(batch)
+        return batch, False
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch, stopping = self._collect_batch(first)
+            self._commit_batch(batch)
+
+    def _commit_batch(self, batch: list[_WriteJob]) -> None:
+        conn = self._conn
+        started = time.monotonic()
+        failed = 0
+        try:
+            if conn is None:
+                raise sqlite3.OperationalError('message write queue has no connection')
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for job in batch:
+                cursor.execute('SAVEPOINT message_write')
+                try:
+                    job.result = job.fn(cursor)
+                    cursor.execute('RELEASE SAVEPOINT message_write')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO SAVEPOINT message_write')
+                    cursor.execute('RELEASE SAVEPOINT message_write')
+                    job.error = e
+                    failed += 1
+            cursor.execute('COMMIT')
+        except Exception as e:
+            logger.error(f"Message write batch failed ({len(batch)} jobs): {e}")
+            try:
+                if conn is not None and conn.in_transaction:
+                    conn.execute('ROLLBACK')
+            except Exception:
+                pass
+            for job in batch:
+                if job.error is None:
+                    job.error = e
+                    job.result = None
+            failed = len(batch)
+        finally:
+            commit_ms = (time.monotonic() - started) * 1000.0
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['jobs'] += len(batch)
+                self._stats['failed_jobs'] += failed
+                self._stats['commit_ms_total'] += commit_ms
+                self._stats['max_batch_size'] = max(int(self._stats['max_batch_size']), len(batch))
+                self._stats['commit_ms_max'] = max(float(self._stats['commit_ms_max']), commit_ms)
+            for job in batch:
+                job.done.set()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        batches = int(stats['batches'])
+        return {
+            'batches': batches,
+            'jobs': int(stats['jobs']),
+            'failed_jobs': int(stats['failed_jobs']),
+            'max_batch_size': int(stats['max_batch_size']),
+            'avg_batch_size': round(int(stats['jobs']) / batches, 2) if batches else 0.0,
+            'commit_ms_avg': round(float(stats['commit_ms_total']) / batches, 3) if batches else 0.0,
+            'commit_ms_max': round(float(stats['commit_ms_max']), 3),
+        }
+
+
+_queue_lock = threading.Lock()
+_queue_config = {
+    'enabled': bool(MESSAGE_WRITE_BATCHING),
+    'window_ms': float(MESSAGE_WRITE_BATCH_WINDOW_MS or 0),
+    'max_batch': int(MESSAGE_WRITE_BATCH_MAX or 1),
+}
+_write_queue: MessageWriteQueue | None = None
+
+
+def configure_message_write_queue(
+    enabled: bool,
+    *,
+    window_ms: float | None = None,
+    max_batch: int | None = None,
+) -> None:
+    """그룹 커밋 사용 여부/파라미터 변경 (실행 중인 writer는 정지 후 필요 시 재시작)"""
+    global _write_queue
+    with _queue_lock:
+        _queue_config['enabled'] = bool(enabled)
+        if window_ms is not None:
+            _queue_config['window_ms'] = float(window_ms)
+        if max_batch is not None:
+            _queue_config['max_batch'] = int(max_batch)
+        if _write_queue is not None:
+            _write_queue.stop()
+            _write_queue = None
+
+
+def get_message_write_queue() -> MessageWriteQueue | None:
+    """활성화된 경우 실행 중인 writer 큐 반환 (DB 경로가 바뀌면 재시작)"""
+    global _write_queue
+    if not _queue_config['enabled']:
+        return None
+    import app.models.base as base_module
+
+    with _queue_lock:
+        current = _write_queue
+        if current is not None and current.is_running() and current.db_path == base_module.DATABASE_PATH:
+            return current
+        if current is not None:
+            current.stop()
+        current = MessageWriteQueue(_queue_config['window_ms'], _queue_config['max_batch'])
+        current.start()
+        _write_queue = current
+        return current
+
+
+def get_message_write_queue_stats() -> dict:
+    with _queue_lock:
+        current = _write_queue
+        enabled = bool(_queue_config['enabled'])
+    stats = current.stats() if current is not None else MessageWriteQueue(0, 1).stats()
+    stats['enabled'] = enabled
+    stats['running'] = bool(current is not None and current.is_running())
+    return stats
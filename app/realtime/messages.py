@@ -9,6 +9,7 @@ import traceback
 from flask import current_app, session
 
 from app.models import (
+    ReplyTargetError,
     create_file_message_with_record,
     create_message,
     delete_message,
@@ -22,6 +23,7 @@ from app.models import (
     update_last_read,
 )
 from app.realtime.emitter import emit_error_i18n, socket_emit
+from app.realtime.metrics import StageTimer, record_send_stages
 from app.realtime.state import user_has_room_access
 from app.upload_tokens import consume_upload_token, get_upload_token_failure_reason
 
@@ -33,9 +35,57 @@ except ImportError:
 logger = logging.getLogger(__name__)
 
 
+def _create_send_message(
+    *,
+    room_id,
+    sender_id,
+    content,
+    message_type,
+    file_path,
+    file_name,
+    file_size,
+    reply_to,
+    encrypted,
+    client_msg_id,
+):
+    """send_message 저장 (답장 대상 검증 + INSERT 단일 트랜잭션)"""
+    if message_type in ("file", "image") and file_path:
+        normalized_file_size = None
+        try:
+            if file_size is not None:
+                normalized_file_size = int(file_size)
+        except (TypeError, ValueError):
+            normalized_file_size = None
+        return create_file_message_with_record(
+            room_id=int(room_id),
+            sender_id=sender_id,
+            content=content,
+            message_type=message_type,
+            file_path=str(file_path),
+            file_name=str(file_name or ""),
+            file_size=normalized_file_size,
+            reply_to=reply_to,
+            client_msg_id=client_msg_id or None,
+            require_reply_target=True,
+        )
+    return create_message(
+        room_id,
+        sender_id,
+        content,
+        message_type,
+        file_path,
+        file_name,
+        reply_to,
+        encrypted,
+        client_msg_id=client_msg_id or None,
+        require_reply_target=True,
+    )
+
+
 def register_message_handlers(socketio) -> None:
     @socketio.on("send_message")
     def handle_send_message(data):
+        timer = StageTimer()
         try:
             if not isinstance(data, dict):
                 data = {}
@@ -82,21 +132,13 @@ def register_message_handlers(socketio) -> None:
                     emit_error_i18n("잘못된 요청입니다.")
                     return {"ok": False, "error": "잘못된 요청입니다."}
 
+            timer.mark("validate")
             if not user_has_room_access(session["user_id"], room_id):
                 emit_error_i18n("대화방 접근 권한이 없습니다.")
                 return {"ok": False, "error": "대화방 접근 권한이 없습니다."}
+            timer.mark("access")
 
-            if reply_to is not None:
-                reply_room_id = get_message_room_id(reply_to)
-                if reply_room_id is None or int(reply_room_id) != int(room_id):
-                    emit_error_i18n("잘못된 요청입니다.")
-                    return {"ok": False, "error": "잘못된 요청입니다."}
-
-            if client_msg_id:
-                existing_message = get_message_by_client_msg_id(room_id, session["user_id"], client_msg_id)
-                if existing_message:
-                    return {"ok": True, "message_id": int(existing_message.get("id") or 0)}
-
+            # 답장 대상 검증과 client_msg_id 중복 판별은 INSERT 트랜잭션 안에서 처리한다.
             if message_type in ("file", "image"):
                 token = data.get("upload_token")
                 if not isinstance(token, str) or not token:
@@ -109,6 +151,14 @@ def register_message_handlers(socketio) -> None:
                     expected_type=message_type,
                 )
                 if reason:
+                    # 이미 저장된 메시지의 재전송이면 토큰은 첫 전송에서 소비된 상태다.
+                    existing_message = (
+                        get_message_by_client_msg_id(room_id, session["user_id"], client_msg_id)
+                        if client_msg_id
+                        else None
+                    )
+                    if existing_message:
+                        return {"ok": True, "message_id": int(existing_message.get("id") or 0)}
                     emit_error_i18n(str(reason))
                     return {"ok": False, "error": str(reason)}
 
@@ -127,40 +177,28 @@ def register_message_handlers(socketio) -> None:
                 file_size = token_data.get("file_size")
                 encrypted = False
                 content = file_name or content
+                timer.mark("upload_token")
 
             if not content and not file_path:
                 return {"ok": False, "error": "잘못된 요청입니다."}
 
-            if message_type in ("file", "image") and file_path:
-                normalized_file_size = None
-                try:
-                    if file_size is not None:
-                        normalized_file_size = int(file_size)
-                except (TypeError, ValueError):
-                    normalized_file_size = None
-                message = create_file_message_with_record(
-                    room_id=int(room_id),
+            try:
+                message = _create_send_message(
+                    room_id=room_id,
                     sender_id=int(session["user_id"]),
                     content=content,
                     message_type=message_type,
-                    file_path=str(file_path),
-                    file_name=str(file_name or ""),
-                    file_size=normalized_file_size,
+                    file_path=file_path,
+                    file_name=file_name,
+                    file_size=file_size,
                     reply_to=reply_to,
-                    client_msg_id=client_msg_id or None,
-                )
-            else:
-                message = create_message(
-                    room_id,
-                    session["user_id"],
-                    content,
-                    message_type,
-                    file_path,
-                    file_name,
-                    reply_to,
-                    encrypted,
-                    client_msg_id=client_msg_id or None,
+                    encrypted=encrypted,
+                    client_msg_id=client_msg_id,
                 )
+            except ReplyTargetError:
+                emit_error_i18n("잘못된 요청입니다.")
+                return {"ok": False, "error": "잘못된 요청입니다."}
+            timer.mark("insert")
 
             if message:
                 created = bool(message.pop("__created", True))
@@ -171,6 +209,8 @@ def register_message_handlers(socketio) -> None:
                     message["client_msg_id"] = client_msg_id
                 message["unread_count"] = 0
                 socket_emit("new_message", message, room=f"room_{room_id}")
+                timer.mark("emit")
+                record_send_stages(timer.finish())
                 logger.debug(f"Message sent: room={room_id}, user={session['user_id']}, type={message_type}")
                 return {"ok": True, "message_id": message_id}
 
@@ -205,12 +245,19 @@ def register_message_handlers(socketio) -> None:
                 emit_error_i18n("잘못된 요청입니다.")
                 return
 
-            update_last_read(normalized_room_id, session["user_id"], normalized_message_id)
+            unread_count = update_last_read(normalized_room_id, session["user_id"], normalized_message_id)
             socket_emit(
                 "read_updated",
                 {"room_id": normalized_room_id, "user_id": session["user_id"], "message_id": normalized_message_id},
                 room=f"room_{normalized_room_id}",
             )
+            if unread_count is not None:
+                # 같은 사용자의 다른 기기도 목록 재조회 없이 배지를 맞춘다.
+                socket_emit(
+                    "room_unread",
+                    {"room_id": normalized_room_id, "unread_count": int(unread_count)},
+                    room=f"user_{int(session['user_id'])}",
+                )
         except Exception as exc:
             logger.error(f"Message read error: {exc}")
 
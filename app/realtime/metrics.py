@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+소켓 이벤트 처리 구간별 지연 시간 집계
+
+최근 N건(구간별 고정 크기 링 버퍼)만 보관해 평균/p50/p99/최대값을 계산한다.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from threading import Lock
+
+_SAMPLE_LIMIT = 2048
+
+_send_stage_samples: dict[str, deque[float]] = {}
+_send_stage_counts: dict[str, int] = {}
+_send_stage_lock = Lock()
+
+
+class StageTimer:
+    """구간 경과 시간을 ms 단위로 기록 (mark 호출 시점 기준)"""
+
+    __slots__ = ('_started', '_last', 'stages')
+
+    def __init__(self):
+        self._started = self._last = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+    def finish(self) -> dict[str, float]:
+        self.stages['total'] = (time.perf_counter() - self._started) * 1000.0
+        return self.stages
+
+
+def record_send_stages(stages: dict[str, float]) -> None:
+    with _send_stage_lock:
+        for stage, elapsed_ms in stages.items():
+            samples = _send_stage_samples.get(stage)
+            if samples is None:
+                samples = _send_stage_samples[stage] = deque(maxlen=_SAMPLE_LIMIT)
+            samples.append(float(elapsed_ms))
+            _send_stage_counts[stage] = _send_stage_counts.get(stage, 0) + 1
+
+
+def _percentile(sorted_samples: list[float], ratio: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, int(round(ratio * (len(sorted_samples) - 1)))))
+    return sorted_samples[index]
+
+
+def get_send_path_stats() -> dict:
+    """send_message 구간별 지연 (최근 샘플 기준)"""
+    with _send_stage_lock:
+        snapshot = {stage: sorted(samples) for stage, samples in _send_stage_samples.items()}
+        counts = dict(_send_stage_counts)
+    result = {}
+    for stage, samples in snapshot.items():
+        result[stage] = {
+            'count': counts.get(stage, 0),
+            'avg_ms': round(sum(samples) / len(samples), 3) if samples else 0.0,
+            'p50_ms': round(_percentile(samples, 0.50), 3),
+            'p99_ms': round(_percentile(samples, 0.99), 3),
+            'max_ms': round(samples[-1], 3) if samples else 0.0,
+        }
+    return result
+
+
+def reset_send_path_stats() -> None:
+    with _send_stage_lock:
+        _send_stage_samples.clear()
+        _send_stage_counts.clear()
@@ -10,15 +10,14 @@ from flask_socketio import join_room
 from app.models import get_user_session_token, update_user_status
 from app.realtime.emitter import request_sid, socket_emit
 from app.realtime.state import (
-    cleanup_old_cache,
     get_user_room_ids,
     online_users,
     online_users_lock,
+    peek_user_room_ids,
     server_stats,
     stats_lock,
     typing_last_emit,
     typing_rate_lock,
-    user_cache,
     user_sids,
 )
 
@@ -66,16 +65,12 @@ def register_presence_handlers(socketio) -> None:
         with stats_lock:
             server_stats["total_connections"] += 1
             server_stats["active_connections"] += 1
-            should_cleanup = server_stats["total_connections"] % 100 == 0
-
-        if should_cleanup:
-            cleanup_old_cache()
 
     @socketio.on("disconnect")
     def handle_disconnect():
         user_id = None
         still_online = False
-        room_ids: list[int] = []
+        room_ids: list[int] | None = None
         sid = request_sid()
         if sid is None:
             return
@@ -88,12 +83,11 @@ def register_presence_handlers(socketio) -> None:
                 still_online = len(user_sids[user_id]) > 0
                 if not still_online:
                     del user_sids[user_id]
-                    if user_id in user_cache:
-                        room_ids = user_cache[user_id].get("rooms", []).copy()
 
         if user_id and not still_online:
             update_user_status(user_id, "offline")
-            if not room_ids:
+            room_ids = peek_user_room_ids(user_id)
+            if room_ids is None:
                 room_ids = get_user_room_ids(user_id)
             try:
                 for room_id in room_ids:
@@ -8,7 +8,7 @@ from flask import session
 from flask_socketio import emit, join_room, leave_room
 
 from app.realtime.emitter import emit_error_i18n
-from app.realtime.state import get_user_room_id_set, invalidate_user_cache, user_has_room_access
+from app.realtime.state import get_user_room_id_set, user_has_room_access
 
 logger = logging.getLogger(__name__)
 
@@ -61,7 +61,5 @@ def register_room_handlers(socketio) -> None:
             room_id = data.get("room_id")
             if room_id:
                 leave_room(f"room_{room_id}")
-                if "user_id" in session:
-                    invalidate_user_cache(session["user_id"])
         except Exception as exc:
             logger.error(f"Leave room error: {exc}")
@@ -3,10 +3,10 @@
 from __future__ import annotations
 
 import logging
-import time
 from threading import Lock
 
-from app.models import get_user_rooms, is_room_member, server_stats
+from app.models import is_room_member, server_stats
+from app.models.membership_cache import get_cached_user_room_ids, membership_cache
 
 logger = logging.getLogger(__name__)
 
@@ -15,11 +15,6 @@ user_sids: dict[int, list[str]] = {}
 online_users_lock = Lock()
 stats_lock = Lock()
 
-user_cache: dict[int, dict] = {}
-cache_lock = Lock()
-MAX_CACHE_SIZE = 1000
-CACHE_TTL = 300
-
 typing_last_emit: dict[tuple[int, int], float] = {}
 typing_rate_lock = Lock()
 TYPING_RATE_LIMIT = 1.0
@@ -46,67 +41,34 @@ def get_socketio_instance():
 
 
 def cleanup_old_cache():
-    current_time = time.time()
-    expired_keys: list[int] = []
-
-    with cache_lock:
-        for user_id, data in user_cache.items():
-            if current_time - data.get("updated", 0) > 600:
-                expired_keys.append(user_id)
-        for key in expired_keys:
-            del user_cache[key]
-        if len(user_cache) > MAX_CACHE_SIZE:
-            sorted_items = sorted(user_cache.items(), key=lambda item: item[1].get("updated", 0))
-            to_remove = len(user_cache) - MAX_CACHE_SIZE
-            for index in range(to_remove):
-                del user_cache[sorted_items[index][0]]
-
-    if expired_keys:
-        logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+    """호환용: 멤버십 캐시는 LRU로 크기를 스스로 유지하므로 정리할 것이 없다."""
+    return None
 
 
 def get_user_room_ids(user_id):
-    with cache_lock:
-        cached = user_cache.get(user_id)
-        if cached and (time.time() - cached.get("updated", 0)) < CACHE_TTL:
-            if "room_set" not in cached:
-                cached["room_set"] = set(cached.get("rooms") or [])
-            return cached.get("rooms", [])
-
     try:
-        rooms = get_user_rooms(user_id)
-        room_ids = [room["id"] for room in rooms]
-        with cache_lock:
-            if len(user_cache) > MAX_CACHE_SIZE // 2:
-                cleanup_old_cache()
-            if user_id not in user_cache:
-                user_cache[user_id] = {}
-            user_cache[user_id]["rooms"] = room_ids
-            user_cache[user_id]["room_set"] = set(room_ids)
-            user_cache[user_id]["updated"] = time.time()
-        return room_ids
+        return sorted(get_cached_user_room_ids(int(user_id)))
     except Exception as exc:
         logger.error(f"Get user rooms error: {exc}")
         return []
 
 
+def peek_user_room_ids(user_id: int) -> list[int] | None:
+    """DB 조회 없이 캐시된 방 목록만 반환 (없으면 None)"""
+    cached = membership_cache.peek_user_rooms(int(user_id))
+    return sorted(cached) if cached is not None else None
+
+
 def invalidate_user_cache(user_id):
-    with cache_lock:
-        if user_id in user_cache:
-            del user_cache[user_id]
+    membership_cache.invalidate_user(int(user_id))
 
 
 def get_user_room_id_set(user_id: int) -> set[int]:
-    with cache_lock:
-        cached = user_cache.get(user_id)
-        if cached and (time.time() - cached.get("updated", 0)) < CACHE_TTL:
-            room_set = cached.get("room_set")
-            if isinstance(room_set, set):
-                return set(room_set)
-            rebuilt = set(cached.get("rooms") or [])
-            cached["room_set"] = rebuilt
-            return set(rebuilt)
-    return set(get_user_room_ids(user_id))
+    try:
+        return get_cached_user_room_ids(int(user_id))
+    except Exception as exc:
+        logger.error(f"Get user rooms error: {exc}")
+        return set()
 
 
 def user_has_room_access(user_id: int, room_id: int) -> bool:
@@ -125,7 +87,15 @@ def user_has_room_access(user_id: int, room_id: int) -> bool:
     allowed_room_ids = get_room_id_set(normalized_user_id)
     if normalized_room_id in allowed_room_ids:
         return True
-    if not room_member_check(normalized_room_id, normalized_user_id):
+    # 최근 거부된 방이면 DB 재확인 생략 (멤버 추가 시 즉시 해제됨)
+    if membership_cache.is_denied(normalized_user_id, normalized_room_id):
+        return False
+    is_member = room_member_check(normalized_room_id, normalized_user_id)
+    if is_member is None:
+        # 조회 실패는 이번 요청만 거부하고 거부 캐시에 남기지 않는다.
+        return False
+    if not is_member:
+        membership_cache.mark_denied(normalized_user_id, normalized_room_id)
         return False
 
     invalidate_cache(normalized_user_id)
@@ -148,8 +118,9 @@ def force_remove_user_from_room(user_id: int, room_id: int) -> int:
 
     with online_users_lock:
         sid_list = list(user_sids.get(normalized_user_id, []))
+    # 멤버십 자체는 leave_room_db/kick_member가 이미 캐시에 반영했다 (중복 호출은 무해).
+    membership_cache.remove_member(normalized_room_id, normalized_user_id)
     if not sid_list:
-        invalidate_user_cache(normalized_user_id)
         return 0
 
     room_name = f"room_{normalized_room_id}"
@@ -171,5 +142,4 @@ def force_remove_user_from_room(user_id: int, room_id: int) -> int:
         except Exception:
             pass
 
-    invalidate_user_cache(normalized_user_id)
     return removed
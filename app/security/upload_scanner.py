@@ -54,6 +54,44 @@ def scan_upload_stream(file_obj, *, filename: str = '', content_type: str = '')
     return False, '업로드 스캔 제공자가 구성되지 않았습니다.'
 
 
+class StreamScan:
+    """
+    Per-upload chunk scanner session.
+
+    The streaming ingest calls feed() for every chunk as it is written and
+    finish() once the body is complete. Both return (ok, reason).
+    """
+
+    def feed(self, chunk: bytes) -> tuple[bool, str]:
+        return True, ''
+
+    def finish(self) -> tuple[bool, str]:
+        return True, ''
+
+
+class _UnconfiguredStreamScan(StreamScan):
+    def feed(self, chunk: bytes) -> tuple[bool, str]:
+        return False, '업로드 스캔 제공자가 구성되지 않았습니다.'
+
+    def finish(self) -> tuple[bool, str]:
+        return self.feed(b'')
+
+
+def open_stream_scan(*, filename: str = '', content_type: str = '') -> StreamScan:
+    """
+    Chunk-by-chunk scanner hook used by the streaming upload path.
+    """
+    if not _is_enabled():
+        return StreamScan()
+
+    provider = _provider_name()
+    if provider == 'noop':
+        return StreamScan()
+
+    logger.warning(f"Unknown upload scan provider: {provider}")
+    return _UnconfiguredStreamScan()
+
+
 def scan_saved_file(full_path: str, *, filename: str = '', content_type: str = '') -> tuple[bool, str]:
     """
     Post-save scanner hook.
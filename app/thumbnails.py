@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+이미지 첨부 썸네일/미리보기
+
+- 업로드가 확정되면 백그라운드 워커 풀에서 축소본(THUMBNAIL_SIZES, 기본 thumb=256px /
+  preview=1024px)을 WebP(미지원 시 JPEG)로 생성한다. 업로드 요청은 기다리지 않는다.
+- 축소본은 원본 저장 경로를 그대로 따르는 결정적 경로
+  ``uploads/.thumbs/<원본 상대 경로>.<variant>.<webp|jpg>``에 저장한다.
+  원본 경로는 고유하므로 축소본은 불변이며 오래 캐시할 수 있다.
+- 원본이 safe_file_delete로 지워지면 같은 원본 이름으로 시작하는 파생 파일
+  (``<원본 이름>.<variant>.<ext>``, 프로필 크기별 이미지 포함)을 함께 지운다.
+- Pillow는 선택 의존성이다. 없으면 생성을 건너뛰고 ``?variant=`` 요청에 원본을 준다.
+- gevent monkey patch 환경에서는 디코딩/리샘플링이 이벤트 루프를 막지 않도록
+  gevent 스레드풀(실제 OS 스레드)에서 실행한다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow 미설치 환경
+    Image = None
+    ImageOps = None
+
+try:
+    from pillow_heif import register_heif_opener
+except ImportError:
+    register_heif_opener = None
+else:  # pragma: no cover - pillow-heif 설치 시에만
+    register_heif_opener()
+
+try:
+    from config import (
+        THUMBNAILS_ENABLED,
+        THUMBNAIL_FORMAT,
+        THUMBNAIL_QUALITY,
+        THUMBNAIL_SIZES,
+        THUMBNAIL_WORKERS,
+    )
+except ImportError:
+    THUMBNAILS_ENABLED = True
+    THUMBNAIL_SIZES = {'thumb': 256, 'preview': 1024}
+    THUMBNAIL_FORMAT = 'webp'
+    THUMBNAIL_QUALITY = 80
+    THUMBNAIL_WORKERS = 2
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = '.thumbs'
+# 래스터 이미지 형식만 대상 (svg는 원본이 벡터)
+THUMBNAIL_SOURCE_EXTS = frozenset({'png', 'jpg', 'jpeg', 'gif', 'webp', 'bmp', 'tif', 'tiff', 'ico'})
+HEIF_SOURCE_EXTS = frozenset({'heic', 'heif'})
+_FORMAT_EXTS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+def is_available() -> bool:
+    """Pillow가 있고 썸네일 생성이 켜져 있으면 True"""
+    return bool(THUMBNAILS_ENABLED) and Image is not None
+
+
+def output_format() -> str:
+    """저장 형식 ('webp' | 'jpeg'). WebP 인코더가 없으면 JPEG"""
+    fmt = str(THUMBNAIL_FORMAT or 'webp').strip().lower()
+    if fmt == 'jpg':
+        fmt = 'jpeg'
+    if fmt not in _FORMAT_EXTS:
+        fmt = 'webp'
+    if fmt == 'webp' and Image is not None:
+        try:
+            from PIL import features
+
+            if not features.check('webp'):
+                fmt = 'jpeg'
+        except Exception:
+            fmt = 'jpeg'
+    return fmt
+
+
+def is_thumbnail_source(rel_path: str) -> bool:
+    ext = os.path.splitext(str(rel_path or ''))[1].lower().lstrip('.')
+    if ext in HEIF_SOURCE_EXTS:
+        return register_heif_opener is not None
+    return ext in THUMBNAIL_SOURCE_EXTS
+
+
+def thumbnail_relpath(rel_path: str, variant: str, fmt: str | None = None) -> str:
+    """원본 상대 경로 → 축소본 상대 경로 (결정적)"""
+    rel_path = str(rel_path or '').replace('\\', '/').strip('/')
+    ext = _FORMAT_EXTS[fmt or output_format()]
+    return f'{THUMBNAIL_DIR}/{rel_path}.{variant}.{ext}'
+
+
+def _save_image(image, target_path: str, fmt: str) -> None:
+    """형식에 맞게 변환해 임시 파일에 쓴 뒤 교체 (메타데이터/EXIF는 쓰지 않는다)"""
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    if fmt == 'jpeg':
+        if has_alpha:
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image.convert('RGBA'), mask=image.convert('RGBA').split()[-1])
+            image = background
+        else:
+            image = image.convert('RGB')
+        save_kwargs = {'quality': int(THUMBNAIL_QUALITY), 'optimize': True, 'progressive': True}
+    else:
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+        save_kwargs = {'quality': int(THUMBNAIL_QUALITY), 'method': 4}
+    temp_path = f'{target_path}.{threading.get_ident()}.tmp'
+    try:
+        image.save(temp_path, format=fmt.upper(), **save_kwargs)
+        os.replace(temp_path, target_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _render(source_path: str, target_path: str, max_side: int, fmt: str) -> None:
+    with Image.open(source_path) as opened:
+        # JPEG은 디코딩 단계에서 미리 축소해 메모리/CPU를 줄인다.
+        opened.draft('RGB', (max_side, max_side))
+        if getattr(opened, 'is_animated', False):
+            opened.seek(0)
+        image = ImageOps.exif_transpose(opened)
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+        _save_image(image, target_path, fmt)
+
+
+def generate_thumbnails(upload_root: str, rel_path: str) -> dict[str, str]:
+    """
+    원본 1건의 축소본을 모두 생성 (이미 있으면 건너뜀).
+
+    반환: variant → 축소본 상대 경로
+    """
+    if not is_available() or not is_thumbnail_source(rel_path):
+        return {}
+    source_path = os.path.join(upload_root, rel_path)
+    fmt = output_format()
+    created: dict[str, str] = {}
+    for variant, max_side in sorted(THUMBNAIL_SIZES.items(), key=lambda item: item[1]):
+        thumb_rel = thumbnail_relpath(rel_path, variant, fmt)
+        target_path = os.path.join(upload_root, thumb_rel)
+        if not os.path.exists(target_path):
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            _render(source_path, target_path, int(max_side), fmt)
+        created[variant] = thumb_rel
+    return created
+
+
+def _split_derived_name(name: str) -> tuple[str, str] | None:
+    """``<원본 이름>.<variant>.<ext>`` → (원본 이름, variant). 형식이 아니면 None"""
+    parts = name.rsplit('.', 2)
+    if len(parts) != 3 or not all(parts):
+        return None
+    return parts[0], parts[1]
+
+
+def remove_thumbnails(source_path: str) -> int:
+    """원본(절대 경로)에서 파생된 파일(축소본, 프로필 크기별 이미지/보관 원본) 삭제. 업로드 폴더 밖이면 무시"""
+    import app.models.base as base_module
+
+    upload_root = os.path.realpath(str(base_module.UPLOAD_FOLDER or ''))
+    source_path = os.path.realpath(str(source_path or ''))
+    if not upload_root or not source_path.startswith(upload_root + os.sep):
+        return 0
+    rel_path = os.path.relpath(source_path, upload_root).replace(os.sep, '/')
+    if rel_path.startswith(f'{THUMBNAIL_DIR}/'):
+        return 0
+    derived_dir = os.path.dirname(os.path.join(upload_root, THUMBNAIL_DIR, rel_path))
+    source_name = os.path.basename(rel_path)
+    try:
+        entries = list(os.scandir(derived_dir))
+    except FileNotFoundError:
+        return 0
+    except OSError as e:
+        logger.warning(f"Thumbnail cleanup failed: {rel_path}: {e}")
+        return 0
+    removed = 0
+    for entry in entries:
+        split = _split_derived_name(entry.name)
+        if split is None or split[0] != source_name:
+            continue
+        try:
+            os.remove(entry.path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Thumbnail cleanup failed: {rel_path} ({split[1]}): {e}")
+    return removed
+
+
+def purge_orphan_thumbnails(upload_root: str) -> int:
+    """원본이 없어진 파생 파일 삭제 (매니페스트 보정 시)"""
+    thumbs_root = os.path.join(upload_root, THUMBNAIL_DIR)
+    if not os.path.isdir(thumbs_root):
+        return 0
+    removed = 0
+    for root, _dirs, files in os.walk(thumbs_root):
+        for name in files:
+            if name.endswith('.tmp'):
+                continue  # 생성 중
+            full_path = os.path.join(root, name)
+            split = _split_derived_name(name)
+            if split is not None:
+                source_rel = os.path.relpath(os.path.join(root, split[0]), thumbs_root)
+                if os.path.exists(os.path.join(upload_root, source_rel)):
+                    continue
+            try:
+                os.remove(full_path)
+                removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+class _ThumbnailWorkers:
+    """축소본 생성 작업 풀 (같은 원본은 동시에 한 번만)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._in_flight: set[tuple[str, str]] = set()
+        self._stats = {'queued': 0, 'generated': 0, 'failed': 0, 'served': 0, 'fallbacks': 0}
+
+    def _spawn(self, func, *args) -> None:
+        with self._lock:
+            if self._executor is None:
+                workers = max(1, int(THUMBNAIL_WORKERS or 1))
+                try:
+                    from gevent import monkey
+
+                    use_gevent_pool = monkey.is_module_patched('threading')
+                except ImportError:
+                    use_gevent_pool = False
+                if use_gevent_pool:  # pragma: no cover - gevent 서버에서만
+                    from gevent.threadpool import ThreadPool
+
+                    self._executor = ThreadPool(workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnailer')
+            executor = self._executor
+        if isinstance(executor, ThreadPoolExecutor):
+            executor.submit(func, *args)
+        else:  # pragma: no cover
+            executor.spawn(func, *args)
+
+    def schedule(self, upload_root: str, rel_path: str) -> bool:
+        if not is_available() or not is_thumbnail_source(rel_path):
+            return False
+        key = (os.path.realpath(upload_root), str(rel_path))
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+            self._stats['queued'] += 1
+        try:
+            self._spawn(self._run, key)
+        except Exception as e:
+            logger.warning(f"Thumbnail schedule failed: {rel_path}: {e}")
+            with self._lock:
+                self._in_flight.discard(key)
+                self._stats['failed'] += 1
+            return False
+        return True
+
+    def _run(self, key: tuple[str, str]) -> None:
+        upload_root, rel_path = key
+        ok = False
+        try:
+            generate_thumbnails(upload_root, rel_path)
+            ok = True
+        except Exception as e:
+            logger.warning(f"Thumbnail generation failed: {rel_path}: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(key)
+                self._stats['generated' if ok else 'failed'] += 1
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            self._stats[counter] += 1
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """대기 중인 생성이 끝날 때까지 대기 (timeout 초과 시 False)"""
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            with self._lock:
+                if not self._in_flight:
+                    return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'enabled': bool(THUMBNAILS_ENABLED),
+                'available': Image is not None,
+                'format': output_format(),
+                'variants': dict(THUMBNAIL_SIZES),
+                **self._stats,
+                'pending': len(self._in_flight),
+            }
+
+
+_workers = _ThumbnailWorkers()
+
+
+def schedule_thumbnails(upload_root: str, rel_path: str) -> bool:
+    """축소본 생성을 백그라운드에 예약 (대상이 아니거나 이미 진행 중이면 False)"""
+    return _workers.schedule(upload_root, rel_path)
+
+
+def find_thumbnail(upload_root: str, rel_path: str, variant: str) -> str | None:
+    """
+    요청한 축소본의 절대 경로. 아직 없으면 생성을 예약하고 None (호출자는 원본 제공)
+    """
+    if variant not in THUMBNAIL_SIZES or not is_available() or not is_thumbnail_source(rel_path):
+        return None
+    thumb_path = os.path.join(upload_root, thumbnail_relpath(rel_path, variant))
+    if os.path.isfile(thumb_path):
+        _workers.record('served')
+        return thumb_path
+    _workers.record('fallbacks')
+    schedule_thumbnails(upload_root, rel_path)
+    return None
+
+
+def flush_thumbnails(timeout: float = 10.0) -> bool:
+    return _workers.flush(timeout)
+
+
+def get_thumbnail_stats() -> dict:
+    return _workers.stats()
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+스트리밍 업로드 수신
+
+/api/upload 요청 본문의 파일 파트를 Werkzeug 임시 파일을 거치지 않고
+``uploads/.incoming/<임의>.part``에 고정 크기 청크로 바로 기록한다.
+쓰는 동안 같은 패스에서 크기 / SHA-256 / 매직 넘버 검증 / 스캐너 훅(청크 단위)을
+처리하고, 검증을 통과하면 최종 경로로 이름만 바꾼다 (os.replace).
+
+- 업로드 1건당 메모리는 청크 버퍼(UPLOAD_STREAM_CHUNK_BYTES) + 헤더 샘플(2KB)로 고정
+- 거부된 업로드는 이후 데이터를 디스크에 쓰지 않고 버린다
+- 커밋되지 않은 임시 파일은 요청 종료 시(close) 삭제된다
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+
+from flask import Request, current_app, has_request_context
+
+from app.security.upload_scanner import StreamScan, open_stream_scan
+from app.utils import FILE_HEADER_SAMPLE_BYTES, validate_header_bytes
+
+try:
+    from config import UPLOAD_STREAM_CHUNK_BYTES
+except ImportError:
+    UPLOAD_STREAM_CHUNK_BYTES = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+INCOMING_DIR = '.incoming'
+MAX_UPLOAD_BYTES = 16 * 1024 * 1024
+# 요청 본문을 바로 StreamingUpload로 받는 경로
+STREAMING_UPLOAD_PATHS = frozenset({'/api/upload'})
+
+HEADER_MISMATCH_ERROR = '파일 내용이 확장자와 일치하지 않습니다.'
+SCAN_BLOCKED_ERROR = '업로드 스캔 정책에 의해 차단되었습니다.'
+TOO_LARGE_ERROR = '파일 크기는 16MB 이하여야 합니다.'
+
+
+class UploadValidator:
+    """
+    업로드 본문 1건의 단일 패스 검증 상태 (크기 / SHA-256 / 매직 넘버 / 스캐너 훅).
+
+    feed()가 False를 반환하면 거부된 것이며 이후 데이터는 무시한다.
+    """
+
+    def __init__(
+        self,
+        *,
+        filename: str = '',
+        content_type: str = '',
+        max_size: int | None = MAX_UPLOAD_BYTES,
+        scanner: StreamScan | None = None,
+    ):
+        self.filename = str(filename or '')
+        self.max_size = int(max_size) if max_size else None
+        self.scanner = scanner or open_stream_scan(filename=self.filename, content_type=str(content_type or ''))
+        self.size = 0
+        self.error: tuple[str, int] | None = None
+        self._digest = hashlib.sha256()
+        self._sample = bytearray()
+        self._header_checked = False
+        self._finished = False
+
+    def feed(self, data) -> bool:
+        length = len(data)
+        if self.error is not None:
+            return False
+        if not length:
+            return True
+        if self.max_size is not None and self.size + length > self.max_size:
+            self.error = (TOO_LARGE_ERROR, 413)
+            return False
+        if not self._header_checked:
+            self._sample += data[:FILE_HEADER_SAMPLE_BYTES - len(self._sample)]
+            if len(self._sample) >= FILE_HEADER_SAMPLE_BYTES:
+                self._check_header()
+                if self.error is not None:
+                    return False
+        ok, reason = self.scanner.feed(bytes(data))
+        if not ok:
+            self.error = (reason or SCAN_BLOCKED_ERROR, 400)
+            return False
+        self._digest.update(data)
+        self.size += length
+        return True
+
+    def _check_header(self) -> None:
+        self._header_checked = True
+        if not validate_header_bytes(self.filename, self._sample):
+            self.error = (HEADER_MISMATCH_ERROR, 400)
+
+    def finish(self) -> tuple[str, int] | None:
+        """본문 끝 처리. 거부 사유 (메시지, HTTP 상태) 또는 None 반환"""
+        if self._finished:
+            return self.error
+        self._finished = True
+        if self.error is None and not self._header_checked:
+            self._check_header()
+        if self.error is None:
+            ok, reason = self.scanner.finish()
+            if not ok:
+                self.error = (reason or SCAN_BLOCKED_ERROR, 400)
+        return self.error
+
+    @property
+    def sha256(self) -> str:
+        return self._digest.hexdigest()
+
+
+def inspect_file(full_path: str, *, chunk_size: int | None = None, **kwargs) -> UploadValidator:
+    """디스크에 조립된 파일을 한 번 읽으며 같은 검증 수행 (분할 업로드 완료 시)"""
+    validator = UploadValidator(**kwargs)
+    read_size = max(4096, int(chunk_size or UPLOAD_STREAM_CHUNK_BYTES))
+    with open(full_path, 'rb') as handle:
+        while True:
+            chunk = handle.read(read_size)
+            if not chunk or not validator.feed(chunk):
+                break
+    validator.finish()
+    return validator
+
+
+class StreamingUpload:
+    """
+    업로드 파일 1건의 수신 파일 객체 (Werkzeug 파일 스트림으로도 사용).
+
+    write()로 받은 데이터를 UploadValidator로 검증하면서 청크 단위로 임시 파일에 쓴다.
+    finish()로 검증 결과를 확정하고 commit()으로 최종 경로에 배치한다.
+    """
+
+    def __init__(
+        self,
+        upload_folder: str,
+        *,
+        filename: str = '',
+        content_type: str = '',
+        max_size: int | None = MAX_UPLOAD_BYTES,
+        chunk_size: int | None = None,
+        scanner: StreamScan | None = None,
+    ):
+        incoming = os.path.join(upload_folder, INCOMING_DIR)
+        os.makedirs(incoming, exist_ok=True)
+        self.temp_path = os.path.join(incoming, f'{uuid.uuid4().hex}.part')
+        self.chunk_size = max(4096, int(chunk_size or UPLOAD_STREAM_CHUNK_BYTES))
+        self.validator = UploadValidator(
+            filename=filename, content_type=content_type, max_size=max_size, scanner=scanner
+        )
+        self.committed_path: str | None = None
+        self._pending = bytearray()
+        self._discarded = False
+        self._handle = open(self.temp_path, 'w+b')
+
+    # -- 수신 ---------------------------------------------------------------
+
+    def write(self, data) -> int:
+        length = len(data)
+        if not self.validator.feed(data):
+            self._discard_data()
+            return length
+        self._pending += data
+        if len(self._pending) >= self.chunk_size:
+            self._flush_pending()
+        return length
+
+    def _flush_pending(self) -> None:
+        if self._pending:
+            self._handle.write(self._pending)
+            self._pending = bytearray()
+
+    def _discard_data(self) -> None:
+        if self._discarded:
+            return
+        self._discarded = True
+        self._pending = bytearray()
+        try:
+            # 이미 쓴 데이터도 버려 디스크 사용량을 늘리지 않는다.
+            self._handle.seek(0)
+            self._handle.truncate()
+        except (OSError, ValueError):
+            pass
+
+    def finish(self) -> tuple[str, int] | None:
+        """본문 수신 완료 처리. 거부 사유 (메시지, HTTP 상태) 또는 None 반환"""
+        error = self.validator.finish()
+        if error is not None:
+            self._discard_data()
+        else:
+            self._flush_pending()
+            self._handle.flush()
+        return error
+
+    @property
+    def error(self) -> tuple[str, int] | None:
+        return self.validator.error
+
+    @property
+    def size(self) -> int:
+        return self.validator.size
+
+    @property
+    def sha256(self) -> str:
+        return self.validator.sha256
+
+    def commit(self, full_path: str) -> str:
+        """검증을 통과한 임시 파일을 최종 경로로 이동"""
+        error = self.finish()
+        if error is not None:
+            raise ValueError(error[0])
+        self._handle.close()
+        os.replace(self.temp_path, full_path)
+        self.committed_path = full_path
+        return full_path
+
+    # -- 파일 객체 인터페이스 (Werkzeug FileStorage / 헤더 검증 호환) -------------
+
+    def read(self, size: int = -1) -> bytes:
+        self._flush_pending()
+        return self._handle.read(size)
+
+    def readline(self, size: int = -1) -> bytes:
+        self._flush_pending()
+        return self._handle.readline(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        self._flush_pending()
+        return self._handle.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._handle.tell() + len(self._pending)
+
+    def flush(self) -> None:
+        self._flush_pending()
+        self._handle.flush()
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    @property
+    def closed(self) -> bool:
+        return self._handle.closed
+
+    def close(self) -> None:
+        """핸들을 닫고, 커밋되지 않았으면 임시 파일 삭제"""
+        try:
+            self._handle.close()
+        except OSError:
+            pass
+        if self.committed_path is None:
+            try:
+                os.remove(self.temp_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Incoming upload cleanup failed: {self.temp_path}: {e}")
+
+    def __enter__(self) -> 'StreamingUpload':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def ingest_stream(stream, upload_folder: str, **kwargs) -> StreamingUpload:
+    """이미 수신된 스트림(다른 경로/클라이언트)을 같은 파이프라인으로 복사"""
+    upload = StreamingUpload(upload_folder, **kwargs)
+    try:
+        while True:
+            chunk = stream.read(upload.chunk_size)
+            if not chunk:
+                break
+            upload.write(chunk)
+            if upload.error is not None:
+                break
+    except Exception:
+        upload.close()
+        raise
+    return upload
+
+
+def open_upload(file_storage, upload_folder: str, *, max_size: int | None = MAX_UPLOAD_BYTES) -> StreamingUpload:
+    """
+    FileStorage에 해당하는 StreamingUpload 반환.
+
+    StreamingUploadRequest가 이미 스트리밍으로 받았으면 그대로 사용하고,
+    아니면 현재 위치와 무관하게 처음부터 복사한다.
+    """
+    stream = file_storage.stream
+    if isinstance(stream, StreamingUpload):
+        return stream
+    stream.seek(0)
+    return ingest_stream(
+        stream,
+        upload_folder,
+        filename=str(file_storage.filename or ''),
+        content_type=str(getattr(file_storage, 'content_type', '') or ''),
+        max_size=max_size,
+    )
+
+
+def purge_stale_incoming(upload_root: str, max_age_seconds: float) -> int:
+    """중단된 업로드가 남긴 오래된 임시 파일(.part) 삭제 (분할 업로드 세션 파일은 세션 만료로 정리)"""
+    incoming = os.path.join(upload_root, INCOMING_DIR)
+    if not os.path.isdir(incoming):
+        return 0
+    cutoff = time.time() - max(0.0, float(max_age_seconds))
+    removed = 0
+    for entry in os.scandir(incoming):
+        try:
+            if entry.name.endswith('.part') and entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+class StreamingUploadRequest(Request):
+    """STREAMING_UPLOAD_PATHS의 파일 파트를 StreamingUpload로 직접 수신"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.path in STREAMING_UPLOAD_PATHS and has_request_context():
+            upload_folder = str(current_app.config.get('UPLOAD_FOLDER') or '')
+            if upload_folder:
+                return StreamingUpload(upload_folder, filename=filename or '', content_type=content_type or '')
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+분할(재개 가능) 업로드 세션
+
+큰 첨부는 init → 청크 PUT(offset 지정, 병렬/재전송 가능) → finalize 순서로 올린다.
+- 세션과 수신 완료 청크는 DB(upload_sessions / upload_session_chunks)에 기록되어
+  연결이 끊겨도 받은 청크부터 이어서 보낼 수 있다.
+- 청크는 ``uploads/.incoming/<세션ID>.session`` 파일의 해당 offset에 바로 기록한다.
+  임시 파일은 빈 파일로 만들고 청크 기록으로 늘어나므로 받은 만큼만 디스크를 쓴다.
+- 사용자별 미완료 세션 수(CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER)와 선언한 크기 합계
+  (CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER)를 제한한다.
+- finalize는 조립된 파일을 한 번 읽어 크기/SHA-256/헤더/스캐너 검증을 수행한 뒤
+  일반 업로드와 같은 경로로 배치하고 업로드 토큰을 발급한다.
+- 마지막 청크 이후 CHUNKED_UPLOAD_SESSION_TTL_HOURS가 지난 세션은 유지보수에서 삭제한다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import secrets
+import sqlite3
+from datetime import datetime, timedelta
+
+try:
+    from config import CHUNKED_UPLOAD_CHUNK_BYTES, CHUNKED_UPLOAD_MAX_BYTES, CHUNKED_UPLOAD_SESSION_TTL_HOURS
+except ImportError:
+    CHUNKED_UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024
+    CHUNKED_UPLOAD_MAX_BYTES = 512 * 1024 * 1024
+    CHUNKED_UPLOAD_SESSION_TTL_HOURS = 24
+
+try:
+    from config import CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER, CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER
+except ImportError:
+    CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER = 4
+    CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER = 1024 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE_SUFFIX = '.session'
+_SESSION_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_COPY_BUFFER_BYTES = 64 * 1024
+
+
+class UploadSessionError(ValueError):
+    """청크/세션 요청 오류 (message, HTTP 상태)"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = int(status)
+
+
+def _get_db():
+    import app.models.base as base_module
+    return base_module.get_db()
+
+
+def _now() -> datetime:
+    return datetime.now()
+
+
+def _ts(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _expires_at() -> str:
+    return _ts(_now() + timedelta(hours=max(0.0, float(CHUNKED_UPLOAD_SESSION_TTL_HOURS or 0))))
+
+
+def is_valid_session_id(session_id: str) -> bool:
+    return bool(_SESSION_ID_RE.match(str(session_id or '')))
+
+
+def session_temp_path(upload_folder: str, session_id: str) -> str:
+    from app.upload_ingest import INCOMING_DIR
+
+    return os.path.join(upload_folder, INCOMING_DIR, f'{session_id}{SESSION_FILE_SUFFIX}')
+
+
+def _total_chunks(file_size: int, chunk_size: int) -> int:
+    return max(1, -(-int(file_size) // int(chunk_size)))
+
+
+def create_upload_session(
+    upload_folder: str,
+    *,
+    user_id: int,
+    room_id: int,
+    file_name: str,
+    file_size: int,
+    content_type: str = '',
+) -> dict:
+    """세션 생성 + 빈 임시 파일 생성 (사용자별 세션 수/예약 크기 제한)"""
+    file_size = int(file_size or 0)
+    if file_size <= 0:
+        raise UploadSessionError('file_size가 필요합니다.')
+    if file_size > CHUNKED_UPLOAD_MAX_BYTES:
+        limit_mb = CHUNKED_UPLOAD_MAX_BYTES // (1024 * 1024)
+        raise UploadSessionError(f'파일 크기는 {limit_mb}MB 이하여야 합니다.', 413)
+
+    session_id = secrets.token_hex(16)
+    chunk_size = int(CHUNKED_UPLOAD_CHUNK_BYTES)
+    temp_path = session_temp_path(upload_folder, session_id)
+    os.makedirs(os.path.dirname(temp_path), exist_ok=True)
+    open(temp_path, 'wb').close()
+
+    conn = _get_db()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+    except sqlite3.OperationalError as e:
+        # 쓰기 락 없이 한도를 확인하면 동시 요청이 함께 통과하므로 재시도를 요청한다.
+        logger.warning(f"Upload session begin failed: {e}")
+        _remove_file(temp_path)
+        raise UploadSessionError('업로드 세션을 시작할 수 없습니다. 잠시 후 다시 시도하세요.', 503) from e
+
+    try:
+        # 동시 요청이 함께 한도를 넘지 않도록 같은 쓰기 트랜잭션 안에서 세고 기록한다.
+        row = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM upload_sessions WHERE user_id = ? AND expires_at > ?',
+            (int(user_id), _ts(_now())),
+        ).fetchone()
+        active_sessions, reserved_bytes = int(row[0] or 0), int(row[1] or 0)
+        if active_sessions >= int(CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER):
+            raise UploadSessionError('진행 중인 분할 업로드가 너무 많습니다. 완료하거나 취소한 뒤 다시 시도하세요.', 429)
+        if reserved_bytes + file_size > int(CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER):
+            limit_mb = int(CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER) // (1024 * 1024)
+            raise UploadSessionError(f'진행 중인 분할 업로드 크기 합계는 {limit_mb}MB 이하여야 합니다.', 429)
+        conn.execute(
+            '''
+            INSERT INTO upload_sessions (
+                id, user_id, room_id, file_name, file_size, chunk_size, content_type,
+                created_at, updated_at, expires_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''',
+            (
+                session_id, int(user_id), int(room_id), str(file_name or ''), file_size, chunk_size,
+                str(content_type or ''), _ts(_now()), _ts(_now()), _expires_at(),
+            ),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        _remove_file(temp_path)
+        raise
+    return get_upload_session(session_id, user_id)
+
+
+def get_upload_session(session_id: str, user_id: int) -> dict | None:
+    """세션 상태 (본인 세션만). 재개용 수신 완료 청크 목록 포함"""
+    if not is_valid_session_id(session_id):
+        return None
+    conn = _get_db()
+    row = conn.execute(
+        '''
+        SELECT id, user_id, room_id, file_name, file_size, chunk_size, content_type, expires_at
+        FROM upload_sessions
+        WHERE id = ? AND user_id = ?
+        ''',
+        (session_id, int(user_id)),
+    ).fetchone()
+    if not row:
+        return None
+    session = dict(row)
+    chunks = conn.execute(
+        'SELECT chunk_index, size FROM upload_session_chunks WHERE session_id = ? ORDER BY chunk_index',
+        (session_id,),
+    ).fetchall()
+    session['received_chunks'] = [int(chunk[0]) for chunk in chunks]
+    session['received_bytes'] = sum(int(chunk[1]) for chunk in chunks)
+    session['total_chunks'] = _total_chunks(session['file_size'], session['chunk_size'])
+    return session
+
+
+def public_session_view(session: dict) -> dict:
+    return {
+        'session_id': session['id'],
+        'room_id': session['room_id'],
+        'file_name': session['file_name'],
+        'file_size': session['file_size'],
+        'chunk_size': session['chunk_size'],
+        'total_chunks': session['total_chunks'],
+        'received_chunks': session['received_chunks'],
+        'received_bytes': session['received_bytes'],
+        'expires_at': session['expires_at'],
+    }
+
+
+def write_upload_chunk(upload_folder: str, session: dict, offset: int, stream, content_length: int | None) -> dict:
+    """
+    청크 1개를 offset 위치에 기록.
+
+    offset은 chunk_size의 배수여야 하며, 본문 길이는 해당 청크 크기와 같아야 한다
+    (마지막 청크만 짧을 수 있음). 같은 청크를 다시 보내면 덮어쓴다.
+    """
+    file_size = int(session['file_size'])
+    chunk_size = int(session['chunk_size'])
+    offset = int(offset)
+    if offset < 0 or offset >= file_size or offset % chunk_size:
+        raise UploadSessionError('잘못된 offset입니다.')
+    expected = min(chunk_size, file_size - offset)
+    if content_length is not None and int(content_length) != expected:
+        raise UploadSessionError(f'청크 크기가 올바르지 않습니다. (expected {expected} bytes)')
+
+    temp_path = session_temp_path(upload_folder, session['id'])
+    if not os.path.isfile(temp_path):
+        raise UploadSessionError('업로드 세션 파일이 없습니다.', 410)
+
+    written = 0
+    with open(temp_path, 'r+b') as handle:
+        handle.seek(offset)
+        while written < expected:
+            data = stream.read(min(_COPY_BUFFER_BYTES, expected - written))
+            if not data:
+                break
+            handle.write(data)
+            written += len(data)
+        extra = stream.read(1)
+    if written != expected or extra:
+        raise UploadSessionError(f'청크 크기가 올바르지 않습니다. (expected {expected} bytes)')
+
+    conn = _get_db()
+    try:
+        conn.execute(
+            '''
+            INSERT OR REPLACE INTO upload_session_chunks (session_id, chunk_index, size, received_at)
+            VALUES (?, ?, ?, ?)
+            ''',
+            (session['id'], offset // chunk_size, written, _ts(_now())),
+        )
+        conn.execute(
+            'UPDATE upload_sessions SET updated_at = ?, expires_at = ? WHERE id = ?',
+            (_ts(_now()), _expires_at(), session['id']),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return {'chunk_index': offset // chunk_size, 'offset': offset, 'size': written}
+
+
+def missing_chunks(session: dict) -> list[int]:
+    received = set(session.get('received_chunks') or [])
+    return [index for index in range(int(session['total_chunks'])) if index not in received]
+
+
+def delete_upload_session(upload_folder: str, session_id: str) -> None:
+    """세션 기록과 임시 파일 삭제"""
+    conn = _get_db()
+    try:
+        conn.execute('DELETE FROM upload_session_chunks WHERE session_id = ?', (session_id,))
+        conn.execute('DELETE FROM upload_sessions WHERE id = ?', (session_id,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Delete upload session error: {session_id}: {e}")
+    _remove_file(session_temp_path(upload_folder, session_id))
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.warning(f"Upload session file cleanup failed: {path}: {e}")
+
+
+def purge_expired_upload_sessions() -> int:
+    """만료된 미완료 세션 정리 (유지보수 작업)"""
+    from app.models.retention import delete_in_batches
+    from app.upload_tokens import _get_upload_folder
+
+    conn = _get_db()
+    now = _ts(_now())
+    expired = [
+        str(row[0])
+        for row in conn.execute('SELECT id FROM upload_sessions WHERE expires_at <= ?', (now,)).fetchall()
+    ]
+    if not expired:
+        return 0
+    delete_in_batches(
+        conn,
+        'upload_session_chunks',
+        'session_id IN (SELECT id FROM upload_sessions WHERE expires_at <= ?)',
+        (now,),
+    )
+    removed = delete_in_batches(conn, 'upload_sessions', 'expires_at <= ?', (now,))
+    upload_folder = _get_upload_folder()
+    # 정리 도중 청크가 도착해 연장된 세션은 남겨 둔다.
+    placeholders = ','.join('?' for _ in expired)
+    remaining = {
+        str(row[0])
+        for row in conn.execute(f'SELECT id FROM upload_sessions WHERE id IN ({placeholders})', expired).fetchall()
+    }
+    for session_id in expired:
+        if session_id in remaining:
+            continue
+        _remove_file(session_temp_path(upload_folder, session_id))
+    if removed:
+        logger.info(f"Purged {removed} expired upload sessions")
+    return removed
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+업로드 파일 저장 경로 (해시 디렉터리 분산)
+
+새 업로드는 파일명 해시 앞 4자리로 2단계 하위 폴더를 만든 ``ab/cd/<파일명>``
+경로에 저장한다. 분산 경로는 파일명만으로 결정되므로, 이전 평면 경로
+(``<파일명>``)로 요청이 와도 분산 위치를 바로 계산해 찾을 수 있다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+
+try:
+    from config import UPLOAD_SHARDING_ENABLED
+except ImportError:
+    UPLOAD_SHARDING_ENABLED = True
+
+PROFILE_DIR = 'profiles'
+_SHARD_RE = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}$')
+
+
+def shard_prefix(filename: str) -> str:
+    digest = hashlib.sha256(os.path.basename(filename).encode('utf-8')).hexdigest()
+    return f'{digest[:2]}/{digest[2:4]}'
+
+
+def sharded_relpath(filename: str) -> str:
+    """파일명 → 분산 상대 경로 (``ab/cd/<파일명>``)"""
+    name = os.path.basename(str(filename or '').replace('\\', '/'))
+    return f'{shard_prefix(name)}/{name}'
+
+
+def is_shard_dir(subdir: str) -> bool:
+    return bool(_SHARD_RE.match(str(subdir or '').replace('\\', '/').strip('/')))
+
+
+def new_upload_relpath(filename: str) -> str:
+    """새 업로드 저장 상대 경로 (UPLOAD_SHARDING_ENABLED=False이면 평면 경로)"""
+    return sharded_relpath(filename) if UPLOAD_SHARDING_ENABLED else os.path.basename(filename)
+
+
+def ensure_parent_dir(upload_folder: str, rel_path: str) -> str:
+    """상대 경로의 상위 폴더를 만들고 절대 경로 반환"""
+    full_path = os.path.join(upload_folder, rel_path)
+    parent = os.path.dirname(full_path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    return full_path
+
+
+def candidate_relpaths(rel_path: str) -> list[str]:
+    """
+    요청 경로로 찾아볼 상대 경로 후보.
+
+    평면 경로 → [평면, 분산], 분산 경로 → [분산, 평면] (오프라인 이전 도중/이후 모두 대응).
+    profiles 경로는 그대로 사용한다.
+    """
+    rel_path = str(rel_path or '').replace('\\', '/').strip('/')
+    subdir, name = os.path.split(rel_path)
+    if subdir == PROFILE_DIR:
+        return [rel_path]
+    if not subdir:
+        return [rel_path, sharded_relpath(name)]
+    return [rel_path, name]
+
+
+def migrate_flat_uploads(conn, upload_folder: str, *, batch_size: int = 500, dry_run: bool = False) -> dict:
+    """
+    평면 경로로 저장된 첨부 파일을 해시 분산 경로로 이동 (오프라인 도구용).
+
+    room_files에 기록된 평면 경로를 batch_size개씩 처리한다. 파일을 먼저 옮기고
+    같은 배치의 room_files / messages / stored_files / upload_tokens / legal_holds
+    경로를 한 트랜잭션으로 갱신한다. 중간에 중단돼도 다시 실행하면 이어서 처리되며,
+    그 사이 요청은 uploaded_file의 평면/분산 경로 조회로 계속 제공된다.
+    """
+    upload_root = os.path.realpath(upload_folder)
+    result = {'moved': 0, 'already_moved': 0, 'missing': 0, 'batches': 0}
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            '''
+            SELECT id, room_id, file_path
+            FROM room_files
+            WHERE id > ? AND file_path NOT LIKE '%/%'
+            ORDER BY id
+            LIMIT ?
+            ''',
+            (last_id, max(1, int(batch_size))),
+        ).fetchall()
+        if not rows:
+            break
+        last_id = int(rows[-1][0])
+        result['batches'] += 1
+
+        renames: list[tuple[str, str, int]] = []
+        for _, room_id, flat_path in rows:
+            flat_path = str(flat_path or '')
+            if not flat_path:
+                continue
+            new_path = sharded_relpath(flat_path)
+            src = os.path.join(upload_root, flat_path)
+            dst = os.path.join(upload_root, new_path)
+            if os.path.isfile(src):
+                if not dry_run:
+                    ensure_parent_dir(upload_root, new_path)
+                    os.replace(src, dst)
+                result['moved'] += 1
+            elif os.path.isfile(dst):
+                # 이전 실행에서 파일만 옮기고 DB 갱신 전에 중단된 경우
+                result['already_moved'] += 1
+            else:
+                result['missing'] += 1
+                continue
+            renames.append((flat_path, new_path, int(room_id)))
+
+        if dry_run or not renames:
+            continue
+        try:
+            for flat_path, new_path, room_id in renames:
+                conn.execute('UPDATE room_files SET file_path = ? WHERE file_path = ?', (new_path, flat_path))
+                conn.execute(
+                    'UPDATE messages SET file_path = ? WHERE room_id = ? AND file_path = ?',
+                    (new_path, room_id, flat_path),
+                )
+                # 보정 순회가 분산 경로를 이미 등록했을 수 있다.
+                conn.execute('UPDATE OR IGNORE stored_files SET file_path = ? WHERE file_path = ?', (new_path, flat_path))
+                conn.execute('DELETE FROM stored_files WHERE file_path = ?', (flat_path,))
+                conn.execute('UPDATE upload_tokens SET file_path = ? WHERE file_path = ?', (new_path, flat_path))
+                conn.execute(
+                    "UPDATE legal_holds SET target_id = ? WHERE hold_type = 'file_path' AND target_id = ?",
+                    (new_path, flat_path),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return result
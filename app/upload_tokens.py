@@ -26,6 +26,11 @@ def _get_db():
     return base_module.get_db()
 
 
+def _delete_in_batches(conn, table: str, where: str, params: tuple) -> int:
+    from app.models.retention import delete_in_batches
+    return delete_in_batches(conn, table, where, params)
+
+
 def _safe_file_delete(path: str) -> bool:
     import app.models.base as base_module
     return base_module.safe_file_delete(path)
@@ -91,59 +96,21 @@ def _normalize_rel_path(path: str) -> str:
     return str(path or '').replace('\\', '/').strip('/')
 
 
-def _ensure_upload_token_table(conn) -> None:
-    cursor = conn.cursor()
-    cursor.execute(
-        '''
-        CREATE TABLE IF NOT EXISTS upload_tokens (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            token_hash TEXT NOT NULL UNIQUE,
-            user_id INTEGER NOT NULL,
-            room_id INTEGER NOT NULL,
-            file_path TEXT NOT NULL,
-            file_name TEXT NOT NULL,
-            file_type TEXT,
-            file_size INTEGER,
-            issued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL,
-            consumed_at TIMESTAMP
-        )
-        '''
-    )
-    cursor.execute(
-        'CREATE INDEX IF NOT EXISTS idx_upload_tokens_expires_at '
-        'ON upload_tokens(expires_at)'
-    )
-    cursor.execute(
-        'CREATE INDEX IF NOT EXISTS idx_upload_tokens_consumed_at '
-        'ON upload_tokens(consumed_at)'
-    )
-    cursor.execute(
-        'CREATE INDEX IF NOT EXISTS idx_upload_tokens_room_user '
-        'ON upload_tokens(room_id, user_id)'
-    )
-    conn.commit()
-
-
 def purge_expired_upload_tokens(*, retain_consumed_seconds: int | None = None) -> int:
     """만료 토큰/오래된 consumed 토큰 정리"""
     conn = _get_db()
-    _ensure_upload_token_table(conn)
-    cursor = conn.cursor()
     now = _now_ts()
     retain = CONSUMED_TOKEN_RETENTION_SECONDS if retain_consumed_seconds is None else retain_consumed_seconds
     consumed_cutoff = _ts_before(retain)
-    cursor.execute(
+    return _delete_in_batches(
+        conn,
+        'upload_tokens',
         '''
-        DELETE FROM upload_tokens
-        WHERE expires_at <= ?
+        expires_at <= ?
            OR (consumed_at IS NOT NULL AND consumed_at <= ?)
         ''',
         (now, consumed_cutoff),
     )
-    removed = int(cursor.rowcount or 0)
-    conn.commit()
-    return removed
 
 
 def issue_upload_token(
@@ -157,7 +124,6 @@ def issue_upload_token(
     """업로드 토큰 발급"""
     purge_expired_upload_tokens()
     conn = _get_db()
-    _ensure_upload_token_table(conn)
     cursor = conn.cursor()
     normalized_path = _normalize_rel_path(file_path)
     expires_at = _ts_after(TOKEN_TTL_SECONDS)
@@ -221,7 +187,6 @@ def get_upload_token_failure_reason(
         return '업로드 토큰이 필요합니다.'
 
     conn = _get_db()
-    _ensure_upload_token_table(conn)
     token_row = _get_token_row_by_hash(conn, _hash_token(token))
     if not token_row:
         return '업로드 토큰이 유효하지 않습니다.'
@@ -265,7 +230,6 @@ def consume_upload_token(
         return None
 
     conn = _get_db()
-    _ensure_upload_token_table(conn)
     cursor = conn.cursor()
     now = _now_ts()
     token_hash = _hash_token(token)
@@ -333,81 +297,55 @@ def consume_upload_token(
         return None
 
 
-def cleanup_orphan_upload_files(*, grace_seconds: int | None = None) -> int:
-    """
-    room_files / active upload_tokens 어디에도 추적되지 않는 업로드 파일 정리.
-    profiles 폴더는 제외한다.
-    """
-    purge_expired_upload_tokens()
-    conn = _get_db()
-    _ensure_upload_token_table(conn)
-    cursor = conn.cursor()
-    now = datetime.now()
-    grace = ORPHAN_FILE_GRACE_SECONDS if grace_seconds is None else max(0, int(grace_seconds))
-    cutoff = now - timedelta(seconds=grace)
-
-    tracked_paths: set[str] = set()
-    cursor.execute('SELECT file_path FROM room_files')
-    tracked_paths.update(_normalize_rel_path(row['file_path']) for row in cursor.fetchall() if row['file_path'])
-
-    cursor.execute(
-        '''
-        SELECT file_path
-        FROM upload_tokens
-        WHERE consumed_at IS NULL AND expires_at > ?
-        ''',
-        (_now_ts(),),
+def _delete_orphan_manifest_files(kind: str, grace_seconds: int | None) -> int:
+    from app.models.stored_files import (
+        find_orphan_files,
+        forget_stored_files,
+        reconcile_stored_files_if_due,
+        settle_referenced_files,
     )
-    tracked_paths.update(_normalize_rel_path(row['file_path']) for row in cursor.fetchall() if row['file_path'])
-    held_paths: set[str] = set()
-    try:
-        cursor.execute(
-            '''
-            SELECT target_id
-            FROM legal_holds
-            WHERE hold_type = 'file_path'
-              AND active = 1
-            '''
-        )
-        held_paths.update(_normalize_rel_path(row['target_id']) for row in cursor.fetchall() if row['target_id'])
-    except Exception:
-        # legal_holds table may not exist on very old snapshots
-        held_paths = set()
 
-    removed = 0
     upload_root = os.path.realpath(_get_upload_folder())
     if not os.path.isdir(upload_root):
         return 0
+    reconcile_stored_files_if_due(upload_root)
 
-    for root, dirs, files in os.walk(upload_root):
-        rel_dir = os.path.relpath(root, upload_root).replace('\\', '/')
-        if rel_dir == '.':
-            rel_dir = ''
-
-        # 프로필 이미지는 수명주기 정책이 다르므로 제외
-        dirs[:] = [d for d in dirs if _normalize_rel_path(os.path.join(rel_dir, d)) != 'profiles']
-        if rel_dir.startswith('profiles'):
-            continue
+    grace = ORPHAN_FILE_GRACE_SECONDS if grace_seconds is None else max(0, int(grace_seconds))
+    cutoff = _ts_before(grace)
+    settle_referenced_files(kind, cutoff)
 
-        for name in files:
-            if name == '.gitkeep':
-                continue
-            rel_path = _normalize_rel_path(os.path.join(rel_dir, name))
-            if rel_path in tracked_paths:
-                continue
-            if rel_path in held_paths:
+    removed = 0
+    after_id = 0
+    while True:
+        candidates = find_orphan_files(kind, cutoff, after_id=after_id)
+        if not candidates:
+            break
+        after_id = candidates[-1][0]
+        forgotten = []
+        for _, rel_path in candidates:
+            full_path = os.path.realpath(os.path.join(upload_root, rel_path))
+            if not full_path.startswith(upload_root + os.sep):
                 continue
-
-            full_path = os.path.join(root, name)
-            try:
-                mtime = datetime.fromtimestamp(os.path.getmtime(full_path))
-            except Exception:
-                mtime = now
-            if mtime > cutoff:
+            if not os.path.exists(full_path):
+                forgotten.append(rel_path)
                 continue
-
             if _safe_file_delete(full_path):
+                forgotten.append(rel_path)
                 removed += 1
+        forget_stored_files(forgotten)
+    return removed
+
+
+def cleanup_orphan_upload_files(*, grace_seconds: int | None = None) -> int:
+    """
+    room_files / active upload_tokens 어디에도 추적되지 않는 업로드 파일 정리.
+    profiles 폴더는 제외한다.
+
+    stored_files 매니페스트의 미확인 항목만 anti-join으로 검사한다
+    (전체 폴더 순회는 주기적 reconcile에서만 수행).
+    """
+    purge_expired_upload_tokens()
+    removed = _delete_orphan_manifest_files('upload', grace_seconds)
     if removed > 0:
         logger.info(f"Cleaned up {removed} orphan upload files")
     return removed
@@ -418,63 +356,7 @@ def cleanup_orphan_profile_files(*, grace_seconds: int | None = None) -> int:
     users.profile_image 어디에도 참조되지 않는 profiles 하위 파일 정리.
     실수 삭제 방지를 위해 grace 기간을 적용한다.
     """
-    conn = _get_db()
-    cursor = conn.cursor()
-    now = datetime.now()
-    grace = ORPHAN_FILE_GRACE_SECONDS if grace_seconds is None else max(0, int(grace_seconds))
-    cutoff = now - timedelta(seconds=grace)
-
-    tracked_paths: set[str] = set()
-    try:
-        cursor.execute('SELECT profile_image FROM users WHERE profile_image IS NOT NULL AND profile_image <> ? ', ('',))
-        tracked_paths.update(_normalize_rel_path(row['profile_image']) for row in cursor.fetchall() if row['profile_image'])
-    except Exception:
-        tracked_paths = set()
-
-    held_paths: set[str] = set()
-    try:
-        cursor.execute(
-            '''
-            SELECT target_id
-            FROM legal_holds
-            WHERE hold_type = 'file_path'
-              AND active = 1
-            '''
-        )
-        held_paths.update(_normalize_rel_path(row['target_id']) for row in cursor.fetchall() if row['target_id'])
-    except Exception:
-        held_paths = set()
-
-    removed = 0
-    upload_root = os.path.realpath(_get_upload_folder())
-    profile_root = os.path.join(upload_root, 'profiles')
-    if not os.path.isdir(profile_root):
-        return 0
-
-    for root, _, files in os.walk(profile_root):
-        rel_dir = os.path.relpath(root, upload_root).replace('\\', '/')
-        if rel_dir == '.':
-            rel_dir = ''
-        for name in files:
-            if name == '.gitkeep':
-                continue
-            rel_path = _normalize_rel_path(os.path.join(rel_dir, name))
-            if rel_path in tracked_paths:
-                continue
-            if rel_path in held_paths:
-                continue
-
-            full_path = os.path.join(root, name)
-            try:
-                mtime = datetime.fromtimestamp(os.path.getmtime(full_path))
-            except Exception:
-                mtime = now
-            if mtime > cutoff:
-                continue
-
-            if _safe_file_delete(full_path):
-                removed += 1
-
+    removed = _delete_orphan_manifest_files('profile', grace_seconds)
     if removed > 0:
         logger.info(f"Cleaned up {removed} orphan profile files")
     return removed
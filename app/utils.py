@@ -154,6 +154,10 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+# 헤더 검증에 필요한 앞부분 크기 (텍스트 형식은 2KB 샘플 확인)
+FILE_HEADER_SAMPLE_BYTES = 2048
+
+
 def validate_file_header(file):
     """[v4.3] 파일 매직 넘버(헤더) 검증 - 보안 강화"""
     filename = file.filename.lower()
@@ -165,11 +169,23 @@ def validate_file_header(file):
     start_pos = file.tell()
     try:
         file.seek(0)
-        header = file.read(64)
-        file.seek(0)
-        text_sample = file.read(2048)
+        sample = file.read(FILE_HEADER_SAMPLE_BYTES)
     finally:
         file.seek(start_pos)
+    return validate_header_bytes(filename, sample)
+
+
+def validate_header_bytes(filename, sample):
+    """파일 앞부분(최대 FILE_HEADER_SAMPLE_BYTES) 바이트로 매직 넘버 검증 (스트리밍 업로드용)"""
+    filename = str(filename or '').lower()
+    ext = filename.rsplit('.', 1)[1] if '.' in filename else ''
+
+    if ext not in ALLOWED_EXTENSIONS:
+        return False
+
+    sample = bytes(sample or b'')
+    header = sample[:64]
+    text_sample = sample[:FILE_HEADER_SAMPLE_BYTES]
 
     # 고정 시그니처 기반 파일
     signatures = {
@@ -230,6 +230,7 @@ class MessengerAppController(QObject):
         self.socket.on('room_name_updated', self._socket_logic().on_room_name_updated)
         self.socket.on('room_members_updated', self._socket_logic().on_room_members_updated)
         self.socket.on('read_updated', self._socket_logic().on_read_updated)
+        self.socket.on('room_unread', self._socket_logic().on_room_unread)
         self.socket.on('user_typing', self._socket_logic().on_user_typing)
         self.socket.on('message_edited', self._socket_logic().on_message_edited)
         self.socket.on('message_deleted', self._socket_logic().on_message_deleted)
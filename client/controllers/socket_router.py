@@ -108,6 +108,14 @@ class SocketRouter:
             self.controller._set_room_unread(room_id, 0)
             self.controller._set_rooms_view(self.controller.rooms_cache)
 
+    def on_room_unread(self, payload: dict[str, Any]) -> None:
+        room_id = self.controller._extract_room_id(payload)
+        if not room_id:
+            return
+        unread = 0 if self.controller.current_room_id == room_id else int(payload.get("unread_count") or 0)
+        self.controller._set_room_unread(room_id, unread)
+        self.controller._set_rooms_view(self.controller.rooms_cache)
+
     def on_user_typing(self, payload: dict[str, Any]) -> None:
         room_id = self.controller._extract_room_id(payload)
         if not room_id or self.controller.current_room_id != room_id:
@@ -6,6 +6,11 @@ HTTP API wrapper for the desktop client.
 from __future__ import annotations
 
 import mimetypes
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any
 from urllib.parse import quote
@@ -14,6 +19,15 @@ import httpx
 
 from client.i18n import t
 
+# Files larger than this use the resumable chunked upload protocol.
+CHUNKED_UPLOAD_THRESHOLD = 8 * 1024 * 1024
+CHUNKED_UPLOAD_PARALLELISM = 4
+CHUNK_RETRY_ATTEMPTS = 3
+# Downloads stream into "<name>.part" and resume from it with Range/If-Range.
+DOWNLOAD_PART_SUFFIX = '.part'
+DOWNLOAD_RETRY_ATTEMPTS = 3
+DOWNLOAD_CACHE_MAX_ENTRIES = 512
+
 
 class ApiError(RuntimeError):
     def __init__(self, message: str, *, status_code: int, error_code: str = ''):
@@ -29,12 +43,25 @@ class APIClient:
         self._csrf_token = ''
         self._language_getter = language_getter
         self._unauthorized_retry_hook = None
+        # (room_id, path, size, mtime_ns) -> server upload session id, kept for resume.
+        self._resumable_uploads: dict[tuple[int, str, int, int], str] = {}
+        self._resumable_lock = threading.Lock()
+        # remote path -> (etag, local path) of the last complete download, for If-None-Match.
+        self._download_cache: dict[str, tuple[str, str]] = {}
+        # local .part path -> etag of the partial body, for If-Range resume.
+        self._partial_downloads: dict[str, str] = {}
+        self._download_lock = threading.Lock()
 
     def update_base_url(self, base_url: str) -> None:
         self.base_url = base_url.rstrip('/')
         self._client.close()
         self._client = httpx.Client(base_url=self.base_url, timeout=15.0)
         self._csrf_token = ''
+        with self._resumable_lock:
+            self._resumable_uploads.clear()
+        with self._download_lock:
+            self._download_cache.clear()
+            self._partial_downloads.clear()
 
     def set_language_getter(self, language_getter) -> None:
         self._language_getter = language_getter
@@ -319,12 +346,25 @@ class APIClient:
     def delete_room_file(self, room_id: int, file_id: int) -> dict[str, Any]:
         return self._request('DELETE', f'/api/rooms/{room_id}/files/{file_id}')
 
-    def upload_file(self, room_id: int, file_path: str) -> dict[str, Any]:
+    def upload_file(
+        self,
+        room_id: int,
+        file_path: str,
+        *,
+        parallel: int = CHUNKED_UPLOAD_PARALLELISM,
+    ) -> dict[str, Any]:
         file_obj = Path(file_path)
         if not file_obj.exists() or not file_obj.is_file():
             raise RuntimeError(t('files.local_not_found', 'File not found.'))
 
         mime, _ = mimetypes.guess_type(str(file_obj))
+        if file_obj.stat().st_size > CHUNKED_UPLOAD_THRESHOLD:
+            try:
+                return self._upload_file_chunked(room_id, file_obj, mime or 'application/octet-stream', parallel)
+            except ApiError as exc:
+                # Servers without the chunked protocol fall back to a single-shot upload.
+                if exc.status_code not in (404, 405):
+                    raise
         response = None
         for attempt in range(2):
             with file_obj.open('rb') as fp:
@@ -354,33 +394,184 @@ class APIClient:
             raise ApiError(str(message), status_code=response.status_code, error_code=error_code)
         return payload
 
-    def download_upload_file(self, remote_file_path: str, save_path: str) -> str:
-        encoded_path = '/'.join(quote(part) for part in remote_file_path.split('/'))
-        response = None
-        for attempt in range(2):
-            response = self._client.get(f'/uploads/{encoded_path}', headers=self._headers())
-            if (
-                response.status_code == 401
-                and attempt == 0
-                and callable(self._unauthorized_retry_hook)
-            ):
+    def _upload_file_chunked(self, room_id: int, file_obj: Path, mime: str, parallel: int) -> dict[str, Any]:
+        """Init (or resume) a chunked upload session, PUT missing chunks in parallel, then finalize."""
+        stat = file_obj.stat()
+        key = (int(room_id), str(file_obj.resolve()), int(stat.st_size), int(stat.st_mtime_ns))
+        with self._resumable_lock:
+            session_id = self._resumable_uploads.get(key, '')
+
+        state: dict[str, Any] | None = None
+        if session_id:
+            try:
+                state = self._request('GET', f'/api/uploads/sessions/{session_id}')
+            except ApiError as exc:
+                if exc.status_code != 404:
+                    raise
+                state = None
+        if state is None:
+            state = self._request(
+                'POST',
+                '/api/uploads/sessions',
+                json_data={
+                    'room_id': int(room_id),
+                    'file_name': file_obj.name,
+                    'file_size': int(stat.st_size),
+                    'content_type': mime,
+                },
+            )
+            session_id = str(state['session_id'])
+            with self._resumable_lock:
+                self._resumable_uploads[key] = session_id
+
+        chunk_size = int(state['chunk_size'])
+        received = {int(index) for index in state.get('received_chunks') or []}
+        pending = [index for index in range(int(state['total_chunks'])) if index not in received]
+        if pending:
+            workers = max(1, min(int(parallel or 1), len(pending)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='upload-chunk') as pool:
+                futures = [
+                    pool.submit(self._put_upload_chunk, session_id, file_obj, index * chunk_size, chunk_size)
+                    for index in pending
+                ]
+                for future in futures:
+                    future.result()
+
+        payload = self._request('POST', f'/api/uploads/sessions/{session_id}/finalize')
+        with self._resumable_lock:
+            self._resumable_uploads.pop(key, None)
+        return payload
+
+    def _put_upload_chunk(self, session_id: str, file_obj: Path, offset: int, chunk_size: int) -> None:
+        with file_obj.open('rb') as fp:
+            fp.seek(offset)
+            data = fp.read(chunk_size)
+        path = f'/api/uploads/sessions/{session_id}/chunks'
+        last_error: Exception | None = None
+        for attempt in range(CHUNK_RETRY_ATTEMPTS):
+            try:
+                response = self._client.put(
+                    path,
+                    params={'offset': offset},
+                    content=data,
+                    headers=self._headers({'Content-Type': 'application/octet-stream'}),
+                )
+            except httpx.TransportError as exc:
+                last_error = exc
+                time.sleep(0.5 * (2 ** attempt))
+                continue
+            if response.status_code == 401 and callable(self._unauthorized_retry_hook):
                 try:
                     if bool(self._unauthorized_retry_hook()):
                         continue
                 except Exception:
                     pass
-            break
-        if response is None:
-            raise ApiError('HTTP download failed', status_code=500, error_code='')
-        if response.status_code >= 400:
+            if response.status_code < 400:
+                return
             payload = response.json() if 'application/json' in response.headers.get('content-type', '') else {}
             message = payload.get('error_localized') or payload.get('error') or f'HTTP {response.status_code}'
-            error_code = str(payload.get('error_code') or '') if isinstance(payload, dict) else ''
-            raise ApiError(str(message), status_code=response.status_code, error_code=error_code)
-
+            last_error = ApiError(
+                str(message),
+                status_code=response.status_code,
+                error_code=str(payload.get('error_code') or '') if isinstance(payload, dict) else '',
+            )
+            if response.status_code < 500:
+                break
+            time.sleep(0.5 * (2 ** attempt))
+        if isinstance(last_error, ApiError):
+            raise last_error
+        raise ApiError(f'HTTP chunk upload failed: {last_error}', status_code=503, error_code='')
+
+    def download_upload_file(self, remote_file_path: str, save_path: str, *, variant: str = '') -> str:
+        """
+        Stream an attachment to ``save_path``.
+
+        A file downloaded earlier is revalidated with If-None-Match and reused on 304.
+        An interrupted transfer keeps its ``.part`` file and resumes with a Range
+        request guarded by If-Range, so retries only fetch the missing bytes.
+        ``variant`` ('thumb' or 'preview') asks for a downscaled image; the server
+        falls back to the original until the variant has been generated.
+        """
+        encoded_path = '/'.join(quote(part) for part in remote_file_path.split('/'))
+        url = f'/uploads/{encoded_path}'
+        cache_key = remote_file_path
+        if variant:
+            url = f'{url}?variant={quote(variant)}'
+            cache_key = f'{remote_file_path}?variant={variant}'
         output = Path(save_path)
         output.parent.mkdir(parents=True, exist_ok=True)
-        output.write_bytes(response.content)
+        partial = output.with_name(output.name + DOWNLOAD_PART_SUFFIX)
+        with self._download_lock:
+            cached = self._download_cache.get(cache_key)
+            etag = self._partial_downloads.get(str(partial), '')
+        cached_path = Path(cached[1]) if cached else None
+
+        auth_retried = False
+        last_error: Exception | None = None
+        attempt = 0
+        while attempt < DOWNLOAD_RETRY_ATTEMPTS:
+            headers: dict[str, str] = {}
+            offset = partial.stat().st_size if etag and partial.is_file() else 0
+            if offset:
+                headers['Range'] = f'bytes={offset}-'
+                headers['If-Range'] = etag
+            elif cached and cached_path is not None and cached_path.is_file():
+                headers['If-None-Match'] = cached[0]
+            try:
+                with self._client.stream('GET', url, headers=self._headers(headers)) as response:
+                    if (
+                        response.status_code == 401
+                        and not auth_retried
+                        and callable(self._unauthorized_retry_hook)
+                    ):
+                        auth_retried = True
+                        try:
+                            if bool(self._unauthorized_retry_hook()):
+                                continue
+                        except Exception:
+                            pass
+                    if response.status_code == 304 and cached_path is not None:
+                        if cached_path.resolve() != output.resolve():
+                            shutil.copyfile(cached_path, output)
+                        return str(output)
+                    if response.status_code >= 400:
+                        response.read()
+                        payload = (
+                            response.json() if 'application/json' in response.headers.get('content-type', '') else {}
+                        )
+                        message = payload.get('error_localized') or payload.get('error') or f'HTTP {response.status_code}'
+                        error_code = str(payload.get('error_code') or '') if isinstance(payload, dict) else ''
+                        raise ApiError(str(message), status_code=response.status_code, error_code=error_code)
+
+                    resumed = response.status_code == 206 and offset > 0
+                    etag = response.headers.get('etag', '')
+                    with self._download_lock:
+                        if etag:
+                            self._partial_downloads[str(partial)] = etag
+                        else:
+                            self._partial_downloads.pop(str(partial), None)
+                    # Write chunks as they arrive so an interrupted transfer keeps every received byte.
+                    with partial.open('ab' if resumed else 'wb') as fp:
+                        for chunk in response.iter_bytes():
+                            fp.write(chunk)
+            except httpx.TransportError as exc:
+                last_error = exc
+                attempt += 1
+                if attempt < DOWNLOAD_RETRY_ATTEMPTS:
+                    time.sleep(0.5 * (2 ** (attempt - 1)))
+                continue
+            break
+        else:
+            raise ApiError(f'HTTP download failed: {last_error}', status_code=503, error_code='')
+
+        os.replace(partial, output)
+        with self._download_lock:
+            self._partial_downloads.pop(str(partial), None)
+            if etag:
+                self._download_cache.pop(cache_key, None)
+                self._download_cache[cache_key] = (etag, str(output))
+                while len(self._download_cache) > DOWNLOAD_CACHE_MAX_ENTRIES:
+                    self._download_cache.pop(next(iter(self._download_cache)))
         return str(output)
 
     def get_room_admins(self, room_id: int) -> list[dict[str, Any]]:
@@ -25,6 +25,7 @@ class SocketClient:
         self._client.on('disconnect', handler=self._on_disconnect)
         self._client.on('new_message', handler=lambda data=None: self._emit_event('new_message', data))
         self._client.on('read_updated', handler=lambda data=None: self._emit_event('read_updated', data))
+        self._client.on('room_unread', handler=lambda data=None: self._emit_event('room_unread', data))
         self._client.on('user_typing', handler=lambda data=None: self._emit_event('user_typing', data))
         self._client.on('room_updated', handler=lambda data=None: self._emit_event('room_updated', data))
         self._client.on('room_name_updated', handler=lambda data=None: self._emit_event('room_name_updated', data))
@@ -80,6 +80,18 @@ DESKTOP_CLIENT_CANARY_SIGNATURE_ALG = "sha256"
 ENFORCE_HTTPS = False
 ALLOW_SELF_REGISTER = True
 MAINTENANCE_INTERVAL_MINUTES = 30
+MAINTENANCE_STARTUP_MODE = "background"  # background | sync | off (시작 시 유지보수 실행 방식)
+MAINTENANCE_STARTUP_DELAY_SECONDS = 10  # background 모드에서 시작 후 유지보수까지 대기 시간 (초)
+MAINTENANCE_DELETE_BATCH_SIZE = 500  # 정리 작업의 트랜잭션당 최대 삭제 행 수
+MAINTENANCE_BATCH_PAUSE_MS = 5  # 삭제 배치 사이 양보 시간 (ms)
+ORPHAN_RECONCILE_INTERVAL_HOURS = 24  # 업로드 폴더 전체 순회(매니페스트 보정) 주기 (0 = 매 유지보수마다)
+UPLOAD_SHARDING_ENABLED = True  # 새 업로드를 파일명 해시 기반 ab/cd/ 하위 폴더에 저장
+UPLOAD_DEDUP_ENABLED = False  # 같은 내용(SHA-256)의 첨부를 한 번만 저장하고 room_files 참조 수로 관리
+CHUNKED_UPLOAD_MAX_BYTES = 512 * 1024 * 1024  # 분할(재개 가능) 업로드 최대 파일 크기
+CHUNKED_UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024  # 분할 업로드 청크 크기 (MAX_CONTENT_LENGTH 이하)
+CHUNKED_UPLOAD_SESSION_TTL_HOURS = 24  # 마지막 청크 수신 후 미완료 세션 보관 시간
+CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER = 4  # 사용자별 동시 미완료 분할 업로드 세션 수
+CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER = 1024 * 1024 * 1024  # 사용자별 미완료 세션 file_size 합계 상한
 REQUIRE_MESSAGE_ENCRYPTION = False
 REQUIRE_SIGNED_UPDATES_IN_PROD = True
 RATE_LIMIT_STORAGE_URI = "memory://"
@@ -114,6 +126,54 @@ MAX_HTTP_BUFFER_SIZE = 10 * 1024 * 1024  # 10MB (메시지 버퍼 크기)
 # 동시 연결 제한 (0 = 무제한)
 MAX_CONNECTIONS = 0
 
+# SQLite 연결 풀 (프로세스당)
+DB_POOL_SIZE = 16  # 최대 동시 연결 수
+DB_POOL_TIMEOUT_SECONDS = 10  # 연결 대기 최대 시간 (초)
+DB_POOL_MAX_AGE_SECONDS = 1800  # 이 시간보다 오래된 연결은 반납 시 교체 (0 = 무제한)
+
+# 메시지 INSERT 그룹 커밋 (단일 writer 큐, 기본 비활성)
+MESSAGE_WRITE_BATCHING = False
+MESSAGE_WRITE_BATCH_WINDOW_MS = 0  # 추가 수집 대기 시간 (ms, 0 = 커밋 중 쌓인 INSERT만 묶음)
+MESSAGE_WRITE_BATCH_MAX = 64  # 배치당 최대 INSERT 수
+# 대화방 멤버십 캐시 (user→rooms / room→users LRU, 멤버십 변경 시 즉시 갱신)
+MEMBERSHIP_CACHE_MAX_USERS = 5000  # 캐시할 최대 사용자 수
+MEMBERSHIP_CACHE_MAX_ROOMS = 5000  # 캐시할 최대 대화방 수
+MEMBERSHIP_CACHE_TTL_SECONDS = 300  # 멤버십 캐시 항목 유지 시간. 다른 프로세스/직접 SQL 변경 반영 (0 = 이벤트로만 갱신)
+MEMBERSHIP_DENY_CACHE_TTL_SECONDS = 30  # 접근 거부 (user, room) 음성 캐시 유지 시간 (0 = 비활성)
+MEMBERSHIP_DENY_CACHE_MAX_SIZE = 10000
+# 첨부 다운로드 ACL 캐시 (저장 경로 → 참조 대화방/파일명, 최대 항목 수)
+UPLOAD_ACL_CACHE_MAX_SIZE = 10000
+# 스트리밍 업로드 수신 (업로드 1건당 메모리 = 청크 버퍼 크기)
+UPLOAD_STREAM_CHUNK_BYTES = 64 * 1024
+# 첨부 다운로드 (/uploads): 비공개 캐시 유지 시간과 파일 전송 버퍼
+UPLOAD_CACHE_MAX_AGE_SECONDS = 3600
+UPLOAD_SEND_BUFFER_BYTES = 256 * 1024
+# 리버스 프록시(nginx internal location) 오프로드 경로 접두사. 예: '/_protected_uploads/' ('' = 비활성)
+UPLOAD_ACCEL_REDIRECT_PREFIX = ''
+# 이미지 첨부 축소본 (Pillow 필요, 없으면 원본 제공). variant 이름 → 긴 변 픽셀
+THUMBNAILS_ENABLED = True
+THUMBNAIL_SIZES = {'thumb': 256, 'preview': 1024}
+THUMBNAIL_FORMAT = 'webp'  # 'webp' | 'jpeg' (WebP 인코더가 없으면 JPEG)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600
+# 프로필 이미지 정규화 (Pillow 필요, 없으면 업로드 원본 그대로 저장)
+# EXIF 제거 + 정사각형 크롭 + 재인코딩. 가장 큰 크기가 대표 이미지, 나머지는 ?size= 요청용 축소본
+PROFILE_IMAGE_NORMALIZE = True
+PROFILE_IMAGE_SIZES = (48, 96, 256)
+PROFILE_IMAGE_KEEP_ORIGINAL = False  # True면 업로드 원본을 비공개(.thumbs)로 보관
+PROFILE_IMAGE_CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600
+# 메시지 검색: 3글자 이상 검색어는 trigram FTS 색인(부분 문자열 일치)을 사용
+# (False면 단어 단위 unicode61 색인만 사용. 2글자 이하는 항상 unicode61 접두어 일치)
+SEARCH_FTS_TRIGRAM = True
+# 검색 계획 통계: 디버그 모드 요청에서만 적중 수 추정(fts5vocab)과 볼 수 있는 메시지 수를 조회해 DEBUG 로그/응답에 표시
+SEARCH_PLANNER_ENABLED = True
+# 검색 결과 total은 이 건수까지만 센다 (넘으면 total_capped=True, 화면에는 "1000+")
+SEARCH_TOTAL_CAP = 1000
+# 검색 결과 캐시 (사용자+검색어+필터+페이지 LRU, 대화방 메시지 변경 시 무효). TTL 0 = 비활성
+SEARCH_CACHE_MAX_SIZE = 1000
+SEARCH_CACHE_TTL_SECONDS = 60
+
 # 메시지 큐 설정 (대규모 배포 시 Redis 사용 권장)
 # MESSAGE_QUEUE = 'redis://localhost:6379'  # Redis 사용 시 주석 해제
 MESSAGE_QUEUE = None  # 단일 서버 모드
@@ -1,159 +1,57 @@
 
+import argparse
 import sqlite3
-import os
-from config import DATABASE_PATH
-
-def migrate_db():
-    print(f"Migrating database at: {DATABASE_PATH}")
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-
-    # 1. Ensure new tables exist
-    tables = {
-        'pinned_messages': '''
-            CREATE TABLE IF NOT EXISTS pinned_messages (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                message_id INTEGER,
-                content TEXT,
-                pinned_by INTEGER NOT NULL,
-                pinned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (message_id) REFERENCES messages(id),
-                FOREIGN KEY (pinned_by) REFERENCES users(id)
-            )
-        ''',
-        'polls': '''
-            CREATE TABLE IF NOT EXISTS polls (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                created_by INTEGER NOT NULL,
-                question TEXT NOT NULL,
-                multiple_choice INTEGER DEFAULT 0,
-                anonymous INTEGER DEFAULT 0,
-                closed INTEGER DEFAULT 0,
-                ends_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (created_by) REFERENCES users(id)
-            )
-        ''',
-        'poll_options': '''
-            CREATE TABLE IF NOT EXISTS poll_options (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                poll_id INTEGER NOT NULL,
-                option_text TEXT NOT NULL,
-                FOREIGN KEY (poll_id) REFERENCES polls(id) ON DELETE CASCADE
-            )
-        ''',
-        'poll_votes': '''
-            CREATE TABLE IF NOT EXISTS poll_votes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                poll_id INTEGER NOT NULL,
-                option_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                voted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(poll_id, option_id, user_id),
-                FOREIGN KEY (poll_id) REFERENCES polls(id) ON DELETE CASCADE,
-                FOREIGN KEY (option_id) REFERENCES poll_options(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        ''',
-        'room_files': '''
-            CREATE TABLE IF NOT EXISTS room_files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_id INTEGER NOT NULL,
-                message_id INTEGER,
-                file_path TEXT NOT NULL,
-                file_name TEXT NOT NULL,
-                file_size INTEGER,
-                file_type TEXT,
-                uploaded_by INTEGER NOT NULL,
-                uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (room_id) REFERENCES rooms(id),
-                FOREIGN KEY (message_id) REFERENCES messages(id),
-                FOREIGN KEY (uploaded_by) REFERENCES users(id)
-            )
-        ''',
-        'message_reactions': '''
-            CREATE TABLE IF NOT EXISTS message_reactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                message_id INTEGER NOT NULL,
-                user_id INTEGER NOT NULL,
-                emoji TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(message_id, user_id, emoji),
-                FOREIGN KEY (message_id) REFERENCES messages(id) ON DELETE CASCADE,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-        '''
-    }
-
-    for table_name, create_sql in tables.items():
-        try:
-            cursor.execute(f"SELECT name FROM sqlite_master WHERE type='table' AND name='{table_name}'")
-            if not cursor.fetchone():
-                print(f"Creating table: {table_name}")
-                cursor.execute(create_sql)
-        except Exception as e:
-            print(f"Error checking/creating table {table_name}: {e}")
 
-    # 2. Check for missing columns in existing tables
-    # Format: table_name: {column_name: column_type_definition}
-    required_columns = {
-        'room_members': {
-            'role': 'TEXT DEFAULT "member"',
-            'pinned': 'INTEGER DEFAULT 0',
-            'muted': 'INTEGER DEFAULT 0',
-            'last_read_message_id': 'INTEGER DEFAULT 0'
-        },
-        'messages': {
-            'reply_to': 'INTEGER'
-        },
-        'rooms': {
-             # Add if any new columns were added to rooms, none seen in init_db snippet so far, 
-             # but keeping placeholder just in case. 
-             # Wait, 'pinned' and 'muted' are in room_members, not rooms (usually).
-             # Let's double check models.py... yes, they were in room_members schema.
-        }
-    }
-
-    for table, columns in required_columns.items():
-        try:
-            cursor.execute(f"PRAGMA table_info({table})")
-            existing_columns = [row['name'] for row in cursor.fetchall()]
-            
-            for col_name, col_def in columns.items():
-                if col_name not in existing_columns:
-                    print(f"Adding column '{col_name}' to table '{table}'")
-                    try:
-                        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {col_name} {col_def}")
-                    except Exception as e:
-                        print(f"Failed to add column {col_name}: {e}")
-        except Exception as e:
-             print(f"Error checking columns for {table}: {e}")
-
-    # 3. Create Indexes
-    indexes = [
-        'CREATE INDEX IF NOT EXISTS idx_messages_room_id ON messages(room_id)',
-        'CREATE INDEX IF NOT EXISTS idx_messages_created_at ON messages(created_at)',
-        'CREATE INDEX IF NOT EXISTS idx_room_members_user_id ON room_members(user_id)',
-        'CREATE INDEX IF NOT EXISTS idx_room_members_room_id ON room_members(room_id)',
-        'CREATE INDEX IF NOT EXISTS idx_message_reactions_message_id ON message_reactions(message_id)',
-        'CREATE INDEX IF NOT EXISTS idx_room_files_file_path ON room_files(file_path)',
-        'CREATE INDEX IF NOT EXISTS idx_users_status ON users(status)',
-    ]
-
-    for idx_sql in indexes:
-        try:
-            cursor.execute(idx_sql)
-        except Exception as e:
-            print(f"Error creating index: {e}")
+from config import DATABASE_PATH
+from app.models.migrations import (
+    LATEST_SCHEMA_VERSION,
+    get_applied_migrations,
+    get_schema_version,
+    run_migrations,
+)
+
+
+def migrate_db(db_path=DATABASE_PATH, target_version=None):
+    """서버를 띄우지 않고 스키마 마이그레이션만 적용 (app.models.migrations 사용)"""
+    print(f"Migrating database at: {db_path}")
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        before = get_schema_version(conn)
+        applied = run_migrations(conn, target_version)
+        after = get_schema_version(conn)
+    finally:
+        conn.close()
+
+    for item in applied:
+        print(f"  applied {item['version']:03d}_{item['name']} ({item['duration_ms']}ms)")
+    if applied:
+        print(f"Migration completed: v{before} -> v{after}")
+    else:
+        print(f"Schema already at v{after} (latest v{LATEST_SCHEMA_VERSION})")
+    return applied
+
+
+def show_status(db_path=DATABASE_PATH):
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        version = get_schema_version(conn)
+        history = get_applied_migrations(conn)
+    finally:
+        conn.close()
+    print(f"Schema version: v{version} (latest v{LATEST_SCHEMA_VERSION})")
+    for item in history:
+        print(f"  {item['version']:03d}_{item['name']}  {item['applied_at']}  {item['duration_ms']}ms")
 
-    conn.commit()
-    conn.close()
-    print("Migration completed.")
 
 if __name__ == "__main__":
-    migrate_db()
+    parser = argparse.ArgumentParser(description='Apply schema migrations')
+    parser.add_argument('--db', default=DATABASE_PATH, help='database path (default: config.DATABASE_PATH)')
+    parser.add_argument('--to', type=int, default=None, help='target schema version')
+    parser.add_argument('--status', action='store_true', help='show applied migrations only')
+    args = parser.parse_args()
+    if args.status:
+        show_status(args.db)
+    else:
+        migrate_db(args.db, args.to)
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+한국어 메시지 검색 벤치마크 (LIKE 전체 스캔 vs unicode61 단어 색인 vs trigram 색인)
+
+사용법:
+    python scripts/bench_korean_search.py --messages 1000000
+
+임시 DB에 합성 한국어 대화(명사 + 조사 + 복합어 + 서술어)를 넣고 검색어마다
+- like     : content LIKE '%검색어%' (정답 기준)
+- unicode61: 기존 공백 단위 토큰 완전 일치
+- current  : 현재 검색 경로 (_fts5_hits_sql: 3글자 이상 trigram, 그 이하 접두어)
+의 지연 시간(중앙값)과 LIKE 대비 재현율을 출력한다. 운영 DB는 건드리지 않는다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SKIP_GEVENT_PATCH', '1')
+
+NOUNS = [
+    '회의', '회의실', '프로젝트', '일정', '보고서', '점심', '메뉴', '예산', '출장', '계약서',
+    '견적', '배포', '서버', '장애', '고객', '미팅', '자료', '검토', '휴가', '결재',
+    '인사', '교육', '채용', '면접', '발표', '디자인', '개발', '테스트', '문서', '공지',
+]
+PREFIXES = ['정기', '대', '소', '주간', '월간', '긴급', '최종', '신규', '분기']
+PARTICLES = ['은', '는', '이', '가', '을', '를', '에서', '으로', '에게', '도', '만', '까지', '와', '의']
+PREDICATES = [
+    '확인했습니다', '공유해 주세요', '부탁드립니다', '진행 중입니다', '완료했습니다',
+    '검토 바랍니다', '변경되었습니다', '취소되었습니다', '참고하세요', '올려 두었습니다',
+]
+DEFAULT_QUERIES = ['회의', '회의실', '정기회의', '보고서', '주간보고서', '서버 장애', '예산 검토', '디자인', '결재']
+
+
+def _sentence(rng: random.Random) -> str:
+    words = []
+    for _ in range(rng.randint(2, 5)):
+        noun = rng.choice(NOUNS)
+        if rng.random() < 0.25:
+            noun = rng.choice(PREFIXES) + noun
+        words.append(noun + (rng.choice(PARTICLES) if rng.random() < 0.7 else ''))
+    words.append(rng.choice(PREDICATES))
+    return ' '.join(words)
+
+
+def _prepare_db(db_path: str, upload_dir: str, total: int, rooms: int, seed: int) -> None:
+    import config
+
+    config.DATABASE_PATH = db_path
+    config.UPLOAD_FOLDER = upload_dir
+
+    import importlib
+    import app.models.base as base_module
+
+    importlib.reload(base_module)
+    base_module._db_initialized = False
+    base_module.init_db()
+
+    conn = base_module.get_db()
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('bench', 'x', 'bench')")
+    user_id = int(cursor.lastrowid)
+    room_ids = []
+    for index in range(rooms):
+        cursor.execute("INSERT INTO rooms (name, type, created_by) VALUES (?, 'group', ?)", (f'room {index}', user_id))
+        room_ids.append(int(cursor.lastrowid))
+    cursor.executemany(
+        'INSERT INTO room_members (room_id, user_id) VALUES (?, ?)',
+        [(room_id, user_id) for room_id in room_ids],
+    )
+    conn.commit()
+
+    rng = random.Random(seed)
+    batch = 10000
+    started = time.perf_counter()
+    for start in range(0, total, batch):
+        rows = [
+            (rng.choice(room_ids), user_id, _sentence(rng))
+            for _ in range(min(batch, total - start))
+        ]
+        cursor.executemany(
+            "INSERT INTO messages (room_id, sender_id, content, encrypted, message_type) VALUES (?, ?, ?, 0, 'text')",
+            rows,
+        )
+        conn.commit()
+    print(f'loaded {total} messages in {time.perf_counter() - started:.1f}s')
+
+
+def _index_sizes(conn) -> dict[str, int]:
+    """FTS 색인별 섀도 테이블 크기 (dbstat 가상 테이블이 없으면 빈 dict)"""
+    sizes = {}
+    for table in ('messages_fts', 'messages_fts_trigram'):
+        names = [f'{table}_{suffix}' for suffix in ('data', 'idx', 'content', 'docsize', 'config')]
+        try:
+            row = conn.execute(
+                f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({','.join('?' for _ in names)})",
+                names,
+            ).fetchone()
+        except Exception:
+            return {}
+        sizes[table] = int(row[0] or 0)
+    return sizes
+
+
+def _timed(conn, sql: str, params, repeat: int) -> tuple[float, set[int]]:
+    samples = []
+    ids: set[int] = set()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        ids = {int(row[0]) for row in conn.execute(sql, params).fetchall()}
+        samples.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(samples), ids
+
+
+def _run_queries(queries: list[str], repeat: int) -> None:
+    import app.models.base as base_module
+    from app.models.messages import _fts5_build_query, _fts5_hits_sql
+
+    conn = base_module.get_db()
+    cursor = conn.cursor()
+    print(f'{"query":<14}{"like ms":>10}{"hits":>9}{"unicode61 ms":>14}{"recall":>8}{"current ms":>12}{"recall":>8}')
+    for query in queries:
+        terms = query.split()
+        like_sql = (
+            "SELECT id FROM messages WHERE encrypted = 0 AND message_type IN ('text', 'system') AND "
+            + ' AND '.join('content LIKE ?' for _ in terms)
+        )
+        like_ms, expected = _timed(conn, like_sql, [f'%{term}%' for term in terms], repeat)
+        word_ms, word_ids = _timed(
+            conn,
+            'SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?',
+            [_fts5_build_query(query)],
+            repeat,
+        )
+        hits_sql, hits_params = _fts5_hits_sql(cursor, query)
+        current_ms, current_ids = _timed(conn, f'SELECT id FROM ({hits_sql})', hits_params, repeat)
+
+        def _recall(found: set[int]) -> str:
+            return f'{len(found & expected) / len(expected):.3f}' if expected else '-'
+
+        print(
+            f'{query:<14}{like_ms:>10.1f}{len(expected):>9}{word_ms:>14.1f}{_recall(word_ids):>8}'
+            f'{current_ms:>12.1f}{_recall(current_ids):>8}'
+        )
+    sizes = _index_sizes(conn)
+    if sizes:
+        print('index size: ' + ', '.join(f'{name}={size / (1024 * 1024):.1f}MB' for name, size in sizes.items()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Korean message search benchmark')
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--query', action='append', dest='queries', help='repeatable (default: built-in set)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_search_')
+    try:
+        _prepare_db(os.path.join(workdir, 'bench.db'), workdir, args.messages, args.rooms, args.seed)
+        _run_queries(args.queries or DEFAULT_QUERIES, args.repeat)
+    finally:
+        import app.models.base as base_module
+
+        base_module.close_thread_db()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+메시지 INSERT 처리량 벤치마크 (그룹 커밋 on/off 비교)
+
+사용법:
+    python scripts/bench_message_writes.py --threads 16 --messages 200
+
+임시 DB를 만들어 동일한 부하를 MESSAGE_WRITE_BATCHING 비활성/활성 상태로
+각각 실행하고 messages/sec를 출력한다. 운영 DB는 건드리지 않는다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SKIP_GEVENT_PATCH', '1')
+
+
+def _prepare_db(db_path: str, upload_dir: str, threads: int) -> tuple[int, list[int]]:
+    import config
+
+    config.DATABASE_PATH = db_path
+    config.UPLOAD_FOLDER = upload_dir
+
+    import importlib
+    import app.models.base as base_module
+
+    importlib.reload(base_module)
+    base_module._db_initialized = False
+    base_module.init_db()
+
+    conn = base_module.get_db()
+    cursor = conn.cursor()
+    user_ids = []
+    for index in range(threads):
+        cursor.execute(
+            'INSERT INTO users (username, password_hash, nickname) VALUES (?, ?, ?)',
+            (f'bench_{index}', 'x', f'bench {index}'),
+        )
+        user_ids.append(int(cursor.lastrowid))
+    cursor.execute("INSERT INTO rooms (name, type, created_by) VALUES ('bench', 'group', ?)", (user_ids[0],))
+    room_id = int(cursor.lastrowid)
+    cursor.executemany(
+        'INSERT INTO room_members (room_id, user_id) VALUES (?, ?)',
+        [(room_id, user_id) for user_id in user_ids],
+    )
+    conn.commit()
+    base_module.close_thread_db()
+    return room_id, user_ids
+
+
+def _run(threads: int, per_thread: int, batching: bool, window_ms: float) -> tuple[float, dict]:
+    from app.models import close_thread_db, create_message
+    from app.models.write_queue import configure_message_write_queue, get_message_write_queue_stats
+
+    workdir = tempfile.mkdtemp(prefix='bench_msg_')
+    try:
+        room_id, user_ids = _prepare_db(os.path.join(workdir, 'bench.db'), workdir, threads)
+        configure_message_write_queue(batching, window_ms=window_ms, max_batch=256)
+        barrier = threading.Barrier(threads + 1)
+        failures = []
+
+        def _worker(user_id: int) -> None:
+            barrier.wait()
+            for index in range(per_thread):
+                if not create_message(room_id, user_id, f'bench {index}', encrypted=False):
+                    failures.append(index)
+            close_thread_db()
+
+        workers = [threading.Thread(target=_worker, args=(user_id,)) for user_id in user_ids]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        stats = get_message_write_queue_stats()
+        configure_message_write_queue(False)
+        if failures:
+            raise RuntimeError(f'{len(failures)} inserts failed')
+        return (threads * per_thread) / elapsed, stats
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Message insert throughput benchmark')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--messages', type=int, default=200, help='messages per thread')
+    parser.add_argument('--window-ms', type=float, default=0.0)
+    args = parser.parse_args()
+
+    total = args.threads * args.messages
+    print(f'threads={args.threads} messages/thread={args.messages} total={total}')
+    baseline, _ = _run(args.threads, args.messages, False, args.window_ms)
+    print(f'  per-message commit : {baseline:10.1f} msg/s')
+    batched, stats = _run(args.threads, args.messages, True, args.window_ms)
+    print(
+        f'  group commit       : {batched:10.1f} msg/s '
+        f'(avg batch {stats["avg_batch_size"]}, max batch {stats["max_batch_size"]}, '
+        f'commit avg {stats["commit_ms_avg"]}ms)'
+    )
+    print(f'  speedup            : {batched / baseline:10.2f}x')
+
+
+if __name__ == '__main__':
+    main()
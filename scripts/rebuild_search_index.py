@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+메시지 검색 FTS5 색인 일괄 재구축
+
+사용법:
+    python scripts/rebuild_search_index.py [--db PATH]
+
+색인은 트리거로 유지되지만 external-content 테이블이라 messages를 트리거 없이
+직접 고친 경우(수동 DB 조작, 복구 등) 어긋날 수 있다. 서버를 내린 상태(또는 유지보수
+시간)에 실행해 messages_fts / messages_fts_trigram을 평문 메시지 기준으로 다시 채운다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SKIP_GEVENT_PATCH', '1')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Rebuild message search FTS5 indexes')
+    parser.add_argument('--db', help='database path (default: config.DATABASE_PATH)')
+    args = parser.parse_args()
+
+    import config
+
+    if args.db:
+        config.DATABASE_PATH = os.path.abspath(args.db)
+
+    import importlib
+    import app.models.base as base_module
+
+    importlib.reload(base_module)
+
+    started = time.perf_counter()
+    rebuilt = base_module.rebuild_search_index()
+    base_module.close_thread_db()
+    elapsed = time.perf_counter() - started
+    if not rebuilt:
+        print(f'no search index rebuilt ({config.DATABASE_PATH})')
+        sys.exit(1)
+    summary = ', '.join(f'{table}={rows}' for table, rows in rebuilt.items())
+    print(f'rebuilt search index ({summary}) in {elapsed:.2f}s ({config.DATABASE_PATH})')
+
+
+if __name__ == '__main__':
+    main()
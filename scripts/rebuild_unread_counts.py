@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+room_members.unread_count 오프라인 재계산
+
+사용법:
+    python scripts/rebuild_unread_counts.py [--db PATH] [--room-id ID]
+
+서버를 내린 상태(또는 유지보수 시간)에 실행한다. 트리거로 유지되는 카운터가
+수동 DB 조작 등으로 어긋났을 때 last_read_message_id 기준으로 다시 맞춘다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SKIP_GEVENT_PATCH', '1')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Rebuild per-member unread counters')
+    parser.add_argument('--db', help='database path (default: config.DATABASE_PATH)')
+    parser.add_argument('--room-id', type=int, help='rebuild a single room only')
+    args = parser.parse_args()
+
+    import config
+
+    if args.db:
+        config.DATABASE_PATH = os.path.abspath(args.db)
+
+    import importlib
+    import app.models.base as base_module
+
+    importlib.reload(base_module)
+
+    started = time.perf_counter()
+    updated = base_module.rebuild_unread_counts(args.room_id)
+    base_module.close_thread_db()
+    elapsed = time.perf_counter() - started
+    print(f'rebuilt unread_count for {updated} member rows in {elapsed:.2f}s ({config.DATABASE_PATH})')
+
+
+if __name__ == '__main__':
+    main()
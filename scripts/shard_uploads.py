@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+평면 업로드 파일 → 해시 분산 경로(ab/cd/<파일명>) 오프라인 이전
+
+사용법:
+    python scripts/shard_uploads.py [--db PATH] [--upload-folder PATH] [--batch-size 500] [--dry-run]
+
+서버를 내린 상태(또는 유지보수 시간)에 실행한다. 중단돼도 다시 실행하면 남은
+파일부터 이어서 처리한다. 서버는 이전 중에도 평면/분산 경로를 모두 찾아 제공한다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SKIP_GEVENT_PATCH', '1')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Move flat uploads into hashed shard directories')
+    parser.add_argument('--db', help='database path (default: config.DATABASE_PATH)')
+    parser.add_argument('--upload-folder', help='upload folder (default: config.UPLOAD_FOLDER)')
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help='report only, do not move files')
+    args = parser.parse_args()
+
+    import config
+    from app.upload_storage import migrate_flat_uploads
+
+    db_path = os.path.abspath(args.db) if args.db else config.DATABASE_PATH
+    upload_folder = os.path.abspath(args.upload_folder) if args.upload_folder else config.UPLOAD_FOLDER
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        result = migrate_flat_uploads(conn, upload_folder, batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - started
+    mode = 'dry-run' if args.dry_run else 'applied'
+    print(
+        f"{mode}: moved={result['moved']} already_moved={result['already_moved']} "
+        f"missing={result['missing']} batches={result['batches']} in {elapsed:.2f}s ({upload_folder})"
+    )
+
+
+if __name__ == '__main__':
+    main()
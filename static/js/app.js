@@ -395,7 +395,7 @@ function initApp() {
                 // [v4.22] XSS 방지: safeImagePath 사용
                 var safePath = typeof safeImagePath === 'function' ? safeImagePath(currentUser.profile_image) : currentUser.profile_image;
                 if (safePath) {
-                    userAvatar.innerHTML = '<img src="/uploads/' + safePath + '" alt="프로필">';
+                    userAvatar.innerHTML = '<img src="/uploads/' + safePath + '?size=96" alt="프로필">';
                     userAvatar.classList.add('has-image');
                 }
             } else {
@@ -30,7 +30,7 @@ function openLightbox(imageSrc) {
     var lightboxImg = document.getElementById('lightboxImage');
     if (!lightbox || !lightboxImg) return;
 
-    lightboxImages = Array.from(document.querySelectorAll('.message-image')).map(function (img) { return img.src; });
+    lightboxImages = Array.from(document.querySelectorAll('.message-image')).map(function (img) { return img.dataset.fullSrc || img.src; });
     currentImageIndex = lightboxImages.indexOf(imageSrc);
     if (currentImageIndex === -1) currentImageIndex = 0;
 
@@ -388,7 +388,7 @@ function renderFileList(files) {
     container.innerHTML = files.map(function (file) {
         var isImage = file.file_type && file.file_type.startsWith('image');
         var safePath = encodeURIComponent(file.file_path || '');
-        var icon = isImage ? '<img src="/uploads/' + safePath + '" alt="">' : '📄';
+        var icon = isImage ? '<img src="/uploads/' + safePath + '?variant=thumb" alt="" loading="lazy">' : '📄';
         return '<div class="file-item" data-file-id="' + file.id + '">' +
             '<div class="file-item-icon">' + icon + '</div>' +
             '<div class="file-item-info">' +
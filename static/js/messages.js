@@ -374,7 +374,8 @@ function createMessageElement(msg, isGrouped, isFirstInGroup, isLastInGroup) {
         if (msg.message_type === 'image') {
             var safeFilePathImg = (typeof safeImagePath === 'function') ? safeImagePath(msg.file_path) : msg.file_path;
             if (safeFilePathImg) {
-                content = '<img src="/uploads/' + safeFilePathImg + '" class="message-image" loading="lazy" decoding="async" onclick="openLightbox(this.src)">';
+                // 대화 목록에는 축소본(preview), 라이트박스에는 원본
+                content = '<img src="/uploads/' + safeFilePathImg + '?variant=preview" data-full-src="/uploads/' + safeFilePathImg + '" class="message-image" loading="lazy" decoding="async" onclick="openLightbox(this.dataset.fullSrc || this.src)">';
             } else {
                 content = '<div class="message-bubble">' + _t('message.file_invalid_path', '[잘못된 이미지 경로]') + '</div>';
             }
@@ -185,7 +185,7 @@ async function handleProfileImageUpload(e) {
                 // [v4.21] XSS 방지: safeImagePath 사용
                 var safePath = typeof safeImagePath === 'function' ? safeImagePath(result.profile_image) : result.profile_image;
                 if (safePath) {
-                    userAvatarEl.innerHTML = '<img src="/uploads/' + safePath + '" alt="프로필">';
+                    userAvatarEl.innerHTML = '<img src="/uploads/' + safePath + '?size=96" alt="프로필">';
                     userAvatarEl.classList.add('has-image');
                 }
             }
@@ -453,7 +453,7 @@ async function openNewChatModal() {
             // [v4.30] XSS 방지: safeImagePath 사용
             var safePath = u.profile_image && typeof safeImagePath === 'function' ? safeImagePath(u.profile_image) : null;
             var avatarHtml = safePath
-                ? '<div class="user-item-avatar has-image"><img src="/uploads/' + safePath + '" alt="프로필"></div>'
+                ? '<div class="user-item-avatar has-image"><img src="/uploads/' + safePath + '?size=96" alt="프로필"></div>'
                 : '<div class="user-item-avatar">' + initial + '</div>';
             return '<div class="user-item" data-user-id="' + u.id + '">' +
                 avatarHtml +
@@ -542,7 +542,7 @@ async function openInviteModal() {
                 // [v4.30] XSS 방지: safeImagePath 사용
                 var safePath = u.profile_image && typeof safeImagePath === 'function' ? safeImagePath(u.profile_image) : null;
                 var avatarHtml = safePath
-                    ? '<div class="user-item-avatar has-image"><img src="/uploads/' + safePath + '" alt="프로필"></div>'
+                    ? '<div class="user-item-avatar has-image"><img src="/uploads/' + safePath + '?size=96" alt="프로필"></div>'
                     : '<div class="user-item-avatar">' + initial + '</div>';
                 return '<div class="user-item" data-user-id="' + u.id + '">' +
                     avatarHtml +
@@ -724,7 +724,7 @@ async function viewMembers() {
                     // [v4.30] XSS 방지: safeImagePath 사용
                     var safePath = m.profile_image && typeof safeImagePath === 'function' ? safeImagePath(m.profile_image) : null;
                     var avatarHtml = safePath
-                        ? '<div class="user-item-avatar ' + statusClass + ' has-image"><img src="/uploads/' + safePath + '" alt="프로필"></div>'
+                        ? '<div class="user-item-avatar ' + statusClass + ' has-image"><img src="/uploads/' + safePath + '?size=96" alt="프로필"></div>'
                         : '<div class="user-item-avatar ' + statusClass + '">' + initial + '</div>';
 
                     return '<div class="user-item member-item ' + statusClass + '">' +
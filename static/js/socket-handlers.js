@@ -807,7 +807,7 @@ function handleUserProfileUpdated(data) {
                     // [v4.21] XSS 방지: safeImagePath 사용
                     var safePath = typeof safeImagePath === 'function' ? safeImagePath(data.profile_image) : data.profile_image;
                     if (safePath) {
-                        avatarEl.innerHTML = '<img src="/uploads/' + safePath + '" alt="프로필">';
+                        avatarEl.innerHTML = '<img src="/uploads/' + safePath + '?size=96" alt="프로필">';
                         avatarEl.classList.add('has-image');
                     }
                 } else if (data.nickname) {
@@ -393,7 +393,7 @@ function createAvatarHtml(name, imagePath, userId, cssClass) {
         // [v4.31] XSS 방지: safeImagePath로 경로 검증
         var safePath = safeImagePath(imagePath);
         if (safePath) {
-            return '<div class="' + cssClass + ' has-image"><img src="/uploads/' + safePath + '" alt="프로필"></div>';
+            return '<div class="' + cssClass + ' has-image"><img src="/uploads/' + safePath + '?size=96" alt="프로필"></div>';
         }
     }
     return '<div class="' + cssClass + '" style="background:' + color + '">' + initial + '</div>';
@@ -512,7 +512,7 @@ function createSafeAvatarHtml(name, imagePath, userId, cssClass) {
     if (imagePath) {
         var safePath = safeImagePath(imagePath);
         if (safePath) {
-            return '<div class="' + cssClass + ' has-image"><img src="/uploads/' + safePath + '" alt="프로필"></div>';
+            return '<div class="' + cssClass + ' has-image"><img src="/uploads/' + safePath + '?size=96" alt="프로필"></div>';
         }
     }
     return '<div class="' + cssClass + '" style="background:' + color + '">' + initial + '</div>';
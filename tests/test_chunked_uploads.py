@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _setup_room(client, prefix: str) -> int:
+    _register(client, f'{prefix}_u1')
+    _register(client, f'{prefix}_u2')
+    assert _login(client, f'{prefix}_u1').status_code == 200
+    users = client.get('/api/users').json
+    u2 = next(u for u in users if u['username'] == f'{prefix}_u2')
+    created = client.post('/api/rooms', json={'members': [u2['id']]})
+    assert created.status_code == 200
+    return int(created.json['room_id'])
+
+
+def _put_chunk(client, session_id: str, offset: int, data: bytes):
+    return client.put(
+        f'/api/uploads/sessions/{session_id}/chunks?offset={offset}',
+        data=data,
+        content_type='application/octet-stream',
+    )
+
+
+def test_chunked_upload_resume_and_finalize(client, monkeypatch):
+    import config
+    import app.upload_sessions as sessions_module
+
+    monkeypatch.setattr(sessions_module, 'CHUNKED_UPLOAD_CHUNK_BYTES', 4096)
+    room_id = _setup_room(client, 'chunked')
+    body = (b'chunked upload line\n' * 1000)[:10000]
+
+    created = client.post(
+        '/api/uploads/sessions',
+        json={'room_id': room_id, 'file_name': 'big.txt', 'file_size': len(body)},
+    )
+    assert created.status_code == 201
+    session_id = created.json['session_id']
+    assert created.json['total_chunks'] == 3
+
+    # 순서와 무관하게 받고, 중간에 끊긴 뒤에는 상태 조회로 남은 청크만 보낸다.
+    assert _put_chunk(client, session_id, 8192, body[8192:]).status_code == 200
+    assert _put_chunk(client, session_id, 0, body[:4096]).status_code == 200
+    assert _put_chunk(client, session_id, 100, body[100:4196]).status_code == 400
+    assert _put_chunk(client, session_id, 4096, body[4096:5000]).status_code == 400
+
+    early = client.post(f'/api/uploads/sessions/{session_id}/finalize')
+    assert early.status_code == 409
+    assert early.json['missing_chunks'] == [1]
+
+    status = client.get(f'/api/uploads/sessions/{session_id}')
+    assert status.json['received_chunks'] == [0, 2]
+    assert _put_chunk(client, session_id, 4096, body[4096:8192]).status_code == 200
+
+    finalized = client.post(f'/api/uploads/sessions/{session_id}/finalize')
+    assert finalized.status_code == 200
+    assert finalized.json['upload_token']
+    with open(os.path.join(config.UPLOAD_FOLDER, finalized.json['file_path']), 'rb') as handle:
+        assert handle.read() == body
+    assert client.get(f'/api/uploads/sessions/{session_id}').status_code == 404
+    assert not os.listdir(os.path.join(config.UPLOAD_FOLDER, '.incoming'))
+
+
+def test_chunked_upload_rejects_bad_content_and_expires(client, monkeypatch):
+    import config
+    import app.upload_sessions as sessions_module
+
+    monkeypatch.setattr(sessions_module, 'CHUNKED_UPLOAD_CHUNK_BYTES', 4096)
+    room_id = _setup_room(client, 'chunked_bad')
+
+    fake = b'not really a png' * 10
+    created = client.post(
+        '/api/uploads/sessions',
+        json={'room_id': room_id, 'file_name': 'fake.png', 'file_size': len(fake)},
+    ).json
+    assert _put_chunk(client, created['session_id'], 0, fake).status_code == 200
+    rejected = client.post(f"/api/uploads/sessions/{created['session_id']}/finalize")
+    assert rejected.status_code == 400
+    assert rejected.json['error'] == '파일 내용이 확장자와 일치하지 않습니다.'
+
+    stale = client.post(
+        '/api/uploads/sessions',
+        json={'room_id': room_id, 'file_name': 'stale.txt', 'file_size': 5000},
+    ).json
+    assert _put_chunk(client, stale['session_id'], 0, b'a' * 4096).status_code == 200
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        conn.execute("UPDATE upload_sessions SET expires_at = '2000-01-01 00:00:00'")
+        conn.commit()
+    finally:
+        conn.close()
+
+    from app.models import run_maintenance_once
+
+    with client.application.app_context():
+        results = run_maintenance_once()
+    assert results['cleaned_upload_sessions'] == 1
+    assert client.get(f"/api/uploads/sessions/{stale['session_id']}").status_code == 404
+    assert not os.listdir(os.path.join(config.UPLOAD_FOLDER, '.incoming'))
+
+
+def test_upload_sessions_are_capped_per_user_and_not_preallocated(client, monkeypatch):
+    import config
+    import app.upload_sessions as sessions_module
+
+    monkeypatch.setattr(sessions_module, 'CHUNKED_UPLOAD_CHUNK_BYTES', 4096)
+    monkeypatch.setattr(sessions_module, 'CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER', 2)
+    monkeypatch.setattr(sessions_module, 'CHUNKED_UPLOAD_MAX_RESERVED_BYTES_PER_USER', 30000)
+    room_id = _setup_room(client, 'capped')
+
+    def _create(size: int):
+        return client.post(
+            '/api/uploads/sessions',
+            json={'room_id': room_id, 'file_name': 'big.txt', 'file_size': size},
+        )
+
+    first = _create(20000)
+    assert first.status_code == 201
+    # 선언한 크기만큼 미리 잡지 않고 받은 청크만큼만 늘어난다.
+    temp_path = sessions_module.session_temp_path(config.UPLOAD_FOLDER, first.json['session_id'])
+    assert os.path.getsize(temp_path) == 0
+    assert _put_chunk(client, first.json['session_id'], 4096, b'x' * 4096).status_code == 200
+    assert os.path.getsize(temp_path) == 8192
+
+    assert _create(20000).status_code == 429
+    second = _create(10000)
+    assert second.status_code == 201
+    assert _create(1).status_code == 429
+    assert len(os.listdir(os.path.join(config.UPLOAD_FOLDER, '.incoming'))) == 2
+
+    # 취소한 세션은 한도에서 빠진다.
+    assert client.delete(f"/api/uploads/sessions/{second.json['session_id']}").status_code == 200
+    assert _create(10000).status_code == 201
+
+
+def test_concurrent_session_creation_respects_count_limit(client, monkeypatch):
+    import threading
+    import time
+
+    import config
+    import app.upload_sessions as sessions_module
+    from app.models.base import close_thread_db
+
+    monkeypatch.setattr(sessions_module, 'CHUNKED_UPLOAD_MAX_SESSIONS_PER_USER', 1)
+    room_id = _setup_room(client, 'racing')
+    user_id = client.get('/api/me').json['user']['id']
+
+    # 한도 확인과 INSERT 사이를 늘려, 쓰기 락이 없으면 두 요청이 모두 통과하게 만든다.
+    real_expires_at = sessions_module._expires_at
+
+    def _slow_expires_at():
+        time.sleep(0.2)
+        return real_expires_at()
+
+    monkeypatch.setattr(sessions_module, '_expires_at', _slow_expires_at)
+    barrier = threading.Barrier(2)
+    outcomes = []
+
+    def _create():
+        barrier.wait()
+        try:
+            sessions_module.create_upload_session(
+                config.UPLOAD_FOLDER, user_id=user_id, room_id=room_id, file_name='race.txt', file_size=10,
+            )
+            outcomes.append(201)
+        except sessions_module.UploadSessionError as e:
+            outcomes.append(e.status)
+        finally:
+            close_thread_db()
+
+    threads = [threading.Thread(target=_create) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert sorted(outcomes) in ([201, 429], [201, 503])
+    with client.application.app_context():
+        from app.models import get_db
+
+        count = get_db().execute('SELECT COUNT(*) FROM upload_sessions WHERE user_id = ?', (user_id,)).fetchone()[0]
+    assert count == 1
+
+
+def test_session_creation_fails_retryably_when_write_lock_unavailable(client):
+    import config
+    import app.upload_sessions as sessions_module
+    from app.models import get_db
+
+    room_id = _setup_room(client, 'locked')
+    user_id = client.get('/api/me').json['user']['id']
+    with client.application.app_context():
+        conn = get_db()
+        conn.execute('BEGIN')
+        try:
+            try:
+                sessions_module.create_upload_session(
+                    config.UPLOAD_FOLDER, user_id=user_id, room_id=room_id, file_name='x.txt', file_size=10,
+                )
+            except sessions_module.UploadSessionError as e:
+                assert e.status == 503
+            else:
+                raise AssertionError('expected UploadSessionError')
+        finally:
+            conn.rollback()
+    assert not os.listdir(os.path.join(config.UPLOAD_FOLDER, '.incoming'))
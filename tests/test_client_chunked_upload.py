@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import json
+import threading
+
+import httpx
+import pytest
+
+import client.services.api_client as api_module
+from client.services.api_client import APIClient, ApiError
+
+
+class _FakeChunkServer:
+    def __init__(self, chunk_size: int, fail_offsets: set[int] | None = None):
+        self.chunk_size = chunk_size
+        self.fail_offsets = set(fail_offsets or ())
+        self.sessions: dict[str, dict] = {}
+        self.created = 0
+        self.puts: list[int] = []
+        self.lock = threading.Lock()
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == 'POST' and path == '/api/uploads/sessions':
+            payload = json.loads(request.content)
+            self.created += 1
+            session_id = f'{self.created:032x}'
+            total = -(-payload['file_size'] // self.chunk_size)
+            self.sessions[session_id] = {'size': payload['file_size'], 'total': total, 'chunks': {}}
+            return httpx.Response(201, json=self._view(session_id))
+        session_id = path.split('/')[4]
+        session = self.sessions[session_id]
+        if request.method == 'GET':
+            return httpx.Response(200, json=self._view(session_id))
+        if request.method == 'PUT':
+            offset = int(request.url.params['offset'])
+            with self.lock:
+                self.puts.append(offset)
+                if offset in self.fail_offsets:
+                    self.fail_offsets.discard(offset)
+                    return httpx.Response(400, json={'error': 'dropped'})
+                session['chunks'][offset // self.chunk_size] = request.content
+            return httpx.Response(200, json={'success': True})
+        body = b''.join(session['chunks'][index] for index in sorted(session['chunks']))
+        return httpx.Response(200, json={'success': True, 'file_path': 'ab/cd/x.bin', 'size': len(body)})
+
+    def _view(self, session_id: str) -> dict:
+        session = self.sessions[session_id]
+        return {
+            'session_id': session_id,
+            'chunk_size': self.chunk_size,
+            'total_chunks': session['total'],
+            'received_chunks': sorted(session['chunks']),
+        }
+
+
+def _api_with(server: _FakeChunkServer) -> APIClient:
+    api = APIClient('http://testserver')
+    api._client = httpx.Client(base_url='http://testserver', transport=httpx.MockTransport(server.handler))
+    return api
+
+
+def test_upload_file_sends_chunks_in_parallel_and_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_module, 'CHUNKED_UPLOAD_THRESHOLD', 1000)
+    source = tmp_path / 'big.bin'
+    source.write_bytes(bytes(range(256)) * 40)  # 10240 bytes -> 3 chunks of 4096
+    server = _FakeChunkServer(4096, fail_offsets={4096})
+    api = _api_with(server)
+
+    with pytest.raises(ApiError):
+        api.upload_file(7, str(source), parallel=3)
+    assert server.created == 1
+
+    result = api.upload_file(7, str(source), parallel=3)
+    assert result['size'] == 10240
+    # 재개 시 새 세션을 만들지 않고 실패한 청크만 다시 보낸다.
+    assert server.created == 1
+    assert sorted(server.puts) == [0, 4096, 4096, 8192]
+    assert api._resumable_uploads == {}
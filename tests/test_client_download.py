@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import httpx
+
+import client.services.api_client as api_module
+from client.services.api_client import APIClient
+
+
+class _TruncatedStream(httpx.SyncByteStream):
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __iter__(self):
+        yield self.data
+        raise httpx.ReadError('connection reset')
+
+
+class _FakeFileServer:
+    def __init__(self, body: bytes, etag: str = '"abc-1"', cut_at: int | None = None):
+        self.body = body
+        self.etag = etag
+        self.cut_at = cut_at
+        self.requests: list[dict[str, str]] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        headers = {key.lower(): value for key, value in request.headers.items()}
+        self.requests.append(headers)
+        if headers.get('if-none-match') == self.etag:
+            return httpx.Response(304, headers={'ETag': self.etag})
+        range_header = headers.get('range', '')
+        if range_header and headers.get('if-range') == self.etag:
+            start = int(range_header.split('=')[1].rstrip('-'))
+            return httpx.Response(
+                206,
+                headers={'ETag': self.etag, 'Content-Range': f'bytes {start}-{len(self.body) - 1}/{len(self.body)}'},
+                content=self.body[start:],
+            )
+        if self.cut_at is not None:
+            cut, self.cut_at = self.cut_at, None
+            return httpx.Response(200, headers={'ETag': self.etag}, stream=_TruncatedStream(self.body[:cut]))
+        return httpx.Response(200, headers={'ETag': self.etag}, content=self.body)
+
+
+def _api_with(server: _FakeFileServer) -> APIClient:
+    api = APIClient('http://testserver')
+    api._client = httpx.Client(base_url='http://testserver', transport=httpx.MockTransport(server.handler))
+    return api
+
+
+def test_download_resumes_interrupted_transfer_with_range(tmp_path, monkeypatch):
+    monkeypatch.setattr(api_module.time, 'sleep', lambda _seconds: None)
+    body = bytes(range(256)) * 64
+    server = _FakeFileServer(body, cut_at=5000)
+    api = _api_with(server)
+
+    target = tmp_path / 'out' / 'video.bin'
+    assert api.download_upload_file('ab/cd/video.bin', str(target)) == str(target)
+
+    assert target.read_bytes() == body
+    assert not (tmp_path / 'out' / 'video.bin.part').exists()
+    assert len(server.requests) == 2
+    # 재시도는 받은 부분 이후만 요청한다.
+    assert server.requests[1]['range'] == 'bytes=5000-'
+    assert server.requests[1]['if-range'] == '"abc-1"'
+
+
+def test_download_reuses_local_copy_on_not_modified(tmp_path):
+    body = b'preview bytes' * 100
+    server = _FakeFileServer(body)
+    api = _api_with(server)
+
+    first = tmp_path / 'first.txt'
+    api.download_upload_file('ab/cd/doc.txt', str(first))
+    second = tmp_path / 'preview' / 'doc.txt'
+    api.download_upload_file('ab/cd/doc.txt', str(second))
+
+    assert server.requests[1]['if-none-match'] == '"abc-1"'
+    assert second.read_bytes() == body
+
+    server.etag = '"abc-2"'
+    server.body = b'changed'
+    api.download_upload_file('ab/cd/doc.txt', str(second))
+    assert second.read_bytes() == b'changed'
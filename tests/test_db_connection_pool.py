@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+
+import pytest
+
+
+def test_get_db_reuses_pooled_connection_after_release(app):
+    import app.models.base as base
+
+    with app.app_context():
+        base.close_thread_db()
+        conn = base.get_db()
+        assert base.get_db() is conn
+        base.close_thread_db()
+
+        created_before = base.get_db_pool_stats()['created']
+        assert base.get_db() is conn
+        assert base.get_db_pool_stats()['created'] == created_before
+        base.close_thread_db()
+
+
+def test_get_db_replaces_externally_closed_connection(app):
+    import app.models.base as base
+
+    with app.app_context():
+        conn = base.get_db()
+        conn.close()
+        fresh = base.get_db()
+        assert fresh is not conn
+        assert fresh.execute('SELECT 1').fetchone()[0] == 1
+        base.close_thread_db()
+
+
+def test_pool_checkout_times_out_when_exhausted(app):
+    import app.models.base as base
+
+    pool = base._ConnectionPool(1, 0.05, 0)
+    held = pool.checkout()
+    with pytest.raises(sqlite3.OperationalError):
+        pool.checkout()
+    stats = pool.stats()
+    assert stats['timeouts'] == 1
+    assert stats['in_use'] == 1
+    assert stats['size'] == 1
+
+    pool.release(held)
+    assert pool.stats()['idle'] == 1
+    pool.close_idle()
+
+
+def test_pool_waiter_gets_released_connection(app):
+    import app.models.base as base
+
+    pool = base._ConnectionPool(1, 2.0, 0)
+    held = pool.checkout()
+    acquired = {}
+
+    def _worker():
+        acquired['conn'] = pool.checkout()
+
+    worker = threading.Thread(target=_worker)
+    worker.start()
+    pool.release(held)
+    worker.join(timeout=5)
+
+    assert acquired.get('conn') is held
+    assert pool.stats()['created'] == 1
+    pool.release(acquired['conn'])
+    pool.close_idle()
+
+
+def test_pool_replaces_expired_connection(app):
+    import app.models.base as base
+
+    pool = base._ConnectionPool(2, 1.0, 60)
+    conn = pool.checkout()
+    conn.created_at -= 120
+    pool.release(conn)
+
+    stats = pool.stats()
+    assert stats['idle'] == 0
+    assert stats['replaced'] == 1
+    fresh = pool.checkout()
+    assert fresh is not conn
+    pool.release(fresh)
+    pool.close_idle()
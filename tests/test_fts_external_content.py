@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import pytest
+
+
+def _fts_tables(conn):
+    return {
+        row[0]: row[1]
+        for row in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN ('messages_fts', 'messages_fts_trigram')"
+        ).fetchall()
+    }
+
+
+def _seed(conn):
+    conn.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('ftsuser', 'x', 'fts')")
+    user_id = conn.execute("SELECT id FROM users WHERE username = 'ftsuser'").fetchone()[0]
+    conn.execute("INSERT INTO rooms (name, type, created_by) VALUES ('fts', 'group', ?)", (user_id,))
+    room_id = conn.execute("SELECT MAX(id) FROM rooms").fetchone()[0]
+    rows = [
+        ('quarterly budget review', 0, 'text'),
+        ('v2:cipher:text', 1, 'text'),
+        ('report.pdf', 0, 'file'),
+        ('budget meeting moved', 0, 'text'),
+    ]
+    ids = []
+    for content, encrypted, message_type in rows:
+        cursor = conn.execute(
+            'INSERT INTO messages (room_id, sender_id, content, encrypted, message_type) VALUES (?, ?, ?, ?, ?)',
+            (room_id, user_id, content, encrypted, message_type),
+        )
+        ids.append(cursor.lastrowid)
+    conn.commit()
+    return ids
+
+
+def _match(conn, table, query):
+    return sorted(row[0] for row in conn.execute(f'SELECT rowid FROM {table} WHERE {table} MATCH ?', (query,)))
+
+
+@pytest.fixture
+def db(app):
+    import config
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    if not _fts_tables(conn):
+        conn.close()
+        pytest.skip('SQLite FTS5 not supported in this environment')
+    yield conn
+    conn.close()
+
+
+def test_fts_tables_use_external_content(db):
+    tables = _fts_tables(db)
+    for sql in tables.values():
+        assert "content='messages'" in sql
+    # 본문 사본 테이블(_content)이 없어야 한다.
+    shadow = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE name LIKE 'messages_fts%_content'")}
+    assert shadow == set()
+
+
+def test_triggers_index_only_plaintext_and_skip_unrelated_updates(db):
+    plain, encrypted, file_msg, other = _seed(db)
+    assert _match(db, 'messages_fts', 'budget') == [plain, other]
+
+    before = db.total_changes
+    db.execute('UPDATE messages SET reply_to = ? WHERE id = ?', (other, plain))
+    db.commit()
+    # 색인 트리거가 돌지 않았으면 변경 행은 messages 1건뿐이다.
+    assert db.total_changes - before == 1
+
+    db.execute("UPDATE messages SET content = 'quarterly forecast' WHERE id = ?", (plain,))
+    db.execute("UPDATE messages SET content = 'budget draft', encrypted = 0 WHERE id = ?", (encrypted,))
+    db.execute("UPDATE messages SET content = 'budget.xlsx' WHERE id = ?", (file_msg,))
+    db.execute('DELETE FROM messages WHERE id = ?', (other,))
+    db.commit()
+
+    assert _match(db, 'messages_fts', 'budget') == [encrypted]
+    assert _match(db, 'messages_fts', 'forecast') == [plain]
+    for table in _fts_tables(db):
+        db.execute(f"INSERT INTO {table}({table}) VALUES('integrity-check')")
+
+
+def test_rebuild_search_index_restores_out_of_sync_index(app, db):
+    from app.models import rebuild_search_index
+
+    plain, _encrypted, _file_msg, other = _seed(db)
+    for table in _fts_tables(db):
+        db.execute(f"INSERT INTO {table}({table}) VALUES('delete-all')")
+    db.commit()
+    assert _match(db, 'messages_fts', 'budget') == []
+
+    with app.app_context():
+        rebuilt = rebuild_search_index()
+    assert rebuilt['messages_fts'] == 2
+    assert set(rebuilt) == set(_fts_tables(db))
+    assert _match(db, 'messages_fts', 'budget') == [plain, other]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import pytest
+
+
+def _register(client, username, password="Password123!"):
+    return client.post(
+        "/api/register",
+        json={"username": username, "password": password, "nickname": username},
+    )
+
+
+def _login(client, username, password="Password123!"):
+    return client.post("/api/login", json={"username": username, "password": password})
+
+
+def _seed_room(client, contents):
+    from app.models.messages import create_message
+
+    _register(client, "korsearch1")
+    _register(client, "korsearch2")
+    assert _login(client, "korsearch1").status_code == 200
+    users = {u["username"]: u["id"] for u in client.get("/api/users").json}
+    room_id = client.post("/api/rooms", json={"members": [users["korsearch2"]]}).json["room_id"]
+    sender_id = client.get("/api/me").json["user"]["id"]
+    with client.application.app_context():
+        for content in contents:
+            create_message(room_id=room_id, sender_id=sender_id, content=content, encrypted=False)
+    return room_id
+
+
+def _contents(response):
+    return sorted(m["content"] for m in response.json)
+
+
+@pytest.fixture
+def trigram_index(app):
+    import config
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        row = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='messages_fts_trigram'"
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        pytest.skip("SQLite trigram tokenizer not supported in this environment")
+
+
+def test_fts5_build_query_quotes_terms():
+    from app.models.messages import _fts5_build_query
+
+    assert _fts5_build_query("  ") is None
+    assert _fts5_build_query('회의 "실"') == '"회의" AND """실"""'
+    assert _fts5_build_query("회의 자료", prefix=True) == '"회의"* AND "자료"*'
+
+
+def test_korean_substring_search_uses_trigram_index(client, trigram_index):
+    _seed_room(
+        client,
+        [
+            "회의실에서 만나요",
+            "대회의실 예약 완료",
+            "오늘 점심 메뉴",
+            "정기회의 자료 공유",
+        ],
+    )
+
+    # 3글자 이상: 어절 안쪽 부분 문자열도 찾는다.
+    assert _contents(client.get("/api/search?q=회의실")) == ["대회의실 예약 완료", "회의실에서 만나요"]
+    assert _contents(client.get("/api/search?q=기회의")) == ["정기회의 자료 공유"]
+    # 2글자 이하: 어절 접두어 일치
+    assert _contents(client.get("/api/search?q=회의")) == ["회의실에서 만나요"]
+    # 섞인 검색어는 둘 다 만족해야 한다.
+    assert _contents(client.get("/api/search?q=자료 정기회")) == ["정기회의 자료 공유"]
+
+    advanced = client.post("/api/search/advanced", json={"query": "회의실"}).json
+    assert sorted(m["content"] for m in advanced["messages"]) == ["대회의실 예약 완료", "회의실에서 만나요"]
+    assert advanced["total"] == 2
+
+
+def test_trigram_index_follows_edits_and_deletes(client, trigram_index):
+    import config
+
+    _seed_room(client, ["프로젝트 일정 안내"])
+    message = client.get("/api/search?q=프로젝트").json[0]
+
+    from app.models.messages import delete_message, edit_message
+
+    with client.application.app_context():
+        assert edit_message(message["id"], message["sender_id"], "마케팅 일정 안내")[0]
+    assert client.get("/api/search?q=프로젝트").json == []
+    assert _contents(client.get("/api/search?q=마케팅")) == ["마케팅 일정 안내"]
+
+    with client.application.app_context():
+        assert delete_message(message["id"], message["sender_id"])[0]
+    assert client.get("/api/search?q=마케팅").json == []
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        row = conn.execute(
+            "SELECT content FROM messages_fts_trigram WHERE rowid = ?", (message["id"],)
+        ).fetchone()
+    finally:
+        conn.close()
+    assert row == ("[삭제된 메시지]",)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+
+
+def _small_batches(monkeypatch, size: int = 100) -> None:
+    import app.models.retention as retention_module
+
+    monkeypatch.setattr(retention_module, 'MAINTENANCE_DELETE_BATCH_SIZE', size)
+    monkeypatch.setattr(retention_module, 'MAINTENANCE_BATCH_PAUSE_MS', 0)
+
+
+def test_access_log_cleanup_runs_in_bounded_batches(app, monkeypatch):
+    from app.models import cleanup_old_access_logs, get_db
+    from app.models.retention import track_task
+
+    _small_batches(monkeypatch)
+    old_date = (datetime.now() - timedelta(days=120)).strftime('%Y-%m-%d %H:%M:%S')
+    with app.app_context():
+        conn = get_db()
+        user_id = conn.execute(
+            "INSERT INTO users (username, password_hash, nickname) VALUES ('logs', 'x', 'logs')"
+        ).lastrowid
+        conn.executemany(
+            'INSERT INTO access_logs (user_id, action, ip_address, created_at) VALUES (?, ?, ?, ?)',
+            [(user_id, 'login', '127.0.0.1', old_date) for _ in range(1050)],
+        )
+        conn.execute(
+            "INSERT INTO access_logs (user_id, action, ip_address) VALUES (?, 'login', '127.0.0.1')",
+            (user_id,),
+        )
+        conn.commit()
+
+        with track_task() as stats:
+            removed = cleanup_old_access_logs(days_to_keep=90)
+
+        assert removed == 1050
+        assert stats.rows == 1050
+        assert stats.batches == 11
+        assert stats.max_lock_hold_ms > 0
+        assert get_db().execute('SELECT COUNT(*) FROM access_logs').fetchone()[0] == 1
+
+
+def test_cleanup_empty_rooms_deletes_in_fk_order_and_queues_files(app, monkeypatch):
+    import config
+    from app.models import cleanup_empty_rooms, create_room, get_db
+    from app.models.retention import flush_file_deletes
+
+    _small_batches(monkeypatch, size=10)
+    with app.app_context():
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('gone', 'x', 'gone')")
+        user_id = int(cursor.lastrowid)
+        conn.commit()
+        room_id = create_room('empty', 'group', user_id, [user_id])
+
+        # 배치 경계를 넘는 답장 체인 + 고정 메시지 + 첨부 파일
+        previous = None
+        for index in range(35):
+            cursor.execute(
+                'INSERT INTO messages (room_id, sender_id, content, encrypted, reply_to) VALUES (?, ?, ?, 0, ?)',
+                (room_id, user_id, f'm{index}', previous),
+            )
+            previous = int(cursor.lastrowid)
+        cursor.execute(
+            'INSERT INTO pinned_messages (room_id, message_id, content, pinned_by) VALUES (?, ?, ?, ?)',
+            (room_id, previous, 'pinned', user_id),
+        )
+        stored_name = 'empty_room_attachment.txt'
+        file_path = os.path.join(config.UPLOAD_FOLDER, stored_name)
+        with open(file_path, 'w', encoding='utf-8') as handle:
+            handle.write('x')
+        cursor.execute(
+            'INSERT INTO room_files (room_id, message_id, file_path, file_name, uploaded_by) VALUES (?, ?, ?, ?, ?)',
+            (room_id, previous, stored_name, 'a.txt', user_id),
+        )
+        cursor.execute('DELETE FROM room_members WHERE room_id = ?', (room_id,))
+        conn.commit()
+
+        assert cleanup_empty_rooms() == 1
+        assert flush_file_deletes(5)
+
+        conn = get_db()
+        assert conn.execute('SELECT COUNT(*) FROM rooms WHERE id = ?', (room_id,)).fetchone()[0] == 0
+        assert conn.execute('SELECT COUNT(*) FROM messages WHERE room_id = ?', (room_id,)).fetchone()[0] == 0
+        assert not os.path.exists(file_path)
+
+
+def test_maintenance_status_reports_task_throughput(app):
+    from app.models import get_maintenance_status, run_maintenance_once
+
+    with app.app_context():
+        run_maintenance_once()
+        status = get_maintenance_status()
+
+    tasks = status['tasks']
+    assert 'cleanup_old_access_logs' in tasks
+    for stats in tasks.values():
+        assert {'rows', 'batches', 'rows_per_sec', 'max_lock_hold_ms', 'duration_ms'} <= set(stats)
+    assert 'pending' in status['file_deleter']
+
+
+def test_cleanup_empty_rooms_keeps_room_joined_mid_cleanup(app, monkeypatch):
+    import config
+    import app.models.base as base_module
+    from app.models import cleanup_empty_rooms, create_room, get_db
+    from app.models.membership_cache import membership_cache
+
+    with app.app_context():
+        conn = get_db()
+        cursor = conn.cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('late', 'x', 'late')")
+        user_id = int(cursor.lastrowid)
+        conn.commit()
+
+        rooms = []
+        for name in ('first', 'joined'):
+            room_id = create_room(name, 'group', user_id, [user_id])
+            cursor.execute(
+                'INSERT INTO messages (room_id, sender_id, content, encrypted) VALUES (?, ?, ?, 0)',
+                (room_id, user_id, f'{name} message'),
+            )
+            message_id = int(cursor.lastrowid)
+            cursor.execute(
+                'INSERT INTO pinned_messages (room_id, message_id, content, pinned_by) VALUES (?, ?, ?, ?)',
+                (room_id, message_id, 'pinned', user_id),
+            )
+            cursor.execute(
+                'INSERT INTO polls (room_id, created_by, question) VALUES (?, ?, ?)',
+                (room_id, user_id, 'lunch?'),
+            )
+            stored_name = f'{name}_room_attachment.txt'
+            with open(os.path.join(config.UPLOAD_FOLDER, stored_name), 'w', encoding='utf-8') as handle:
+                handle.write('x')
+            cursor.execute(
+                'INSERT INTO room_files (room_id, message_id, file_path, file_name, uploaded_by) VALUES (?, ?, ?, ?, ?)',
+                (room_id, message_id, stored_name, 'a.txt', user_id),
+            )
+            rooms.append((room_id, stored_name))
+        cursor.execute('DELETE FROM room_members WHERE user_id = ?', (user_id,))
+        conn.commit()
+        (first_room, _first_file), (joined_room, joined_file) = rooms
+
+        # 첫 대화방 정리가 끝난 직후 (목록 조회 뒤) 두 번째 대화방에 멤버가 들어온다.
+        real_forget = membership_cache.forget_room
+        forgotten = []
+        queued = []
+
+        def _join_after_first(room_id):
+            forgotten.append(room_id)
+            real_forget(room_id)
+            if room_id == first_room:
+                get_db().execute('INSERT INTO room_members (room_id, user_id) VALUES (?, ?)', (joined_room, user_id))
+                get_db().commit()
+
+        monkeypatch.setattr(membership_cache, 'forget_room', _join_after_first)
+        monkeypatch.setattr(base_module, 'enqueue_file_delete', queued.append)
+
+        assert cleanup_empty_rooms() == 1
+
+        conn = get_db()
+        assert conn.execute('SELECT COUNT(*) FROM rooms WHERE id = ?', (first_room,)).fetchone()[0] == 0
+        for table in ('messages', 'pinned_messages', 'polls', 'room_files'):
+            count = conn.execute(f'SELECT COUNT(*) FROM {table} WHERE room_id = ?', (joined_room,)).fetchone()[0]
+            assert count == 1, table
+        assert conn.execute('SELECT COUNT(*) FROM rooms WHERE id = ?', (joined_room,)).fetchone()[0] == 1
+        assert forgotten == [first_room]
+        assert [os.path.basename(path) for path in queued] == ['first_room_attachment.txt']
+        assert os.path.exists(os.path.join(config.UPLOAD_FOLDER, joined_file))
@@ -13,3 +13,54 @@ def test_run_maintenance_once_updates_status(app):
     assert 'cleaned_access_logs' in result
     assert status.get('last_run_at')
     assert isinstance(status.get('last_results'), dict)
+
+
+def test_startup_maintenance_runs_in_background(app, monkeypatch):
+    import threading
+
+    import app.models.base as base_module
+    from app.models import get_maintenance_status, get_readiness, schedule_startup_maintenance
+
+    release = threading.Event()
+    entered = threading.Event()
+
+    def _slow_cleanup():
+        entered.set()
+        release.wait(5)
+        return 3
+
+    monkeypatch.setattr(base_module, 'cleanup_empty_rooms', _slow_cleanup)
+
+    worker = schedule_startup_maintenance(mode='background', delay_seconds=0)
+    assert worker is not None
+    assert entered.wait(5)
+
+    # 유지보수가 진행 중이어도 서버는 준비 상태이며 진행 상황이 보인다.
+    readiness = get_readiness()
+    assert readiness['ready'] is True
+    assert readiness['maintenance_pending'] is True
+    status = get_maintenance_status()
+    assert status['running'] is True
+    assert status['progress']['current_task'] == 'cleanup_empty_rooms'
+    assert status['progress']['total_tasks'] >= status['progress']['completed_tasks'] + 1
+
+    release.set()
+    worker.join(10)
+    status = get_maintenance_status()
+    assert status['startup']['state'] == 'completed'
+    assert status['startup']['duration_ms'] is not None
+    assert status['last_results']['cleaned_empty_rooms'] == 3
+    assert get_readiness()['maintenance_pending'] is False
+
+
+def test_startup_maintenance_off_and_sync_modes(app):
+    from app.models import get_maintenance_status, get_readiness, schedule_startup_maintenance
+
+    assert schedule_startup_maintenance(mode='off') is None
+    assert get_maintenance_status()['startup']['state'] == 'disabled'
+    assert get_readiness()['maintenance_pending'] is False
+
+    assert schedule_startup_maintenance(mode='sync') is None
+    status = get_maintenance_status()
+    assert status['startup']['state'] == 'completed'
+    assert status['last_run_at']
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+
+def _create_users(count: int) -> list[int]:
+    from app.models import get_db
+
+    conn = get_db()
+    cursor = conn.cursor()
+    user_ids = []
+    for index in range(count):
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, nickname) VALUES (?, ?, ?)",
+            (f'mc_user_{index}', 'hash', f'MC {index}'),
+        )
+        user_ids.append(int(cursor.lastrowid))
+    conn.commit()
+    return user_ids
+
+
+def test_lru_index_evicts_least_recently_used():
+    from app.models.membership_cache import MembershipCache
+
+    cache = MembershipCache(max_users=2, max_rooms=2)
+    generation = cache.generation()
+    cache.store_user_rooms(1, {10}, generation)
+    cache.store_user_rooms(2, {20}, generation)
+    assert cache.get_user_rooms(1) == {10}
+    cache.store_user_rooms(3, {30}, generation)
+
+    assert cache.get_user_rooms(2) is None
+    assert cache.get_user_rooms(1) == {10}
+    stats = cache.stats()['users']
+    assert stats['evictions'] == 1
+    assert stats['hits'] == 2
+    assert stats['misses'] == 1
+
+
+def test_stale_load_is_not_stored_after_membership_change():
+    from app.models.membership_cache import MembershipCache
+
+    cache = MembershipCache(max_users=10, max_rooms=10)
+    generation = cache.generation()
+    cache.add_members(5, [1])
+    cache.store_user_rooms(1, set(), generation)
+    assert cache.peek_user_rooms(1) is None
+
+
+def test_membership_events_update_both_indexes_without_db(app, monkeypatch):
+    import app.models.rooms as rooms_module
+    from app.models import (
+        add_room_member,
+        create_room,
+        get_cached_room_member_ids,
+        get_cached_user_room_ids,
+        kick_member,
+        leave_room_db,
+    )
+
+    with app.app_context():
+        user_a, user_b, user_c = _create_users(3)
+        room_id = create_room('cache', 'group', user_a, [user_a, user_b])
+
+        assert get_cached_user_room_ids(user_c) == set()
+        assert get_cached_room_member_ids(room_id) == {user_a, user_b}
+        assert get_cached_user_room_ids(user_b) == {room_id}
+        assert get_cached_user_room_ids(user_a) == {room_id}
+
+        def _no_db(*_args, **_kwargs):
+            raise AssertionError('membership cache should be updated by events')
+
+        monkeypatch.setattr(rooms_module, 'get_member_room_ids', _no_db)
+        monkeypatch.setattr(rooms_module, 'get_room_member_ids', _no_db)
+
+        assert add_room_member(room_id, user_c) is True
+        assert get_cached_user_room_ids(user_c) == {room_id}
+        assert get_cached_room_member_ids(room_id) == {user_a, user_b, user_c}
+
+        assert kick_member(room_id, user_c) is True
+        assert get_cached_user_room_ids(user_c) == set()
+
+        assert leave_room_db(room_id, user_b) is True
+        assert get_cached_user_room_ids(user_b) == set()
+        assert get_cached_room_member_ids(room_id) == {user_a}
+
+        second_room = create_room('cache2', 'group', user_a, [user_a, user_c])
+        assert get_cached_user_room_ids(user_a) == {room_id, second_room}
+        assert get_cached_user_room_ids(user_c) == {second_room}
+
+
+def test_delete_user_forgets_cached_membership(app):
+    from app.models import create_room, delete_user, get_cached_room_member_ids
+    from app.models.membership_cache import membership_cache
+    from app.utils import hash_password
+
+    with app.app_context():
+        user_a, user_b = _create_users(2)
+        from app.models import get_db
+
+        get_db().execute('UPDATE users SET password_hash = ? WHERE id = ?', (hash_password('pw-123456'), user_b))
+        get_db().commit()
+        room_id = create_room('bye', 'group', user_a, [user_a, user_b])
+        assert get_cached_room_member_ids(room_id) == {user_a, user_b}
+
+        ok, _error = delete_user(user_b, 'pw-123456')
+        assert ok is True
+        assert membership_cache.peek_room_users(room_id) == {user_a}
+        assert membership_cache.peek_user_rooms(user_b) is None
+
+
+def test_failed_membership_load_is_not_cached(app, monkeypatch):
+    import sqlite3
+
+    import app.models.rooms as rooms_module
+    from app.models import create_room, get_cached_room_member_ids, get_cached_user_room_ids
+    from app.models.membership_cache import membership_cache
+
+    with app.app_context():
+        user_a, user_b = _create_users(2)
+        room_id = create_room('flaky', 'group', user_a, [user_a, user_b])
+        membership_cache.clear()
+
+        class _LockedCursor:
+            def execute(self, *_args, **_kwargs):
+                raise sqlite3.OperationalError('database is locked')
+
+        class _LockedConnection:
+            def cursor(self):
+                return _LockedCursor()
+
+        real_get_db = rooms_module.get_db
+        monkeypatch.setattr(rooms_module, 'get_db', lambda: _LockedConnection())
+
+        assert get_cached_user_room_ids(user_b) == set()
+        assert get_cached_room_member_ids(room_id) == set()
+        assert membership_cache.peek_user_rooms(user_b) is None
+        assert membership_cache.peek_room_users(room_id) is None
+
+        monkeypatch.setattr(rooms_module, 'get_db', real_get_db)
+        assert get_cached_user_room_ids(user_b) == {room_id}
+        assert get_cached_room_member_ids(room_id) == {user_a, user_b}
+
+
+def test_expired_membership_entry_is_reloaded(app, monkeypatch):
+    import time
+
+    import app.models.membership_cache as cache_module
+    from app.models import create_room, get_cached_room_member_ids, get_cached_user_room_ids, get_db
+    from app.models.membership_cache import MembershipCache
+
+    monkeypatch.setattr(cache_module, 'membership_cache', MembershipCache(max_users=10, max_rooms=10, ttl=0.05))
+    with app.app_context():
+        user_a, user_b = _create_users(2)
+        room_id = create_room('ttl', 'group', user_a, [user_a, user_b])
+        assert get_cached_user_room_ids(user_b) == {room_id}
+        assert get_cached_room_member_ids(room_id) == {user_a, user_b}
+
+        # 이벤트 없이 (다른 워커/직접 SQL) 강퇴된 경우 TTL 안에는 캐시를 그대로 쓴다.
+        get_db().execute('DELETE FROM room_members WHERE room_id = ? AND user_id = ?', (room_id, user_b))
+        get_db().commit()
+        assert get_cached_user_room_ids(user_b) == {room_id}
+
+        time.sleep(0.06)
+        assert get_cached_user_room_ids(user_b) == set()
+        assert get_cached_room_member_ids(room_id) == {user_a}
+        stats = cache_module.membership_cache.stats()
+        assert stats['users']['expired'] == 1
+        assert stats['rooms']['expired'] == 1
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def batching(app):
+    from app.models.write_queue import configure_message_write_queue
+
+    configure_message_write_queue(True, window_ms=20, max_batch=64)
+    yield
+    configure_message_write_queue(False)
+
+
+def _seed_room(user_count: int = 2) -> tuple[int, list[int]]:
+    from app.models import close_thread_db, get_db
+
+    conn = get_db()
+    cursor = conn.cursor()
+    user_ids = []
+    for index in range(user_count):
+        cursor.execute(
+            "INSERT INTO users (username, password_hash, nickname) VALUES (?, ?, ?)",
+            (f'wq_user_{index}', 'hash', f'WQ {index}'),
+        )
+        user_ids.append(int(cursor.lastrowid))
+    cursor.execute("INSERT INTO rooms (name, type, created_by) VALUES (?, 'group', ?)", ('wq', user_ids[0]))
+    room_id = int(cursor.lastrowid)
+    for user_id in user_ids:
+        cursor.execute("INSERT INTO room_members (room_id, user_id) VALUES (?, ?)", (room_id, user_id))
+    conn.commit()
+    close_thread_db()
+    return room_id, user_ids
+
+
+def test_batched_inserts_return_each_callers_row(app, batching):
+    from app.models import close_thread_db, create_message, get_message_write_queue_stats
+
+    with app.app_context():
+        room_id, user_ids = _seed_room()
+
+    results: dict[int, dict] = {}
+    barrier = threading.Barrier(8)
+
+    def _send(index: int) -> None:
+        barrier.wait()
+        with app.app_context():
+            message = create_message(room_id, user_ids[index % 2], f'msg {index}', encrypted=False)
+            results[index] = message or {}
+            close_thread_db()
+
+    threads = [threading.Thread(target=_send, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert len(results) == 8
+    ids = {int(message['id']) for message in results.values()}
+    assert len(ids) == 8
+    for index, message in results.items():
+        assert message['content'] == f'msg {index}'
+        assert message['sender_name'] == f'WQ {index % 2}'
+        assert message['__created'] is True
+
+    stats = get_message_write_queue_stats()
+    assert stats['enabled'] is True
+    assert stats['jobs'] >= 8
+    assert stats['failed_jobs'] == 0
+
+
+def test_queued_jobs_commit_in_one_transaction(app):
+    from app.models.write_queue import MessageWriteQueue, _WriteJob
+
+    with app.app_context():
+        room_id, user_ids = _seed_room()
+
+    write_queue = MessageWriteQueue(window_ms=0, max_batch=64)
+    jobs = []
+    for index in range(5):
+        job = _WriteJob(
+            lambda cursor, index=index: cursor.execute(
+                'INSERT INTO messages (room_id, sender_id, content, encrypted) VALUES (?, ?, ?, 0)',
+                (room_id, user_ids[0], f'queued {index}'),
+            ).lastrowid
+        )
+        jobs.append(job)
+        write_queue._queue.put(job)
+    write_queue.start()
+    try:
+        for job in jobs:
+            assert job.done.wait(5)
+            assert job.error is None
+    finally:
+        write_queue.stop()
+
+    assert len({job.result for job in jobs}) == 5
+    stats = write_queue.stats()
+    assert stats['batches'] == 1
+    assert stats['max_batch_size'] == 5
+
+
+def test_batched_insert_replay_returns_existing_message(app, batching):
+    from app.models import create_file_message_with_record, create_message, get_db
+
+    with app.app_context():
+        room_id, user_ids = _seed_room()
+        first = create_message(room_id, user_ids[0], 'hello', client_msg_id='dup-1')
+        replay = create_message(room_id, user_ids[0], 'hello', client_msg_id='dup-1')
+
+        assert first and first['__created'] is True
+        assert replay and replay['__created'] is False
+        assert int(replay['id']) == int(first['id'])
+
+        file_message = create_file_message_with_record(
+            room_id,
+            user_ids[1],
+            content='a.txt',
+            message_type='file',
+            file_path='a.txt',
+            file_name='a.txt',
+            file_size=3,
+        )
+        assert file_message and file_message['__created'] is True
+        row = get_db().execute(
+            'SELECT message_id FROM room_files WHERE file_path = ?',
+            ('a.txt',),
+        ).fetchone()
+        assert int(row['message_id']) == int(file_message['id'])
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+
+import pytest
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+PROFILE_CACHE_CONTROL = 'private, max-age=2592000, immutable'
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _upload_profile(client, body: bytes = PNG_BYTES, name: str = 'me.png'):
+    return client.post(
+        '/api/profile/image',
+        data={'file': (io.BytesIO(body), name)},
+        content_type='multipart/form-data',
+    )
+
+
+@pytest.fixture
+def fake_normalizer(monkeypatch):
+    """Pillow 없이 정규화 결과(대표 이미지 + 크기별 파생 파일)를 흉내낸다"""
+    import app.http.users as users_routes
+    from app.avatars import avatar_sizes
+    from app.thumbnails import thumbnail_relpath
+
+    def _normalize(upload_root, rel_path):
+        canonical = f'{os.path.splitext(rel_path)[0]}.webp'
+        os.remove(os.path.join(upload_root, rel_path))
+        sizes = avatar_sizes()
+        with open(os.path.join(upload_root, canonical), 'wb') as handle:
+            handle.write(f'avatar:{sizes[-1]}'.encode())
+        for size in sizes[:-1]:
+            target = os.path.join(upload_root, thumbnail_relpath(canonical, str(size), 'webp'))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as handle:
+                handle.write(f'avatar:{size}'.encode())
+        return canonical
+
+    monkeypatch.setattr(users_routes, 'normalize_profile_image', _normalize)
+
+
+def test_pick_avatar_size_prefers_smallest_adequate():
+    from app.avatars import avatar_sizes, pick_avatar_size
+
+    assert avatar_sizes() == (48, 96, 256)
+    assert pick_avatar_size(1) == 48
+    assert pick_avatar_size(40) == 48
+    assert pick_avatar_size(80) == 96
+    assert pick_avatar_size(96) == 96
+    assert pick_avatar_size(2000) == 256
+
+
+def test_profile_upload_serves_size_variants_with_long_cache(client, fake_normalizer):
+    import config
+
+    _register(client, 'avatar_u1')
+    assert _login(client, 'avatar_u1').status_code == 200
+    uploaded = _upload_profile(client)
+    assert uploaded.status_code == 200
+    profile_image = uploaded.json['profile_image']
+    assert profile_image.startswith('profiles/') and profile_image.endswith('.webp')
+    assert client.get('/api/me').json['user']['profile_image'] == profile_image
+
+    small = client.get(f'/uploads/{profile_image}?size=40')
+    assert small.status_code == 200
+    assert small.data == b'avatar:48'
+    assert small.headers['Cache-Control'] == PROFILE_CACHE_CONTROL
+
+    assert client.get(f'/uploads/{profile_image}?size=80').data == b'avatar:96'
+    full = client.get(f'/uploads/{profile_image}?size=512')
+    assert full.data == b'avatar:256'
+    assert full.headers['Cache-Control'] == PROFILE_CACHE_CONTROL
+    assert client.get(f'/uploads/{profile_image}?size=abc').status_code == 400
+    # 파생 파일은 /uploads로 직접 받을 수 없다.
+    assert client.get(f'/uploads/.thumbs/{profile_image}.48.webp').status_code == 403
+
+    derived = os.path.join(config.UPLOAD_FOLDER, '.thumbs', f'{profile_image}.48.webp')
+    assert os.path.exists(derived)
+    assert client.delete('/api/profile/image').status_code == 200
+    assert not os.path.exists(os.path.join(config.UPLOAD_FOLDER, profile_image))
+    assert not os.path.exists(derived)
+
+
+def test_profile_upload_without_normalizer_keeps_original(client, monkeypatch):
+    import app.avatars as avatars
+
+    monkeypatch.setattr(avatars, 'PROFILE_IMAGE_NORMALIZE', False)
+    _register(client, 'avatar_u2')
+    assert _login(client, 'avatar_u2').status_code == 200
+    uploaded = _upload_profile(client)
+    assert uploaded.status_code == 200
+    profile_image = uploaded.json['profile_image']
+    assert profile_image.endswith('.png')
+
+    response = client.get(f'/uploads/{profile_image}?size=40')
+    assert response.status_code == 200
+    assert response.data == PNG_BYTES
+    assert response.headers['Cache-Control'] == PROFILE_CACHE_CONTROL
+
+
+def test_purge_orphan_thumbnails_removes_profile_derivatives(tmp_path):
+    from app.thumbnails import purge_orphan_thumbnails
+
+    profiles = tmp_path / 'profiles'
+    derived = tmp_path / '.thumbs' / 'profiles'
+    profiles.mkdir()
+    derived.mkdir(parents=True)
+    (profiles / 'kept.webp').write_bytes(b'x')
+    (derived / 'kept.webp.48.webp').write_bytes(b'x')
+    (derived / 'gone.webp.48.webp').write_bytes(b'x')
+    (derived / 'gone.webp.original.png').write_bytes(b'x')
+
+    assert purge_orphan_thumbnails(str(tmp_path)) == 2
+    assert sorted(os.listdir(derived)) == ['kept.webp.48.webp']
+
+
+def test_normalize_profile_image_strips_exif_and_resizes(tmp_path, monkeypatch):
+    image_module = pytest.importorskip('PIL.Image')
+    import app.avatars as avatars
+    from app.thumbnails import thumbnail_relpath
+
+    monkeypatch.setattr(avatars, 'output_format', lambda: 'jpeg')
+    monkeypatch.setattr(avatars, 'PROFILE_IMAGE_KEEP_ORIGINAL', True)
+    (tmp_path / 'profiles').mkdir()
+    source = tmp_path / 'profiles' / 'me.jpg'
+    exif = image_module.Exif()
+    exif[0x010F] = 'SecretCam'  # Make
+    image_module.new('RGB', (800, 400), (10, 120, 200)).save(source, format='JPEG', exif=exif)
+
+    canonical = avatars.normalize_profile_image(str(tmp_path), 'profiles/me.jpg')
+    assert canonical == 'profiles/me.jpg'
+    with image_module.open(tmp_path / canonical) as normalized:
+        assert normalized.size == (256, 256)
+        assert not normalized.getexif()
+    with image_module.open(tmp_path / thumbnail_relpath(canonical, '48', 'jpeg')) as small:
+        assert small.size == (48, 48)
+    original = tmp_path / '.thumbs' / 'profiles' / 'me.jpg.original.jpg'
+    with image_module.open(original) as kept:
+        assert kept.size == (800, 400)
+
+    (tmp_path / 'profiles' / 'broken.png').write_bytes(PNG_BYTES)
+    with pytest.raises(ValueError):
+        avatars.normalize_profile_image(str(tmp_path), 'profiles/broken.png')
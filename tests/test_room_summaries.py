@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+
+def _seed(app) -> tuple[int, int]:
+    from app.models import create_room, get_db
+
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('rs', 'x', 'rs')")
+        user_id = int(cursor.lastrowid)
+        get_db().commit()
+        room_id = create_room('summary', 'group', user_id, [user_id])
+    return user_id, room_id
+
+
+def _summary(room_id: int) -> dict | None:
+    from app.models import get_db
+
+    row = get_db().execute('SELECT * FROM room_summaries WHERE room_id = ?', (room_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def test_summary_tracks_insert_edit_and_delete(app):
+    from app.models import create_message, edit_message, get_db
+
+    user_id, room_id = _seed(app)
+    with app.app_context():
+        assert _summary(room_id) is None
+
+        first = create_message(room_id, user_id, 'first', encrypted=False)
+        second = create_message(room_id, user_id, 'second', encrypted=False)
+        summary = _summary(room_id)
+        assert summary['message_count'] == 2
+        assert summary['last_message_id'] == int(second['id'])
+        assert summary['last_message'] == 'second'
+
+        edit_message(int(second['id']), user_id, 'second edited')
+        assert _summary(room_id)['last_message'] == 'second edited'
+
+        get_db().execute('DELETE FROM messages WHERE id = ?', (int(second['id']),))
+        get_db().commit()
+        summary = _summary(room_id)
+        assert summary['message_count'] == 1
+        assert summary['last_message_id'] == int(first['id'])
+        assert summary['last_message'] == 'first'
+
+        get_db().execute('DELETE FROM messages WHERE id = ?', (int(first['id']),))
+        get_db().commit()
+        summary = _summary(room_id)
+        assert summary['message_count'] == 0
+        assert summary['last_message_id'] is None
+
+
+def test_encrypted_text_body_is_not_stored_in_summary(app):
+    from app.models import create_message, get_user_rooms
+
+    user_id, room_id = _seed(app)
+    with app.app_context():
+        create_message(room_id, user_id, 'ciphertext', encrypted=True)
+        assert _summary(room_id)['last_message'] is None
+
+        rooms = get_user_rooms(user_id)
+        assert rooms[0]['last_message'] is None
+        assert rooms[0]['last_message_preview'] == '[암호화된 메시지]'
+        assert rooms[0]['message_count'] == 1
+
+
+def test_backfill_rebuilds_missing_summaries(app):
+    from app.models import create_message, get_db
+    from app.models.migrations import _ensure_room_summary_triggers
+
+    user_id, room_id = _seed(app)
+    with app.app_context():
+        create_message(room_id, user_id, 'a', encrypted=False)
+        last = create_message(room_id, user_id, 'b', encrypted=False)
+        conn = get_db()
+        conn.execute('DELETE FROM room_summaries')
+        _ensure_room_summary_triggers(conn.cursor())
+        conn.commit()
+
+        summary = _summary(room_id)
+        assert summary['message_count'] == 2
+        assert summary['last_message_id'] == int(last['id'])
+        assert summary['last_message'] == 'b'
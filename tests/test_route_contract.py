@@ -46,6 +46,10 @@ EXPECTED_ROUTE_METHODS = {
     "/api/security/audit": ("GET",),
     "/api/system/health": ("GET",),
     "/api/upload": ("POST",),
+    "/api/uploads/sessions": ("POST",),
+    "/api/uploads/sessions/<session_id>": ("DELETE", "GET"),
+    "/api/uploads/sessions/<session_id>/chunks": ("PUT",),
+    "/api/uploads/sessions/<session_id>/finalize": ("POST",),
     "/api/users": ("GET",),
     "/api/users/online": ("GET",),
     "/sw.js": ("GET",),
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import sqlite3
+
+
+def _columns(conn, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})').fetchall()}
+
+
+def test_fresh_database_reaches_latest_version(app):
+    import config
+    from app.models.migrations import LATEST_SCHEMA_VERSION, get_applied_migrations, get_schema_version
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        assert get_schema_version(conn) == LATEST_SCHEMA_VERSION
+        history = get_applied_migrations(conn)
+        assert [item['version'] for item in history] == list(range(1, LATEST_SCHEMA_VERSION + 1))
+        assert all(item['duration_ms'] is not None for item in history)
+        assert {'status_message', 'session_token'} <= _columns(conn, 'users')
+        assert 'unread_count' in _columns(conn, 'room_members')
+    finally:
+        conn.close()
+
+
+def test_current_schema_skips_migrations(app, monkeypatch):
+    import app.models.base as base_module
+    import app.models.migrations as migrations_module
+
+    calls = []
+    monkeypatch.setattr(base_module, 'run_migrations', lambda conn: calls.append(conn) or [])
+    base_module._db_initialized = False
+    base_module.init_db()
+
+    assert calls == []
+    # 최신 DB에 다시 적용해도 아무 것도 하지 않는다.
+    conn = sqlite3.connect(base_module.DATABASE_PATH)
+    try:
+        assert migrations_module.run_migrations(conn) == []
+    finally:
+        conn.close()
+
+
+def test_legacy_database_without_version_table_is_upgraded(tmp_path):
+    from app.models.migrations import LATEST_SCHEMA_VERSION, get_schema_version, run_migrations
+
+    db_path = str(tmp_path / 'legacy.db')
+    conn = sqlite3.connect(db_path)
+    # 초기 버전 스키마: 이후 추가된 컬럼/요약 테이블이 없다.
+    conn.executescript('''
+        CREATE TABLE users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            nickname TEXT,
+            profile_image TEXT,
+            status TEXT DEFAULT 'offline',
+            public_key TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE rooms (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            type TEXT DEFAULT 'direct',
+            created_by INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE room_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(room_id, user_id)
+        );
+        CREATE TABLE messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id INTEGER NOT NULL,
+            sender_id INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            encrypted INTEGER DEFAULT 1,
+            message_type TEXT DEFAULT 'text',
+            file_path TEXT,
+            file_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        INSERT INTO users (username, password_hash, nickname) VALUES ('a', 'x', 'a'), ('b', 'x', 'b');
+        INSERT INTO rooms (name, type, created_by) VALUES ('legacy', 'group', 1);
+        INSERT INTO room_members (room_id, user_id) VALUES (1, 1), (1, 2);
+        INSERT INTO messages (room_id, sender_id, content, encrypted) VALUES (1, 1, 'hello', 0), (1, 1, 'world', 0);
+    ''')
+    conn.commit()
+    try:
+        assert get_schema_version(conn) == 0
+        applied = run_migrations(conn)
+        assert [item['version'] for item in applied] == list(range(1, LATEST_SCHEMA_VERSION + 1))
+        assert get_schema_version(conn) == LATEST_SCHEMA_VERSION
+
+        assert {'is_platform_admin', 'status_message', 'session_token'} <= _columns(conn, 'users')
+        assert {'role', 'last_read_message_id', 'unread_count'} <= _columns(conn, 'room_members')
+        assert {'reply_to', 'client_msg_id'} <= _columns(conn, 'messages')
+
+        summary = conn.execute(
+            'SELECT message_count, last_message FROM room_summaries WHERE room_id = 1'
+        ).fetchone()
+        assert summary == (2, 'world')
+        unread = dict(conn.execute('SELECT user_id, unread_count FROM room_members').fetchall())
+        assert unread == {1: 0, 2: 2}
+    finally:
+        conn.close()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+
+def _register(client, username, password="Password123!"):
+    return client.post(
+        "/api/register",
+        json={"username": username, "password": password, "nickname": username},
+    )
+
+
+def _login(client, username, password="Password123!"):
+    return client.post("/api/login", json={"username": username, "password": password})
+
+
+def _setup(client):
+    """cacheuser1/2의 대화방과 cacheuser1이 속하지 않은 다른 대화방"""
+    ids = {}
+    for name in ("cacheuser1", "cacheuser2", "cacheuser3"):
+        _register(client, name)
+        assert _login(client, name).status_code == 200
+        ids[name] = client.get("/api/me").json["user"]["id"]
+    other_room = client.post("/api/rooms", json={"members": [ids["cacheuser2"]]}).json["room_id"]
+    assert _login(client, "cacheuser1").status_code == 200
+    room_id = client.post("/api/rooms", json={"members": [ids["cacheuser2"]]}).json["room_id"]
+    return ids, room_id, other_room
+
+
+def _search(client, query="budget"):
+    return sorted(m["content"] for m in client.get(f"/api/search?q={query}").json)
+
+
+def _stats():
+    from app.models import get_search_cache_stats
+
+    return get_search_cache_stats()
+
+
+def test_repeated_search_is_served_from_cache(client):
+    from app.models.messages import create_message
+
+    ids, room_id, other_room = _setup(client)
+    with client.application.app_context():
+        create_message(room_id=room_id, sender_id=ids["cacheuser1"], content="budget draft", encrypted=False)
+
+    before = _stats()
+    assert _search(client) == ["budget draft"]
+    # 공백만 다른 검색어도 같은 항목을 쓴다.
+    assert _search(client, "%20budget%20%20") == ["budget draft"]
+    after = _stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+
+    # 요청자가 속하지 않은 대화방의 메시지는 캐시를 무효화하지 않는다.
+    with client.application.app_context():
+        create_message(room_id=other_room, sender_id=ids["cacheuser2"], content="budget elsewhere", encrypted=False)
+    assert _search(client) == ["budget draft"]
+    assert _stats()["hits"] - after["hits"] == 1
+
+
+def test_room_changes_invalidate_cached_results(client):
+    from app.models.messages import create_message, delete_message, edit_message
+
+    ids, room_id, _other_room = _setup(client)
+    sender = ids["cacheuser1"]
+    with client.application.app_context():
+        first = create_message(room_id=room_id, sender_id=sender, content="budget draft", encrypted=False)
+    assert _search(client) == ["budget draft"]
+
+    with client.application.app_context():
+        create_message(room_id=room_id, sender_id=ids["cacheuser2"], content="budget final", encrypted=False)
+    assert _search(client) == ["budget draft", "budget final"]
+
+    with client.application.app_context():
+        assert edit_message(first["id"], sender, "budget revised")[0]
+    assert _search(client) == ["budget final", "budget revised"]
+
+    with client.application.app_context():
+        assert delete_message(first["id"], sender)[0]
+    assert _search(client) == ["budget final"]
+    assert _stats()["stale"] >= 3
+
+
+def test_health_reports_search_cache_hit_ratio(client):
+    _setup(client)
+    _search(client)
+    _search(client)
+    payload = client.get("/api/system/health").json
+    assert {"hits", "misses", "hit_ratio", "stale"} <= set(payload["search_cache"])
+    assert payload["search_cache"]["hits"] >= 1
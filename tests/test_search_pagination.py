@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+def _register(client, username, password="Password123!"):
+    return client.post(
+        "/api/register",
+        json={"username": username, "password": password, "nickname": username},
+    )
+
+
+def _login(client, username, password="Password123!"):
+    return client.post("/api/login", json={"username": username, "password": password})
+
+
+@pytest.fixture
+def seeded_room(client):
+    from app.models.messages import create_message
+
+    _register(client, "pageuser1")
+    _register(client, "pageuser2")
+    assert _login(client, "pageuser2").status_code == 200
+    other_id = client.get("/api/me").json["user"]["id"]
+    assert _login(client, "pageuser1").status_code == 200
+    user_id = client.get("/api/me").json["user"]["id"]
+    room_id = client.post("/api/rooms", json={"members": [other_id]}).json["room_id"]
+    with client.application.app_context():
+        for index in range(7):
+            create_message(room_id=room_id, sender_id=user_id, content=f"budget report {index}", encrypted=False)
+        create_message(room_id=room_id, sender_id=other_id, content="lunch menu", encrypted=False)
+    return user_id, room_id
+
+
+def _walk_advanced(client, payload):
+    ids, cursor, pages = [], None, []
+    while True:
+        body = dict(payload, **({"cursor": cursor} if cursor else {}))
+        response = client.post("/api/search/advanced", json=body)
+        assert response.status_code == 200
+        pages.append(response.json)
+        ids.extend(m["id"] for m in response.json["messages"])
+        cursor = response.json["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+
+def test_cursor_round_trip_and_rejects_garbage():
+    from app.models import InvalidCursorError, decode_cursor, encode_cursor
+
+    token = encode_cursor("fts:fts_filter", [-1.25, 42])
+    assert decode_cursor(token) == {"kind": "fts:fts_filter", "values": [-1.25, 42]}
+    assert decode_cursor("") is None
+    for bad in ("not-base64!", encode_cursor("time", [])[:-2], "eyJrIjoxfQ"):
+        with pytest.raises(InvalidCursorError):
+            decode_cursor(bad)
+
+
+@pytest.mark.parametrize("ordering", ["fts", "time"])
+def test_advanced_search_cursor_pages_match_offset_results(client, seeded_room, ordering):
+    user_id, _room_id = seeded_room
+    payload = {"query": "budget"} if ordering == "fts" else {"sender_id": user_id}
+    expected = client.post("/api/search/advanced", json=dict(payload, limit=50)).json
+
+    ids, pages = _walk_advanced(client, dict(payload, limit=3))
+    assert len(pages) == 3
+    assert ids == [m["id"] for m in expected["messages"]]
+    assert len(set(ids)) == 7
+    assert pages[0]["total"] == 7 and pages[0]["has_more"] is True
+    # 다음 페이지는 기본으로 건수를 세지 않는다.
+    assert pages[1]["total"] is None
+    assert pages[-1]["has_more"] is False
+
+    # 기존 offset 방식도 그대로 동작한다.
+    second = client.post("/api/search/advanced", json=dict(payload, limit=3, offset=3)).json
+    assert [m["id"] for m in second["messages"]] == ids[3:6]
+
+
+def test_advanced_search_total_is_capped(client, seeded_room, monkeypatch):
+    import app.models.pagination as pagination
+
+    monkeypatch.setattr(pagination, "SEARCH_TOTAL_CAP", 5)
+    body = client.post("/api/search/advanced", json={"query": "budget", "limit": 2}).json
+    assert body["total"] == 5
+    assert body["total_capped"] is True
+
+    forced = client.post(
+        "/api/search/advanced",
+        json={"query": "budget", "limit": 2, "cursor": body["next_cursor"], "include_total": True},
+    ).json
+    assert forced["total"] == 5
+
+
+def test_search_cursor_header_and_invalid_cursor(client, seeded_room):
+    first = client.get("/api/search?q=budget&limit=4")
+    assert first.status_code == 200
+    assert len(first.json) == 4
+    cursor = first.headers["X-Next-Cursor"]
+
+    rest = client.get(f"/api/search?q=budget&limit=4&cursor={cursor}")
+    assert len(rest.json) == 3
+    assert "X-Next-Cursor" not in rest.headers
+    assert not {m["id"] for m in first.json} & {m["id"] for m in rest.json}
+
+    assert client.get("/api/search?q=budget&cursor=%%%").status_code == 400
+    # 시간순 커서를 FTS 검색에 쓰면 거부한다.
+    time_cursor = client.post("/api/search/advanced", json={"sender_id": seeded_room[0], "limit": 1}).json["next_cursor"]
+    assert client.get(f"/api/search?q=budget&cursor={time_cursor}").status_code == 400
+    bad = client.post("/api/search/advanced", json={"query": "budget", "cursor": time_cursor})
+    assert bad.status_code == 400
+
+
+def test_room_files_keyset_pages(client, seeded_room):
+    from app.models import add_room_file
+
+    user_id, room_id = seeded_room
+    with client.application.app_context():
+        for index in range(5):
+            add_room_file(room_id, user_id, f"page_{index}.txt", f"page_{index}.txt", 10, "file")
+
+    full = client.get(f"/api/rooms/{room_id}/files").json
+    assert len(full) == 5
+
+    first = client.get(f"/api/rooms/{room_id}/files?limit=2")
+    second = client.get(f"/api/rooms/{room_id}/files?limit=2&cursor={first.headers['X-Next-Cursor']}")
+    third = client.get(f"/api/rooms/{room_id}/files?limit=2&cursor={second.headers['X-Next-Cursor']}")
+    assert "X-Next-Cursor" not in third.headers
+    paged = [f["id"] for f in first.json + second.json + third.json]
+    assert paged == [f["id"] for f in full]
+    assert client.get(f"/api/rooms/{room_id}/files?cursor=bad!").status_code == 400
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import pytest
+
+
+def _register(client, username, password="Password123!"):
+    return client.post(
+        "/api/register",
+        json={"username": username, "password": password, "nickname": username},
+    )
+
+
+def _login(client, username, password="Password123!"):
+    return client.post("/api/login", json={"username": username, "password": password})
+
+
+@pytest.fixture
+def vocab_tables(app, monkeypatch):
+    import config
+    from app.models import messages
+
+    from app.models.search_cache import search_cache
+
+    # 다른 테스트가 남긴 FTS 가용성 캐시를 쓰지 않고, 매번 계획을 새로 세우도록 검색 캐시를 끈다.
+    for state in (messages._fts5_probe_state, messages._fts5_trigram_probe_state):
+        monkeypatch.setitem(state, "available", None)
+    monkeypatch.setattr(search_cache, "_ttl", 0.0)
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('messages_fts_vocab', 'messages_fts_trigram_vocab')"
+        ).fetchall()
+    finally:
+        conn.close()
+    if len(rows) < 2:
+        pytest.skip("SQLite FTS5 trigram/vocab not supported in this environment")
+
+
+@pytest.fixture
+def seeded(client, vocab_tables):
+    """planuser1은 대화방 1개, 다른 대화방에는 같은 검색어가 더 많이 있다"""
+    from app.models.messages import create_message
+
+    users = {}
+    for name in ("planuser1", "planuser2", "planuser3"):
+        _register(client, name)
+        assert _login(client, name).status_code == 200
+        users[name] = client.get("/api/me").json["user"]["id"]
+    assert _login(client, "planuser2").status_code == 200
+    other_room = client.post("/api/rooms", json={"members": [users["planuser3"]]}).json["room_id"]
+    assert _login(client, "planuser1").status_code == 200
+    room_id = client.post("/api/rooms", json={"members": [users["planuser2"]]}).json["room_id"]
+
+    contents = [
+        "회의실 예약 완료",
+        "정기회의 자료",
+        "점심 메뉴",
+        "회의 시간 변경",
+        "(회의) 준비",
+        "안건:\n회의 일정",
+        "CAFÉ 2",
+        "café au lait",
+    ]
+    with client.application.app_context():
+        for content in contents:
+            create_message(room_id=room_id, sender_id=users["planuser1"], content=content, encrypted=False)
+        for index in range(12):
+            create_message(room_id=other_room, sender_id=users["planuser2"], content=f"회의실 {index}번", encrypted=False)
+    return users["planuser1"], room_id
+
+
+def _search(app, user_id, query, explain=False):
+    from app.models.messages import advanced_search
+
+    with app.app_context():
+        return advanced_search(user_id, query=query, explain=explain)
+
+
+def test_search_matches_index_boundaries_and_case(app, client, seeded):
+    user_id, _room_id = seeded
+    # 구두점/줄바꿈으로 끝나는 단어와 ASCII 밖의 대소문자도 색인 규칙대로 찾는다.
+    found = sorted(m["content"] for m in _search(app, user_id, "회의")["messages"])
+    assert "(회의) 준비" in found
+    assert "안건:\n회의 일정" in found
+    assert "회의 시간 변경" in found
+
+    cafe = sorted(m["content"] for m in client.get("/api/search?q=café").json)
+    assert cafe == ["CAFÉ 2", "café au lait"]
+
+
+def test_plan_reports_estimate_and_visible_messages(app, seeded):
+    user_id, _room_id = seeded
+    # 적중 추정 13건(회의실), 볼 수 있는 메시지 8건
+    plan = _search(app, user_id, "회의실", explain=True)["plan"]
+    assert plan["index"] == "messages_fts_trigram"
+    assert plan["estimated_hits"] >= 13
+    assert plan["visible_messages"] == 8
+    assert plan["strategy"] == "fts_filter"
+
+    rare = _search(app, user_id, "정기회의", explain=True)["plan"]
+    assert rare["estimated_hits"] == 1
+    assert rare["strategy"] == "fts_filter"
+
+
+def test_regular_search_skips_plan_statistics(app, seeded, monkeypatch):
+    import app.models.search_planner as planner
+
+    def _no_stats(*_args, **_kwargs):
+        raise AssertionError("statistics must only be queried in debug mode")
+
+    monkeypatch.setattr(planner, "_visible_messages", _no_stats)
+    monkeypatch.setattr(planner, "estimate_fts_hits", _no_stats)
+    user_id, _room_id = seeded
+    result = _search(app, user_id, "회의실")
+    assert result["total"] == 1
+    assert "plan" not in result
+
+
+def test_plan_is_only_exposed_in_debug_mode(app, client, seeded):
+    response = client.post("/api/search/advanced", json={"query": "회의실"})
+    assert response.status_code == 200
+    assert response.json["total"] == 1
+    assert "plan" not in response.json
+
+    app.debug = True
+    try:
+        response = client.post("/api/search/advanced", json={"query": "회의실"})
+    finally:
+        app.debug = False
+    assert response.json["plan"]["strategy"] == "fts_filter"
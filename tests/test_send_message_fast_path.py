@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import pytest
+
+
+def _register(client, username: str, password: str = 'Password123!') -> None:
+    response = client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+    assert response.status_code == 200
+
+
+def _login(client, username: str, password: str = 'Password123!') -> None:
+    response = client.post('/api/login', json={'username': username, 'password': password})
+    assert response.status_code == 200
+
+
+def _create_room(client, name: str) -> int:
+    response = client.post('/api/rooms', json={'name': name, 'members': []})
+    assert response.status_code == 200
+    return int(response.json['room_id'])
+
+
+def test_inserted_payload_matches_joined_row(app):
+    from app.models import create_message, get_db
+    from app.models.messages import _get_message_with_sender
+
+    client = app.test_client()
+    _register(client, 'fastpath')
+    _login(client, 'fastpath')
+    user_id = int(client.get('/api/me').json['user']['id'])
+    room_id = _create_room(client, 'Fast path')
+
+    with app.app_context():
+        origin = create_message(room_id, user_id, 'origin', 'text', encrypted=False)
+        reply = create_message(
+            room_id,
+            user_id,
+            'reply',
+            'text',
+            reply_to=int(origin['id']),
+            encrypted=False,
+            client_msg_id='fp-1',
+            require_reply_target=True,
+        )
+        assert reply.pop('__created') is True
+        joined = _get_message_with_sender(get_db().cursor(), int(reply['id']))
+
+    assert reply == joined
+    assert reply['reply_content'] == 'origin'
+    assert reply['reply_sender'] == 'fastpath'
+
+
+def test_required_reply_target_rejects_other_room_without_insert(app):
+    from app.models import ReplyTargetError, create_message, get_db
+
+    client = app.test_client()
+    _register(client, 'fastreply')
+    _login(client, 'fastreply')
+    user_id = int(client.get('/api/me').json['user']['id'])
+    room_a = _create_room(client, 'Reply A')
+    room_b = _create_room(client, 'Reply B')
+
+    with app.app_context():
+        origin = create_message(room_a, user_id, 'origin', 'text', encrypted=False)
+        with pytest.raises(ReplyTargetError):
+            create_message(
+                room_b,
+                user_id,
+                'cross',
+                'text',
+                reply_to=int(origin['id']),
+                encrypted=False,
+                require_reply_target=True,
+            )
+        count = get_db().execute('SELECT COUNT(*) FROM messages WHERE room_id = ?', (room_b,)).fetchone()[0]
+        assert int(count) == 0
+
+
+def test_send_message_records_stage_timings(app):
+    from app import socketio
+    from app.realtime.metrics import get_send_path_stats, reset_send_path_stats
+
+    client = app.test_client()
+    _register(client, 'fasttiming')
+    _login(client, 'fasttiming')
+    room_id = _create_room(client, 'Timing')
+
+    reset_send_path_stats()
+    sc = socketio.test_client(app, flask_test_client=client)
+    try:
+        ack = sc.emit(
+            'send_message',
+            {'room_id': room_id, 'content': 'hi', 'type': 'text', 'encrypted': False},
+            callback=True,
+        )
+        assert ack.get('ok') is True
+    finally:
+        sc.disconnect()
+
+    stats = get_send_path_stats()
+    for stage in ('validate', 'access', 'insert', 'emit', 'total'):
+        assert stats[stage]['count'] == 1
+        assert stats[stage]['p99_ms'] >= 0.0
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import time
+
 
 def test_user_has_room_access_hits_cache_without_db(monkeypatch):
     import app.sockets as sockets
@@ -43,3 +45,108 @@ def test_user_has_room_access_falls_back_to_db_on_cache_miss(monkeypatch):
     assert sockets.user_has_room_access(1, 30) is True
     assert calls['db'] == 1
     assert calls['invalidate'] == 1
+
+
+def test_user_room_ids_use_membership_query_not_room_list(app, monkeypatch):
+    import app.realtime.state as state
+    from app.models import create_room, get_db
+
+    def _full_room_list(*_args, **_kwargs):
+        raise AssertionError('get_user_rooms must not be used for membership lookups')
+
+    monkeypatch.setattr(state, 'get_user_rooms', _full_room_list, raising=False)
+
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('m1', 'x', 'm1')")
+        user_a = int(cursor.lastrowid)
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('m2', 'x', 'm2')")
+        user_b = int(cursor.lastrowid)
+        get_db().commit()
+        room_id = create_room('membership', 'group', user_a, [user_a, user_b])
+
+        state.invalidate_user_cache(user_a)
+        assert state.get_user_room_ids(user_a) == [room_id]
+        assert state.user_has_room_access(user_b, room_id) is True
+        assert state.user_has_room_access(user_b, room_id + 1000) is False
+
+
+def test_denied_room_access_is_negatively_cached_until_member_added(app, monkeypatch):
+    import app.sockets as sockets
+    from app.models import add_room_member, create_room, get_db
+    from app.models.membership_cache import membership_cache
+
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('n1', 'x', 'n1')")
+        owner = int(cursor.lastrowid)
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('n2', 'x', 'n2')")
+        outsider = int(cursor.lastrowid)
+        get_db().commit()
+        room_id = create_room('deny', 'group', owner, [owner])
+
+        calls = {'db': 0}
+        real_check = sockets.is_room_member
+
+        def _db_check(check_room_id, check_user_id):
+            calls['db'] += 1
+            return real_check(check_room_id, check_user_id)
+
+        monkeypatch.setattr(sockets, 'is_room_member', _db_check)
+        avoided_before = membership_cache.stats()['denied']['avoided_db_lookups']
+
+        for _ in range(5):
+            assert sockets.user_has_room_access(outsider, room_id) is False
+        assert calls['db'] == 1
+        assert membership_cache.stats()['denied']['avoided_db_lookups'] - avoided_before == 4
+
+        assert add_room_member(room_id, outsider) is True
+        assert sockets.user_has_room_access(outsider, room_id) is True
+
+
+
+def test_failed_membership_check_is_not_negatively_cached(app, monkeypatch):
+    import sqlite3
+
+    import app.models.rooms as rooms_module
+    import app.sockets as sockets
+    from app.models import create_room, get_db, is_room_member
+    from app.models.membership_cache import membership_cache
+
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('f1', 'x', 'f1')")
+        owner = int(cursor.lastrowid)
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('f2', 'x', 'f2')")
+        member = int(cursor.lastrowid)
+        get_db().commit()
+        room_id = create_room('flaky', 'group', owner, [owner, member])
+        membership_cache.clear()
+
+        class _LockedCursor:
+            def execute(self, *_args, **_kwargs):
+                raise sqlite3.OperationalError('database is locked')
+
+        class _LockedConnection:
+            def cursor(self):
+                return _LockedCursor()
+
+        real_get_db = rooms_module.get_db
+        monkeypatch.setattr(rooms_module, 'get_db', lambda: _LockedConnection())
+        assert is_room_member(room_id, member) is None
+        assert sockets.user_has_room_access(member, room_id) is False
+        assert membership_cache.is_denied(member, room_id) is False
+
+        monkeypatch.setattr(rooms_module, 'get_db', real_get_db)
+        assert sockets.user_has_room_access(member, room_id) is True
+
+
+def test_denied_entry_expires_after_ttl():
+    from app.models.membership_cache import MembershipCache
+
+    cache = MembershipCache(max_users=10, max_rooms=10, deny_ttl=0.01)
+    cache.mark_denied(1, 2)
+    assert cache.is_denied(1, 2) is True
+    time.sleep(0.02)
+    assert cache.is_denied(1, 2) is False
+    assert cache.stats()['denied']['expired'] == 1
@@ -33,3 +33,15 @@ def test_system_health_shape(client):
     assert 'last_fail_closed_at' in payload['session_guard']
     assert 'warning_count' in payload['hardening']
     assert 'signature_required_now' in payload['hardening']
+    assert 'in_use' in payload['db']['pool']
+    assert 'avg_batch_size' in payload['message_write_queue']
+    assert 'hit_ratio' in payload['membership_cache']['users']
+    assert 'send_message_latency' in payload
+    assert payload['readiness']['ready'] is True
+    assert 'maintenance_pending' in payload['readiness']
+    assert 'progress' in payload['maintenance']
+    assert 'unsettled' in payload['stored_files']
+    assert {'dedup_ratio', 'bytes_saved'} <= set(payload['upload_dedup'])
+    assert {'hits', 'hit_ratio', 'invalidations'} <= set(payload['upload_acl_cache'])
+    assert {'hits', 'hit_ratio', 'stale'} <= set(payload['search_cache'])
+    assert {'available', 'generated', 'pending'} <= set(payload['thumbnails'])
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+
+import pytest
+
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _shared_image(client, body: bytes = PNG_BYTES) -> str:
+    from app.models import add_room_file
+
+    _register(client, 'thumb_u1')
+    _register(client, 'thumb_u2')
+    assert _login(client, 'thumb_u1').status_code == 200
+    me = client.get('/api/me').json['user']
+    users = {u['username']: u['id'] for u in client.get('/api/users').json}
+    room_id = int(client.post('/api/rooms', json={'members': [users['thumb_u2']]}).json['room_id'])
+    uploaded = client.post(
+        '/api/upload',
+        data={'room_id': str(room_id), 'file': (io.BytesIO(body), 'photo.png')},
+        content_type='multipart/form-data',
+    )
+    assert uploaded.status_code == 200
+    file_path = uploaded.json['file_path']
+    with client.application.app_context():
+        add_room_file(room_id, me['id'], file_path, 'photo.png', len(body), 'image')
+    return file_path
+
+
+@pytest.fixture
+def fake_thumbnailer(monkeypatch):
+    """Pillow 없이 생성 경로를 확인하도록 렌더러를 대체"""
+    import app.thumbnails as thumbnails
+
+    rendered = []
+
+    def _render(source_path, target_path, max_side, fmt):
+        rendered.append((os.path.basename(target_path), max_side))
+        with open(target_path, 'wb') as handle:
+            handle.write(f'{fmt}:{max_side}'.encode())
+
+    monkeypatch.setattr(thumbnails, 'is_available', lambda: True)
+    monkeypatch.setattr(thumbnails, 'output_format', lambda: 'webp')
+    monkeypatch.setattr(thumbnails, '_render', _render)
+    return rendered
+
+
+def test_thumbnail_paths_are_deterministic():
+    from app.thumbnails import is_thumbnail_source, thumbnail_relpath
+
+    assert thumbnail_relpath('ab/cd/photo.png', 'thumb', 'webp') == '.thumbs/ab/cd/photo.png.thumb.webp'
+    assert thumbnail_relpath('photo.jpg', 'preview', 'jpeg') == '.thumbs/photo.jpg.preview.jpg'
+    assert is_thumbnail_source('ab/cd/photo.JPG')
+    assert not is_thumbnail_source('ab/cd/drawing.svg')
+    assert not is_thumbnail_source('ab/cd/report.pdf')
+
+
+def test_upload_schedules_thumbnails_and_serves_variant(client, fake_thumbnailer):
+    import config
+    from app.thumbnails import flush_thumbnails, get_thumbnail_stats
+
+    file_path = _shared_image(client)
+    assert flush_thumbnails(5.0)
+    assert sorted(size for _name, size in fake_thumbnailer) == [256, 1024]
+
+    response = client.get(f'/uploads/{file_path}?variant=thumb')
+    assert response.status_code == 200
+    assert response.data == b'webp:256'
+    assert response.mimetype == 'image/webp'
+    assert response.headers['Cache-Control'] == 'private, max-age=2592000, immutable'
+    assert response.headers['Content-Disposition'] == 'inline'
+    assert client.get(f'/uploads/{file_path}?variant=thumb', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert get_thumbnail_stats()['served'] >= 1
+
+    assert client.get(f'/uploads/{file_path}?variant=huge').status_code == 400
+
+    # 원본이 삭제되면 축소본도 함께 지운다.
+    from app.models.base import safe_file_delete
+
+    thumb_full = os.path.join(config.UPLOAD_FOLDER, '.thumbs', f'{file_path}.thumb.webp')
+    assert os.path.isfile(thumb_full)
+    assert safe_file_delete(os.path.join(config.UPLOAD_FOLDER, file_path))
+    assert not os.path.exists(thumb_full)
+
+
+def test_missing_variant_falls_back_to_original_and_regenerates(client, fake_thumbnailer):
+    import config
+    from app.thumbnails import flush_thumbnails
+
+    file_path = _shared_image(client)
+    assert flush_thumbnails(5.0)
+    os.remove(os.path.join(config.UPLOAD_FOLDER, '.thumbs', f'{file_path}.preview.webp'))
+
+    response = client.get(f'/uploads/{file_path}?variant=preview')
+    assert response.status_code == 200
+    assert response.data == PNG_BYTES
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+
+    assert flush_thumbnails(5.0)
+    assert client.get(f'/uploads/{file_path}?variant=preview').data == b'webp:1024'
+
+
+def test_reconcile_skips_thumbnails_and_purges_orphans(app):
+    import config
+    from app.models.stored_files import reconcile_stored_files
+    from app.models.base import get_db
+
+    thumbs = os.path.join(config.UPLOAD_FOLDER, '.thumbs', 'ab', 'cd')
+    os.makedirs(thumbs)
+    orphan = os.path.join(thumbs, 'gone.png.thumb.webp')
+    with open(orphan, 'wb') as handle:
+        handle.write(b'x')
+
+    with app.app_context():
+        result = reconcile_stored_files(config.UPLOAD_FOLDER)
+        registered = get_db().execute(
+            "SELECT COUNT(*) FROM stored_files WHERE file_path LIKE '.thumbs/%'"
+        ).fetchone()[0]
+    assert result['orphan_thumbnails_removed'] == 1
+    assert not os.path.exists(orphan)
+    assert registered == 0
+
+
+def test_generate_thumbnails_downscales_with_pillow(tmp_path):
+    image_module = pytest.importorskip('PIL.Image')
+    from app.thumbnails import generate_thumbnails, output_format
+
+    source = tmp_path / 'ab' / 'cd' / 'wide.png'
+    source.parent.mkdir(parents=True)
+    image_module.new('RGBA', (2000, 1000), (10, 20, 30, 128)).save(source)
+
+    created = generate_thumbnails(str(tmp_path), 'ab/cd/wide.png')
+    assert set(created) == {'thumb', 'preview'}
+    with image_module.open(tmp_path / created['thumb']) as thumb:
+        assert thumb.size == (256, 128)
+        assert thumb.format == output_format().upper()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+
+def _seed(app) -> tuple[int, int, int]:
+    from app.models import create_room, get_db
+
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('ua', 'x', 'ua')")
+        user_a = int(cursor.lastrowid)
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('ub', 'x', 'ub')")
+        user_b = int(cursor.lastrowid)
+        get_db().commit()
+        room_id = create_room('unread', 'group', user_a, [user_a, user_b])
+    return user_a, user_b, room_id
+
+
+def _unread(room_id: int, user_id: int) -> int:
+    from app.models import get_db
+
+    row = get_db().execute(
+        'SELECT unread_count FROM room_members WHERE room_id = ? AND user_id = ?',
+        (room_id, user_id),
+    ).fetchone()
+    return int(row[0])
+
+
+def test_insert_increments_other_members_and_read_resets(app):
+    from app.models import create_message, get_user_rooms, update_last_read
+
+    user_a, user_b, room_id = _seed(app)
+    with app.app_context():
+        first = create_message(room_id, user_a, 'one', encrypted=False)
+        create_message(room_id, user_a, 'two', encrypted=False)
+        last = create_message(room_id, user_a, 'three', encrypted=False)
+
+        assert _unread(room_id, user_a) == 0
+        assert _unread(room_id, user_b) == 3
+        assert get_user_rooms(user_b)[0]['unread_count'] == 3
+
+        assert update_last_read(room_id, user_b, int(first['id'])) == 2
+        assert update_last_read(room_id, user_b, int(last['id'])) == 0
+        assert get_user_rooms(user_b)[0]['unread_count'] == 0
+
+
+def test_new_member_and_rebuild_match_full_count(app):
+    from app.models import add_room_member, create_message, get_db, rebuild_unread_counts
+
+    user_a, user_b, room_id = _seed(app)
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("INSERT INTO users (username, password_hash, nickname) VALUES ('uc', 'x', 'uc')")
+        user_c = int(cursor.lastrowid)
+        get_db().commit()
+
+        create_message(room_id, user_a, 'before join', encrypted=False)
+        create_message(room_id, user_b, 'before join 2', encrypted=False)
+        assert add_room_member(room_id, user_c) is True
+        assert _unread(room_id, user_c) == 2
+
+        get_db().execute('UPDATE room_members SET unread_count = 99')
+        get_db().commit()
+        assert rebuild_unread_counts() == 3
+        assert _unread(room_id, user_a) == 1
+        assert _unread(room_id, user_b) == 1
+        assert _unread(room_id, user_c) == 2
+
+
+def test_message_read_pushes_room_unread_to_reader(app):
+    from app import socketio
+    from app.models import create_message, get_db
+
+    client = app.test_client()
+    for name in ('unread_owner', 'unread_peer'):
+        response = client.post(
+            '/api/register',
+            json={'username': name, 'password': 'Password123!', 'nickname': name},
+        )
+        assert response.status_code == 200
+    assert client.post('/api/login', json={'username': 'unread_owner', 'password': 'Password123!'}).status_code == 200
+    peer = next(u for u in client.get('/api/users').get_json() if u['username'] == 'unread_peer')
+    room_id = int(client.post('/api/rooms', json={'name': 'Unread', 'members': [peer['id']]}).get_json()['room_id'])
+
+    with app.app_context():
+        first = create_message(room_id, int(peer['id']), 'a', encrypted=False)
+        create_message(room_id, int(peer['id']), 'b', encrypted=False)
+        get_db().commit()
+
+    sc = socketio.test_client(app, flask_test_client=client)
+    try:
+        sc.get_received()
+        sc.emit('message_read', {'room_id': room_id, 'message_id': int(first['id'])})
+        events = [evt for evt in sc.get_received() if evt['name'] == 'room_unread']
+        assert events
+        assert events[-1]['args'][0] == {'room_id': room_id, 'unread_count': 1}
+    finally:
+        sc.disconnect()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def test_upload_acl_lookups_are_cached_and_invalidated(app, monkeypatch):
+    import config
+    import app.models.upload_acl_cache as acl_module
+    from app.models import add_room_file, delete_room_file, get_upload_acl_cache_stats
+
+    owner = app.test_client()
+    guest = app.test_client()
+    for name in ('acl_owner', 'acl_peer', 'acl_guest'):
+        _register(owner, name)
+    assert _login(owner, 'acl_owner').status_code == 200
+    assert _login(guest, 'acl_guest').status_code == 200
+    owner_id = owner.get('/api/me').json['user']['id']
+    users = {u['username']: u['id'] for u in owner.get('/api/users').json}
+    room_a = int(owner.post('/api/rooms', json={'members': [users['acl_peer']]}).json['room_id'])
+    room_b = int(owner.post('/api/rooms', json={'members': [users['acl_guest']]}).json['room_id'])
+
+    file_path = 'shared.txt'
+    with open(os.path.join(config.UPLOAD_FOLDER, file_path), 'wb') as handle:
+        handle.write(b'shared body')
+    with app.app_context():
+        file_a = add_room_file(room_a, owner_id, file_path, 'report.txt', 11, 'file')
+
+    loads = []
+    original_load = acl_module._load_references
+    monkeypatch.setattr(acl_module, '_load_references', lambda paths: loads.append(paths) or original_load(paths))
+
+    hits_before = get_upload_acl_cache_stats()['hits']
+    for _ in range(3):
+        response = owner.get(f'/uploads/{file_path}')
+        assert response.status_code == 200
+        assert 'report.txt' in response.headers['Content-Disposition']
+    assert len(loads) == 1
+    assert get_upload_acl_cache_stats()['hits'] - hits_before == 2
+
+    # 캐시된 참조에 없는 방의 멤버는 거부되고, 새 참조가 생기면 바로 허용된다.
+    assert guest.get(f'/uploads/{file_path}').status_code == 403
+    with app.app_context():
+        file_b = add_room_file(room_b, owner_id, file_path, 'copy.txt', 11, 'file')
+    response = guest.get(f'/uploads/{file_path}')
+    assert response.status_code == 200
+    assert 'copy.txt' in response.headers['Content-Disposition']
+
+    with app.app_context():
+        assert delete_room_file(file_b, owner_id, room_id=room_b)[0] is True
+    # 중복 제거 없이 공유된 경로라 삭제 시 파일도 지워지므로 다시 만들어 권한만 확인한다.
+    with open(os.path.join(config.UPLOAD_FOLDER, file_path), 'wb') as handle:
+        handle.write(b'shared body')
+    assert guest.get(f'/uploads/{file_path}').status_code == 403
+    assert owner.get(f'/uploads/{file_path}').status_code == 200
+
+    with app.app_context():
+        assert delete_room_file(file_a, owner_id, room_id=room_a)[0] is True
+    assert owner.get(f'/uploads/{file_path}').status_code == 404
+
+
+def test_upload_acl_cache_drops_stale_load_after_invalidation():
+    from app.models.upload_acl_cache import UploadAclCache
+
+    cache = UploadAclCache(2)
+    generation = cache.generation()
+    cache.invalidate('ab/cd/file.txt')
+    cache.store('ab/cd/file.txt', ((1, 'file.txt'),), generation)
+    assert cache.get('ab/cd/file.txt') is None
+
+    generation = cache.generation()
+    for name in ('a.txt', 'b.txt', 'c.txt'):
+        cache.store(name, ((1, name),), generation)
+    assert cache.get('a.txt') is None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_member_of_older_room_is_allowed_past_reference_cap(app, monkeypatch):
+    import config
+    import app.models.upload_acl_cache as acl_module
+    from app.models import add_room_file
+
+    monkeypatch.setattr(acl_module, '_MAX_REFERENCES', 2)
+    owner = app.test_client()
+    guest = app.test_client()
+    outsider = app.test_client()
+    for name in ('cap_owner', 'cap_peer', 'cap_guest', 'cap_outsider'):
+        _register(owner, name)
+    assert _login(owner, 'cap_owner').status_code == 200
+    assert _login(guest, 'cap_guest').status_code == 200
+    assert _login(outsider, 'cap_outsider').status_code == 200
+    owner_id = owner.get('/api/me').json['user']['id']
+    users = {u['username']: u['id'] for u in owner.get('/api/users').json}
+    old_room = int(owner.post('/api/rooms', json={'members': [users['cap_guest']]}).json['room_id'])
+    newer_rooms = [
+        int(owner.post('/api/rooms', json={'members': [users['cap_peer']], 'name': f'cap{index}'}).json['room_id'])
+        for index in range(2)
+    ]
+
+    file_path = 'capped_shared.txt'
+    with open(os.path.join(config.UPLOAD_FOLDER, file_path), 'wb') as handle:
+        handle.write(b'shared body')
+    with app.app_context():
+        # 가장 오래된 참조만 guest의 방에 있다.
+        add_room_file(old_room, owner_id, file_path, 'old.txt', 11, 'file')
+        for room_id in newer_rooms:
+            add_room_file(room_id, owner_id, file_path, 'new.txt', 11, 'file')
+
+    assert owner.get(f'/uploads/{file_path}').status_code == 200
+    response = guest.get(f'/uploads/{file_path}')
+    assert response.status_code == 200
+    assert 'old.txt' in response.headers['Content-Disposition']
+    assert outsider.get(f'/uploads/{file_path}').status_code == 403
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sqlite3
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _upload(client, room_id: int, body: bytes, name: str):
+    response = client.post(
+        '/api/upload',
+        data={'room_id': str(room_id), 'file': (io.BytesIO(body), name)},
+        content_type='multipart/form-data',
+    )
+    assert response.status_code == 200
+    return response.json['file_path']
+
+
+def test_identical_uploads_share_one_blob_until_last_reference(client, monkeypatch):
+    import config
+    import app.http.uploads as uploads_module
+    from app.models import add_room_file, delete_room_file, get_dedup_stats
+
+    monkeypatch.setattr(uploads_module, 'UPLOAD_DEDUP_ENABLED', True)
+    for name in ('dedup_u1', 'dedup_u2', 'dedup_u3'):
+        _register(client, name)
+    assert _login(client, 'dedup_u1').status_code == 200
+    me = client.get('/api/me').json['user']
+    users = {u['username']: u['id'] for u in client.get('/api/users').json}
+    room_a = int(client.post('/api/rooms', json={'members': [users['dedup_u2']]}).json['room_id'])
+    room_b = int(client.post('/api/rooms', json={'members': [users['dedup_u3']]}).json['room_id'])
+
+    body = b'same attachment body' * 100
+    path_a = _upload(client, room_a, body, 'report.txt')
+    path_b = _upload(client, room_b, body, 'copy.txt')
+    assert path_a == path_b
+    full_path = os.path.join(config.UPLOAD_FOLDER, path_a)
+    assert os.path.isfile(full_path)
+
+    with client.application.app_context():
+        file_a = add_room_file(room_a, me['id'], path_a, 'report.txt', len(body), 'file')
+        file_b = add_room_file(room_b, me['id'], path_b, 'copy.txt', len(body), 'file')
+        stats = get_dedup_stats()
+    assert stats['blobs'] == 1
+    assert stats['bytes_saved'] == len(body)
+    assert stats['dedup_ratio'] == 2.0
+
+    # 각 방의 멤버는 자기 방의 기록으로 내려받는다.
+    client.post('/api/logout')
+    assert _login(client, 'dedup_u3').status_code == 200
+    downloaded = client.get(f'/uploads/{path_b}')
+    assert downloaded.status_code == 200
+    assert downloaded.data == body
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        conn.execute('UPDATE upload_tokens SET consumed_at = CURRENT_TIMESTAMP')
+        conn.execute('UPDATE file_blobs SET held_until = NULL')
+        conn.commit()
+
+        with client.application.app_context():
+            assert delete_room_file(file_a, me['id'], room_id=room_a)[0] is True
+        assert os.path.isfile(full_path)
+        assert conn.execute('SELECT refcount FROM file_blobs WHERE file_path = ?', (path_a,)).fetchone()[0] == 1
+
+        with client.application.app_context():
+            assert delete_room_file(file_b, me['id'], room_id=room_b)[0] is True
+        assert not os.path.exists(full_path)
+        assert conn.execute('SELECT COUNT(*) FROM file_blobs').fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_adopted_blob_is_held_against_concurrent_release(client, monkeypatch):
+    import config
+    import app.http.uploads as uploads_module
+    from app.models import release_upload_file
+
+    monkeypatch.setattr(uploads_module, 'UPLOAD_DEDUP_ENABLED', True)
+    _register(client, 'hold_u1')
+    _register(client, 'hold_u2')
+    assert _login(client, 'hold_u1').status_code == 200
+    users = {u['username']: u['id'] for u in client.get('/api/users').json}
+    room_id = int(client.post('/api/rooms', json={'members': [users['hold_u2']]}).json['room_id'])
+
+    body = b'held blob body' * 100
+    path = _upload(client, room_id, body, 'held.txt')
+    full_path = os.path.join(config.UPLOAD_FOLDER, path)
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        # 토큰이 소비된 뒤에도 재사용 직후의 보류가 남아 있으면 지우지 않는다.
+        conn.execute('UPDATE upload_tokens SET consumed_at = CURRENT_TIMESTAMP')
+        conn.commit()
+        assert _upload(client, room_id, body, 'again.txt') == path
+        conn.execute('UPDATE upload_tokens SET consumed_at = CURRENT_TIMESTAMP')
+        conn.commit()
+        with client.application.app_context():
+            assert release_upload_file(path) is False
+        assert os.path.isfile(full_path)
+        assert conn.execute('SELECT held_until FROM file_blobs WHERE file_path = ?', (path,)).fetchone()[0]
+
+        # 보류가 끝나면 락 안에서 바로 지운다 (지연 삭제 함수는 쓰지 않는다).
+        conn.execute("UPDATE file_blobs SET held_until = '2000-01-01 00:00:00'")
+        conn.commit()
+        deferred = []
+        with client.application.app_context():
+            assert release_upload_file(path, delete_func=deferred.append) is True
+        assert deferred == []
+        assert not os.path.exists(full_path)
+        assert conn.execute('SELECT COUNT(*) FROM file_blobs').fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_release_keeps_file_when_write_lock_is_unavailable(client, monkeypatch):
+    import config
+    import app.http.uploads as uploads_module
+    from app.models import release_upload_file
+
+    monkeypatch.setattr(uploads_module, 'UPLOAD_DEDUP_ENABLED', True)
+    _register(client, 'lock_u1')
+    _register(client, 'lock_u2')
+    assert _login(client, 'lock_u1').status_code == 200
+    users = {u['username']: u['id'] for u in client.get('/api/users').json}
+    room_id = int(client.post('/api/rooms', json={'members': [users['lock_u2']]}).json['room_id'])
+
+    path = _upload(client, room_id, b'locked blob body' * 100, 'locked.txt')
+    full_path = os.path.join(config.UPLOAD_FOLDER, path)
+
+    with client.application.app_context():
+        from app.models import get_db
+
+        db = get_db()
+        db.execute('UPDATE upload_tokens SET consumed_at = CURRENT_TIMESTAMP')
+        db.execute('UPDATE file_blobs SET held_until = NULL')
+        db.commit()
+        # 이미 열린 트랜잭션 때문에 쓰기 락을 잡지 못하면 확인 없이 지우지 않는다.
+        db.execute('BEGIN')
+        try:
+            assert release_upload_file(path) is False
+        finally:
+            db.rollback()
+    assert os.path.isfile(full_path)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _shared_attachment(client, body: bytes, name: str = 'notes.txt') -> str:
+    from app.models import add_room_file
+
+    _register(client, 'cache_u1')
+    _register(client, 'cache_u2')
+    assert _login(client, 'cache_u1').status_code == 200
+    me = client.get('/api/me').json['user']
+    users = {u['username']: u['id'] for u in client.get('/api/users').json}
+    room_id = int(client.post('/api/rooms', json={'members': [users['cache_u2']]}).json['room_id'])
+    uploaded = client.post(
+        '/api/upload',
+        data={'room_id': str(room_id), 'file': (io.BytesIO(body), name)},
+        content_type='multipart/form-data',
+    )
+    assert uploaded.status_code == 200
+    file_path = uploaded.json['file_path']
+    with client.application.app_context():
+        add_room_file(room_id, me['id'], file_path, name, len(body), 'file')
+    return file_path
+
+
+def test_attachment_download_supports_etag_and_ranges(client):
+    body = b'0123456789abcdef' * 1000
+    file_path = _shared_attachment(client, body)
+
+    full = client.get(f'/uploads/{file_path}', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert full.status_code == 200
+    assert full.data == body
+    assert full.headers['Cache-Control'] == 'private, max-age=3600'
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    assert 'Content-Encoding' not in full.headers
+    etag = full.headers['ETag']
+    assert etag.startswith('"') and not etag.startswith('W/')
+
+    not_modified = client.get(f'/uploads/{file_path}', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+    partial = client.get(f'/uploads/{file_path}', headers={'Range': 'bytes=10-19', 'If-Range': etag})
+    assert partial.status_code == 206
+    assert partial.headers['Content-Range'] == f'bytes 10-19/{len(body)}'
+    assert partial.data == body[10:20]
+
+    stale = client.get(f'/uploads/{file_path}', headers={'Range': 'bytes=10-19', 'If-Range': '"other"'})
+    assert stale.status_code == 200
+    assert stale.data == body
+
+
+def test_attachment_download_can_offload_to_proxy(client, monkeypatch):
+    import app.http.uploads as uploads_module
+
+    monkeypatch.setattr(uploads_module, 'UPLOAD_ACCEL_REDIRECT_PREFIX', '/_protected_uploads/')
+    file_path = _shared_attachment(client, b'offloaded body' * 10)
+
+    response = client.get(f'/uploads/{file_path}')
+    assert response.status_code == 200
+    assert response.headers['X-Accel-Redirect'] == f'/_protected_uploads/{file_path}'
+    assert response.data == b''
+
+    not_modified = client.get(f'/uploads/{file_path}', headers={'If-None-Match': response.headers['ETag']})
+    assert not_modified.status_code == 304
+    assert 'X-Accel-Redirect' not in not_modified.headers
@@ -71,3 +71,46 @@ def test_cleanup_orphan_upload_files_removes_consumed_untracked_file(app, monkey
     removed = upload_tokens.cleanup_orphan_upload_files(grace_seconds=0)
     assert removed >= 1
     assert not consumed.exists()
+
+
+def test_orphan_cleanup_uses_manifest_without_walking_after_reconcile(app, monkeypatch):
+    import app.upload_tokens as upload_tokens
+    from app.models import get_db, register_stored_file
+    from config import UPLOAD_FOLDER
+
+    # 첫 호출은 매니페스트 보정(전체 순회)을 수행한다.
+    upload_tokens.cleanup_orphan_upload_files(grace_seconds=0)
+
+    def _no_walk(*_args, **_kwargs):
+        raise AssertionError('os.walk should not run between reconcile passes')
+
+    monkeypatch.setattr('os.walk', _no_walk)
+
+    orphan = Path(UPLOAD_FOLDER) / 'manifest_orphan.txt'
+    referenced = Path(UPLOAD_FOLDER) / 'manifest_referenced.txt'
+    _touch_old(orphan, seconds_ago=600)
+    _touch_old(referenced, seconds_ago=600)
+    with app.app_context():
+        register_stored_file(orphan.name, created_at='2000-01-01 00:00:00')
+        register_stored_file(referenced.name, created_at='2000-01-01 00:00:00')
+        conn = get_db()
+        user_id = conn.execute(
+            "INSERT INTO users (username, password_hash, nickname) VALUES ('manifest', 'x', 'manifest')"
+        ).lastrowid
+        room_id = conn.execute(
+            "INSERT INTO rooms (name, type, created_by) VALUES ('manifest', 'group', ?)", (user_id,)
+        ).lastrowid
+        conn.execute(
+            'INSERT INTO room_files (room_id, file_path, file_name, uploaded_by) VALUES (?, ?, ?, ?)',
+            (room_id, referenced.name, referenced.name, user_id),
+        )
+        conn.commit()
+
+    assert upload_tokens.cleanup_orphan_upload_files(grace_seconds=0) == 1
+    assert not orphan.exists()
+    assert referenced.exists()
+
+    with app.app_context():
+        rows = dict(get_db().execute('SELECT file_path, settled_at FROM stored_files').fetchall())
+    assert orphan.name not in rows
+    assert rows[referenced.name] is not None
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import sqlite3
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _room_with_file_record(client, prefix: str) -> tuple[int, int]:
+    _register(client, f'{prefix}_u1')
+    _register(client, f'{prefix}_u2')
+    assert _login(client, f'{prefix}_u1').status_code == 200
+    me = client.get('/api/me').json['user']
+    users = client.get('/api/users').json
+    u2 = next(u for u in users if u['username'] == f'{prefix}_u2')
+    created = client.post('/api/rooms', json={'members': [u2['id']]})
+    assert created.status_code == 200
+    return int(created.json['room_id']), int(me['id'])
+
+
+def test_new_uploads_use_sharded_paths(client):
+    from app.upload_storage import sharded_relpath
+    from config import UPLOAD_FOLDER
+
+    room_id, user_id = _room_with_file_record(client, 'shard_new')
+    response = client.post(
+        '/api/upload',
+        data={'room_id': str(room_id), 'file': (io.BytesIO(b'sharded body'), 'note.txt')},
+        content_type='multipart/form-data',
+    )
+    assert response.status_code == 200
+    file_path = response.json['file_path']
+    name = os.path.basename(file_path)
+    assert file_path == sharded_relpath(name)
+    assert os.path.isfile(os.path.join(UPLOAD_FOLDER, file_path))
+
+    from app.models import add_room_file
+
+    with client.application.app_context():
+        add_room_file(room_id, user_id, file_path, 'note.txt', 12, 'file')
+
+    downloaded = client.get(f'/uploads/{file_path}')
+    assert downloaded.status_code == 200
+    assert downloaded.data == b'sharded body'
+
+    # 다른 하위 폴더 이름은 허용하지 않는다.
+    assert client.get(f'/uploads/zz/yy/{name}').status_code == 403
+
+
+def test_legacy_flat_files_migrate_and_resolve_by_either_path(client):
+    import config
+    from app.models import add_room_file
+    from app.upload_storage import migrate_flat_uploads, sharded_relpath
+
+    room_id, user_id = _room_with_file_record(client, 'shard_old')
+    flat_name = '20200101000000_deadbeef_legacy.txt'
+    with open(os.path.join(config.UPLOAD_FOLDER, flat_name), 'wb') as handle:
+        handle.write(b'legacy body')
+    with client.application.app_context():
+        add_room_file(room_id, user_id, flat_name, 'legacy.txt', 11, 'file')
+
+    assert client.get(f'/uploads/{flat_name}').data == b'legacy body'
+
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        conn.execute(
+            "INSERT INTO messages (room_id, sender_id, content, encrypted, message_type, file_path, file_name) "
+            "VALUES (?, ?, 'legacy.txt', 0, 'file', ?, 'legacy.txt')",
+            (room_id, user_id, flat_name),
+        )
+        conn.commit()
+        result = migrate_flat_uploads(conn, config.UPLOAD_FOLDER, batch_size=1)
+        assert result['moved'] == 1
+        # 재실행해도 추가 작업 없음
+        assert migrate_flat_uploads(conn, config.UPLOAD_FOLDER)['moved'] == 0
+
+        sharded = sharded_relpath(flat_name)
+        assert conn.execute('SELECT file_path FROM room_files WHERE room_id = ?', (room_id,)).fetchone()[0] == sharded
+        assert conn.execute(
+            "SELECT file_path FROM messages WHERE room_id = ? AND message_type = 'file'", (room_id,)
+        ).fetchone()[0] == sharded
+    finally:
+        conn.close()
+
+    assert not os.path.exists(os.path.join(config.UPLOAD_FOLDER, flat_name))
+    # 이전 링크(평면 경로)와 새 경로 모두 제공된다.
+    assert client.get(f'/uploads/{flat_name}').data == b'legacy body'
+    assert client.get(f'/uploads/{sharded}').data == b'legacy body'
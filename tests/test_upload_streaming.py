@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import io
+import os
+
+from app.security.upload_scanner import StreamScan
+
+
+def _register(client, username: str, password: str = 'Password123!'):
+    return client.post(
+        '/api/register',
+        json={'username': username, 'password': password, 'nickname': username},
+    )
+
+
+def _login(client, username: str, password: str = 'Password123!'):
+    return client.post('/api/login', json={'username': username, 'password': password})
+
+
+def _incoming_files(upload_folder: str) -> list[str]:
+    incoming = os.path.join(upload_folder, '.incoming')
+    return os.listdir(incoming) if os.path.isdir(incoming) else []
+
+
+class _RecordingScan(StreamScan):
+    def __init__(self, block_marker: bytes = b''):
+        self.chunks: list[int] = []
+        self.block_marker = block_marker
+
+    def feed(self, chunk: bytes) -> tuple[bool, str]:
+        self.chunks.append(len(chunk))
+        if self.block_marker and self.block_marker in chunk:
+            return False, 'blocked'
+        return True, ''
+
+
+def test_streaming_upload_single_pass_hash_and_rename(tmp_path):
+    from app.upload_ingest import StreamingUpload
+
+    body = b'hello world\n' * 20000
+    scan = _RecordingScan()
+    upload = StreamingUpload(str(tmp_path), filename='notes.txt', chunk_size=4096, scanner=scan)
+    try:
+        for start in range(0, len(body), 10000):
+            upload.write(body[start:start + 10000])
+        assert upload.finish() is None
+        target = str(tmp_path / 'ab' / 'notes.txt')
+        os.makedirs(os.path.dirname(target))
+        upload.commit(target)
+    finally:
+        upload.close()
+
+    assert upload.size == len(body)
+    assert upload.sha256 == hashlib.sha256(body).hexdigest()
+    assert sum(scan.chunks) == len(body)
+    with open(target, 'rb') as handle:
+        assert handle.read() == body
+    assert _incoming_files(str(tmp_path)) == []
+
+
+def test_streaming_upload_rejects_without_keeping_data(tmp_path):
+    from app.upload_ingest import StreamingUpload
+
+    mismatch = StreamingUpload(str(tmp_path), filename='photo.png', scanner=_RecordingScan())
+    mismatch.write(b'not a png' * 1000)
+    assert mismatch.finish()[1] == 400
+    mismatch.close()
+
+    too_large = StreamingUpload(str(tmp_path), filename='big.txt', max_size=1000, scanner=_RecordingScan())
+    too_large.write(b'a' * 600)
+    too_large.write(b'a' * 600)
+    assert os.path.getsize(too_large.temp_path) == 0
+    assert too_large.finish()[1] == 413
+    too_large.close()
+
+    scan = _RecordingScan(block_marker=b'EICAR')
+    blocked = StreamingUpload(str(tmp_path), filename='doc.txt', scanner=scan)
+    blocked.write(b'clean text ' * 300)
+    blocked.write(b'EICAR payload')
+    blocked.write(b'trailing data')
+    assert blocked.finish() == ('blocked', 400)
+    # 거부 이후 청크는 스캐너에 전달하지 않는다.
+    assert len(scan.chunks) == 2
+    blocked.close()
+
+    assert _incoming_files(str(tmp_path)) == []
+
+
+def test_upload_route_streams_into_incoming_and_cleans_up(client, monkeypatch):
+    import config
+    import app.upload_ingest as ingest_module
+
+    def _no_second_copy(*args, **kwargs):
+        raise AssertionError('request body should already be streamed into .incoming')
+
+    monkeypatch.setattr(ingest_module, 'ingest_stream', _no_second_copy)
+
+    _register(client, 'stream_u1')
+    _register(client, 'stream_u2')
+    assert _login(client, 'stream_u1').status_code == 200
+    users = client.get('/api/users').json
+    u2 = next(u for u in users if u['username'] == 'stream_u2')
+    room_id = int(client.post('/api/rooms', json={'members': [u2['id']]}).json['room_id'])
+
+    body = b'streamed attachment\n' * 5000
+    ok = client.post(
+        '/api/upload',
+        data={'room_id': str(room_id), 'file': (io.BytesIO(body), 'streamed.txt')},
+        content_type='multipart/form-data',
+    )
+    assert ok.status_code == 200
+    with open(os.path.join(config.UPLOAD_FOLDER, ok.json['file_path']), 'rb') as handle:
+        assert handle.read() == body
+
+    rejected = client.post(
+        '/api/upload',
+        data={'room_id': str(room_id), 'file': (io.BytesIO(b'plain text'), 'fake.png')},
+        content_type='multipart/form-data',
+    )
+    assert rejected.status_code == 400
+    assert rejected.json['error'] == '파일 내용이 확장자와 일치하지 않습니다.'
+    assert _incoming_files(config.UPLOAD_FOLDER) == []
@@ -54,7 +54,7 @@ def test_uploads_room_member_only(app):
     # member can download
     r = c1.get(f"/uploads/{file_path}")
     assert r.status_code == 200
-    assert r.headers.get("Cache-Control") == "private, no-store"
+    assert r.headers.get("Cache-Control") == "private, max-age=3600"
 
     # non-member cannot download
     _login(c2, "usr3")
@@ -75,5 +75,5 @@ def test_uploads_profiles_allowed_for_logged_in(app):
 
     r = c.get(f"/uploads/profiles/{fname}")
     assert r.status_code == 200
-    assert r.headers.get("Cache-Control") == "private, max-age=3600"
+    assert r.headers.get("Cache-Control") == "private, max-age=2592000, immutable"
 